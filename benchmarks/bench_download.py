@@ -0,0 +1,79 @@
+"""
+Benchmark for streaming a large download (eg. a snapshot) to a file.
+
+Compares the 1 KiB iter_content loop that invoke_get_file used with the download engine
+(default 1 MiB chunks, SHA-256 computed while streaming), against a local HTTP server.
+
+e.g.: `PYTHONPATH=. python benchmarks/bench_download.py --size 256`
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from ibmsecurity.appliance import download
+
+
+def make_handler(payload):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            view = memoryview(payload)
+            for i in range(0, len(payload), 1024 * 1024):
+                self.wfile.write(view[i:i + 1024 * 1024])
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def legacy(session, url, filename):
+    r = session.get(url, stream=True)
+    with open(filename, 'wb') as f:
+        for chunk in r.iter_content(chunk_size=1024):
+            if chunk:  # filter out keep-alive new chunks
+                f.write(chunk)
+
+
+def engine(session, url, filename, chunk_size=None):
+    download.download(session, url, filename, chunk_size=chunk_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=256, help="size of the download in MiB")
+    args = parser.parse_args()
+
+    payload = os.urandom(args.size * 1024 * 1024)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(payload))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{httpd.server_address[1]}/snapshot"
+    session = requests.session()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, "snapshot.zip")
+        for name, func in [("legacy", legacy), ("engine", engine),
+                           ("engine 8M", lambda s, u, f: engine(s, u, f, chunk_size=8 * 1024 * 1024))]:
+            start = time.perf_counter()
+            func(session, url, filename)
+            results[name] = time.perf_counter() - start
+            assert os.path.getsize(filename) == len(payload)
+            os.remove(filename)
+            print(f"{name:<10} {results[name]:8.2f} s  {args.size / results[name]:8.1f} MiB/s")
+    print(f"speedup: {results['legacy'] / results['engine']:.1f}x (engine includes SHA-256)")
+    httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
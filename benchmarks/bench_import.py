@@ -0,0 +1,70 @@
+"""
+Benchmark for the startup time of a script using ibmsecurity (eg. testisam_cmd.py).
+
+Compares importing every module of the package up front (the import_submodules walk the test scripts used) with
+the lazy loading of ibmsecurity/lazy.py, where only the modules that are used get imported.
+Each variant runs in a new interpreter with `python -X importtime`, the time reported is the total of the
+import times and the wall time of the interpreter.
+
+e.g.: `PYTHONPATH=. python benchmarks/bench_import.py --runs 5`
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+EAGER = """
+import importlib, pkgutil
+import ibmsecurity
+from ibmsecurity.appliance.isamappliance import ISAMAppliance
+for _, name, _ in pkgutil.walk_packages(ibmsecurity.__path__, "ibmsecurity."):
+    importlib.import_module(name)
+ibmsecurity.isam.web.reverse_proxy.junctions.get_all
+"""
+
+LAZY = """
+import ibmsecurity
+from ibmsecurity.appliance.isamappliance import ISAMAppliance
+ibmsecurity.isam.web.reverse_proxy.junctions.get_all
+"""
+
+REGISTRY = """
+from ibmsecurity import registry
+registry.find("*.junctions.get*")
+registry.resolve("ibmsecurity.isam.web.reverse_proxy.junctions.get_all")
+"""
+
+BASELINE = "pass"
+
+
+def run(code):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                            check=True, env=dict(os.environ, PYTHONPATH=os.getcwd()))
+    wall = time.perf_counter() - start
+    imports = 0
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package, top level imports have no indent
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\S.*)", line)
+        if match and not match.group(2).startswith(" "):
+            imports += int(match.group(1))
+    return imports / 1000, wall * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5, help="runs per variant, the median is reported")
+    args = parser.parse_args()
+
+    for name, code in [("baseline", BASELINE), ("eager", EAGER), ("lazy", LAZY), ("registry", REGISTRY)]:
+        results = [run(code) for _ in range(args.runs)]
+        imports = statistics.median(r[0] for r in results)
+        wall = statistics.median(r[1] for r in results)
+        print(f"{name:<10} imports {imports:8.1f} ms  interpreter {wall:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark for tools.json_compare on documents of about 10k nodes (eg. all junctions of a reverse proxy).
+
+Compares the previous implementation (json_sort, pprint, ndiff, context_diff and a complete HtmlDiff page) with the
+structural diff of utilities/jsondiff.py, for one changed value and for identical documents, and equals_only.
+
+e.g.: `PYTHONPATH=. python benchmarks/bench_jsondiff.py --nodes 10000`
+"""
+import argparse
+import copy
+import difflib
+import pprint
+import random
+import time
+
+from ibmsecurity.utilities import tools
+
+
+def legacy_json_compare(ret_obj1, ret_obj2):
+    data = {'matches': False, 'difference': ''}
+    sorted_json1 = tools.json_sort(ret_obj1['data'])
+    sorted_json2 = tools.json_sort(ret_obj2['data'])
+    if sorted_json1 == sorted_json2:
+        data['matches'] = True
+    else:
+        psj1 = pprint.pformat(sorted_json1)
+        psj2 = pprint.pformat(sorted_json2)
+        data['difference'] = '\n'.join(difflib.ndiff(psj1.split('\n'), psj2.split('\n')))
+        data['context_difference'] = list(difflib.context_diff(psj1.split('\n'), psj2.split('\n')))
+        data['html_difference'] = difflib.HtmlDiff().make_file(psj1.split('\n'), psj2.split('\n'), context=True)
+    return data
+
+
+def junctions(nodes):
+    """
+    Junction definitions with servers, about `nodes` values in total
+    """
+    result = []
+    for i in range(nodes // 20):
+        result.append({
+            'id': f"/junction{i}", 'junction_type': random.choice(["tcp", "ssl"]), 'stateful_junction': "no",
+            'transparent_path_junction': "yes", 'basic_auth_mode': "filter", 'remote_http_header': ["iv-user", "iv-creds"],
+            'servers': [{'server_hostname': f"backend{i}-{j}.example.com", 'server_port': 443, 'virtual_junction_hostname': "",
+                         'server_dn': "", 'query_contents': "", 'case_sensitive_url': "no"} for j in range(2)],
+        })
+    return {'rc': 0, 'data': result}
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, default=10000, help="approximate number of values per document")
+    args = parser.parse_args()
+
+    random.seed(1)
+    first = junctions(args.nodes)
+    changed = copy.deepcopy(first)
+    random.shuffle(changed['data'])
+    changed['data'][len(changed['data']) // 2]['servers'][1]['server_port'] = 8443
+
+    for title, second in [("one change", changed), ("identical", copy.deepcopy(first))]:
+        legacy, legacy_result = timed(legacy_json_compare, first, second)
+        structural, result = timed(tools.json_compare, first, second)
+        equals_only, _ = timed(tools.json_compare, first, second, equals_only=True)
+        assert legacy_result['matches'] == result['data']['matches']
+        print(f"{title:<12} legacy {legacy * 1000:9.1f} ms  structural {structural * 1000:8.1f} ms  "
+              f"equals_only {equals_only * 1000:8.1f} ms  ({len(result['data'].get('changes', []))} changes)")
+
+
+if __name__ == "__main__":
+    main()
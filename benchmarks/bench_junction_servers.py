@@ -0,0 +1,80 @@
+"""
+Benchmark for parsing the junction servers strings of a large reverse proxy instance.
+
+Compares the shared parser in junctions_parser with the nested loops it replaced,
+on a synthetic detailed junction list (default 5000 junctions with 1-4 servers each).
+
+e.g.: `PYTHONPATH=. python benchmarks/bench_junction_servers.py --junctions 5000`
+"""
+import argparse
+import timeit
+
+from ibmsecurity.isam.web.reverse_proxy import junctions_parser
+from ibmsecurity.utilities import tools
+
+
+class FakeAppliance:
+    facts = {'version': '10.0.8.0'}
+
+
+def make_junctions(count):
+    junctions = []
+    for i in range(count):
+        servers = [f"server_hostname!backend{i}-{s}.example.com;server_port!443;server_state!running;"
+                   f"operation_state!Online;server_uuid!{i:08d}-{s:04d};current_requests!0;total_requests!{i * s};"
+                   f"query_content_url!/cgi-bin/query_contents;virtual_junction_hostname!vh{i};"
+                   f"windows_style_url!no;case_insensitive_url!no;http_port!80;local_ip!;server_dn!;"
+                   f"priority!9;server_cn!" for s in range(1 + i % 4)]
+        junctions.append({'junction_point': f"/jct{i}", 'servers': '#'.join(servers)})
+    return junctions
+
+
+def legacy(isamAppliance, junctions):
+    result = []
+    for c in junctions:
+        servers = []
+        if tools.version_compare(isamAppliance.facts["version"], "9.0.1.0") > 0:
+            srv_separator = '#'
+        else:
+            srv_separator = '&'
+        for srv in c['servers'].split(srv_separator):
+            server = {}
+            for s in srv.split(';'):
+                if s != '':
+                    kv = s.split('!')
+                    server[kv[0]] = kv[1]
+            servers.append(server)
+        result.append(servers)
+    return result
+
+
+def shared(isamAppliance, junctions):
+    separator = junctions_parser.server_separator(isamAppliance)
+    return [junctions_parser.parse_servers(c['servers'], separator) for c in junctions]
+
+
+def records(isamAppliance, junctions):
+    separator = junctions_parser.server_separator(isamAppliance)
+    return [junctions_parser.parse_server_records(c['servers'], separator) for c in junctions]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--junctions", type=int, default=5000)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    appliance = FakeAppliance()
+    junctions = make_junctions(args.junctions)
+    assert legacy(appliance, junctions) == shared(appliance, junctions)
+
+    results = {}
+    for name, func in [("legacy", legacy), ("shared", shared), ("records", records)]:
+        results[name] = min(timeit.repeat(lambda: func(appliance, junctions), number=args.number,
+                                          repeat=3)) / args.number
+        print(f"{name:<10} {results[name] * 1000:10.2f} ms for {args.junctions} junctions")
+    print(f"speedup: {results['legacy'] / results['shared']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark of a typical configuration run (junctions, stanzas, commit) against the local LMI emulator.
+
+The emulator adds a fixed latency per request to stand in for a real LMI, the first run makes the changes
+and the second run only checks them (idempotent), both report the time and the number of requests.
+
+e.g.: `PYTHONPATH=. python benchmarks/bench_lmi_workload.py --junctions 50 --latency 0.01`
+"""
+import argparse
+import time
+
+import ibmsecurity.isam.appliance
+from ibmsecurity.appliance.emulator import LMIEmulator
+from ibmsecurity.isam.web.reverse_proxy import junctions
+from ibmsecurity.isam.web.reverse_proxy.configuration import entry
+
+
+def workload(isamAppliance, count):
+    for i in range(count):
+        junctions.add(isamAppliance, "default", f"/app{i}", f"app{i}.example.com", 443, junction_type="ssl")
+    entry.set_stanzas(isamAppliance, "default", {
+        "server": {"worker-threads": "500", "http": "no"},
+        "session": {"timeout": "7200", "inactive-timeout": "600"},
+    })
+    ibmsecurity.isam.appliance.commit(isamAppliance)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--junctions", type=int, default=50, help="number of junctions")
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds added to every request")
+    parser.add_argument("--tls", action="store_true", help="serve HTTPS (needs the openssl command)")
+    args = parser.parse_args()
+
+    with LMIEmulator(latency=args.latency, tls=args.tls) as lmi:
+        isamAppliance = lmi.appliance(lazy_facts=True)
+        for name in ("changes", "no changes"):
+            before = len(lmi.requests)
+            start = time.perf_counter()
+            workload(isamAppliance, args.junctions)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<12} {elapsed:8.2f} s  {len(lmi.requests) - before:6d} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark for utilities/loganalyzer.py on a generated request log.
+
+Compares a line by line parser (readline, split, strptime per record, one dict per record, as analysis scripts
+usually do) with loganalyzer.analyze in one process and with a process pool, and the p95 response time per
+junction on the result.
+
+e.g.: `PYTHONPATH=. python benchmarks/bench_log_analyzer.py --records 2000000`
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from ibmsecurity.utilities import loganalyzer
+
+JUNCTIONS = [f"/app{i}" for i in range(40)]
+
+
+def generate(filename, records):
+    start = 1792300000
+    with open(filename, 'w') as f:
+        for i in range(records):
+            moment = datetime.utcfromtimestamp(start + i * 86400 // records).strftime("%d/%b/%Y:%H:%M:%S +0000")
+            f.write(f'10.0.{i % 250}.{i % 7} - user{i % 1000} [{moment}] "GET {random.choice(JUNCTIONS)}/page/{i % 500}'
+                    f'.html?q={i} HTTP/1.1" {random.choice((200, 200, 200, 302, 404, 500))} {random.randint(0, 50000)}'
+                    f' {random.randint(200, 900000)}\n')
+
+
+def line_by_line(filename):
+    records = []
+    with open(filename, 'r') as f:
+        for line in f:
+            head, _, rest = line.partition(' [')
+            moment, _, rest = rest.partition('] "')
+            request, _, rest = rest.partition('" ')
+            path = request.split(' ')[1]
+            status, size, duration = rest.split()[:3]
+            records.append({'time': int(datetime.strptime(moment, "%d/%b/%Y:%H:%M:%S %z").timestamp()),
+                            'junction': '/' + path.split('/')[1], 'status': int(status), 'bytes': int(size),
+                            'response_time': int(duration) / 1000})
+    return records
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=500000, help="records of the generated log")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    random.seed(1)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "request.log")
+        generate(filename, args.records)
+        size = os.path.getsize(filename) / 1024 / 1024
+        print(f"{args.records} records, {size:.0f} MB, {args.processes} processes, numpy: "
+              f"{loganalyzer.columnstore.numpy is not None}")
+
+        elapsed, records = timed(line_by_line, filename)
+        print(f"line by line:         {elapsed:7.2f} s  {len(records) / elapsed:10.0f} records/s")
+        del records
+        elapsed, columns = timed(loganalyzer.analyze, filename, processes=1, junctions=JUNCTIONS)
+        print(f"analyze, 1 process:   {elapsed:7.2f} s  {len(columns) / elapsed:10.0f} records/s")
+        elapsed, columns = timed(loganalyzer.analyze, filename, processes=args.processes, chunk_size=8 * 1024 * 1024,
+                                 junctions=JUNCTIONS)
+        print(f"analyze, {args.processes} processes: {elapsed:7.2f} s  {len(columns) / elapsed:10.0f} records/s")
+        elapsed, result = timed(loganalyzer.aggregate, columns, "response_time", "p95", by=["junction"])
+        print(f"p95 per junction:     {elapsed:7.2f} s  ({len(result)} junctions)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark for ISAMAppliance._process_response
+
+Compares the single pass response processing against the previous implementation
+(which decoded and parsed the same body up to four times) on multi-MB junction lists.
+
+e.g.: `python benchmarks/bench_process_response.py --junctions 20000`
+"""
+import argparse
+import json
+import logging
+import timeit
+import tracemalloc
+
+import requests
+
+from ibmsecurity.appliance.isamappliance import ISAMAppliance
+from ibmsecurity.utilities import json_backend
+
+
+def make_response(junctions):
+    data = []
+    for i in range(junctions):
+        data.append({
+            "id": f"/junction{i}",
+            "junction_point": f"/junction{i}",
+            "junction_type": "SSL",
+            "servers": f"server_hostname!backend{i}.example.com;server_port!443;server_state!running;"
+                       f"server_uuid!{i:08d}-0000-0000-0000-000000000000#"
+                       f"server_hostname!backup{i}.example.com;server_port!443;server_state!running",
+            "remote_http_header": "insert - iv_user iv_groups iv_creds",
+            "description": "Synthetic junction " * 4
+        })
+    r = requests.models.Response()
+    r.status_code = 200
+    r.headers['content-type'] = 'application/json; charset=UTF-8'
+    r._content = json.dumps(data).encode('utf-8')
+    r.encoding = 'utf-8'
+    return r
+
+
+def legacy_process_response(return_obj, http_response):
+    """Body handling of _process_response before the single pass rewrite"""
+    try:
+        json_data = json.loads(http_response.text)
+        return_obj['data'] = json_data
+    except ValueError:
+        return_obj['data'] = http_response.content
+        return
+    if http_response.text != "":
+        logging.getLogger(__name__).debug("Text: " + http_response.content.decode("utf-8"))
+    json_data = json.loads(http_response.text)
+    return_obj['data'] = json_data
+    return_obj['data'] = json.loads(http_response.content.decode("utf-8"))
+
+
+def fresh(response):
+    # use a new response object for each call, so nothing is cached between runs
+    r = requests.models.Response()
+    r.status_code = response.status_code
+    r.headers = response.headers
+    r._content = response._content
+    r.encoding = response.encoding
+    return r
+
+
+def measure(name, func, response, number):
+    seconds = min(timeit.repeat(lambda: func(fresh(response)), number=number, repeat=3)) / number
+    tracemalloc.start()
+    func(fresh(response))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:<10} {seconds * 1000:10.2f} ms/call {peak / 1024 / 1024:10.2f} MiB peak")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--junctions", type=int, default=10000)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    appliance = ISAMAppliance.__new__(ISAMAppliance)
+    appliance.logger = logging.getLogger("bench")
+    appliance.debug = True
+
+    response = make_response(args.junctions)
+    print(f"payload: {len(response.content) / 1024 / 1024:.2f} MiB, json backend: {json_backend.backend}")
+
+    legacy = measure("legacy", lambda r: legacy_process_response({}, r), response, args.number)
+    current = measure("current", lambda r: appliance._process_response({}, r, ignore_error=False), response,
+                      args.number)
+    print(f"speedup: {legacy / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark for the memory used by a multipart file upload (eg. a firmware image or snapshot).
+
+Compares requests `files=` (the whole body is built in memory) with the streaming MultipartEncoder,
+uploading to a local HTTP server that discards the body. Peak memory is measured with tracemalloc.
+
+e.g.: `PYTHONPATH=. python benchmarks/bench_upload.py --size 256`
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from ibmsecurity.appliance.multipart import MultipartEncoder
+
+
+class DiscardHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        remaining = int(self.headers['Content-Length'])
+        while remaining:
+            remaining -= len(self.rfile.read(min(remaining, 1024 * 1024)))
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def legacy(session, url, filename):
+    with open(filename, 'rb') as f:
+        session.post(url, data={'comment': 'benchmark'},
+                     files=[('uploadedfile', ('firmware.pkg', f, 'application/octet-stream'))])
+
+
+def streaming(session, url, filename):
+    fileinfo = [{'file_formfield': 'uploadedfile', 'filename': filename, 'mimetype': 'application/octet-stream'}]
+    with MultipartEncoder.from_fileinfo(fileinfo, {'comment': 'benchmark'}) as encoder:
+        session.post(url, data=encoder, headers={'Content-Type': encoder.content_type})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=256, help="size of the uploaded file in MiB")
+    args = parser.parse_args()
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), DiscardHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{httpd.server_address[1]}/firmware"
+    session = requests.session()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, "firmware.pkg")
+        with open(filename, 'wb') as f:
+            for _ in range(args.size):
+                f.write(os.urandom(1024 * 1024))
+        for name, func in [("legacy", legacy), ("streaming", streaming)]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            func(session, url, filename)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name:<10} {elapsed:8.2f} s  peak {peak / 1024 / 1024:8.1f} MiB for a {args.size} MiB file")
+    httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+from ibmsecurity import lazy as _lazy
+
+# Submodules are imported on first attribute access, eg. ibmsecurity.isam.base.ntp.get
+_lazy.install(__import__(__name__))
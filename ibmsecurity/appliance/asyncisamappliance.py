@@ -0,0 +1,593 @@
+"""
+Asyncio variant of ISAMAppliance, built on httpx (optional dependency: pip install httpx).
+
+The invoke_* functions are coroutines returning the same IBMResponse objects as ISAMAppliance, with the same
+requires_modules/requires_version/requires_model gating. Existing module functions (which are synchronous)
+run against the async appliance with run(), eg.:
+
+    async def main():
+        async with AsyncISAMAppliance(hostname="isam1", user=user) as appliance:
+            await appliance.load_facts_async()
+            ret_obj = await appliance.invoke_get("Retrieve junctions", "/wga/reverseproxy/default/junctions")
+            ret_obj = await appliance.run(ibmsecurity.isam.web.reverse_proxy.junctions.get_all, "default")
+
+All the HTTP requests of all the appliances share one event loop, run() only needs a worker thread while the
+(synchronous) module function is waiting for its requests.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import threading
+
+from . import download
+from . import multipart
+from .ibmappliance import IBMAppliance
+from .ibmappliance import IBMError
+from .ibmappliance import IBMFatal
+from .isamappliance import ISAMAppliance
+from .transport import TransportConfig
+from os import environ
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Set for the requests sent by fact discovery, which must not wait for the facts
+_discovering = contextvars.ContextVar('discovering', default=False)
+
+
+async def _as_discovery(coroutine):
+    _discovering.set(True)
+    return await coroutine
+
+
+class AsyncISAMAppliance(ISAMAppliance):
+    """
+    ISAMAppliance with awaitable invoke_* functions.
+
+    Facts are not discovered by the constructor, use `await appliance.load_facts_async()` (invoke_* functions
+    do it on first use).
+
+    :param transport: TransportConfig for connection limits, timeouts and retries (retries are limited to the
+                      idempotent methods of the TransportConfig, on transport errors and its retry_status codes)
+    :param client: httpx.AsyncClient to use instead of creating one (eg. for a custom transport)
+    :param executor: concurrent.futures executor for run(), the default executor of the event loop if None
+    """
+
+    def __init__(self, hostname, user, lmi_port=443, cert=None, verify=None, debug=True, response_cache=None,
+                 fact_cache=None, transport=None, client=None, executor=None):
+        if httpx is None and client is None:
+            raise ImportError("AsyncISAMAppliance requires httpx (pip install httpx)")
+        self.logger = logging.getLogger(__name__)
+        self.debug = debug
+        if self.debug:
+            self.logger.debug('Creating an AsyncISAMAppliance')
+        if isinstance(lmi_port, str):
+            self.lmi_port = int(lmi_port)
+        else:
+            self.lmi_port = lmi_port
+        self.hostname = hostname
+        self.session = None
+        self.transport = transport or TransportConfig()
+        self.executor = executor
+        self._loop = None
+        self._facts_task = None
+        self._request_count_lock = threading.Lock()
+
+        if verify is None:
+            verify = str(environ.get("IBMSECLIB_VERIFY_CONNECTION", False)).lower() in ["true", "yes"]
+        self.verify = verify
+        self.cert = cert
+        self.disable_urllib_warnings = not verify
+
+        if client is None:
+            client = httpx.AsyncClient(
+                auth=(user.username, user.password) if cert is None else None,
+                cert=cert, verify=verify,
+                timeout=httpx.Timeout(self.transport.read_timeout, connect=self.transport.connect_timeout),
+                limits=httpx.Limits(max_connections=self.transport.pool_maxsize,
+                                    max_keepalive_connections=self.transport.pool_maxsize))
+        self.client = client
+        self.client.event_hooks.setdefault('response', []).append(self._count_async_request)
+
+        if response_cache is True:
+            self.enable_response_cache()
+        elif response_cache:
+            self.response_cache = response_cache
+
+        IBMAppliance.__init__(self, hostname, user, lazy_facts=True, fact_cache=fact_cache)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def _count_async_request(self, response):
+        self._count_request(response)
+
+    def _get_loop(self):
+        self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a synchronous module function, eg. ibmsecurity.isam.base.ntp.get, against this appliance.
+
+        The function runs in a worker thread with a synchronous view of the appliance, whose invoke_* calls
+        are sent through the event loop.
+        """
+        loop = self._get_loop()
+        appliance = SyncISAMAppliance(self, loop)
+        return await loop.run_in_executor(self.executor, functools.partial(func, appliance, *args, **kwargs))
+
+    @property
+    def facts(self):
+        # The requests of fact discovery see the facts collected so far, without waiting for the lock
+        if not self._facts_loaded and not _discovering.get():
+            self.load_facts()
+        return self._facts
+
+    @facts.setter
+    def facts(self, facts):
+        self._facts = facts
+        self._facts_loaded = True
+
+    async def load_facts_async(self, refresh=False):
+        """
+        Discover the facts (or take them from the fact cache), see IBMAppliance.load_facts().
+        Concurrent callers share the same discovery.
+        """
+        if self._facts_loaded and not refresh:
+            return self._facts
+        loop = self._get_loop()
+        if self._facts_task is None or self._facts_task.done():
+            self._facts_task = loop.create_task(self._load_facts_in_executor(loop, refresh))
+        await self._facts_task
+        return self._facts
+
+    async def _load_facts_in_executor(self, loop, refresh):
+        await loop.run_in_executor(self.executor, functools.partial(self.load_facts, refresh=refresh))
+
+    def get_facts(self):
+        """
+        Facts are discovered with the synchronous view of the appliance, which can not be used on the event loop
+        """
+        try:
+            asyncio.get_running_loop()
+            on_loop = True
+        except RuntimeError:
+            on_loop = False
+        if on_loop or self._loop is None:
+            raise IBMFatal("Facts not loaded", "Use 'await appliance.load_facts_async()' before using the facts")
+        ISAMAppliance.get_facts(SyncISAMAppliance(self, self._loop, discovery=True))
+
+    async def _ensure_facts(self):
+        if not self._facts_loaded and not _discovering.get():
+            await self.load_facts_async()
+
+    def _pop_session_cookie(self):
+        if not self.transport.keep_session_cookie:
+            for name in ('LtpaToken2', 'JSESSIONID'):
+                self.client.cookies.delete(name)
+
+    async def _send(self, method, uri, retry=True, **kwargs):
+        """
+        Send a request, with the retries of the TransportConfig for idempotent methods
+        """
+        retries = self.transport.retries if retry and method in self.transport.retry_methods else 0
+        attempt = 0
+        while True:
+            try:
+                r = await self.client.request(method, self._url(uri), **kwargs)
+                if r.status_code not in self.transport.retry_status or attempt >= retries:
+                    return r
+                self.logger.debug(f"{method} {uri} returned {r.status_code}, retrying")
+            except httpx.TransportError as e:
+                if attempt >= retries:
+                    raise
+                self.logger.debug(f"{method} {uri} failed ({e}), retrying")
+            await asyncio.sleep(self.transport.backoff_factor * (2 ** attempt))
+            attempt += 1
+
+    async def _gate(self, description, uri, requires_modules, requires_version, requires_model, warnings):
+        self._log_desc(description=description)
+        await self._ensure_facts()
+        self._pop_session_cookie()
+        warnings, return_call = self._process_warnings(uri=uri, requires_modules=requires_modules,
+                                                       requires_version=requires_version,
+                                                       requires_model=requires_model, warnings=warnings)
+        return self.create_return_object(warnings=warnings), return_call
+
+    async def _invoke_request_async(self, method, description, uri, ignore_error, data={}, headers=None,
+                                    requires_modules=None, requires_version=None, warnings=[], requires_model=None):
+        """
+        Async counterpart of ISAMAppliance._invoke_request
+        """
+        return_obj, return_call = await self._gate(description, uri, requires_modules, requires_version,
+                                                   requires_model, warnings)
+        if return_call:
+            return return_obj
+
+        cacheable = method == "GET" and data == {} and headers is None and self.response_cache is not None
+        if cacheable:
+            cached_data = self.response_cache.get("GET", uri)
+            if cached_data is not None:
+                return_obj['data'] = cached_data
+                return return_obj
+        elif method != "GET":
+            self._invalidate_caches(uri)
+
+        if headers is None:
+            headers = {
+                'Accept': 'application/json',
+                'Content-type': 'application/json'
+            }
+        json_data = json.dumps(data)
+        if self.debug: self.logger.debug("Input Data: " + json_data)
+
+        try:
+            if method in ("GET", "DELETE") and data == {}:
+                r = await self._send(method, uri, headers=headers)
+            else:
+                r = await self._send(method, uri, content=json_data, headers=headers)
+
+            if method != "GET":
+                return_obj['changed'] = True  # Anything but GET should result in change
+
+            self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
+            if cacheable and return_obj['rc'] == 0:
+                self.response_cache.put("GET", uri, return_obj['data'])
+
+        except httpx.TransportError as e:
+            self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj, error_message=str(e))
+
+        return return_obj
+
+    async def invoke_get(self, description, uri, ignore_error=False, requires_modules=None, requires_version=None,
+                         warnings=[], requires_model=None):
+        """
+        Send a GET request to the LMI.
+        """
+        self._log_request("GET", uri, description)
+        response = await self._invoke_request_async("GET", description, uri, ignore_error,
+                                                    requires_modules=requires_modules,
+                                                    requires_version=requires_version,
+                                                    requires_model=requires_model, warnings=warnings)
+        self._log_response(response)
+        return response
+
+    async def invoke_get_with_headers(self, description, uri, headers, ignore_error=False, requires_modules=None,
+                                      requires_version=None, warnings=[], requires_model=None):
+        """
+        Send a GET request to the LMI with passed in headers.
+        """
+        self._log_request("GET", uri, description)
+        response = await self._invoke_request_async("GET", description, uri, ignore_error, headers=headers,
+                                                    requires_modules=requires_modules,
+                                                    requires_version=requires_version,
+                                                    requires_model=requires_model, warnings=warnings)
+        self._log_response(response)
+        return response
+
+    async def invoke_put(self, description, uri, data, ignore_error=False, requires_modules=None,
+                         requires_version=None, warnings=[], requires_model=None):
+        """
+        Send a PUT request to the LMI.
+        """
+        self._log_request("PUT", uri, description)
+        return await self._invoke_request_async("PUT", description, uri, ignore_error, data,
+                                                requires_modules=requires_modules, requires_version=requires_version,
+                                                requires_model=requires_model, warnings=warnings)
+
+    async def invoke_post(self, description, uri, data, ignore_error=False, requires_modules=None,
+                          requires_version=None, warnings=[], requires_model=None):
+        """
+        Send a POST request to the LMI.
+        """
+        self._log_request("POST", uri, description)
+        return await self._invoke_request_async("POST", description, uri, ignore_error, data,
+                                                requires_modules=requires_modules, requires_version=requires_version,
+                                                requires_model=requires_model, warnings=warnings)
+
+    async def invoke_delete(self, description, uri, data={}, ignore_error=False, requires_modules=None,
+                            requires_version=None, warnings=[], requires_model=None):
+        """
+        Send a DELETE request to the LMI.
+        """
+        self._log_request("DELETE", uri, description)
+        response = await self._invoke_request_async("DELETE", description, uri, ignore_error, data,
+                                                    requires_modules=requires_modules,
+                                                    requires_version=requires_version,
+                                                    requires_model=requires_model, warnings=warnings)
+        self._log_response(response)
+        return response
+
+    async def invoke_post_snapshot_id(self, description, uri, data, ignore_error=False, requires_modules=None,
+                                      requires_version=None, warnings=[], requires_model=None):
+        """
+        Send a POST request to the LMI.  Snapshot id is part of the uri.
+        """
+        self._log_request("POST", uri, description)
+        return_obj, return_call = await self._gate(description, uri, requires_modules, requires_version,
+                                                   requires_model, warnings)
+        if return_call:
+            return return_obj
+
+        headers = {
+            'Accept': '*/*',
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+        try:
+            r = await self._send("POST", uri, data=data, headers=headers)
+            return_obj['changed'] = False  # POST of snapshot id would not be a change
+            self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
+        except httpx.TransportError as e:
+            self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj, error_message=str(e))
+
+        return return_obj
+
+    async def _invoke_files(self, method, description, uri, encoder, ignore_error, headers, requires_modules,
+                            requires_version, warnings, requires_model):
+        try:
+            return_obj, return_call = await self._gate(description, uri, requires_modules, requires_version,
+                                                       requires_model, warnings)
+            if return_call:
+                return return_obj
+
+            headers['Content-Type'] = encoder.content_type
+            headers['Content-Length'] = str(len(encoder))
+            self._invalidate_caches(uri)
+
+            try:
+                # The file contents are streamed, a failed upload is not retried
+                # httpx takes a plain iterable as a sync stream, pass the async iterator
+                r = await self._send(method, uri, retry=False, content=encoder.__aiter__(), headers=headers)
+                return_obj['changed'] = True  # POST of file would be a change
+                self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
+            except httpx.TransportError as e:
+                self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj,
+                                               error_message=str(e))
+        finally:
+            encoder.close()
+
+        return return_obj
+
+    async def invoke_post_files(self, description, uri, fileinfo, data, ignore_error=False, requires_modules=None,
+                                requires_version=None, warnings=[], json_response=True, data_as_files=False,
+                                requires_model=None, progress=None):
+        """
+        Send multipart/form-data upload file request to the appliance.
+        """
+        if json_response:
+            headers = {'Accept': 'application/json,text/html,application/xhtml+xml,application/xml'}
+        else:
+            headers = {'Accept': 'text/html,application/xhtml+xml,application/xml'}
+        if data_as_files is False:
+            encoder = multipart.MultipartEncoder.from_fileinfo(fileinfo, data, progress=progress)
+        else:
+            encoder = multipart.MultipartEncoder(files=data, progress=progress)
+        return await self._invoke_files("POST", description, uri, encoder, ignore_error, headers,
+                                        requires_modules, requires_version, warnings, requires_model)
+
+    async def invoke_put_files(self, description, uri, fileinfo, data, ignore_error=False, requires_modules=None,
+                               requires_version=None, warnings=[], requires_model=None, progress=None):
+        """
+        Send multipart/form-data upload file request to the appliance.
+        """
+        headers = {'Accept': 'application/json,text/html,application/xhtml+xml,application/xml'}
+        encoder = multipart.MultipartEncoder.from_fileinfo(fileinfo, data, path_leaf=False, progress=progress)
+        return await self._invoke_files("PUT", description, uri, encoder, ignore_error, headers,
+                                        requires_modules, requires_version, warnings, requires_model)
+
+    async def _stream_to_file(self, return_obj, method, uri, filename, ignore_error, headers=None, chunk_size=None,
+                              resume=False, progress=None, **kwargs):
+        """
+        Async counterpart of download.download(), resume is limited to an existing partial file
+        """
+        target = download.PartialDownload(filename, resume=resume and method == "GET", progress=progress)
+        try:
+            target.open()
+            async with self.client.stream(method, self._url(uri), headers=target.request_headers(headers),
+                                          **kwargs) as r:
+                if r.status_code not in (200, 201, 204, 206):
+                    await r.aread()
+                    target.discard()
+                    self.logger.error("  Request failed: ")
+                    self.logger.error("     status code: {0}".format(r.status_code))
+                    if r.text != "":
+                        self.logger.error("     text: " + r.text)
+                    if not ignore_error:
+                        raise IBMError("HTTP Return code: {0}".format(r.status_code), r.text)
+                    return_obj['rc'] = r.status_code
+                    return_obj['data'] = {'msg': 'Unable to extract contents to file!'}
+                    return return_obj
+                target.start(r.status_code, r.headers)
+                async for chunk in r.aiter_bytes(chunk_size or download.DEFAULT_CHUNK_SIZE):
+                    target.write(chunk)
+            result = target.complete()
+            return_obj['rc'] = 0
+            return_obj['data'] = {'msg': 'Contents extracted to file: ' + filename, 'size': result['size'],
+                                  'sha256': result['sha256']}
+
+        except httpx.TransportError as e:
+            self._keep_partial(target)
+            self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj, error_message=str(e))
+
+        except IOError:
+            self._keep_partial(target)
+            if not ignore_error:
+                self.logger.critical("Failed to write to file: " + filename)
+                raise IBMError("HTTP Return code: 999", "Failed to write to file: " + filename)
+            else:
+                if self.debug: self.logger.debug("Failed to write to file: " + filename)
+                return_obj['rc'] = 999
+
+        except BaseException:
+            self._keep_partial(target)
+            raise
+
+        return return_obj
+
+    @staticmethod
+    def _keep_partial(target):
+        """
+        Keep the partial file of an interrupted download only when it can be resumed, like download.download()
+        """
+        target.close()
+        if not target.resume or target.offset == 0:
+            target.discard()
+
+    async def invoke_get_file(self, description, uri, filename, no_headers=False, ignore_error=False,
+                              requires_modules=None, requires_version=None, warnings=[], requires_model=None,
+                              chunk_size=None, resume=False, progress=None):
+        """
+        Invoke a GET request and download the response data to a file
+        """
+        return_obj, return_call = await self._gate(description, uri, requires_modules, requires_version,
+                                                   requires_model, warnings)
+        if return_call:
+            return return_obj
+
+        headers = {} if no_headers is True else {'Accept': 'application/json,application/octet-stream'}
+        return await self._stream_to_file(return_obj, "GET", uri, filename, ignore_error, headers=headers,
+                                          chunk_size=chunk_size, resume=resume, progress=progress)
+
+    async def invoke_request(self, description, method, uri, filename=None, ignore_error=False,
+                             requires_modules=None, requires_version=None, warnings=[], requires_model=None,
+                             **kwargs):
+        """
+        Send a request with any method, the keyword arguments are passed to httpx (requests style `json`, `data`,
+        `headers`, `params` and `stream` are accepted).
+        """
+        return_obj, return_call = await self._gate(description, uri, requires_modules, requires_version,
+                                                   requires_model, warnings)
+        if return_call:
+            return return_obj
+
+        args = {}
+        stream = False
+        for key, value in kwargs.items():
+            if key == 'json' and value != {}:
+                args['content'] = json.dumps(value)
+            elif key == 'data' and isinstance(value, (str, bytes)):
+                args['content'] = value
+            elif key == 'stream':
+                stream = value is True
+            elif key not in ('verify', 'cert'):
+                args[key] = value
+
+        if method.lower() != "get":
+            self._invalidate_caches(uri)
+
+        if stream:
+            if filename is None:
+                return_obj['warnings'].append("filename is missing, for stream=True, filename needs to be non null")
+                return return_obj
+            await self._stream_to_file(return_obj, method.upper(), uri, filename, ignore_error, **args)
+            return_obj['changed'] = method.lower() not in ("get", "post")
+            return return_obj
+
+        try:
+            r = await self._send(method.upper(), uri, **args)
+            return_obj['changed'] = method.lower() != "get"
+            self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
+        except httpx.TransportError as e:
+            self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj, error_message=str(e))
+
+        return return_obj
+
+
+class SyncISAMAppliance(ISAMAppliance):
+    """
+    Synchronous view of an AsyncISAMAppliance, used by AsyncISAMAppliance.run().
+
+    The invoke_* calls are submitted to the event loop of the async appliance and wait for their result,
+    so it must only be used from a thread other than the one running the event loop.
+    The facts, response cache and name index are those of the async appliance.
+    """
+
+    def __init__(self, appliance, loop, discovery=False):
+        self.appliance = appliance
+        self.loop = loop
+        self.discovery = discovery
+        self.logger = appliance.logger
+        self.debug = appliance.debug
+        self.hostname = appliance.hostname
+        self.user = appliance.user
+        self.lmi_port = appliance.lmi_port
+        self.verify = appliance.verify
+        self.cert = appliance.cert
+        self.disable_urllib_warnings = appliance.disable_urllib_warnings
+        self.transport = appliance.transport
+        self.session = None
+
+    @property
+    def facts(self):
+        return self.appliance.facts
+
+    @facts.setter
+    def facts(self, facts):
+        self.appliance.facts = facts
+
+    @property
+    def response_cache(self):
+        return self.appliance.response_cache
+
+    @property
+    def fact_cache(self):
+        return self.appliance.fact_cache
+
+    @property
+    def name_index(self):
+        return self.appliance.name_index
+
+    def load_facts(self, refresh=False):
+        self.appliance.load_facts(refresh=refresh)
+
+    def save_facts(self):
+        self.appliance.save_facts()
+
+    def invalidate_facts(self, in_memory=True):
+        self.appliance.invalidate_facts(in_memory=in_memory)
+
+    def _call(self, coroutine):
+        if self.discovery:
+            coroutine = _as_discovery(coroutine)
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def invoke_get(self, *args, **kwargs):
+        return self._call(self.appliance.invoke_get(*args, **kwargs))
+
+    def invoke_get_with_headers(self, *args, **kwargs):
+        return self._call(self.appliance.invoke_get_with_headers(*args, **kwargs))
+
+    def invoke_put(self, *args, **kwargs):
+        return self._call(self.appliance.invoke_put(*args, **kwargs))
+
+    def invoke_post(self, *args, **kwargs):
+        return self._call(self.appliance.invoke_post(*args, **kwargs))
+
+    def invoke_delete(self, *args, **kwargs):
+        return self._call(self.appliance.invoke_delete(*args, **kwargs))
+
+    def invoke_post_snapshot_id(self, *args, **kwargs):
+        return self._call(self.appliance.invoke_post_snapshot_id(*args, **kwargs))
+
+    def invoke_post_files(self, *args, **kwargs):
+        return self._call(self.appliance.invoke_post_files(*args, **kwargs))
+
+    def invoke_put_files(self, *args, **kwargs):
+        return self._call(self.appliance.invoke_put_files(*args, **kwargs))
+
+    def invoke_get_file(self, *args, **kwargs):
+        return self._call(self.appliance.invoke_get_file(*args, **kwargs))
+
+    def invoke_request(self, *args, **kwargs):
+        return self._call(self.appliance.invoke_request(*args, **kwargs))
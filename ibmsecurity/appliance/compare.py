@@ -0,0 +1,153 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from ibmsecurity.utilities import tools
+
+logger = logging.getLogger(__name__)
+
+# Requests in flight per compare (both appliances together)
+DEFAULT_WORKERS = 8
+
+
+def _per_appliance(func):
+    """
+    One function per appliance, `func` may be a single function or a tuple of two
+    """
+    if isinstance(func, (tuple, list)):
+        return tuple(func)
+    return func, func
+
+
+def _attach_details(item, data):
+    item['details'] = data
+
+
+def _path_tree(paths):
+    tree = {}
+    for path in paths:
+        node = tree
+        segments = path.split('/')
+        for segment in segments[:-1]:
+            node = node.setdefault(segment, {})
+        node[segments[-1]] = None
+    return tree
+
+
+def _strip(data, tree):
+    if isinstance(data, list):
+        for value in data:
+            _strip(value, tree)
+    elif isinstance(data, dict):
+        for key, subtree in tree.items():
+            if key in data:
+                if subtree is None:
+                    del data[key]
+                else:
+                    _strip(data[key], subtree)
+
+
+def strip_paths(data, paths):
+    """
+    Remove the fields at the paths (eg. volatile counters and states like "active_worker_threads" or
+    "servers/current_requests") from the data, in place, in one pass. A list is walked through, the path
+    applies to each of its elements.
+    """
+    _strip(data, _path_tree(paths))
+    return data
+
+
+def collect(isamAppliance1, isamAppliance2, get_all, get=None, attach=_attach_details, volatile=(), normalize=None,
+            max_workers=DEFAULT_WORKERS):
+    """
+    Retrieve the same list from two appliances concurrently, and the details of every item
+
+    The lists of both appliances are retrieved at the same time, the details of their items are retrieved by
+    a pool of max_workers threads as soon as each list is available.
+
+    :param get_all: callable(isamAppliance) returning the return object with the list of items,
+                    or a tuple of two callables (first and second appliance)
+    :param get: callable(isamAppliance, item) returning the return object with the details of an item (or a tuple)
+    :param attach: callable(item, data) storing the details in the item, default item['details'] = data
+    :param volatile: paths of the fields removed from the list and from the details (ids, timestamps,
+                     counters, ...), eg. "servers/current_requests", see strip_paths()
+    :param normalize: callable(item) for other changes to each item, after the volatile fields are removed
+    :return: the two return objects
+    """
+    get_alls = _per_appliance(get_all)
+    gets = _per_appliance(get) if get is not None else (None, None)
+    appliances = (isamAppliance1, isamAppliance2)
+    ret_objs = [None, None]
+    volatile = _path_tree(volatile)
+
+    executor = ThreadPoolExecutor(max_workers=max(2, max_workers), thread_name_prefix="ibmsecurity-compare")
+    try:
+        pending = {executor.submit(get_alls[side], appliances[side]): (side, None) for side in (0, 1)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                side, item = pending.pop(future)
+                # Raises the exception of the request, the other requests are cancelled
+                ret_obj = future.result()
+                _strip(ret_obj['data'], volatile)
+                if item is None:
+                    ret_objs[side] = ret_obj
+                    if gets[side] is not None:
+                        for list_item in ret_obj['data']:
+                            pending[executor.submit(gets[side], appliances[side], list_item)] = (side, list_item)
+                else:
+                    attach(item, ret_obj['data'])
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for ret_obj in ret_objs:
+        if normalize is not None and isinstance(ret_obj['data'], list):
+            for item in ret_obj['data']:
+                normalize(item)
+    return ret_objs[0], ret_objs[1]
+
+
+def compare(isamAppliance1, isamAppliance2, get_all, get=None, attach=_attach_details, volatile=(), normalize=None,
+            deleted_keys=None, max_workers=DEFAULT_WORKERS):
+    """
+    Compare the same list on two appliances, see collect() for the parameters
+
+    :param deleted_keys: reported in the result, defaults to the volatile keys
+    :return: the result of tools.json_compare
+    """
+    ret_obj1, ret_obj2 = collect(isamAppliance1, isamAppliance2, get_all, get=get, attach=attach, volatile=volatile,
+                                 normalize=normalize, max_workers=max_workers)
+    if deleted_keys is None:
+        deleted_keys = sorted(volatile)
+    return tools.json_compare(ret_obj1, ret_obj2, deleted_keys=deleted_keys)
+
+
+def compare_pairs(pairs, func, *args, max_workers=10, **kwargs):
+    """
+    Run a compare function on many pairs of appliances concurrently, eg. for a drift report of all environments
+
+        compare_pairs([(test1, prod1), (test2, prod2)], ibmsecurity.isam.web.reverse_proxy.junctions.compare,
+                      "default")
+
+    :param pairs: list of (isamAppliance1, isamAppliance2)
+    :param func: compare function taking the two appliances as first arguments
+    :return: dict of (hostname1, hostname2) to FleetResult (value is the compare result, or error the exception)
+    """
+    # fleet imports the appliance classes, only needed here
+    from .fleet import FleetResult
+
+    results = {}
+
+    def _call(pair):
+        start = time.monotonic()
+        key = (pair[0].hostname, pair[1].hostname)
+        try:
+            return FleetResult(key, value=func(pair[0], pair[1], *args, **kwargs), elapsed=time.monotonic() - start)
+        except Exception as e:
+            logger.error(f"Compare of {key[0]} and {key[1]} failed: {e}")
+            return FleetResult(key, error=e, elapsed=time.monotonic() - start)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ibmsecurity-compare-pairs") as executor:
+        for result in executor.map(_call, pairs):
+            results[result.hostname] = result
+    return results
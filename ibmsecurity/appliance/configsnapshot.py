@@ -0,0 +1,505 @@
+"""
+Snapshot of the logical configuration of an appliance in a local, content-addressed store.
+
+export() walks a catalog of ibmsecurity getters (junctions, stanzas, policies, mapping rules, certificates,
+federations, ...), calls them in parallel with an optional rate limit, and saves:
+
+    <directory>/objects/ab/cdef....json     one JSON blob per document, named by the SHA-256 of its content,
+                                            so identical documents (across exports and appliances) are stored once
+    <directory>/indexes/<label>.json        the index of one snapshot: the blobs of every collection and detail,
+                                            and the blob of the response of every GET uri
+
+The next export of the same label takes the details of the items whose list entry did not change from the
+previous index, only the details of new and changed items are retrieved (use full=True to retrieve everything).
+When the Resource declares a change marker (a field of the list items that changes whenever the item changes,
+like a modification time) only the marker is compared. Lists of ids or names (junctions, stanzas) do not show
+changes of the details, export them with full=True to be sure to see every change.
+
+Example:
+    store = ConfigStore("/var/lib/ibmsecurity/snapshots")
+    snapshot = export(isamAppliance, store, resources=["web/*", "aac/mapping_rules"])
+    junctions = snapshot.details("web/reverse_proxy/junctions", "default")
+"""
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+
+from ibmsecurity import registry
+from ibmsecurity.appliance.compare import strip_paths
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+# Runtime counters and states of junctions, removed so that unchanged junctions keep the same blob
+JUNCTION_VOLATILE = ('active_worker_threads', 'servers/current_requests', 'servers/operation_state',
+                     'servers/server_state', 'servers/total_requests')
+
+Resource = namedtuple('Resource', ['name', 'getter', 'parent', 'key', 'detail', 'volatile', 'marker'],
+                      defaults=(None, 'id', None, (), None))
+Resource.__doc__ = """
+One collection of the catalog
+
+name: unique name, eg. "web/reverse_proxy/junctions"
+getter: dotted name of the function returning the collection, called as getter(isamAppliance, *scope)
+parent: name of the resource the collection belongs to, the getter is called once per item of the parent
+        with the key of the item appended to the scope (eg. the junctions of each reverse proxy)
+key: field identifying the items of the list, None if the items are the keys (eg. a list of stanza names)
+detail: dotted name of the function returning one item, called as detail(isamAppliance, *scope, key)
+volatile: paths of the fields removed before the documents are stored (see compare.strip_paths)
+marker: field of the list items that changes with the item (eg. a modification time), compared instead of the
+        whole list entry to tell whether the details of the previous export can be reused
+"""
+
+CATALOG = (
+    Resource("base/date_time", "ibmsecurity.isam.base.date_time.get"),
+    Resource("base/network/interfaces", "ibmsecurity.isam.base.network.interfaces.get_all"),
+    Resource("base/ssl_certificates", "ibmsecurity.isam.base.ssl_certificates.certificate_databases.get_all"),
+    Resource("base/ssl_certificates/personal", "ibmsecurity.isam.base.ssl_certificates.personal_certificate.get_all",
+             parent="base/ssl_certificates"),
+    Resource("base/ssl_certificates/signer", "ibmsecurity.isam.base.ssl_certificates.signer_certificate.get_all",
+             parent="base/ssl_certificates"),
+    Resource("web/reverse_proxy", "ibmsecurity.isam.web.reverse_proxy.instance.get"),
+    Resource("web/reverse_proxy/junctions", "ibmsecurity.isam.web.reverse_proxy.junctions.get_all",
+             parent="web/reverse_proxy", detail="ibmsecurity.isam.web.reverse_proxy.junctions.get",
+             volatile=JUNCTION_VOLATILE),
+    Resource("web/reverse_proxy/stanzas", "ibmsecurity.isam.web.reverse_proxy.configuration.stanza.get",
+             parent="web/reverse_proxy", key=None,
+             detail="ibmsecurity.isam.web.reverse_proxy.configuration.entry.get_all"),
+    Resource("aac/access_control/policies", "ibmsecurity.isam.aac.access_control.policies.get_all"),
+    Resource("aac/access_control/policy_sets", "ibmsecurity.isam.aac.access_control.policy_sets.get_all"),
+    Resource("aac/api_protection/definitions", "ibmsecurity.isam.aac.api_protection.definitions.get_all",
+             detail="ibmsecurity.isam.aac.api_protection.definitions._get"),
+    Resource("aac/api_protection/clients", "ibmsecurity.isam.aac.api_protection.clients.get_all"),
+    Resource("aac/authentication/mechanisms", "ibmsecurity.isam.aac.authentication.mechanisms.get_all"),
+    Resource("aac/authentication/policies", "ibmsecurity.isam.aac.authentication.policies.get_all",
+             detail="ibmsecurity.isam.aac.authentication.policies._get", marker="lastmodified"),
+    Resource("aac/mapping_rules", "ibmsecurity.isam.aac.mapping_rules.get_all",
+             detail="ibmsecurity.isam.aac.mapping_rules._get"),
+    Resource("aac/server_connections/ldap", "ibmsecurity.isam.aac.server_connections.ldap.get_all"),
+    Resource("aac/server_connections/jdbc", "ibmsecurity.isam.aac.server_connections.jdbc.get_all"),
+    Resource("aac/server_connections/ws", "ibmsecurity.isam.aac.server_connections.ws.get_all"),
+    Resource("aac/server_connections/isamruntime", "ibmsecurity.isam.aac.server_connections.isamruntime.get_all"),
+    Resource("fed/federations", "ibmsecurity.isam.fed.federations.get_all",
+             detail="ibmsecurity.isam.fed.federations._get"),
+)
+
+
+def _collection_key(name, scope):
+    return "|".join((name,) + tuple(scope))
+
+
+def _item_key(resource, item):
+    if resource.key is None:
+        return item
+    if isinstance(item, dict):
+        return item.get(resource.key)
+    return None
+
+
+def _unchanged(resource, item, old_item):
+    """
+    Whether a list entry is the same as in the previous export, by its change marker when both have one
+    """
+    if resource.marker is not None and isinstance(item, dict) and isinstance(old_item, dict) and \
+            item.get(resource.marker) is not None and old_item.get(resource.marker) is not None:
+        return item[resource.marker] == old_item[resource.marker]
+    return item == old_item
+
+
+def _select(catalog, patterns):
+    """
+    The resources matching one of the shell style patterns, with the resources they belong to
+    """
+    if patterns is None:
+        return list(catalog)
+    by_name = {resource.name: resource for resource in catalog}
+    names = set()
+    for resource in catalog:
+        if any(fnmatch.fnmatchcase(resource.name, pattern) for pattern in patterns):
+            while resource is not None and resource.name not in names:
+                names.add(resource.name)
+                resource = by_name.get(resource.parent)
+    return [resource for resource in catalog if resource.name in names]
+
+
+class RateLimiter:
+    """
+    Token bucket allowing `rate` calls per second on average, and bursts of `burst` calls
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+class ConfigStore:
+    """
+    Directory of content-addressed JSON blobs and snapshot indexes
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _blob_filename(self, sha256):
+        return os.path.join(self.directory, "objects", sha256[:2], sha256[2:] + ".json")
+
+    def _index_filename(self, label):
+        return os.path.join(self.directory, "indexes", re.sub(r'[^A-Za-z0-9._-]', '_', str(label)) + ".json")
+
+    @staticmethod
+    def _write(filename, content):
+        """
+        Write the file atomically, readers never see a partial file
+        """
+        directory = os.path.dirname(filename)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmpname, filename)
+        except BaseException:
+            os.remove(tmpname)
+            raise
+
+    def put(self, data):
+        """
+        Store a JSON document, returns its SHA-256 (the blob is only written if it does not exist yet)
+        """
+        content = json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        sha256 = hashlib.sha256(content).hexdigest()
+        filename = self._blob_filename(sha256)
+        if not os.path.exists(filename):
+            self._write(filename, content)
+        return sha256
+
+    def get(self, sha256):
+        with open(self._blob_filename(sha256), 'rb') as f:
+            return json.loads(f.read())
+
+    def save(self, label, index):
+        self._write(self._index_filename(label), json.dumps(index, indent=1, sort_keys=True).encode('utf-8'))
+
+    def load(self, label):
+        """
+        The ConfigSnapshot saved with the label, None if there is none
+        """
+        try:
+            with open(self._index_filename(label), 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get('version') != INDEX_VERSION:
+            logger.warning(f"Ignoring snapshot {label} with index version {index.get('version')}")
+            return None
+        return ConfigSnapshot(self, index)
+
+    def labels(self):
+        try:
+            return sorted(name[:-len(".json")] for name in os.listdir(os.path.join(self.directory, "indexes"))
+                          if name.endswith(".json"))
+        except OSError:
+            return []
+
+    def prune(self):
+        """
+        Remove the blobs not used by any snapshot, returns the number of blobs removed
+        """
+        used = set()
+        for label in self.labels():
+            snapshot = self.load(label)
+            if snapshot is not None:
+                used.update(snapshot.blobs())
+        removed = 0
+        for root, _, files in os.walk(os.path.join(self.directory, "objects")):
+            for name in files:
+                if name.endswith(".json") and os.path.basename(root) + name[:-len(".json")] not in used:
+                    os.remove(os.path.join(root, name))
+                    removed += 1
+        return removed
+
+
+class ConfigSnapshot:
+    """
+    The configuration of one appliance as saved by export(), documents are read from the store when used
+    """
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def hostname(self):
+        return self.index['hostname']
+
+    @property
+    def exported(self):
+        return self.index['exported']
+
+    @property
+    def facts(self):
+        """
+        The facts of the appliance (version, model, activations, ...) at the time of the export
+        """
+        return self.index.get('facts', {})
+
+    @property
+    def errors(self):
+        """
+        {collection: error message} of the getters that failed
+        """
+        return self.index['errors']
+
+    def collections(self, name=None):
+        """
+        (name, scope) of all collections, or of the collections of one resource
+        """
+        return [(entry['resource'], tuple(entry['scope'])) for entry in self.index['collections'].values()
+                if name is None or entry['resource'] == name]
+
+    def _entry(self, name, scope):
+        return self.index['collections'].get(_collection_key(name, scope))
+
+    def get(self, name, *scope):
+        """
+        The data of a collection, eg. get("web/reverse_proxy/junctions", "default"), None if not in the snapshot
+        """
+        entry = self._entry(name, scope)
+        if entry is None or entry.get('list') is None:
+            return None
+        return self.store.get(entry['list'])
+
+    def details(self, name, *scope):
+        """
+        {key: data} of the items of a collection retrieved with the detail getter
+        """
+        entry = self._entry(name, scope)
+        if entry is None:
+            return {}
+        return {key: self.store.get(sha256) for key, sha256 in entry['items'].items()}
+
+    @property
+    def uris(self):
+        return sorted(self.index['responses'])
+
+    def response(self, uri):
+        """
+        The data returned by the appliance for a GET of the uri, None if the uri was not retrieved
+        """
+        sha256 = self.index['responses'].get(uri)
+        if sha256 is None:
+            return None
+        return self.store.get(sha256)
+
+    def blobs(self):
+        used = set(self.index['responses'].values())
+        for entry in self.index['collections'].values():
+            if entry.get('list') is not None:
+                used.add(entry['list'])
+            used.update(entry['items'].values())
+        return used
+
+
+class _Recorder:
+    """
+    Takes the place of the response cache of the appliance during an export, to record the data of every
+    successful GET for the task running in the current thread. An existing response cache keeps working.
+    """
+
+    def __init__(self, store, inner=None):
+        self.store = store
+        self.inner = inner
+        self._local = threading.local()
+
+    def start(self):
+        self._local.responses = {}
+
+    def stop(self):
+        responses = getattr(self._local, 'responses', {})
+        self._local.responses = None
+        return responses
+
+    def _record(self, uri, data):
+        responses = getattr(self._local, 'responses', None)
+        if responses is not None:
+            responses[uri] = self.store.put(data)
+
+    def get(self, method, uri):
+        if self.inner is None:
+            return None
+        data = self.inner.get(method, uri)
+        if data is not None:
+            self._record(uri, data)
+        return data
+
+    def put(self, method, uri, data):
+        self._record(uri, data)
+        if self.inner is not None:
+            self.inner.put(method, uri, data)
+
+    def invalidate(self, uri=None):
+        if self.inner is not None:
+            self.inner.invalidate(uri)
+
+
+def export(isamAppliance, store, catalog=None, resources=None, label=None, full=False, max_workers=8, rate=None):
+    """
+    Retrieve the configuration of the appliance and save it in the store
+
+    :param catalog: Resources to retrieve, defaults to CATALOG
+    :param resources: shell style patterns of resource names to export (eg. ["web/*"]), default all of the catalog
+    :param label: name of the snapshot in the store, defaults to the hostname of the appliance
+    :param full: retrieve the details of all items, also the ones with an unchanged list entry
+    :param max_workers: number of getters running at the same time
+    :param rate: maximum number of getters started per second, no limit by default
+    :return: the ConfigSnapshot
+    """
+    if label is None:
+        label = isamAppliance.hostname
+    selected = _select(CATALOG if catalog is None else catalog, resources)
+    children = {}
+    for resource in selected:
+        children.setdefault(resource.parent, []).append(resource)
+    functions = {}
+    for resource in selected:
+        for name in (resource.getter, resource.detail):
+            if name is not None and name not in functions:
+                functions[name] = registry.resolve(name)
+
+    previous = None if full else store.load(label)
+    previous_collections = previous.index['collections'] if previous is not None else {}
+    limiter = RateLimiter(rate) if rate else None
+    collections = {}
+    errors = {}
+
+    recorder = None
+    if hasattr(isamAppliance, 'response_cache'):
+        recorder = _Recorder(store, isamAppliance.response_cache)
+        isamAppliance.response_cache = recorder
+
+    def _call(function, *args):
+        if limiter is not None:
+            limiter.acquire()
+        if recorder is not None:
+            recorder.start()
+        try:
+            ret_obj = function(isamAppliance, *args)
+        finally:
+            responses = recorder.stop() if recorder is not None else {}
+        return ret_obj, responses
+
+    start = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ibmsecurity-snapshot")
+    try:
+        pending = {}
+
+        def _submit_collection(resource, scope):
+            future = executor.submit(_call, functions[resource.getter], *scope)
+            pending[future] = (resource, scope, None)
+
+        for resource in children.get(None, []):
+            _submit_collection(resource, ())
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                resource, scope, item_key = pending.pop(future)
+                key = _collection_key(resource.name, scope)
+                try:
+                    ret_obj, responses = future.result()
+                except Exception as e:
+                    failed = key if item_key is None else f"{key}|{item_key}"
+                    logger.warning(f"Unable to retrieve {failed} from {isamAppliance.hostname}: {e}")
+                    errors[failed] = str(e)
+                    continue
+                data = ret_obj.get('data')
+                if resource.volatile:
+                    strip_paths(data, resource.volatile)
+
+                if item_key is not None:
+                    entry = collections[key]
+                    entry['items'][str(item_key)] = store.put(data)
+                    entry['item_responses'][str(item_key)] = responses
+                    entry['responses'].update(responses)
+                    continue
+
+                entry = {'resource': resource.name, 'scope': list(scope), 'list': store.put(data), 'items': {},
+                         'item_responses': {}, 'responses': responses, 'warnings': ret_obj.get('warnings', [])}
+                collections[key] = entry
+                items = data if isinstance(data, list) else []
+                if resource.detail is not None:
+                    old = previous_collections.get(key)
+                    old_items = {}
+                    if old is not None:
+                        old_list = store.get(old['list'])
+                        for old_item in old_list if isinstance(old_list, list) else []:
+                            old_items[str(_item_key(resource, old_item))] = old_item
+                    for item in items:
+                        item_key = _item_key(resource, item)
+                        if item_key is None:
+                            continue
+                        name = str(item_key)
+                        if name in old_items and name in old['items'] and \
+                                f"{key}|{name}" not in previous.errors and _unchanged(resource, item, old_items[name]):
+                            # The list entry did not change, keep the details of the previous export
+                            entry['items'][name] = old['items'][name]
+                            item_responses = old.get('item_responses', {}).get(name, {})
+                            entry['item_responses'][name] = item_responses
+                            entry['responses'].update(item_responses)
+                        else:
+                            future = executor.submit(_call, functions[resource.detail], *scope, item_key)
+                            pending[future] = (resource, scope, item_key)
+                for child in children.get(resource.name, []):
+                    for item in items:
+                        item_key = _item_key(resource, item)
+                        if item_key is not None:
+                            _submit_collection(child, scope + (str(item_key),))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if recorder is not None:
+            isamAppliance.response_cache = recorder.inner
+
+    responses = {}
+    for entry in collections.values():
+        responses.update(entry['responses'])
+    # version_info is derived from the version when the facts are restored
+    facts = {name: value for name, value in (getattr(isamAppliance, 'facts', None) or {}).items()
+             if name != 'version_info'}
+    index = {
+        'version': INDEX_VERSION,
+        'hostname': isamAppliance.hostname,
+        'facts': facts,
+        'exported': datetime.now(timezone.utc).isoformat(),
+        'collections': collections,
+        'responses': responses,
+        'errors': errors,
+    }
+    store.save(label, index)
+    logger.info(f"Exported {len(collections)} collections and {len(responses)} responses of "
+                f"{isamAppliance.hostname} in {time.monotonic() - start:.1f}s")
+    return ConfigSnapshot(store, index)
@@ -0,0 +1,188 @@
+"""
+Download engine for large files (snapshots, support files, log exports).
+
+The response is streamed in large chunks into `<filename>.part`, with the SHA-256 computed on the fly, and renamed
+to the filename once complete, so a partial download never looks like a complete file.
+With resume=True an existing `.part` file is continued with an HTTP Range request, and a transfer interrupted by
+a connection error is continued where it stopped.
+"""
+import hashlib
+import logging
+import os
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Default chunk size, the environment variable IBMSECLIB_DOWNLOAD_CHUNK_SIZE overrides it (in bytes)
+DEFAULT_CHUNK_SIZE = int(os.environ.get("IBMSECLIB_DOWNLOAD_CHUNK_SIZE", 1024 * 1024))
+
+# Errors of an interrupted transfer, which can be resumed
+_INTERRUPTED_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                       requests.exceptions.Timeout)
+
+
+class PartialDownload:
+    """
+    Target file of a download, independent of the HTTP client.
+
+    :param filename: final name of the file
+    :param resume: continue an existing `<filename>.part` file
+    :param progress: callable(bytes_done, bytes_total), bytes_total is None when the size is not known
+    """
+
+    def __init__(self, filename, resume=False, progress=None):
+        self.filename = filename
+        self.partname = filename + ".part"
+        self.resume = resume
+        self.progress = progress
+        self.offset = 0
+        self.total = None
+        self.resumed = False
+        self._sha256 = hashlib.sha256()
+        self._file = None
+
+    def open(self):
+        if self.resume and os.path.exists(self.partname):
+            # Hash what is already there, the digest covers the complete file
+            with open(self.partname, 'rb') as f:
+                for chunk in iter(lambda: f.read(DEFAULT_CHUNK_SIZE), b''):
+                    self._sha256.update(chunk)
+                    self.offset += len(chunk)
+            self._file = open(self.partname, 'ab')
+            if self.offset:
+                logger.info(f"Resuming download of {self.filename} at {self.offset} bytes")
+        else:
+            self._file = open(self.partname, 'wb')
+        return self
+
+    def request_headers(self, headers=None):
+        """
+        Headers for the next request, with a Range header when continuing a partial file
+        """
+        headers = dict(headers or {})
+        if self.offset:
+            headers['Range'] = f"bytes={self.offset}-"
+        return headers
+
+    def start(self, status_code, headers):
+        """
+        Process the status and headers of a response, before writing its content
+        """
+        length = headers.get('content-length', None)
+        length = int(length) if length is not None and length.isdigit() else None
+        if headers.get('content-encoding', 'identity') != 'identity':
+            # The content is decoded while streaming, the length is not the size of the file
+            length = None
+        if status_code == 206 and self.offset:
+            self.resumed = True
+            self.total = self.offset + length if length is not None else None
+        else:
+            # Range not supported (or not requested), start over
+            if self.offset:
+                logger.info(f"Range request not honoured, restarting download of {self.filename}")
+                self.restart()
+            self.total = length
+        self._report()
+
+    def restart(self):
+        self._file.seek(0)
+        self._file.truncate()
+        self._sha256 = hashlib.sha256()
+        self.offset = 0
+        self.resumed = False
+
+    def write(self, chunk):
+        if chunk:  # filter out keep-alive new chunks
+            self._file.write(chunk)
+            self._sha256.update(chunk)
+            self.offset += len(chunk)
+            self._report()
+
+    def _report(self):
+        if self.progress is not None:
+            self.progress(self.offset, self.total)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        self.close()
+        if os.path.exists(self.partname):
+            os.remove(self.partname)
+
+    def complete(self):
+        """
+        Rename the partial file to the filename
+        """
+        self.close()
+        os.replace(self.partname, self.filename)
+        return self.result()
+
+    def result(self):
+        return {'size': self.offset, 'sha256': self._sha256.hexdigest(), 'resumed': self.resumed}
+
+
+def _succeeded(status_code):
+    return status_code == 200 or status_code == 204 or status_code == 201 or status_code == 206
+
+
+def download(session, url, filename, method="GET", headers=None, chunk_size=None, resume=False, progress=None,
+             attempts=3, **kwargs):
+    """
+    Stream the response of a request to a file.
+
+    :param session: requests session
+    :param chunk_size: bytes per read, DEFAULT_CHUNK_SIZE (1 MiB) if None
+    :param resume: continue an existing partial file and retry interrupted transfers with a Range request
+    :param progress: callable(bytes_done, bytes_total)
+    :param attempts: number of attempts of an interrupted transfer when resume is True
+    :return: the response and the result ({'size', 'sha256', 'resumed'}), the result is None if the response
+             is an error (the response content is not consumed in that case)
+    """
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    # Only a GET can be repeated with a Range header
+    resume = resume and method.upper() == "GET"
+    target = PartialDownload(filename, resume=resume, progress=progress)
+    target.open()
+    attempt = 1
+    try:
+        while True:
+            r = session.request(method, url, stream=True, headers=target.request_headers(headers), **kwargs)
+            if r.status_code == 416 and target.offset:
+                # The partial file is not part of the current content, start over
+                r.close()
+                target.restart()
+                continue
+            if not _succeeded(r.status_code):
+                target.close()
+                if not resume or target.offset == 0:
+                    target.discard()
+                return r, None
+            try:
+                target.start(r.status_code, r.headers)
+                for chunk in r.iter_content(chunk_size=chunk_size):
+                    target.write(chunk)
+            except _INTERRUPTED_ERRORS as e:
+                if not resume or attempt >= attempts:
+                    raise
+                attempt += 1
+                logger.warning(f"Download of {filename} interrupted at {target.offset} bytes ({e}), resuming")
+                continue
+            finally:
+                r.close()
+            if target.total is not None and target.offset < target.total:
+                if not resume or attempt >= attempts:
+                    raise requests.exceptions.ChunkedEncodingError(
+                        f"Download of {filename} incomplete: {target.offset} of {target.total} bytes")
+                attempt += 1
+                continue
+            return r, target.complete()
+    except BaseException:
+        # Keep the partial file for a later resume
+        target.close()
+        if not resume or target.offset == 0:
+            target.discard()
+        raise
@@ -0,0 +1,677 @@
+"""
+In-process stand-in for the LMI of an appliance, to test and benchmark the library without lab hardware.
+
+The emulator serves HTTPS (or HTTP) on a local port with one of three sources of responses:
+- "emulate": a state model of the core endpoints (version, setup_complete, activations, pending changes,
+  snapshots, reverse proxies with their junctions and configuration stanzas, access control policies)
+- "record": requests are forwarded to a real LMI (upstream) and the responses saved in a cassette, without
+  the values of password, secret, token and similar fields
+- "replay": responses are served from a cassette, in the order they were recorded
+
+Latency and errors can be injected in any mode.
+
+Example:
+    with LMIEmulator(latency=0.005) as lmi:
+        lmi.inject(500, path="/wga/reverseproxy/*/junctions", method="POST", count=1)
+        isamAppliance = lmi.appliance()
+        ibmsecurity.isam.web.reverse_proxy.junctions.get_all(isamAppliance, "default")
+
+The self-signed certificate for HTTPS is created with the openssl command, unless certfile/keyfile are given.
+"""
+import copy
+import fnmatch
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote_plus, urlsplit
+
+from ibmsecurity.isam.web.reverse_proxy.junctions_config import server_fields
+from ibmsecurity.isam.web.reverse_proxy.junctions_parser import format_servers, parse_servers
+
+logger = logging.getLogger(__name__)
+
+_certificate = None
+_certificate_lock = threading.Lock()
+
+
+def _self_signed_certificate():
+    """
+    (certfile, keyfile) of a self-signed certificate for localhost, created once per process
+    """
+    global _certificate
+    with _certificate_lock:
+        if _certificate is None:
+            openssl = shutil.which("openssl")
+            if openssl is None:
+                raise RuntimeError("The openssl command is needed to create a certificate, "
+                                   "provide certfile and keyfile or use tls=False")
+            directory = tempfile.mkdtemp(prefix="ibmsecurity-emulator-")
+            certfile = os.path.join(directory, "cert.pem")
+            keyfile = os.path.join(directory, "key.pem")
+            subprocess.run([openssl, "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "2",
+                            "-subj", "/CN=localhost", "-keyout", keyfile, "-out", certfile],
+                           check=True, capture_output=True)
+            _certificate = (certfile, keyfile)
+        return _certificate
+
+
+class LMIError(Exception):
+    """
+    Error response of the state model
+    """
+
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+        self.message = message
+
+
+_routes = []
+
+
+def _route(method, pattern):
+    """
+    Register a method of LMIModel for requests to the uri pattern (a regular expression of the path)
+    """
+    def decorator(func):
+        _routes.append((method, re.compile(pattern + "/?$"), func))
+        return func
+    return decorator
+
+
+# Server fields as they appear in the servers string of a junction
+_server_keys = {name: value.get('alt_name', name) for name, value in server_fields.items()
+                if value['type'] != 'ignore'}
+
+
+class LMIModel:
+    """
+    State of the emulated appliance and the behaviour of its endpoints.
+
+    The state is a plain dict (see to_dict/from_dict) so that tests can set it up and inspect it:
+    version, configured, activations, reverse_proxies ({id: {'junctions': {id: junction}, 'stanzas': {stanza:
+    {key: [values]}}}}), policies ({id: policy}), snapshots and pending_changes.
+    """
+
+    def __init__(self, state=None):
+        self.state = {
+            'version': "10.0.8.0",
+            'model': "Appliance",
+            'configured': True,
+            'activations': [{'id': "wga", 'enabled': "True"}, {'id': "mga", 'enabled': "True"},
+                            {'id': "federation", 'enabled': "True"}],
+            'reverse_proxies': {"default": {'junctions': {}, 'stanzas': {
+                "server": {"server-name": ["default"], "worker-threads": ["300"]},
+                "session": {"timeout": ["3600"]},
+            }}},
+            'policies': {},
+            'snapshots': [],
+            'pending_changes': [],
+        }
+        if state:
+            self.state.update(copy.deepcopy(state))
+        self._lock = threading.RLock()
+        self._next_id = 1
+
+    def to_dict(self):
+        with self._lock:
+            return copy.deepcopy(self.state)
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state)
+
+    def handle(self, method, path, query, body):
+        """
+        (status, data) of a request
+        """
+        for route_method, pattern, func in _routes:
+            if route_method != method:
+                continue
+            match = pattern.match(path)
+            if match is not None:
+                args = [unquote_plus(group) for group in match.groups()]
+                with self._lock:
+                    try:
+                        data = func(self, query, body, *args)
+                    except LMIError as e:
+                        return e.status, {'message': e.message}
+                    if method != "GET" and not path.startswith(("/isam/pending_changes", "/snapshots")):
+                        self.state['pending_changes'].append({'method': method, 'uri': path})
+                return 200, data
+        return 404, {'message': f"{method} {path} is not emulated"}
+
+    def _id(self):
+        self._next_id += 1
+        return str(self._next_id - 1)
+
+    # Appliance
+
+    @_route("GET", r"/core/sys/versions")
+    def _versions(self, query, body):
+        return {'firmware_version': self.state['version'], 'deployment_model': self.state['model'],
+                'product_name': "isva", 'product_description': "IBM Security Verify Access",
+                'firmware_build': "emulator", 'firmware_label': "isva_" + self.state['version']}
+
+    @_route("GET", r"/setup_complete")
+    def _setup_complete(self, query, body):
+        return {'configured': self.state['configured']}
+
+    @_route("PUT", r"/setup_complete")
+    def _set_setup_complete(self, query, body):
+        self.state['configured'] = True
+        return {}
+
+    @_route("GET", r"/isam/capabilities/v1")
+    def _activations(self, query, body):
+        return self.state['activations']
+
+    @_route("GET", r"/isam/capabilities/([^/]+)/v1")
+    def _activation(self, query, body, id):
+        for activation in self.state['activations']:
+            if activation['id'] == id:
+                return activation
+        raise LMIError(404, f"Activation {id} not found")
+
+    @_route("POST", r"/isam/capabilities/v1")
+    def _activate(self, query, body):
+        # The offering is the first part of the activation code, eg. "wga-xxxx"
+        id = body.get('id') or str(body.get('code', '')).split('-')[0]
+        self.state['activations'] = [a for a in self.state['activations'] if a['id'] != id]
+        self.state['activations'].append({'id': id, 'enabled': "True"})
+        return {}
+
+    @_route("DELETE", r"/isam/capabilities/([^/]+)/v1")
+    def _deactivate(self, query, body, id):
+        self.state['activations'] = [a for a in self.state['activations'] if a['id'] != id]
+        return {}
+
+    @_route("GET", r"/isam/pending_changes")
+    def _pending_changes(self, query, body):
+        return {'changes': self.state['pending_changes']}
+
+    @_route("GET", r"/isam/pending_changes/count")
+    def _pending_changes_count(self, query, body):
+        return {'count': len(self.state['pending_changes'])}
+
+    @_route("PUT", r"/isam/pending_changes")
+    def _commit(self, query, body):
+        self.state['pending_changes'] = []
+        return {}
+
+    @_route("DELETE", r"/isam/pending_changes")
+    def _rollback(self, query, body):
+        # Only the list of changes is discarded, the state is not rolled back
+        self.state['pending_changes'] = []
+        return {}
+
+    @_route("GET", r"/snapshots")
+    def _snapshots(self, query, body):
+        return self.state['snapshots']
+
+    @_route("POST", r"/snapshots")
+    def _create_snapshot(self, query, body):
+        for snapshot in self.state['snapshots']:
+            snapshot['index'] += 1
+        self.state['snapshots'].append({
+            'id': uuid.uuid4().hex, 'comment': body.get('comment', ''), 'index': 0,
+            'created_on': datetime.now(timezone.utc).isoformat(), 'created_by': "admin",
+        })
+        return {}
+
+    @_route("PUT", r"/snapshots/([^/]+)")
+    def _modify_snapshot(self, query, body, id):
+        for snapshot in self.state['snapshots']:
+            if snapshot['id'] == id:
+                snapshot['comment'] = body.get('comment', '')
+                return {}
+        raise LMIError(404, f"Snapshot {id} not found")
+
+    @_route("DELETE", r"/snapshots/multi_destroy")
+    def _delete_snapshots(self, query, body):
+        ids = query.get('record_ids', [''])[0].split(',')
+        self.state['snapshots'] = [s for s in self.state['snapshots'] if s['id'] not in ids]
+        return {}
+
+    # Reverse proxies
+
+    def _reverse_proxy(self, id):
+        rp = self.state['reverse_proxies'].get(id)
+        if rp is None:
+            raise LMIError(404, f"Reverse proxy {id} not found")
+        return rp
+
+    @_route("GET", r"/wga/reverseproxy")
+    def _reverse_proxies(self, query, body):
+        return [{'id': id, 'instance_name': id, 'started': "yes", 'enabled': "yes", 'restart': "false"}
+                for id in self.state['reverse_proxies']]
+
+    @_route("GET", r"/wga/reverseproxy/([^/]+)/junctions")
+    def _junctions(self, query, body, rp):
+        junctions = self._reverse_proxy(rp)['junctions']
+        if 'junctions_id' in query:
+            junction = junctions.get(query['junctions_id'][0])
+            if junction is None:
+                raise LMIError(404, f"Junction {query['junctions_id'][0]} not found")
+            return junction
+        if query.get('detailed') == ["true"]:
+            return list(junctions.values())
+        return [{'id': id, 'type': "Virtual" if junction.get('junction_type') == "virtual" else "Standard"}
+                for id, junction in junctions.items()]
+
+    @_route("POST", r"/wga/reverseproxy/([^/]+)/junctions")
+    def _create_junction(self, query, body, rp):
+        junctions = self._reverse_proxy(rp)['junctions']
+        server = {alt_name: str(body[name]) for name, alt_name in _server_keys.items() if body.get(name) is not None}
+        server.update({'server_uuid': str(uuid.uuid4()), 'server_state': "running", 'operation_state': "Online",
+                       'current_requests': "0", 'total_requests': "0"})
+        id = body.get('junction_point')
+        junction = junctions.get(id)
+        if junction is None:
+            junction = {key: str(value) for key, value in body.items()
+                        if key not in _server_keys and key not in ('junction_point', 'force')}
+            junction.update({'id': id, 'active_worker_threads': "0", 'servers': ""})
+            junctions[id] = junction
+            servers = []
+        else:
+            servers = parse_servers(junction['servers'])
+        junction['servers'] = format_servers(servers + [server])
+        return {}
+
+    @_route("DELETE", r"/wga/reverseproxy/([^/]+)/junctions")
+    def _delete_junction(self, query, body, rp):
+        junctions = self._reverse_proxy(rp)['junctions']
+        id = query.get('junctions_id', [''])[0]
+        if junctions.pop(id, None) is None:
+            raise LMIError(404, f"Junction {id} not found")
+        return {}
+
+    def _stanza(self, rp, stanza):
+        stanzas = self._reverse_proxy(rp)['stanzas']
+        if stanza not in stanzas:
+            raise LMIError(404, f"Stanza {stanza} not found")
+        return stanzas[stanza]
+
+    @_route("GET", r"/wga/reverseproxy/([^/]+)/configuration/stanza")
+    def _stanzas(self, query, body, rp):
+        return list(self._reverse_proxy(rp)['stanzas'])
+
+    @_route("POST", r"/wga/reverseproxy/([^/]+)/configuration/stanza/([^/]+)")
+    def _add_stanza(self, query, body, rp, stanza):
+        stanzas = self._reverse_proxy(rp)['stanzas']
+        if stanza in stanzas:
+            raise LMIError(400, f"Stanza {stanza} already exists")
+        stanzas[stanza] = {}
+        return {}
+
+    @_route("DELETE", r"/wga/reverseproxy/([^/]+)/configuration/stanza/([^/]+)")
+    def _delete_stanza(self, query, body, rp, stanza):
+        self._stanza(rp, stanza)
+        del self._reverse_proxy(rp)['stanzas'][stanza]
+        return {}
+
+    @_route("GET", r"/wga/reverseproxy/([^/]+)/configuration/stanza/([^/]+)")
+    def _entries(self, query, body, rp, stanza):
+        return self._stanza(rp, stanza)
+
+    @_route("POST", r"/wga/reverseproxy/([^/]+)/configuration/stanza/([^/]+)/entry_name")
+    def _add_entries(self, query, body, rp, stanza):
+        entries = self._stanza(rp, stanza)
+        for key, value in body.get('entries', []):
+            entries.setdefault(key, []).append(str(value))
+        return {}
+
+    @_route("GET", r"/wga/reverseproxy/([^/]+)/configuration/stanza/([^/]+)/entry_name/([^/]+)")
+    def _entry(self, query, body, rp, stanza, key):
+        entries = self._stanza(rp, stanza)
+        if key not in entries:
+            raise LMIError(404, f"Entry {key} not found")
+        return {key: entries[key]}
+
+    @_route("PUT", r"/wga/reverseproxy/([^/]+)/configuration/stanza/([^/]+)/entry_name/([^/]+)")
+    def _update_entry(self, query, body, rp, stanza, key):
+        self._stanza(rp, stanza)[key] = [str(body.get('value', ''))]
+        return {}
+
+    @_route("DELETE", r"/wga/reverseproxy/([^/]+)/configuration/stanza/([^/]+)/entry_name/([^/]+)")
+    def _delete_entry(self, query, body, rp, stanza, key):
+        if self._stanza(rp, stanza).pop(key, None) is None:
+            raise LMIError(404, f"Entry {key} not found")
+        return {}
+
+    @_route("DELETE", r"/wga/reverseproxy/([^/]+)/configuration/stanza/([^/]+)/entry_name/([^/]+)/value/([^/]+)")
+    def _delete_value(self, query, body, rp, stanza, key, value):
+        values = self._stanza(rp, stanza).get(key, [])
+        if value not in values:
+            raise LMIError(404, f"Value {value} of {key} not found")
+        values.remove(value)
+        return {}
+
+    # Access control policies, in xml and json formats
+
+    @_route("GET", r"/iam/access/v8/policies(?:/json)?")
+    def _policies(self, query, body):
+        return list(self.state['policies'].values())
+
+    @_route("GET", r"/iam/access/v8/policies(?:/json)?/([^/]+)")
+    def _policy(self, query, body, id):
+        policy = self.state['policies'].get(id)
+        if policy is None:
+            raise LMIError(404, f"Policy {id} not found")
+        return policy
+
+    @_route("POST", r"/iam/access/v8/policies(?:/json)?")
+    def _create_policy(self, query, body):
+        if any(policy.get('name') == body.get('name') for policy in self.state['policies'].values()):
+            raise LMIError(400, f"Policy {body.get('name')} already exists")
+        id = self._id()
+        self.state['policies'][id] = dict(body, id=id)
+        return {}
+
+    @_route("PUT", r"/iam/access/v8/policies(?:/json)?/([^/]+)")
+    def _update_policy(self, query, body, id):
+        self._policy(query, body, id)
+        self.state['policies'][id] = dict(body, id=id)
+        return {}
+
+    @_route("DELETE", r"/iam/access/v8/policies(?:/json)?/([^/]+)")
+    def _delete_policy(self, query, body, id):
+        if self.state['policies'].pop(id, None) is None:
+            raise LMIError(404, f"Policy {id} not found")
+        return {}
+
+
+# Fields of recorded json bodies (and of plans, see planappliance) whose values are replaced, matched
+# case-insensitively on the name
+REDACTED_FIELDS = re.compile(r'passw|pwd|secret|token|cookie|credential|private_?key|^auth', re.IGNORECASE)
+REDACTED = "*redacted*"
+
+
+def _redact_fields(value):
+    if isinstance(value, dict):
+        return {key: REDACTED if REDACTED_FIELDS.search(str(key)) and value[key] not in (None, "")
+                else _redact_fields(value[key]) for key in value}
+    if isinstance(value, list):
+        return [_redact_fields(item) for item in value]
+    return value
+
+
+def _redact(body, content_type):
+    """
+    Body to record, with the values of the REDACTED_FIELDS of json bodies replaced (headers, and so Set-Cookie,
+    are never recorded)
+    """
+    if 'json' not in (content_type or ''):
+        return body
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    return json.dumps(_redact_fields(data)).encode('utf-8')
+
+
+class Cassette:
+    """
+    Recorded responses, {"METHOD uri": [{'status', 'content_type', 'body'}, ...]} saved as a json file.
+
+    Replay serves the responses of a request in the order they were recorded, the last one is repeated.
+    """
+
+    def __init__(self, filename=None, interactions=None):
+        self.filename = filename
+        self.interactions = interactions if interactions is not None else {}
+        self._positions = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'r') as f:
+            return cls(filename, json.load(f))
+
+    def save(self, filename=None):
+        filename = filename or self.filename
+        with self._lock, open(filename, 'w') as f:
+            json.dump(self.interactions, f, indent=1, sort_keys=True)
+
+    def record(self, method, uri, status, content_type, body):
+        with self._lock:
+            self.interactions.setdefault(f"{method} {uri}", []).append(
+                {'status': status, 'content_type': content_type, 'body': body.decode('utf-8', 'replace')})
+
+    def play(self, method, uri):
+        """
+        (status, content_type, body) of the next recorded response, None if the request was not recorded
+        """
+        key = f"{method} {uri}"
+        with self._lock:
+            responses = self.interactions.get(key)
+            if not responses:
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            response = responses[min(position, len(responses) - 1)]
+        return response['status'], response.get('content_type', 'application/json'), response['body'].encode('utf-8')
+
+    def rewind(self):
+        with self._lock:
+            self._positions.clear()
+
+
+class Fault:
+    """
+    Error injected for requests matching the method and path (shell style pattern, eg. "/wga/*/junctions"),
+    for a share (rate) of the requests and at most count times (None for no limit)
+    """
+
+    def __init__(self, status, path="*", method=None, rate=1.0, count=None, message="Injected error"):
+        self.status = status
+        self.path = path
+        self.method = method
+        self.rate = rate
+        self.count = count
+        self.message = message
+        self.hits = 0
+
+    def matches(self, method, path):
+        return ((self.method is None or self.method == method) and fnmatch.fnmatchcase(path, self.path)
+                and (self.count is None or self.hits < self.count))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, without TCP_NODELAY keep-alive requests wait for delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def _serve(self):
+        self.server.emulator._serve(self)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = _serve
+
+
+class LMIEmulator:
+    """
+    Local LMI server, see the module documentation
+
+    :param model: LMIModel (state) for mode "emulate", or for replay of requests that are not in the cassette
+    :param mode: "emulate", "record" or "replay"
+    :param cassette: Cassette or filename, saved when the emulator stops in record mode
+    :param upstream: base url of the real LMI for mode "record", eg. "https://isam.example.com:443"
+    :param upstream_auth: (username, password) for the upstream LMI
+    :param latency: seconds added to every response, or callable(method, path) returning the seconds
+    :param jitter: random seconds (0 to jitter) added to the latency
+    :param verify: TLS verification of the upstream LMI in mode "record": True, False or the path of a CA bundle
+    :param tls: serve HTTPS (the default), or plain HTTP
+    :param seed: seed of the random numbers for jitter and fault rates, for reproducible runs
+    """
+
+    def __init__(self, model=None, mode="emulate", cassette=None, upstream=None, upstream_auth=None, latency=0.0,
+                 jitter=0.0, tls=True, certfile=None, keyfile=None, host="127.0.0.1", port=0, seed=None, verify=True):
+        if mode not in ("emulate", "record", "replay"):
+            raise ValueError(f"Unknown mode {mode}")
+        if mode == "record" and upstream is None:
+            raise ValueError("Mode record needs the upstream LMI")
+        self.mode = mode
+        self.model = model if model is not None or mode == "replay" else LMIModel()
+        if isinstance(cassette, str):
+            cassette = Cassette.load(cassette) if mode == "replay" else Cassette(cassette)
+        elif cassette is None and mode != "emulate":
+            cassette = Cassette()
+        self.cassette = cassette
+        self.upstream = upstream.rstrip('/') if upstream else None
+        self.upstream_auth = upstream_auth
+        self.verify = verify
+        self.latency = latency
+        self.jitter = jitter
+        self.tls = tls
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.host = host
+        self.port = port
+        self.faults = []
+        self.requests = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._upstream_session = None
+
+    def inject(self, status, path="*", method=None, rate=1.0, count=None, message="Injected error"):
+        """
+        Answer matching requests with an error, returns the Fault (its hits attribute counts the errors)
+        """
+        fault = Fault(status, path=path, method=method, rate=rate, count=count, message=message)
+        with self._lock:
+            self.faults.append(fault)
+        return fault
+
+    def clear_faults(self):
+        with self._lock:
+            self.faults = []
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.emulator = self
+        if self.tls:
+            if self.certfile is None:
+                self.certfile, self.keyfile = _self_signed_certificate()
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(self.certfile, self.keyfile)
+            self._httpd.socket = context.wrap_socket(self._httpd.socket, server_side=True)
+        self.port = self._httpd.server_address[1]
+        if self.mode == "record":
+            import requests
+            self._upstream_session = requests.session()
+            self._upstream_session.verify = self.verify
+            self._upstream_session.auth = self.upstream_auth
+        threading.Thread(target=self._httpd.serve_forever, name="ibmsecurity-emulator", daemon=True).start()
+        logger.info(f"LMI emulator ({self.mode}) listening on {self.url}")
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        if self.mode == "record" and self.cassette.filename:
+            self.cassette.save()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def url(self):
+        return f"{'https' if self.tls else 'http'}://{self.host}:{self.port}"
+
+    def appliance(self, username="admin@local", password="admin", **kwargs):
+        """
+        An ISAMAppliance connected to the emulator, also when it serves plain HTTP
+        """
+        from .isamappliance import ISAMAppliance
+        from ibmsecurity.user.applianceuser import ApplianceUser
+        return ISAMAppliance(self.host, ApplianceUser(username=username, password=password), lmi_port=self.port,
+                             verify=False, debug=False, scheme="https" if self.tls else "http", **kwargs)
+
+    def _delay(self, method, path):
+        latency = self.latency(method, path) if callable(self.latency) else self.latency
+        if self.jitter:
+            with self._lock:
+                latency += self._random.uniform(0, self.jitter)
+        if latency > 0:
+            time.sleep(latency)
+
+    def _fault(self, method, path):
+        with self._lock:
+            for fault in self.faults:
+                if fault.matches(method, path) and (fault.rate >= 1.0 or self._random.random() < fault.rate):
+                    fault.hits += 1
+                    return fault
+        return None
+
+    def _respond(self, handler, status, body, content_type="application/json"):
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _forward(self, method, uri, headers, content):
+        r = self._upstream_session.request(method, self.upstream + uri, data=content or None,
+                                           headers={name: value for name, value in headers.items()
+                                                    if name.lower() in ('accept', 'content-type')})
+        return r.status_code, r.headers.get('Content-Type', 'application/json'), r.content
+
+    def _serve(self, handler):
+        method = handler.command
+        uri = handler.path
+        parts = urlsplit(uri)
+        length = int(handler.headers.get('Content-Length') or 0)
+        content = handler.rfile.read(length) if length else b""
+        with self._lock:
+            self.requests.append((method, uri))
+
+        self._delay(method, parts.path)
+        fault = self._fault(method, parts.path)
+        if fault is not None:
+            self._respond(handler, fault.status, json.dumps({'message': fault.message}).encode('utf-8'))
+            return
+
+        if self.mode == "record":
+            status, content_type, body = self._forward(method, uri, handler.headers, content)
+            self.cassette.record(method, uri, status, content_type, _redact(body, content_type))
+            self._respond(handler, status, body, content_type)
+            return
+        if self.mode == "replay":
+            response = self.cassette.play(method, uri)
+            if response is not None:
+                self._respond(handler, response[0], response[2], response[1])
+                return
+            if self.model is None:
+                self._respond(handler, 404, json.dumps({'message': f"{method} {uri} was not recorded"}).encode())
+                return
+
+        body = {}
+        if content and 'json' in handler.headers.get('Content-Type', ''):
+            try:
+                body = json.loads(content)
+            except ValueError:
+                self._respond(handler, 400, b'{"message": "Invalid JSON"}')
+                return
+        status, data = self.model.handle(method, parts.path.rstrip('/') or '/', parse_qs(parts.query), body)
+        self._respond(handler, status, json.dumps(data).encode('utf-8'))
@@ -0,0 +1,70 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class FactCache:
+    """
+    On-disk cache of appliance facts (version, model, activations, ...), one json file per hostname.
+
+    Used by appliances created with fact_cache, so that short-lived scripts (eg. one per Ansible task) do not
+    repeat fact discovery against the LMI every time. Entries expire after `ttl` seconds and are removed by
+    operations that change the facts (firmware, activation, LMI restart).
+
+    The directory defaults to the environment variable IBMSECLIB_FACT_CACHE_DIR or ~/.cache/ibmsecurity/facts
+    """
+
+    def __init__(self, directory=None, ttl=3600):
+        if directory is None:
+            directory = os.environ.get("IBMSECLIB_FACT_CACHE_DIR",
+                                       os.path.join(os.path.expanduser("~"), ".cache", "ibmsecurity", "facts"))
+        self.directory = directory
+        self.ttl = ttl
+
+    def _filename(self, hostname):
+        return os.path.join(self.directory, re.sub(r'[^A-Za-z0-9._-]', '_', str(hostname)) + ".json")
+
+    def get(self, hostname):
+        """
+        Return the cached facts for the hostname, None if not cached or expired
+        """
+        filename = self._filename(hostname)
+        try:
+            with open(filename, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('saved', 0) + self.ttl < time.time():
+            logger.debug(f"Cached facts for {hostname} expired")
+            self.invalidate(hostname)
+            return None
+        logger.debug(f"Using cached facts for {hostname} from {filename}")
+        return entry.get('facts', None)
+
+    def put(self, hostname, facts):
+        """
+        Store the facts, the file is replaced atomically so concurrent readers never see a partial file
+        """
+        tmpname = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmpname = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'hostname': hostname, 'saved': time.time(), 'facts': facts}, f)
+            os.replace(tmpname, self._filename(hostname))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Unable to cache facts for {hostname}: {e}")
+            if tmpname is not None and os.path.exists(tmpname):
+                os.remove(tmpname)
+
+    def invalidate(self, hostname):
+        try:
+            os.remove(self._filename(hostname))
+            logger.debug(f"Removed cached facts for {hostname}")
+        except OSError:
+            pass
@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from .ibmappliance import IBMAppliance
+from .isamappliance import ISAMAppliance
+from ibmsecurity.user.applianceuser import ApplianceUser
+
+logger = logging.getLogger(__name__)
+
+
+class FleetTimeout(Exception):
+    def __init__(self, *args, **kwargs):
+        Exception.__init__(self, *args, **kwargs)
+
+
+class FleetResult:
+    """
+    Outcome of one call on one appliance of the fleet.
+    value is the return value of the function (usually an IBMResponse), error the exception raised (if any).
+    """
+    __slots__ = ('hostname', 'value', 'error', 'elapsed')
+
+    def __init__(self, hostname, value=None, error=None, elapsed=0.0):
+        self.hostname = hostname
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+
+    def succeeded(self):
+        return self.error is None
+
+    def failed(self):
+        return self.error is not None
+
+    def __repr__(self):
+        if self.error is not None:
+            return f"FleetResult({self.hostname!r}, error={self.error!r}, elapsed={self.elapsed:.2f})"
+        return f"FleetResult({self.hostname!r}, value={self.value!r}, elapsed={self.elapsed:.2f})"
+
+
+class ApplianceFleet:
+    """
+    Run ibmsecurity functions concurrently across many appliances.
+
+    Each spec is either an appliance object, or a dict with the `hostname` and either a `user` (ApplianceUser)
+    or `username`/`password`. Other keys are passed to the appliance class (eg. lmi_port, verify, cert).
+
+    Example:
+        fleet = ApplianceFleet([{"hostname": "isam1", "password": "pw"}, {"hostname": "isam2", "password": "pw"}],
+                               max_workers=20, timeout=300)
+        results = fleet.run(ibmsecurity.isam.base.date_time.get)
+        for hostname, result in results.items():
+            print(hostname, result.value if result.succeeded() else result.error)
+
+    The appliances are created (which includes fact collection) in parallel when the fleet is constructed,
+    hosts that could not be created are reported in `errors` and skipped by run().
+    """
+
+    def __init__(self, specs, max_workers=10, timeout=None, appliance_class=ISAMAppliance):
+        """
+        :param specs: list of appliance objects or dicts describing the appliances
+        :param max_workers: maximum number of appliances handled at the same time
+        :param timeout: default seconds allowed per host (None waits forever)
+        :param appliance_class: class used to create appliances from dict specs
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.appliance_class = appliance_class
+        self.appliances = {}
+        self.errors = {}
+
+        built = self.map(self._build, [self._hostname(spec) for spec in specs], specs)
+        for hostname, result in built.items():
+            if result.succeeded():
+                self.appliances[hostname] = result.value
+            else:
+                logger.error(f"Unable to create appliance {hostname}: {result.error}")
+                self.errors[hostname] = result.error
+
+    @staticmethod
+    def _hostname(spec):
+        if isinstance(spec, IBMAppliance):
+            return spec.hostname
+        return spec['hostname']
+
+    def _build(self, spec):
+        if isinstance(spec, IBMAppliance):
+            return spec
+        kwargs = dict(spec)
+        if 'user' not in kwargs:
+            kwargs['user'] = ApplianceUser(username=kwargs.pop('username', None), password=kwargs.pop('password'))
+        return self.appliance_class(**kwargs)
+
+    def map(self, func, hostnames, items, timeout=None):
+        """
+        Call func(item) for every item with bounded concurrency.
+
+        :return: dict of hostname to FleetResult, in the order of hostnames
+        """
+        if timeout is None:
+            timeout = self.timeout
+        results = {}
+        started = {}
+        lock = threading.Lock()
+
+        def _call(hostname, item):
+            with lock:
+                started[hostname] = time.monotonic()
+            value = func(item)
+            return value, time.monotonic() - started[hostname]
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ibmsecurity-fleet")
+        try:
+            pending = {executor.submit(_call, hostname, item): hostname for hostname, item in zip(hostnames, items)}
+            while pending:
+                done, _ = wait(pending, timeout=None if timeout is None else 0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    hostname = pending.pop(future)
+                    try:
+                        value, elapsed = future.result()
+                        results[hostname] = FleetResult(hostname, value=value, elapsed=elapsed)
+                    except Exception as e:
+                        results[hostname] = FleetResult(hostname, error=e,
+                                                        elapsed=time.monotonic() - started.get(hostname, time.monotonic()))
+                if timeout is None:
+                    continue
+                now = time.monotonic()
+                with lock:
+                    expired = [f for f, h in pending.items() if h in started and now - started[h] > timeout]
+                for future in expired:
+                    # The worker thread can not be interrupted, it is abandoned and its result ignored
+                    hostname = pending.pop(future)
+                    future.cancel()
+                    logger.error(f"Timeout of {timeout} seconds expired for {hostname}")
+                    results[hostname] = FleetResult(hostname, error=FleetTimeout(
+                        f"Timeout of {timeout} seconds expired for {hostname}"), elapsed=now - started[hostname])
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return {hostname: results[hostname] for hostname in hostnames if hostname in results}
+
+    def run(self, func, *args, timeout=None, **kwargs):
+        """
+        Call func(appliance, *args, **kwargs) on every appliance of the fleet concurrently.
+
+        :param func: any function taking the appliance as first argument, eg. ibmsecurity.isam.base.ntp.set
+        :param timeout: seconds allowed per host, overrides the fleet default
+        :return: dict of hostname to FleetResult
+        """
+        hostnames = list(self.appliances.keys())
+        logger.debug(f"Running {getattr(func, '__module__', '')}.{getattr(func, '__name__', func)} on {len(hostnames)} appliances")
+        return self.map(lambda appliance: func(appliance, *args, **kwargs), hostnames,
+                        [self.appliances[hostname] for hostname in hostnames], timeout=timeout)
@@ -1,6 +1,9 @@
 import logging
+import threading
 from abc import ABCMeta, abstractmethod
 
+from .factcache import FactCache
+
 
 class IBMError(Exception):
     def __init__(self, *args, **kwargs):
@@ -45,16 +48,100 @@ class IBMResponse(dict):
 
 
 class IBMAppliance(metaclass=ABCMeta):
+    # Fact discovery state, see the facts property
+    _facts = None
+    _facts_loaded = False
+    _facts_loading = False
+    _facts_lock = threading.RLock()
+    fact_cache = None
 
-    def __init__(self, hostname, user):
+    def __init__(self, hostname, user, lazy_facts=False, fact_cache=None):
+        """
+        :param lazy_facts: Collect the facts on first use, instead of when the object is created
+        :param fact_cache: FactCache (or True for the default one) to reuse the facts of earlier runs
+        """
         self.logger = logging.getLogger(__name__)
         self.logger.debug('Creating an IBMAppliance')
 
         self.hostname = hostname
         self.user = user
 
-        self.facts = {}
-        self.get_facts()
+        if fact_cache is True:
+            fact_cache = FactCache()
+        self.fact_cache = fact_cache or None
+        self._facts_lock = threading.RLock()
+        self._facts = {}
+        self._facts_loaded = False
+        if not lazy_facts:
+            self.load_facts()
+
+    @property
+    def facts(self):
+        """
+        Facts about the appliance (version, model, activations, ...), discovered on first use
+        """
+        if not self._facts_loaded:
+            self.load_facts()
+        return self._facts
+
+    @facts.setter
+    def facts(self, facts):
+        self._facts = facts
+        self._facts_loaded = True
+
+    def load_facts(self, refresh=False):
+        """
+        Discover the facts, or take them from the fact cache.
+        Use refresh=True to force discovery (this also warms the fact cache).
+        """
+        with self._facts_lock:
+            # Fact discovery itself uses the facts, those calls see the facts collected so far
+            if self._facts_loading or (self._facts_loaded and not refresh):
+                return
+            if self.fact_cache is not None and not refresh:
+                cached = self.fact_cache.get(self.hostname)
+                if cached:
+                    self._facts = self._restore_facts(cached)
+                    self._facts_loaded = True
+                    return
+            self._facts_loading = True
+            try:
+                self._facts = {}
+                self.get_facts()
+            finally:
+                self._facts_loading = False
+            # get_facts swallows connection errors, without a version the discovery is repeated on next use
+            if self._facts.get('version', None) is not None:
+                self._facts_loaded = True
+                self.save_facts()
+            else:
+                self.logger.warning(f"Unable to discover the facts of {self.hostname}, retrying on next use")
+
+    def save_facts(self):
+        """
+        Store the facts in the fact cache, after they have been updated in memory
+        """
+        if self.fact_cache is not None and self._facts_loaded:
+            self.fact_cache.put(self.hostname, self._facts)
+
+    def invalidate_facts(self, in_memory=True):
+        """
+        Discard the facts (in memory and in the fact cache), they are discovered again on next use.
+        To be called after operations that change the facts, like firmware updates and activations.
+
+        :param in_memory: False keeps the facts in memory and only drops the fact cache entry
+        """
+        with self._facts_lock:
+            if in_memory:
+                self._facts_loaded = False
+            if self.fact_cache is not None:
+                self.fact_cache.invalidate(self.hostname)
+
+    def _restore_facts(self, facts):
+        """
+        Convert facts read from the fact cache
+        """
+        return facts
 
     @abstractmethod
     def invoke_post_files(self, description, uri, fileinfo, data, ignore_error=False):
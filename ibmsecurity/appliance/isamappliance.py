@@ -1,4 +1,5 @@
 import json
+import threading
 import requests
 import traceback
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
@@ -6,7 +7,14 @@ import logging
 from .ibmappliance import IBMAppliance
 from .ibmappliance import IBMError
 from .ibmappliance import IBMFatal
+from . import download
+from . import multipart
+from .nameindex import NameIndex
+from .responsecache import ResponseCache
+from .transport import TransportConfig, TRANSPORT_ERRORS
+import ibmsecurity
 from ibmsecurity.utilities import tools
+from ibmsecurity.utilities import json_backend
 from io import open
 from os import environ
 
@@ -15,11 +23,32 @@ try:
 except NameError:
     basestring = (str, bytes)
 
+# Responses with these content types are never parsed as json (unless they look like a json document)
+_BINARY_CONTENT_TYPES = ('application/octet-stream', 'application/zip', 'application/x-zip-compressed',
+                         'application/gzip', 'application/x-tar', 'application/pdf')
+_BINARY_CONTENT_PREFIXES = ('image/', 'audio/', 'video/')
 
 class ISAMAppliance(IBMAppliance):
-    def __init__(self, hostname, user, lmi_port=443, cert=None, verify=None, http_proxy=None, https_proxy=None, debug=True):
+    # HTTP transport settings, see transport.TransportConfig (no retries unless configured)
+    transport = TransportConfig()
+    # Scheme of the LMI urls, "http" only for test servers (eg. appliance.emulator without TLS)
+    scheme = "https"
+    # Opt-in cache for GET requests, see enable_response_cache()
+    response_cache = None
+    # Number of HTTP requests sent to the LMI by this object
+    request_count = 0
+    _request_count_lock = threading.Lock()
+    # Opt-in name -> id index of collections, see enable_name_index()
+    name_index = None
+
+    def __init__(self, hostname, user, lmi_port=443, cert=None, verify=None, http_proxy=None, https_proxy=None, debug=True,
+                 response_cache=None, lazy_facts=False, fact_cache=None, transport=None, scheme="https",
+                 name_index=None):
         self.logger = logging.getLogger(__name__)
         self.debug = debug
+        if scheme not in ("https", "http"):
+            raise ValueError(f"Unsupported scheme {scheme}")
+        self.scheme = scheme
         if self.debug:
             self.logger.debug('Creating an ISAMAppliance')
         if isinstance(lmi_port, str):
@@ -28,6 +57,10 @@ class ISAMAppliance(IBMAppliance):
             self.lmi_port = lmi_port
         self.hostname = hostname
         self.session = requests.session()
+        self.session.hooks['response'].append(self._count_request)
+        # Connection pool, timeouts and retries
+        self.transport = transport or TransportConfig()
+        self.transport.apply(self.session)
 
         # If we did not get a value for verify, try the environment variable
         if verify is None:
@@ -52,7 +85,59 @@ class ISAMAppliance(IBMAppliance):
         elif https_proxy is not None:
             self._set_proxies(https=https_proxy)
 
-        IBMAppliance.__init__(self, hostname, user)
+        if response_cache is True:
+            self.enable_response_cache()
+        elif response_cache:
+            self.response_cache = response_cache
+        if name_index is True:
+            self.enable_name_index()
+        elif name_index:
+            self.name_index = name_index
+
+        IBMAppliance.__init__(self, hostname, user, lazy_facts=lazy_facts, fact_cache=fact_cache)
+
+    def enable_response_cache(self, ttl=300, maxsize=128):
+        """
+        Serve repeated GET requests from memory.
+
+        Useful for bulk idempotent runs, where every set/add/delete starts by retrieving the same list again.
+        PUT/POST/DELETE requests through this object invalidate the cached GETs of related uris.
+
+        :param ttl: seconds a response is kept
+        :param maxsize: maximum number of cached responses (least recently used are evicted)
+        :return: the ResponseCache, use its stats() for hit/miss counters
+        """
+        self.response_cache = ResponseCache(ttl=ttl, maxsize=maxsize)
+        return self.response_cache
+
+    def disable_response_cache(self):
+        self.response_cache = None
+
+    def _count_request(self, response, *args, **kwargs):
+        with self._request_count_lock:
+            self.request_count += 1
+
+    def enable_name_index(self, ttl=300):
+        """
+        Keep the names and ids of collections (eg. policies) in memory, so the search() functions retrieve a
+        collection once instead of once per name.
+
+        PUT/POST/DELETE requests through this object refresh the collections of related uris.
+
+        :param ttl: seconds a collection is kept, None to keep it until refreshed
+        :return: the NameIndex, call its refresh() to see changes made outside of this object
+        """
+        self.name_index = NameIndex(ttl=ttl)
+        return self.name_index
+
+    def disable_name_index(self):
+        self.name_index = None
+
+    def _invalidate_caches(self, uri):
+        if self.response_cache is not None:
+            self.response_cache.invalidate(uri)
+        if self.name_index is not None:
+            self.name_index.refresh(uri)
 
     def _set_ssl_verification(self, requests_verify_param):
         self.verify = requests_verify_param
@@ -79,7 +164,7 @@ See the following URL for more details:
 
     def _url(self, uri):
         # Build up the URL
-        url = "https://" + self.hostname + ":" + str(self.lmi_port) + uri
+        url = self.scheme + "://" + self.hostname + ":" + str(self.lmi_port) + uri
         if self.debug: self.logger.debug("Issuing request to: " + url)
 
         return url
@@ -137,41 +222,32 @@ See the following URL for more details:
         else:
             return_obj['rc'] = 0
 
-        # Handle if there was json on input but response was not in json format
-        try:
-            json_data = json.loads(http_response.text)
-            return_obj['data'] = json_data
-        except ValueError:
-            return_obj['data'] = http_response.content
-            return
-
         if self.debug: self.logger.debug("Status Code: {0}".format(http_response.status_code))
-        if http_response.text != "":
-            if self.debug: self.logger.debug("Text: " + http_response.content.decode("utf-8"))
-
-        for key in http_response.headers:
-            if key == 'g-type':
-                if http_response.headers[key] == 'application/octet-stream; charset=UTF-8':
-                    json_data = {}
-                    return_obj.data = http_response.content
-                    return
-
-        if http_response.text == "":
-            json_data = {}
-        else:
-            json_data = json.loads(http_response.text)
 
-        return_obj['data'] = json_data
+        # Decode the body only once, the content type decides if it is worth parsing as json
+        content = http_response.content
+        if self.debug and content and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Text: " + content.decode("utf-8", errors="replace"))
+
+        return_obj['data'] = self._parse_content(content, http_response.headers.get('content-type', ''))
+
+    def _parse_content(self, content, content_type):
+        """
+        Convert the raw response body into the data of the return object.
+
+        JSON is returned as python objects, anything else is returned as the raw bytes.
+        """
+        if not content:
+            return content
+        content_type = content_type.split(';', 1)[0].strip().lower()
+        if content_type in _BINARY_CONTENT_TYPES or content_type.startswith(_BINARY_CONTENT_PREFIXES):
+            # Binary downloads can still carry a json message (eg. errors), sniff the first byte
+            if content.lstrip()[:1] not in (b'{', b'['):
+                return content
         try:
-            json_data = json.loads(http_response.content.decode("utf-8"))
-            return_obj['data'] = json_data
-        except UnicodeDecodeError:
-            return_obj['data'] = http_response.content
+            return json_backend.loads(content)
         except ValueError:
-            if isinstance(http_response.content, bytes):
-                return_obj['data'] = http_response.content.decode("utf-8")
-            else:
-                return_obj['data'] = http_response.content
+            return content
 
     def _process_connection_error(self, ignore_error, return_obj, error_message=""):
         if not ignore_error:
@@ -233,9 +309,14 @@ See the following URL for more details:
 
     def invoke_post_files(self, description, uri, fileinfo, data, ignore_error=False, requires_modules=None,
                           requires_version=None, warnings=[], json_response=True, data_as_files=False,
-                          requires_model=None):
+                          requires_model=None, progress=None):
         """
         Send multipart/form-data upload file request to the appliance.
+
+        The body is streamed (see appliance/multipart.py), the files are read in chunks while sending and closed
+        afterwards, also the file objects in data when data_as_files is True.
+
+        :param progress: callable(bytes_sent, bytes_total)
         """
         self._log_desc(description=description)
 
@@ -258,25 +339,21 @@ See the following URL for more details:
         if self.debug: self.logger.debug("Headers are: {0}".format(headers))
 
         if data_as_files is False:
-            files = list()
-            for file2post in fileinfo:
-                files.append((file2post['file_formfield'],
-                              (tools.path_leaf(file2post['filename']), open(file2post['filename'], 'rb'),
-                               file2post['mimetype'])))
+            encoder = multipart.MultipartEncoder.from_fileinfo(fileinfo, data, progress=progress)
         else:
-            files = data
+            encoder = multipart.MultipartEncoder(files=data, progress=progress)
+        headers['Content-Type'] = encoder.content_type
 
         self._suppress_ssl_warning()
+        self._invalidate_caches(uri)
 
         try:
-            if data_as_files is False:
-                r = self.session.post(url=self._url(uri=uri), data=data, files=files, headers=headers)
-            else:
-                r = self.session.post(url=self._url(uri=uri), files=files, headers=headers)
+            with encoder:
+                r = self.session.post(url=self._url(uri=uri), data=encoder, headers=headers)
             return_obj['changed'] = True  # POST of file would be a change
             self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
 
-        except requests.exceptions.ConnectionError as e:
+        except TRANSPORT_ERRORS as e:
             if not ignore_error:
                 self.logger.critical(f"Failed to connect to server: {str(e)}")
                 raise IBMError("HTTP Return code: 502", f"Failed to connect to server: {str(e)}")
@@ -287,9 +364,11 @@ See the following URL for more details:
         return return_obj
 
     def invoke_put_files(self, description, uri, fileinfo, data, ignore_error=False, requires_modules=None,
-                         requires_version=None, warnings=[], requires_model=None):
+                         requires_version=None, warnings=[], requires_model=None, progress=None):
         """
         Send multipart/form-data upload file request to the appliance.
+
+        :param progress: callable(bytes_sent, bytes_total)
         """
         self._log_desc(description=description)
 
@@ -306,20 +385,19 @@ See the following URL for more details:
         }
         if self.debug: self.logger.debug("Headers are: {0}".format(headers))
 
-        files = list()
-
-        for file2post in fileinfo:
-            files.append((file2post['file_formfield'],
-                          (file2post['filename'], open(file2post['filename'], 'rb'), file2post['mimetype'])))
+        encoder = multipart.MultipartEncoder.from_fileinfo(fileinfo, data, path_leaf=False, progress=progress)
+        headers['Content-Type'] = encoder.content_type
 
         self._suppress_ssl_warning()
+        self._invalidate_caches(uri)
 
         try:
-            r = self.session.put(url=self._url(uri=uri), data=data, files=files, headers=headers)
+            with encoder:
+                r = self.session.put(url=self._url(uri=uri), data=encoder, headers=headers)
             return_obj['changed'] = True  # POST of file would be a change
             self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
 
-        except requests.exceptions.ConnectionError as e:
+        except TRANSPORT_ERRORS as e:
             if not ignore_error:
                 self.logger.critical(f"Failed to connect to server. {str(e)}")
                 raise IBMError("HTTP Return code: 502", f"Failed to connect to server : {str(e)}")
@@ -330,9 +408,17 @@ See the following URL for more details:
         return return_obj
 
     def invoke_get_file(self, description, uri, filename, no_headers=False, ignore_error=False, requires_modules=None,
-                        requires_version=None, warnings=[], requires_model=None):
+                        requires_version=None, warnings=[], requires_model=None, chunk_size=None, resume=False,
+                        progress=None):
         """
         Invoke a GET request and download the response data to a file
+
+        The data is written to filename.part and renamed when complete, see appliance/download.py.
+        The size and SHA-256 of the file are returned in the data.
+
+        :param chunk_size: bytes per read (default 1 MiB)
+        :param resume: continue an interrupted download (filename.part) with a Range request
+        :param progress: callable(bytes_done, bytes_total)
         """
         self._log_desc(description=description)
 
@@ -355,9 +441,10 @@ See the following URL for more details:
         self._suppress_ssl_warning()
 
         try:
-            r = self.session.get(url=self._url(uri=uri), stream=True, headers=headers)
+            r, result = download.download(self.session, self._url(uri=uri), filename, headers=headers,
+                                          chunk_size=chunk_size, resume=resume, progress=progress)
 
-            if (r.status_code != 200 and r.status_code != 204 and r.status_code != 201):
+            if result is None:
                 self.logger.error("  Request failed: ")
                 self.logger.error("     status code: {0}".format(r.status_code))
                 if r.text != "":
@@ -368,14 +455,11 @@ See the following URL for more details:
                     return_obj['rc'] = r.status_code
                     return_obj['data'] = {'msg': 'Unable to extract contents to file!'}
             else:
-                with open(filename, 'wb') as f:
-                    for chunk in r.iter_content(chunk_size=1024):
-                        if chunk:  # filter out keep-alive new chunks
-                            f.write(chunk)
                 return_obj['rc'] = 0
-                return_obj['data'] = {'msg': 'Contents extracted to file: ' + filename}
+                return_obj['data'] = {'msg': 'Contents extracted to file: ' + filename, 'size': result['size'],
+                                      'sha256': result['sha256']}
 
-        except requests.exceptions.ConnectionError as e:
+        except TRANSPORT_ERRORS as e:
             self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj, error_message=str(e))
 
         except IOError:
@@ -395,8 +479,9 @@ See the following URL for more details:
         used directly.  The invoke_get/invoke_put/etc functions should be used instead.
         """
         self._log_desc(description=description)
-        self.session.cookies.pop('LtpaToken2', None)
-        self.session.cookies.pop('JSESSIONID', None)
+        if not self.transport.keep_session_cookie:
+            self.session.cookies.pop('LtpaToken2', None)
+            self.session.cookies.pop('JSESSIONID', None)
 
         warnings, return_call = self._process_warnings(uri=uri, requires_modules=requires_modules,
                                                        requires_version=requires_version, requires_model=requires_model,
@@ -405,6 +490,15 @@ See the following URL for more details:
         if return_call:
             return return_obj
 
+        cacheable = func == self.session.get and data == {} and self.response_cache is not None
+        if cacheable:
+            cached_data = self.response_cache.get("GET", uri)
+            if cached_data is not None:
+                return_obj['data'] = cached_data
+                return return_obj
+        elif func != self.session.get:
+            self._invalidate_caches(uri)
+
         # There maybe some cases when header should be blank (not json)
         headers = {
             'Accept': 'application/json',
@@ -433,8 +527,10 @@ See the following URL for more details:
                 return_obj['changed'] = True  # Anything but GET should result in change
 
             self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
+            if cacheable and return_obj['rc'] == 0:
+                self.response_cache.put("GET", uri, return_obj['data'])
 
-        except requests.exceptions.ConnectionError as e:
+        except TRANSPORT_ERRORS as e:
             self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj, error_message=str(e))
 
         return return_obj
@@ -462,6 +558,8 @@ See the following URL for more details:
         self.logger.debug("Input Data: " + json_data)
 
         self._suppress_ssl_warning()
+        if func != self.session.get:
+            self._invalidate_caches(uri)
 
         try:
             if func == self.session.get or func == self.session.delete:
@@ -479,7 +577,7 @@ See the following URL for more details:
 
             self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
 
-        except requests.exceptions.ConnectionError as e:
+        except TRANSPORT_ERRORS as e:
             self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj, error_message=str(e))
 
         return return_obj
@@ -541,7 +639,7 @@ See the following URL for more details:
             return_obj['changed'] = False  # POST of snapshot id would not be a change
             self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
 
-        except requests.exceptions.ConnectionError as e:
+        except TRANSPORT_ERRORS as e:
             if not ignore_error:
                 self.logger.critical(f"Failed to connect to server: {str(e)}")
                 raise IBMError("HTTP Return code: 502", f"Failed to connect to server : {str(e)}")
@@ -634,10 +732,11 @@ See the following URL for more details:
                 args[key] = value
 
         self._suppress_ssl_warning()
+        if method.lower() != "get":
+            self._invalidate_caches(uri)
 
         try:
             streaminargs = False
-            r = self.session.request(method, url=self._url(uri), **args)
             # check for stream=True
             if "stream" in args and args["stream"] == True:
                 streaminargs = True
@@ -647,7 +746,10 @@ See the following URL for more details:
                     return return_obj
                 # else stream content to file
                 else:
-                    if (r.status_code != 200 and r.status_code != 204 and r.status_code != 201):
+                    stream_args = {k: v for k, v in args.items() if k not in ('stream', 'headers')}
+                    r, result = download.download(self.session, self._url(uri), filename, method=method,
+                                                  headers=args.get('headers', None), **stream_args)
+                    if result is None:
                         self.logger.error("  Request failed: ")
                         self.logger.error("     status code: {0}".format(r.status_code))
                         if r.text != "":
@@ -658,12 +760,11 @@ See the following URL for more details:
                             return_obj['rc'] = r.status_code
                             return_obj['data'] = {'msg': 'Unable to extract contents to file!'}
                     else:
-                        with open(filename, 'wb') as f:
-                            for chunk in r.iter_content(chunk_size=1024):
-                                if chunk:  # filter out keep-alive new chunks
-                                    f.write(chunk)
                         return_obj['rc'] = 0
-                        return_obj['data'] = {'msg': 'Contents extracted to file: ' + filename}
+                        return_obj['data'] = {'msg': 'Contents extracted to file: ' + filename,
+                                              'size': result['size'], 'sha256': result['sha256']}
+            else:
+                r = self.session.request(method, url=self._url(uri), **args)
 
             if method == "get" or (method == "post" and streaminargs == True):
                 return_obj['changed'] = False
@@ -673,7 +774,7 @@ See the following URL for more details:
             if streaminargs == False:
                 self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
 
-        except requests.exceptions.ConnectionError as e:
+        except TRANSPORT_ERRORS as e:
             self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj, error_message=str(e))
 
         return return_obj
@@ -687,7 +788,6 @@ See the following URL for more details:
             self.get_version()
 
             # Check if appliance is setup before collecting Activation information
-            import ibmsecurity.isam.base.setup_complete
             ret_obj = ibmsecurity.isam.base.setup_complete.get(self)
             if ret_obj['data'].get('configured') is True:
                 self.get_activations()
@@ -707,8 +807,6 @@ See the following URL for more details:
         When firmware are installed or partition are changed, then this value is updated
         """
         self.facts['version'] = None
-        import ibmsecurity.isam.base.version
-        import ibmsecurity.isam.base.firmware
 
         try:
             ret_obj = ibmsecurity.isam.base.version.get(self)
@@ -745,8 +843,26 @@ See the following URL for more details:
             except:
                 self.logger.error( traceback.print_exc() )
                 pass
+        self.facts['version_info'] = self._parse_version(self.facts['version'])
         return
 
+    def _restore_facts(self, facts):
+        # version_info is cached as a list
+        facts['version_info'] = self._parse_version(facts.get('version', None))
+        return facts
+
+    def _parse_version(self, version):
+        """
+        Parsed version, to test feature levels without parsing strings, eg. facts['version_info'] >= "10.0.6.0"
+        """
+        if version is None:
+            return None
+        try:
+            return tools.Version(version)
+        except ValueError:
+            self.logger.warning(f"Unable to parse appliance version: {version}")
+            return None
+
     def get_activations(self):
         """
         Get  appliance activations
@@ -754,7 +870,6 @@ See the following URL for more details:
         When new modules are activated or old ones de-activated this value is updated.
         """
         self.facts['activations'] = []
-        import ibmsecurity.isam.base.activation
 
         ret_obj = ibmsecurity.isam.base.activation.get_all(self)
         for activation in ret_obj['data']:
@@ -5,6 +5,8 @@ import logging
 from .ibmappliance import IBMAppliance
 from .ibmappliance import IBMError
 from .ibmappliance import IBMFatal
+from .transport import TransportConfig, TRANSPORT_ERRORS
+import ibmsecurity
 from ibmsecurity.utilities import tools
 from io import open
 from os import environ
@@ -16,7 +18,7 @@ except NameError:
 
 
 class ISDSAppliance(IBMAppliance):
-    def __init__(self, hostname, user, lmi_port=443, cert=None, verify=None):
+    def __init__(self, hostname, user, lmi_port=443, cert=None, verify=None, transport=None):
         self.logger = logging.getLogger(__name__)
         self.logger.debug('Creating an ISDSAppliance')
         if isinstance(lmi_port, basestring):
@@ -25,6 +27,8 @@ class ISDSAppliance(IBMAppliance):
             self.lmi_port = lmi_port
         self.hostname = hostname
         self.session = requests.session()
+        self.transport = transport or TransportConfig()
+        self.transport.apply(self.session)
 
         # If we did not get a value for verify, try the environment variable
         if verify is None:
@@ -227,7 +231,7 @@ See the following URL for more details:
             return_obj['changed'] = True  # POST of file would be a change
             self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
 
-        except requests.exceptions.ConnectionError:
+        except TRANSPORT_ERRORS:
             if not ignore_error:
                 self.logger.critical("Failed to connect to server.")
                 raise IBMError("HTTP Return code: 502", "Failed to connect to server")
@@ -271,7 +275,7 @@ See the following URL for more details:
             return_obj['changed'] = True  # POST of file would be a change
             self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
 
-        except requests.exceptions.ConnectionError:
+        except TRANSPORT_ERRORS:
             if not ignore_error:
                 self.logger.critical("Failed to connect to server.")
                 raise IBMError("HTTP Return code: 502", "Failed to connect to server")
@@ -328,7 +332,7 @@ See the following URL for more details:
                 return_obj['rc'] = 0
                 return_obj['data'] = {'msg': 'Contents extracted to file: ' + filename}
 
-        except requests.exceptions.ConnectionError:
+        except TRANSPORT_ERRORS:
             self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj)
 
         except IOError:
@@ -389,7 +393,7 @@ See the following URL for more details:
 
             self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
 
-        except requests.exceptions.ConnectionError:
+        except TRANSPORT_ERRORS:
             self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj)
 
         return return_obj
@@ -437,7 +441,6 @@ See the following URL for more details:
             self.get_version()
 
             # Check if appliance is setup before collecting Activation information
-            import ibmsecurity.isds.setup_complete
             ret_obj = ibmsecurity.isds.setup_complete.get(self)
             if ret_obj['data'].get('configured') is True:
                 self.get_activations()
@@ -452,7 +455,6 @@ See the following URL for more details:
         When firmware are installed or partition are changed, then this value is updated
         """
         self.facts['version'] = None
-        import ibmsecurity.isds.firmware
 
         ret_obj = ibmsecurity.isds.firmware.get(self)
         for partition in ret_obj['data']:
@@ -467,7 +469,6 @@ See the following URL for more details:
         When new modules are activated or old ones de-activated this value is updated.
         """
         self.facts['activations'] = []
-        import ibmsecurity.isds.activation
 
         ret_obj = ibmsecurity.isds.activation.get(self)
         for activation in ret_obj['data']:
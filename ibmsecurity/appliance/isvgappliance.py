@@ -5,6 +5,8 @@ import logging
 from .ibmappliance import IBMAppliance
 from .ibmappliance import IBMError
 from .ibmappliance import IBMFatal
+from .transport import TransportConfig, TRANSPORT_ERRORS
+import ibmsecurity
 from ibmsecurity.utilities import tools
 from io import open
 from os import environ
@@ -16,7 +18,7 @@ except NameError:
 
 
 class ISVGAppliance(IBMAppliance):
-    def __init__(self, hostname, user, lmi_port=443, verify=None):
+    def __init__(self, hostname, user, lmi_port=443, verify=None, transport=None):
         self.logger = logging.getLogger(__name__)
         self.logger.debug('Creating an ISVGAppliance')
         if isinstance(lmi_port, basestring):
@@ -25,6 +27,8 @@ class ISVGAppliance(IBMAppliance):
             self.lmi_port = lmi_port
         self.hostname = hostname
         self.session = requests.session()
+        self.transport = transport or TransportConfig()
+        self.transport.apply(self.session)
 
         # If we did not get a value for verify, try the environment variable
         if verify is None:
@@ -225,7 +229,7 @@ See the following URL for more details:
             return_obj['changed'] = True  # POST of file would be a change
             self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
 
-        except requests.exceptions.ConnectionError:
+        except TRANSPORT_ERRORS:
             if not ignore_error:
                 self.logger.critical("Failed to connect to server.")
                 raise IBMError("HTTP Return code: 502", "Failed to connect to server")
@@ -269,7 +273,7 @@ See the following URL for more details:
             return_obj['changed'] = True  # POST of file would be a change
             self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
 
-        except requests.exceptions.ConnectionError:
+        except TRANSPORT_ERRORS:
             if not ignore_error:
                 self.logger.critical("Failed to connect to server.")
                 raise IBMError("HTTP Return code: 502", "Failed to connect to server")
@@ -330,7 +334,7 @@ See the following URL for more details:
                 return_obj['rc'] = 0
                 return_obj['data'] = {'msg': 'Contents extracted to file: ' + filename}
 
-        except requests.exceptions.ConnectionError:
+        except TRANSPORT_ERRORS:
             self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj)
 
         except IOError:
@@ -391,7 +395,7 @@ See the following URL for more details:
 
             self._process_response(return_obj=return_obj, http_response=r, ignore_error=ignore_error)
 
-        except requests.exceptions.ConnectionError:
+        except TRANSPORT_ERRORS:
             self._process_connection_error(ignore_error=ignore_error, return_obj=return_obj)
 
         return return_obj
@@ -448,7 +452,6 @@ See the following URL for more details:
         When firmware are installed or partition are changed, then this value is updated
         """
         self.facts['version'] = None
-        import ibmsecurity.isvg.firmware
 
         ret_obj = ibmsecurity.isvg.firmware.get(self)
         for partition in ret_obj['data']:
@@ -0,0 +1,241 @@
+"""
+Streaming multipart/form-data encoder for file uploads (firmware, fixpacks, snapshots, zip imports).
+
+requests builds the whole multipart body in memory before sending it. MultipartEncoder produces the same body
+(same field and file encoding as requests) in chunks instead, reading the files while the request is sent,
+so uploads of large files use a bounded amount of memory. The Content-Length is known in advance.
+
+Example:
+    with MultipartEncoder(fields={'comment': 'x'}, files=[('uploadedfile', ('a.zip', 'a.zip', 'application/zip'))],
+                          from_paths=True) as encoder:
+        session.post(url, data=encoder, headers={'Content-Type': encoder.content_type})
+"""
+import asyncio
+import binascii
+import io
+import logging
+import os
+from collections.abc import Mapping
+
+from requests.utils import guess_filename
+from urllib3.fields import RequestField
+
+from ibmsecurity.utilities import tools
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from a file at a time
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def _field_values(fields):
+    """
+    The form fields as (name, bytes) tuples, encoded like requests does
+    """
+    if fields is None:
+        return []
+    if isinstance(fields, (str, bytes)):
+        raise ValueError("Data must not be a string.")
+    items = fields.items() if isinstance(fields, Mapping) else fields
+    result = []
+    for name, value in items:
+        if isinstance(value, (str, bytes)) or not hasattr(value, "__iter__"):
+            value = [value]
+        for v in value:
+            if v is None:
+                continue
+            if not isinstance(v, bytes):
+                v = str(v)
+            result.append((name.decode("utf-8") if isinstance(name, bytes) else name,
+                           v.encode("utf-8") if isinstance(v, str) else v))
+    return result
+
+
+class _FilePart:
+    """
+    File content of a part, opened from a path when needed or read from a file object
+    """
+
+    def __init__(self, source, from_path):
+        self.from_path = from_path
+        if from_path:
+            self.path = source
+            self.file = None
+            self.start = 0
+            self.size = os.path.getsize(source)
+        else:
+            self.path = None
+            self.file = source
+            try:
+                self.start = source.tell()
+            except (AttributeError, OSError, ValueError):
+                self.start = None
+            self.size = self._remaining(source)
+
+    def _remaining(self, f):
+        try:
+            return os.fstat(f.fileno()).st_size - self.start
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation, TypeError):
+            pass
+        if self.start is None:
+            # Not seekable, keep the content
+            self.file = io.BytesIO(f.read())
+            self.start = 0
+            return len(self.file.getvalue())
+        f.seek(0, os.SEEK_END)
+        size = f.tell() - self.start
+        f.seek(self.start)
+        return size
+
+    def chunks(self, chunk_size):
+        if self.file is None:
+            self.file = open(self.path, 'rb')
+        self.file.seek(self.start)
+        remaining = self.size
+        while remaining > 0:
+            chunk = self.file.read(min(chunk_size, remaining))
+            if not chunk:
+                raise IOError(f"File {self.path or self.file} is shorter than expected")
+            remaining -= len(chunk)
+            yield chunk
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class MultipartEncoder:
+    """
+    Iterable multipart/form-data body, pass it as `data` to a requests session (or `content` to httpx).
+
+    :param fields: form fields, dict or list of (name, value) tuples (like `data` of requests)
+    :param files: dict or list of (name, file) like `files` of requests, where file is a file object or a tuple
+                  (filename, content[, content_type[, headers]]) and content a file object, str or bytes.
+                  With from_paths=True the content of the tuples is the path of the file to upload.
+    :param from_paths: content of the files is a path, opened when the body is sent
+    :param chunk_size: bytes read from a file at a time
+    :param progress: callable(bytes_sent, bytes_total)
+
+    The files are closed by close() (or at the end of a `with` block), including file objects passed in.
+    The body can be iterated more than once (eg. when a request is retried) as long as the files are seekable.
+    """
+
+    def __init__(self, fields=None, files=None, from_paths=False, boundary=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 progress=None):
+        self.boundary = boundary or binascii.hexlify(os.urandom(16)).decode("ascii")
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self._parts = []
+        for name, value in _field_values(fields):
+            rf = RequestField(name=name, data=value)
+            rf.make_multipart(content_type=None)
+            self._parts.append((self._header(rf), value))
+        for name, value in self._file_items(files):
+            if isinstance(value, (tuple, list)):
+                filename, content = value[0], value[1]
+                content_type = value[2] if len(value) > 2 else None
+                headers = value[3] if len(value) > 3 else None
+            else:
+                filename = guess_filename(value) or name
+                content, content_type, headers = value, None, None
+            if content is None:
+                continue
+            if from_paths and isinstance(content, (str, os.PathLike)):
+                body = _FilePart(content, from_path=True)
+            elif isinstance(content, str):
+                body = content.encode("utf-8")
+            elif isinstance(content, (bytes, bytearray)):
+                body = bytes(content)
+            elif hasattr(content, 'read'):
+                body = _FilePart(content, from_path=False)
+            else:
+                body = str(content).encode("utf-8")
+            rf = RequestField(name=name, data=b'', filename=filename, headers=headers)
+            rf.make_multipart(content_type=content_type)
+            self._parts.append((self._header(rf), body))
+        self._footer = f"--{self.boundary}--\r\n".encode("ascii")
+        self.len = sum(len(header) + self._size(body) + 2 for header, body in self._parts) + len(self._footer)
+
+    @staticmethod
+    def _file_items(files):
+        if files is None:
+            return []
+        return files.items() if isinstance(files, Mapping) else files
+
+    def _header(self, rf):
+        return f"--{self.boundary}\r\n".encode("ascii") + rf.render_headers().encode("utf-8")
+
+    @staticmethod
+    def _size(body):
+        return body.size if isinstance(body, _FilePart) else len(body)
+
+    @classmethod
+    def from_fileinfo(cls, fileinfo, data=None, path_leaf=True, **kwargs):
+        """
+        Encoder for the fileinfo list of invoke_post_files/invoke_put_files:
+        [{'file_formfield': ..., 'filename': ..., 'mimetype': ...}]
+
+        :param path_leaf: send only the last component of the path as filename
+        """
+        files = [(f['file_formfield'], (tools.path_leaf(f['filename']) if path_leaf else f['filename'],
+                                        f['filename'], f['mimetype']))
+                 for f in fileinfo]
+        return cls(fields=data, files=files, from_paths=True, **kwargs)
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return self.len
+
+    def __iter__(self):
+        sent = 0
+        for header, body in self._parts:
+            yield header
+            sent += len(header)
+            if isinstance(body, _FilePart):
+                for chunk in body.chunks(self.chunk_size):
+                    yield chunk
+                    sent += len(chunk)
+                    self._report(sent)
+            else:
+                yield body
+                sent += len(body)
+            yield b"\r\n"
+            sent += 2
+            self._report(sent)
+        yield self._footer
+        self._report(sent + len(self._footer))
+
+    async def __aiter__(self):
+        # The files are read in the default executor, not on the event loop
+        loop = asyncio.get_running_loop()
+        chunks = iter(self)
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    def _report(self, sent):
+        if self.progress is not None:
+            self.progress(sent, self.len)
+
+    def to_bytes(self):
+        """
+        The complete body in memory, for small bodies and tests
+        """
+        return b"".join(self)
+
+    def close(self):
+        for _, body in self._parts:
+            if isinstance(body, _FilePart):
+                body.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+
+from .responsecache import _path, _related
+
+logger = logging.getLogger(__name__)
+
+
+class Collection:
+    """
+    name -> id of the objects of one collection (eg. all access control policies)
+    """
+
+    def __init__(self, uri, ids, warnings=None):
+        self.uri = uri
+        self.ids = ids
+        self.warnings = warnings or []
+
+    def get(self, name):
+        """
+        The id of the object with the name, None if there is none
+        """
+        return self.ids.get(name)
+
+    def resolve(self, names):
+        """
+        {name: id} for all the names, the id is None for names that do not exist
+        """
+        return {name: self.ids.get(name) for name in names}
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _build(path, ret_obj, name_key, id_key):
+    data = ret_obj.get('data')
+    ids = {}
+    if isinstance(data, list):
+        for obj in data:
+            if isinstance(obj, dict) and name_key in obj:
+                ids[obj[name_key]] = obj.get(id_key)
+    return Collection(path, ids, ret_obj.get('warnings', []))
+
+
+class NameIndex:
+    """
+    Per appliance index of the names and ids of collections, to replace the search() functions that retrieve
+    a complete collection to find the id of one name.
+
+    Each collection is retrieved once, with the get_all function of its module, and kept for `ttl` seconds,
+    until a PUT/POST/DELETE through the same appliance object to a related uri (same, parent or child path)
+    or until refreshed.
+
+    The index is opt-in (see ISAMAppliance.enable_name_index), since changes made outside of the appliance
+    object are not seen until the collection expires or refresh() is called.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._collections = {}
+        self._lock = threading.RLock()
+        self.builds = 0
+
+    def collection(self, uri, load, name_key="name", id_key="id", variant=None, refresh=False):
+        """
+        The Collection of the uri, built with load() the first time
+
+        :param uri: uri of the collection, used as key and to invalidate the index after changes
+        :param load: callable returning the return object of get_all, with a list of objects as data
+        :param variant: other arguments of load that change its result (eg. the formatting), part of the key
+        """
+        path = _path(uri)
+        key = (path, variant)
+        with self._lock:
+            entry = self._collections.get(key)
+            if entry is None or refresh or (self.ttl is not None and entry[0] < time.monotonic()):
+                collection = _build(path, load(), name_key, id_key)
+                expires = time.monotonic() + self.ttl if self.ttl is not None else None
+                self._collections[key] = (expires, collection)
+                self.builds += 1
+                logger.debug(f"Name index of {path} built with {len(collection)} names")
+                return collection
+            return entry[1]
+
+    def refresh(self, uri=None):
+        """
+        Drop the collections related to the uri, or all of them, they are rebuilt when next used
+        """
+        with self._lock:
+            if uri is None:
+                self._collections.clear()
+                return
+            path = _path(uri)
+            for key in [key for key in self._collections if _related(key[0], path)]:
+                logger.debug(f"Name index of {key[0]} invalidated by {uri}")
+                del self._collections[key]
+
+
+def collection(isamAppliance, uri, load, name_key="name", id_key="id", variant=None, refresh=False):
+    """
+    The Collection of the uri from the name index of the appliance, or built with load() when the appliance
+    has no name index enabled
+    """
+    name_index = getattr(isamAppliance, 'name_index', None)
+    if name_index is None:
+        return _build(_path(uri), load(), name_key, id_key)
+    return name_index.collection(uri, load, name_key=name_key, id_key=id_key, variant=variant, refresh=refresh)
@@ -0,0 +1,234 @@
+import inspect
+import json
+import logging
+import sys
+import threading
+
+import requests
+
+from .isamappliance import ISAMAppliance
+from .configsnapshot import export
+from .emulator import REDACTED, REDACTED_FIELDS
+from ibmsecurity.user.applianceuser import ApplianceUser
+
+logger = logging.getLogger(__name__)
+
+# Arguments that are the same for every function, left out of the plan
+_COMMON_ARGUMENTS = ('isamAppliance', 'check_mode', 'force')
+
+
+class Mutation:
+    """
+    One change the plan would make.
+
+    For requests, method is POST/PUT/DELETE with the uri and data of the request.
+    For functions called with check_mode=True that report a change, method and uri are None and
+    arguments are the arguments of the function.
+    function is the ibmsecurity function that made the request or reported the change.
+    """
+    __slots__ = ('method', 'uri', 'data', 'description', 'function', 'arguments')
+
+    def __init__(self, method, uri, data=None, description=None, function=None, arguments=None):
+        self.method = method
+        self.uri = uri
+        self.data = data
+        self.description = description
+        self.function = function
+        self.arguments = arguments
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__ if getattr(self, name) is not None}
+
+    def __repr__(self):
+        if self.method is None:
+            arguments = ", ".join(f"{name}={value!r}" for name, value in (self.arguments or {}).items())
+            return f"{self.function}({arguments})"
+        return f"{self.method} {self.uri}"
+
+
+def _caller(frame):
+    """
+    Name of the first ibmsecurity function outside of the appliance classes in the stack, and the description
+    of the request (the `description` argument of invoke_*)
+    """
+    function = None
+    description = None
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.startswith("ibmsecurity.appliance."):
+            if description is None and isinstance(frame.f_locals.get('description'), str):
+                description = frame.f_locals['description']
+        elif module.startswith("ibmsecurity."):
+            function = f"{module}.{frame.f_code.co_name}"
+            break
+        frame = frame.f_back
+    return function, description
+
+
+def _redacted(arguments):
+    """
+    Arguments or request data without the values of secrets (passwords, keys, tokens), plans are saved and logged
+    """
+    if isinstance(arguments, dict):
+        return {name: REDACTED if REDACTED_FIELDS.search(str(name)) and value not in (None, "")
+                else _redacted(value) for name, value in arguments.items()}
+    if isinstance(arguments, list):
+        return [_redacted(value) for value in arguments]
+    return arguments
+
+
+class PlanSession:
+    """
+    Stands in for the requests session of a PlanAppliance: GETs are answered from the snapshot,
+    other requests are added to the plan and never sent
+    """
+
+    def __init__(self, appliance):
+        self.appliance = appliance
+        self.cookies = {}
+        self.hooks = {'response': []}
+
+    def _uri(self, url):
+        return url.split(f"{self.appliance.hostname}:{self.appliance.lmi_port}", 1)[-1]
+
+    @staticmethod
+    def _response(status_code, data):
+        r = requests.models.Response()
+        r.status_code = status_code
+        r.headers['content-type'] = 'application/json'
+        r._content = json.dumps(data).encode('utf-8')
+        return r
+
+    def request(self, method, url, data=None, **kwargs):
+        method = method.upper()
+        uri = self._uri(url)
+        if method == "GET":
+            content = self.appliance.snapshot.response(uri)
+            if content is None:
+                self.appliance._missing(uri)
+                return self._response(404, {'message': f"{uri} is not in the snapshot"})
+            return self._response(200, content)
+        if isinstance(data, (str, bytes)):
+            try:
+                data = json.loads(data)
+            except ValueError:
+                pass
+        else:
+            # eg. multipart uploads, the content is not read
+            data = None
+        self.appliance._record(method, uri, data)
+        return self._response(200, {})
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, data=None, **kwargs):
+        return self.request("POST", url, data=data, **kwargs)
+
+    def put(self, url, data=None, **kwargs):
+        return self.request("PUT", url, data=data, **kwargs)
+
+    def delete(self, url, data=None, **kwargs):
+        return self.request("DELETE", url, data=data, **kwargs)
+
+    def patch(self, url, data=None, **kwargs):
+        return self.request("PATCH", url, data=data, **kwargs)
+
+    def close(self):
+        pass
+
+
+class PlanAppliance(ISAMAppliance):
+    """
+    Appliance that works from a configuration snapshot (see configsnapshot.export) instead of the LMI.
+
+    GET requests are answered from the responses recorded in the snapshot, so the idempotency checks of
+    set/add/update/delete functions cost no requests. Nothing is ever sent to the appliance:
+    - PUT/POST/DELETE requests are added to `plan` instead
+    - functions called with run() and check_mode=True that report a change are added to `plan` with their
+      arguments (secrets redacted)
+    The plan is in the order of the calls.
+
+    Changes in the plan are not applied to the snapshot, a function that depends on an earlier change of
+    the same run sees the state of the snapshot. GETs of uris that are not in the snapshot return a 404
+    and are listed in `missing`, the decisions based on them may be wrong.
+
+    Example:
+        appliance = PlanAppliance.from_appliance(isamAppliance, ConfigStore("/tmp/snapshots"), resources=["web/*"])
+        appliance.run(ibmsecurity.isam.web.reverse_proxy.junctions.set, "default", "/app", ..., check_mode=True)
+        for mutation in appliance.plan:
+            print(mutation)
+    """
+
+    def __init__(self, snapshot, debug=False):
+        ISAMAppliance.__init__(self, snapshot.hostname, ApplianceUser(password=""), debug=debug, lazy_facts=True)
+        self.snapshot = snapshot
+        self.session = PlanSession(self)
+        self.facts = self._restore_facts(dict(snapshot.facts))
+        self.plan = []
+        self.missing = []
+        self._plan_lock = threading.Lock()
+        # (function, arguments) of the run() calls of each thread
+        self._running = threading.local()
+
+    @classmethod
+    def from_store(cls, store, label, **kwargs):
+        """
+        PlanAppliance of a snapshot saved in the store, None if there is no snapshot with the label
+        """
+        snapshot = store.load(label)
+        if snapshot is None:
+            return None
+        return cls(snapshot, **kwargs)
+
+    @classmethod
+    def from_appliance(cls, isamAppliance, store, **kwargs):
+        """
+        Export the configuration of the appliance (keyword arguments of configsnapshot.export) and plan from it
+        """
+        return cls(export(isamAppliance, store, **kwargs))
+
+    def _record(self, method, uri, data):
+        function, description = _caller(sys._getframe(1))
+        with self._plan_lock:
+            self.plan.append(Mutation(method, uri, data=_redacted(data), description=description, function=function))
+        logger.info(f"Plan: {method} {uri}")
+
+    def _missing(self, uri):
+        logger.warning(f"Plan: {uri} is not in the snapshot of {self.hostname}")
+        with self._plan_lock:
+            if uri not in self.missing:
+                self.missing.append(uri)
+
+    def run(self, function, *args, **kwargs):
+        """
+        Call an ibmsecurity function with this appliance, eg. run(junctions.set, "default", "/app", ..., check_mode=True).
+        A change it reports in check_mode is added to the plan with its arguments.
+        """
+        bound = inspect.signature(function).bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = {name: value for name, value in bound.arguments.items() if name not in _COMMON_ARGUMENTS}
+        running = getattr(self._running, 'calls', None)
+        if running is None:
+            running = self._running.calls = []
+        running.append((f"{function.__module__}.{function.__name__}", bound.arguments.get('check_mode') is True,
+                        _redacted(arguments)))
+        try:
+            return function(self, *args, **kwargs)
+        finally:
+            running.pop()
+
+    def create_return_object(self, rc=0, data={}, warnings=[], changed=False):
+        running = getattr(self._running, 'calls', None)
+        if changed and running:
+            # The outermost run() is the function whose change is planned, helpers report it for it
+            function, check_mode, arguments = running[0]
+            if check_mode:
+                with self._plan_lock:
+                    self.plan.append(Mutation(None, None, function=function, arguments=arguments))
+                logger.info(f"Plan: {function} would make a change")
+        return ISAMAppliance.create_return_object(self, rc=rc, data=data, warnings=warnings, changed=changed)
+
+    def get_facts(self):
+        # The facts of the snapshot are used, there is nothing to discover
+        pass
@@ -0,0 +1,108 @@
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def _path(uri):
+    """
+    Strip the query string and trailing slashes of an uri
+    """
+    return uri.split('?', 1)[0].rstrip('/')
+
+
+def _related(path1, path2):
+    """
+    Two paths are related if one of them is a parent (or the same) of the other one.
+    eg. /wga/reverseproxy/default/junctions and /wga/reverseproxy/default/junctions/x
+    """
+    if len(path1) > len(path2):
+        path1, path2 = path2, path1
+    return path2 == path1 or path2.startswith(path1 + '/')
+
+
+class ResponseCache:
+    """
+    In-memory cache for the data of successful GET requests to one appliance.
+
+    Entries are keyed by method and uri, expire after `ttl` seconds and the least recently used
+    entry is evicted when more than `maxsize` responses are cached.
+    Any PUT/POST/DELETE invalidates the cached GETs with a related uri (same, parent or child path).
+
+    The cache is opt-in, since changes made outside of the appliance object (eg. another script or the
+    LMI user interface) are not seen until the entry expires.
+    """
+
+    def __init__(self, ttl=300, maxsize=128):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, method, uri):
+        """
+        Return a copy of the cached data, None if there is no valid entry.
+        Callers are free to modify the returned data.
+        """
+        key = (method, uri)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            data = entry[1]
+        logger.debug(f"Response cache hit for {method} {uri}")
+        return copy.deepcopy(data)
+
+    def put(self, method, uri, data):
+        key = (method, uri)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(data))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, uri=None):
+        """
+        Drop all entries related to the uri, or everything if no uri is given
+        """
+        with self._lock:
+            if uri is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                return
+            path = _path(uri)
+            stale = [key for key in self._entries if _related(_path(key[1]), path)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        if stale:
+            logger.debug(f"Response cache invalidated {len(stale)} entries for {uri}")
+
+    def clear(self):
+        self.invalidate()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
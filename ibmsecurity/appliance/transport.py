@@ -0,0 +1,119 @@
+import logging
+from os import environ
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Exceptions of requests that mean the LMI could not be reached (or did not answer in time)
+TRANSPORT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError)
+
+
+def _env_float(name, default):
+    value = environ.get(name, None)
+    if value is None or value == "":
+        return default
+    if value.lower() == "none":
+        return None
+    return float(value)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that applies a default timeout to every request without an explicit one
+    """
+
+    def __init__(self, timeout=None, *args, **kwargs):
+        self.timeout = timeout
+        HTTPAdapter.__init__(self, *args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout', None) is None:
+            kwargs['timeout'] = self.timeout
+        return HTTPAdapter.send(self, request, **kwargs)
+
+
+class TransportConfig:
+    """
+    HTTP transport settings for the session with the LMI of an appliance.
+
+    Accepted by ISAMAppliance, ISDSAppliance and ISVGAppliance with the `transport` parameter.
+
+    :param pool_connections: number of connection pools to cache (one per host)
+    :param pool_maxsize: maximum number of connections kept alive to the appliance, raise it when sharing
+                         one appliance object between threads
+    :param connect_timeout: seconds to wait for the connection to be established (None waits forever)
+    :param read_timeout: seconds to wait for data from the LMI (None waits forever), keep it larger than the
+                         slowest call in use (eg. snapshot creation, firmware upload, deploy of pending changes)
+    :param retries: number of retries on connection errors and retry_status responses, 0 (the default) disables
+                    retries
+    :param backoff_factor: the n-th retry waits backoff_factor * 2 ** (n - 1) seconds
+    :param retry_status: HTTP status codes that are retried
+    :param retry_methods: HTTP methods that are retried, read-only methods by default. PUT and DELETE can be
+                          added, but the LMI may have applied the request before the failure, a retried DELETE
+                          then fails with a 404. POST is never retried since it may have created something.
+    :param keep_session_cookie: keep the LMI session cookie (LtpaToken2/JSESSIONID) between requests
+                                instead of authenticating on every request
+
+    The defaults of the timeouts and retries can be set with the environment variables
+    IBMSECLIB_CONNECT_TIMEOUT, IBMSECLIB_READ_TIMEOUT and IBMSECLIB_RETRIES ("none" disables a timeout).
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, connect_timeout=None, read_timeout=None, retries=None,
+                 backoff_factor=0.5, retry_status=(502, 503), retry_methods=('GET', 'HEAD', 'OPTIONS'),
+                 keep_session_cookie=False):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        if connect_timeout is None:
+            connect_timeout = _env_float("IBMSECLIB_CONNECT_TIMEOUT", 30.0)
+        self.connect_timeout = connect_timeout
+        if read_timeout is None:
+            read_timeout = _env_float("IBMSECLIB_READ_TIMEOUT", None)
+        self.read_timeout = read_timeout
+        if retries is None:
+            retries = int(environ.get("IBMSECLIB_RETRIES", 0))
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.retry_status = tuple(retry_status)
+        self.retry_methods = tuple(m.upper() for m in retry_methods if m.upper() != 'POST')
+        self.keep_session_cookie = keep_session_cookie
+
+    @property
+    def timeout(self):
+        """
+        The (connect, read) timeout tuple used by requests
+        """
+        return self.connect_timeout, self.read_timeout
+
+    def retry(self):
+        """
+        The urllib3 Retry policy, None if retries are disabled
+        """
+        if not self.retries:
+            return None
+        return Retry(total=self.retries, connect=self.retries, read=self.retries, status=self.retries,
+                     other=0, backoff_factor=self.backoff_factor, status_forcelist=self.retry_status,
+                     allowed_methods=frozenset(self.retry_methods), raise_on_status=False,
+                     respect_retry_after_header=True)
+
+    def adapter(self):
+        return TimeoutHTTPAdapter(timeout=self.timeout, pool_connections=self.pool_connections,
+                                  pool_maxsize=self.pool_maxsize, max_retries=self.retry() or 0)
+
+    def apply(self, session):
+        """
+        Mount the adapter on the https:// and http:// prefixes of a requests session
+        """
+        adapter = self.adapter()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        logger.debug(f"Transport: pool_maxsize={self.pool_maxsize} timeout={self.timeout} retries={self.retries}")
+        return session
+
+    def __repr__(self):
+        return (f"TransportConfig(pool_maxsize={self.pool_maxsize}, connect_timeout={self.connect_timeout}, "
+                f"read_timeout={self.read_timeout}, retries={self.retries}, "
+                f"keep_session_cookie={self.keep_session_cookie})")
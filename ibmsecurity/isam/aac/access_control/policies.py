@@ -1,5 +1,6 @@
 import logging
 import json
+from ibmsecurity.appliance import nameindex
 from ibmsecurity.utilities import tools
 from io import open
 
@@ -155,18 +156,25 @@ def search(isamAppliance, name, formatting="xml", force=False, check_mode=False)
     """
     Search policy id by name
     """
-    ret_obj = get_all(isamAppliance, formatting=formatting)
+    policies = _name_index(isamAppliance, formatting=formatting)
     return_obj = isamAppliance.create_return_object()
 
-    for obj in ret_obj["data"]:
-        if obj["name"] == name:
-            logger.info(f"Found Policy {name} id: {obj['id']}")
-            return_obj["data"] = obj["id"]
-            return_obj["rc"] = 0
+    if name in policies:
+        logger.info(f"Found Policy {name} id: {policies.get(name)}")
+        return_obj["data"] = policies.get(name)
+        return_obj["rc"] = 0
 
     return return_obj
 
 
+def _name_index(isamAppliance, formatting="xml", refresh=False):
+    """
+    Names and ids of all policies, kept by the name index of the appliance when enabled (see appliance/nameindex.py)
+    """
+    return nameindex.collection(isamAppliance, uri, lambda: get_all(isamAppliance, formatting=formatting),
+                                variant=formatting, refresh=refresh)
+
+
 def set_file(
     isamAppliance,
     name,
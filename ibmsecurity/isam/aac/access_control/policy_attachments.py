@@ -387,54 +387,39 @@ def _convert_policy_name_to_id(isamAppliance, policies):
     to:
     [{'id': '<policy id>', 'type': 'policy'}, {'id': '<policyset id>', 'type': 'policyset'},
      {'id': '<definition id>, 'type': 'definition'}]
+
+    Each type of policy is retrieved once per call (or once while the name index of the appliance is
+    enabled, see appliance/nameindex.py), not once per name.
     """
-    pol_ids = []
     import ibmsecurity.isam.aac.access_control.policies
     import ibmsecurity.isam.aac.access_control.policy_sets
     import ibmsecurity.isam.aac.api_protection.definitions
 
+    name_indexes = {
+        "policy": ("policy", ibmsecurity.isam.aac.access_control.policies._name_index),
+        "policyset": ("policy set", ibmsecurity.isam.aac.access_control.policy_sets._name_index),
+        "definition": ("api definition", ibmsecurity.isam.aac.api_protection.definitions._name_index),
+    }
+    collections = {}
+    pol_ids = []
     for pol in policies:
         name = pol["name"]
         type = pol["type"]
-        if type == "policy":
-            ret_obj = ibmsecurity.isam.aac.access_control.policies.search(
-                isamAppliance, name
-            )
-            pol_id = ret_obj["data"]
-            if pol_id != {}:
-                logger.debug(f"Converting policy {name} to ID: {pol_id}")
-            else:
-                logger.warning(f"Unable to find policy {name}, skipping.")
-        elif type == "policyset":
-            ret_obj = ibmsecurity.isam.aac.access_control.policy_sets.search(
-                isamAppliance, name
-            )
-            pol_id = ret_obj["data"]
-            if pol_id != {}:
-                logger.debug(
-                    f"Converting policy set {name} to ID: {pol_id}"
-                )
-            else:
-                logger.warning(f"Unable to find policy set {name}, skipping.")
-        elif type == "definition":
-            ret_obj = ibmsecurity.isam.aac.api_protection.definitions.search(
-                isamAppliance, name
-            )
-            pol_id = ret_obj["data"]
-            if pol_id != {}:
-                logger.debug(
-                    f"Converting api definition {name} to ID: {pol_id}"
-                )
-            else:
-                logger.warning(
-                    f"Unable to find api definition {name}, skipping."
-                )
-        else:
+        if type not in name_indexes:
             from ibmsecurity.appliance.ibmappliance import IBMError
 
             raise IBMError(
                 "999", f"Policy specified with unknown type: {type}/{name}"
             )
+        description, name_index = name_indexes[type]
+        if type not in collections:
+            collections[type] = name_index(isamAppliance)
+        pol_id = collections[type].get(name)
+        if pol_id is not None:
+            logger.debug(f"Converting {description} {name} to ID: {pol_id}")
+        else:
+            logger.warning(f"Unable to find {description} {name}, skipping.")
+            pol_id = {}
 
         pol_ids.append({"id": pol_id, "type": type})
 
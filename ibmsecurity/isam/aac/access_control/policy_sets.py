@@ -1,4 +1,5 @@
 import logging
+from ibmsecurity.appliance import nameindex
 from ibmsecurity.utilities import tools
 
 logger = logging.getLogger(__name__)
@@ -54,18 +55,25 @@ def search(isamAppliance, name, force=False, check_mode=False):
     """
     Search policy set id by name
     """
-    ret_obj = get_all(isamAppliance)
+    policy_sets = _name_index(isamAppliance)
     return_obj = isamAppliance.create_return_object()
 
-    for obj in ret_obj["data"]:
-        if obj["name"] == name:
-            logger.info(f"Found Policy Set {name} id: {obj['id']}")
-            return_obj["data"] = obj["id"]
-            return_obj["rc"] = 0
+    if name in policy_sets:
+        logger.info(f"Found Policy Set {name} id: {policy_sets.get(name)}")
+        return_obj["data"] = policy_sets.get(name)
+        return_obj["rc"] = 0
 
     return return_obj
 
 
+def _name_index(isamAppliance, refresh=False):
+    """
+    Names and ids of all policy sets, kept by the name index of the appliance when enabled
+    (see appliance/nameindex.py)
+    """
+    return nameindex.collection(isamAppliance, uri, lambda: get_all(isamAppliance), refresh=refresh)
+
+
 def set(
     isamAppliance,
     name,
@@ -155,12 +163,11 @@ def _convert_policy_name_to_id(isamAppliance, policies):
     pol_ids = []
     import ibmsecurity.isam.aac.access_control.policies
 
+    # All policies are retrieved once, not once per name
+    pol_index = ibmsecurity.isam.aac.access_control.policies._name_index(isamAppliance)
     for pol_name in policies:
-        ret_obj = ibmsecurity.isam.aac.access_control.policies.search(
-            isamAppliance, pol_name
-        )
-        pol_id = ret_obj["data"]
-        if pol_id != {}:
+        pol_id = pol_index.get(pol_name)
+        if pol_id is not None:
             pol_ids.append(pol_id)
             logger.debug(f"Converting policy {pol_name} to ID: {pol_id}")
         else:
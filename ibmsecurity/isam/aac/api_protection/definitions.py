@@ -1,5 +1,6 @@
 import logging
 
+from ibmsecurity.appliance import nameindex
 from ibmsecurity.isam.fed import attribute_source
 from ibmsecurity.utilities import tools
 from ibmsecurity.isam.aac import access_policy
@@ -52,19 +53,26 @@ def search(isamAppliance, name, check_mode=False, force=False):
     """
     Search definition id by name
     """
-    ret_obj = get_all(isamAppliance)
+    definitions = _name_index(isamAppliance)
     return_obj = isamAppliance.create_return_object()
-    return_obj["warnings"] = ret_obj["warnings"]
+    return_obj["warnings"] = definitions.warnings
 
-    for obj in ret_obj['data']:
-        if obj['name'] == name:
-            logger.info(f"Found definition {name} id: {obj['id']}")
-            return_obj['data'] = obj['id']
-            return_obj['rc'] = 0
+    if name in definitions:
+        logger.info(f"Found definition {name} id: {definitions.get(name)}")
+        return_obj['data'] = definitions.get(name)
+        return_obj['rc'] = 0
 
     return return_obj
 
 
+def _name_index(isamAppliance, refresh=False):
+    """
+    Names and ids of all API protection definitions, kept by the name index of the appliance when enabled
+    (see appliance/nameindex.py)
+    """
+    return nameindex.collection(isamAppliance, uri, lambda: get_all(isamAppliance), refresh=refresh)
+
+
 def add(isamAppliance, name, description="", accessPolicyName=None, grantTypes=["AUTHORIZATION_CODE"],
         tcmBehavior="NEVER_PROMPT",
         accessTokenLifetime=3600, accessTokenLength=20, enforceSingleUseAuthorizationGrant=False,
@@ -1,10 +1,8 @@
 import logging
 import os.path
-import zipfile
-import shutil
 from ibmsecurity.isam.aac.runtime_template import directory
 from ibmsecurity.isam.aac.runtime_template import file
-from ibmsecurity.utilities.tools import get_random_temp_dir, files_same_zip_content
+from ibmsecurity.utilities.zipmanifest import ZipManifest, server_manifest
 
 logger = logging.getLogger(__name__)
 
@@ -41,23 +39,15 @@ def import_file(isamAppliance, filename, delete_missing=False, check_mode=False,
 
     warnings = []
 
-    if force is True or _check_import(isamAppliance, filename):
+    diff = None
+    if force is not True:
+        diff = _check_import(isamAppliance, filename)
+    if force is True or diff:
         if delete_missing is True:
-            tempdir = get_random_temp_dir()
-            tempfilename = "template_files.zip"
-            tempfile =  os.path.join(tempdir, tempfilename)
-            export_file(isamAppliance, tempfile)
-
-            zServerFile = zipfile.ZipFile(tempfile)
-            zClientFile = zipfile.ZipFile(filename)
-
-            files_on_server = [];
-            for info in zServerFile.infolist():
-                files_on_server.append(info.filename)
-            files_on_client = [];
-            for info in zClientFile.infolist():
-                files_on_client.append(info.filename)
-            missing_client_files = [x for x in files_on_server if x not in files_on_client]
+            # The server content is exported once, for the comparison and the files to delete
+            if diff is None:
+                diff = _compare(isamAppliance, filename)
+            missing_client_files = sorted(diff.removed) if diff is not None else []
 
             if missing_client_files != []:
               logger.info(f"list all missing files in {filename}, which will be deleted on the server: {missing_client_files}.")
@@ -73,8 +63,6 @@ def import_file(isamAppliance, filename, delete_missing=False, check_mode=False,
                     if search_dir not in missing_client_files:
                         logger.debug(f"delete file on the server: {x}.")
                         delete(isamAppliance, x, "file", check_mode=check_mode)
-            zServerFile.close()
-            shutil.rmtree(tempdir)
 
         if check_mode is True:
             return isamAppliance.create_return_object(changed=True)
@@ -96,29 +84,33 @@ def import_file(isamAppliance, filename, delete_missing=False, check_mode=False,
 
     return isamAppliance.create_return_object(warnings=warnings)
 
+def _compare(isamAppliance, filename):
+    """
+    Differences between the zip file and the runtime template files, None if nothing was exported
+    """
+    with server_manifest(lambda tempfile: export_file(isamAppliance, tempfile)) as manifest:
+        if manifest is None:
+            return None
+        return ZipManifest.from_zip(filename).diff(manifest)
+
+
 def _check_import(isamAppliance, filename):
     """
     Checks if runtime template zip from server and client differ
     :param isamAppliance:
     :param filename:
-    :return:
+    :return: the differences (ManifestDiff) if an import is needed, otherwise False
     """
 
-    tempdir = get_random_temp_dir()
-    tempfilename = "template_files.zip"
-    tempfile =  os.path.join(tempdir, tempfilename)
-    export_file(isamAppliance, tempfile)
-
-    if os.path.exists(tempfile):
-      identical = files_same_zip_content(filename,tempfile)
+    diff = _compare(isamAppliance, filename)
 
-      shutil.rmtree(tempdir)
-      if identical:
+    if diff is not None:
+      if diff.identical:
           logger.info(f"runtime template files {filename} are identical with the server content. No update necessary.")
           return False
       else:
           logger.info(f"runtime template files {filename} differ from the server content. Updating runtime template files necessary.")
-          return True
+          return diff
     else:
       logger.info("missing zip file from server. Comparison skipped.")
       return False
@@ -64,6 +64,7 @@ def set(isamAppliance, id, code, check_mode=False, force=False):
             if 'activations' not in isamAppliance.facts:
                 isamAppliance.facts['activations'] = []
             isamAppliance.facts['activations'].append(id)
+            isamAppliance.save_facts()
             return ret_obj
 
     return isamAppliance.create_return_object()
@@ -82,6 +83,7 @@ def delete(isamAppliance, id, check_mode=False, force=False):
                 f"/isam/capabilities/{id}/v1")
             # Update 'facts', remove module
             isamAppliance.facts['activations'].remove(id)
+            isamAppliance.save_facts()
             return ret_obj
 
     return isamAppliance.create_return_object()
@@ -51,7 +51,8 @@ def delete(isamAppliance, file_id, check_mode=False, force=False):
     return isamAppliance.create_return_object(warnings=warnings)
 
 
-def export_file(isamAppliance, file_id, filename, check_mode=False, force=False):
+def export_file(isamAppliance, file_id, filename, check_mode=False, force=False, chunk_size=None, resume=False,
+                progress=None):
     """
     Export a cluster manager log file
     """
@@ -62,6 +63,6 @@ def export_file(isamAppliance, file_id, filename, check_mode=False, force=False)
             return isamAppliance.invoke_get_file(
                 "Export a cluster manager log file",
                 f"/isam/cluster/logging/{file_id}/v1?export",
-                filename, requires_model=requires_model)
+                filename, requires_model=requires_model, chunk_size=chunk_size, resume=resume, progress=progress)
 
     return isamAppliance.create_return_object()
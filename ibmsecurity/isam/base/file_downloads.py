@@ -11,7 +11,8 @@ def get(isamAppliance, file_path='/', recursive=True, check_mode=False, force=Fa
                                     f"/isam/downloads/{file_path}/?recursive={recursive}")
 
 
-def export_file(isamAppliance, file_path, filename, check_mode=False, force=False):
+def export_file(isamAppliance, file_path, filename, check_mode=False, force=False, chunk_size=None, resume=False,
+                progress=None):
     """
     Downloading a file from the file downloads area
     """
@@ -23,6 +24,6 @@ def export_file(isamAppliance, file_path, filename, check_mode=False, force=Fals
             return isamAppliance.invoke_get_file(
                 "Downloading a file from the file downloads area",
                 f"/isam/downloads/{file_path}?type=File&browser=&",
-                filename, True)
+                filename, True, chunk_size=chunk_size, resume=resume, progress=progress)
 
     return isamAppliance.create_return_object()
@@ -1,6 +1,7 @@
 import logging
 import ibmsecurity.utilities.tools
-import time
+from ibmsecurity.utilities import waiter
+from ibmsecurity.utilities.waiter import Waiter
 
 logger = logging.getLogger(__name__)
 
@@ -81,31 +82,13 @@ def restart_and_wait(isamAppliance, wait_time=300, check_freq=5, check_mode=Fals
         ret_obj = restart(isamAppliance)
 
         if ret_obj['rc'] == 0:
-            sec = 0
-
-            # Now check if it is up and running
-            while 1:
-                ret_obj = ibmsecurity.isam.base.firmware.get(isamAppliance, check_mode=check_mode, force=force,
-                                                             ignore_error=True)
-
-                # check partition last_boot time
-                if ret_obj['rc'] == 0 and isinstance(ret_obj['data'], list) and len(ret_obj['data']) > 0 and \
-                        (('last_boot' in ret_obj['data'][0] and ret_obj['data'][0]['last_boot'] != firmware['data'][0][
-                            'last_boot'] and ret_obj['data'][0]['active'] == True) or (
-                                 'last_boot' in ret_obj['data'][1] and ret_obj['data'][1]['last_boot'] !=
-                                 firmware['data'][1]['last_boot'] and ret_obj['data'][1]['active'] == True)):
-                    logger.info("Server is responding and has a different boot time!")
-                    return isamAppliance.create_return_object(warnings=warnings)
-                else:
-                    time.sleep(check_freq)
-                    sec += check_freq
-                    logger.debug(
-                        f"Server is not responding yet. Waited for {sec} secs, next check in {check_freq} secs.")
-
-                if sec >= wait_time:
-                    warnings.append(
-                        f"The FIPS restart not detected or completed, exiting... after {sec} seconds")
-                    break
+            # Now check if it is up and running, with a different boot time of the active partition
+            result = Waiter.from_check_freq(wait_time, check_freq).wait(
+                waiter.partition_rebooted(isamAppliance, firmware['data']), "FIPS restart",
+                isamAppliance=isamAppliance)
+            if not result:
+                warnings.append(
+                    f"The FIPS restart not detected or completed, exiting... after {int(result.elapsed)} seconds")
 
     return isamAppliance.create_return_object(warnings=warnings)
 
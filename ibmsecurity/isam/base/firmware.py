@@ -41,6 +41,9 @@ def swap(isamAppliance, check_mode=False, force=False):
             if partition['active'] is False:  # Get version of inactive partition (active now!)
                 ver = partition['firmware_version'].split(' ')
                 isamAppliance.facts['version'] = ver[-1]
+                isamAppliance.facts['version_info'] = isamAppliance._parse_version(ver[-1])
+        # The appliance restarts on the other partition, the other facts are discovered again after that
+        isamAppliance.invalidate_facts(in_memory=False)
 
         return ret_obj
 
@@ -1,6 +1,7 @@
 import logging
-import time
 from ibmsecurity.appliance.ibmappliance import IBMError
+from ibmsecurity.utilities import waiter
+from ibmsecurity.utilities.waiter import Waiter
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +29,7 @@ def await_startup(isamAppliance, wait_time=300, check_freq=5, start_time=None, c
     Wait for appliance to bootup or LMI to restart
     Checking lmi responding is best option from REST API perspective
 
-    # Frequency (in seconds) when routine will check if server is up
+    # Longest pause (in seconds) between checks if server is up, the first checks come sooner
     # check_freq (seconds)
 
     # Ideally start_time should be taken before restart request is send to LMI
@@ -44,26 +45,13 @@ def await_startup(isamAppliance, wait_time=300, check_freq=5, start_time=None, c
         ret_obj = get(isamAppliance)
         start_time = ret_obj['data'][0]['start_time']
 
-    sec = 0
     warnings = []
 
     # Now check if it is up and running
-    while 1:
-        ret_obj = get(isamAppliance)
-
-        if ret_obj['rc'] == 0 and isinstance(ret_obj['data'], list) and len(ret_obj['data']) > 0 and 'start_time' in \
-                ret_obj['data'][0] and ret_obj['data'][0]['start_time'] != start_time:
-            logger.info("Server is responding and has a different start time!")
-            return isamAppliance.create_return_object(warnings=warnings)
-        else:
-            time.sleep(check_freq)
-            sec += check_freq
-            logger.debug(
-                f"Server is not responding yet. Waited for {sec} secs, next check in {check_freq} secs.")
-
-        if sec >= wait_time:
-            warnings.append(f"The LMI restart not detected or completed, exiting... after {sec} seconds")
-            break
+    result = Waiter.from_check_freq(wait_time, check_freq).wait(waiter.lmi_restarted(isamAppliance, start_time),
+                                                                "LMI startup", isamAppliance=isamAppliance)
+    if not result:
+        warnings.append(f"The LMI restart not detected or completed, exiting... after {int(result.elapsed)} seconds")
 
     return isamAppliance.create_return_object(warnings=warnings)
 
@@ -74,5 +62,9 @@ def restart_and_wait(isamAppliance, wait_time=300, check_freq=5, check_mode=Fals
 
     restart(isamAppliance, check_mode, force)
 
-    return await_startup(isamAppliance, wait_time=wait_time, check_freq=check_freq, start_time=_start_time,
-                         check_mode=False, force=False)
+    ret_obj = await_startup(isamAppliance, wait_time=wait_time, check_freq=check_freq, start_time=_start_time,
+                            check_mode=False, force=False)
+    # Facts are discovered again once the LMI is back, discovery against a LMI that is down finds nothing
+    if check_mode is False and not ret_obj['warnings']:
+        isamAppliance.invalidate_facts()
+    return ret_obj
@@ -180,7 +180,8 @@ def apply(isamAppliance, id=None, comment=None, check_mode=False, force=False):
     return isamAppliance.create_return_object()
 
 
-def download(isamAppliance, filename, id=None, comment=None, check_mode=False, force=False):
+def download(isamAppliance, filename, id=None, comment=None, check_mode=False, force=False, chunk_size=None,
+             resume=False, progress=None):
     """
     Download one snapshot file to a zip file.
     Multiple file download is now supported. Simply pass a list of id.
@@ -208,12 +209,14 @@ def download(isamAppliance, filename, id=None, comment=None, check_mode=False, f
         if check_mode is False:  # We are in check_mode but would try to download named ids
             # Download all ids known so far
             return isamAppliance.invoke_get_file("Downloading multiple snapshots",
-                                                 "/snapshots/download?record_ids=" + ",".join(ids), filename)
+                                                 "/snapshots/download?record_ids=" + ",".join(ids), filename,
+                                                 chunk_size=chunk_size, resume=resume, progress=progress)
 
     return isamAppliance.create_return_object()
 
 
-def download_latest(isamAppliance, dir='.', check_mode=False, force=False):
+def download_latest(isamAppliance, dir='.', check_mode=False, force=False, chunk_size=None, resume=False,
+                    progress=None):
     """
     Download latest snapshot file to a zip file.
     """
@@ -225,7 +228,8 @@ def download_latest(isamAppliance, dir='.', check_mode=False, force=False):
     file = snaps['filename']
     filename = os.path.join(dir, file)
 
-    return download(isamAppliance, filename, id, check_mode, force)
+    return download(isamAppliance, filename, id, check_mode=check_mode, force=force, chunk_size=chunk_size,
+                    resume=resume, progress=progress)
 
 
 def apply_latest(isamAppliance, check_mode=False, force=False):
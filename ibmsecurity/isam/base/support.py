@@ -143,7 +143,8 @@ def modify(isamAppliance, id, filename, comment, check_mode=False, force=False):
     return isamAppliance.create_return_object()
 
 
-def download(isamAppliance, filename, id, check_mode=False, force=False):
+def download(isamAppliance, filename, id, check_mode=False, force=False, chunk_size=None, resume=False,
+             progress=None):
     """
     Download snapshot file(s) to a zip file.
     Note: id can be a list or a single value
@@ -153,12 +154,14 @@ def download(isamAppliance, filename, id, check_mode=False, force=False):
             if isinstance(id, list):
                 id = ','.join(id)
             uri_download = f"{uri}/download{tools.create_query_string(record_ids=id)}"
-            return isamAppliance.invoke_get_file("Downloading snapshots", uri_download, filename)
+            return isamAppliance.invoke_get_file("Downloading snapshots", uri_download, filename,
+                                                 chunk_size=chunk_size, resume=resume, progress=progress)
 
     return isamAppliance.create_return_object()
 
 
-def download_latest(isamAppliance, dir='.', check_mode=False, force=False):
+def download_latest(isamAppliance, dir='.', check_mode=False, force=False, chunk_size=None, resume=False,
+                    progress=None):
     """
     Download latest support file to a zip file.
     """
@@ -170,7 +173,8 @@ def download_latest(isamAppliance, dir='.', check_mode=False, force=False):
     file = sup_file['filename']
     filename = os.path.join(dir, file)
 
-    return download(isamAppliance, filename, id, check_mode, force)
+    return download(isamAppliance, filename, id, check_mode, force, chunk_size=chunk_size, resume=resume,
+                    progress=progress)
 
 
 def compare(isamAppliance1, isamAppliance2):
@@ -28,11 +28,14 @@ def get_rp_health_summary(isamAppliance, check_mode=False, force=False):
                                     "/wga/widgets/health.json",requires_model=requires_model)
 
 
-def get_rp_throughput_summary(isamAppliance, date, duration, aspect, summary=None, check_mode=False, force=False):
+def get_rp_throughput_summary(isamAppliance, date, duration, aspect, summary=None, check_mode=False, force=False,
+                              start=0, count=25):
     """
     Retrieving a summary of throughput for all Reverse Proxy instances
+
+    start and count select the records (range header items=start-end), the first 25 by default
     """
-    headers = {'Accept': 'application/json', 'range': 'items=0-24'}
+    headers = {'Accept': 'application/json', 'range': f"items={start}-{start + count - 1}"}
     return isamAppliance.invoke_get_with_headers("Retrieving a summary of throughput for all Reverse Proxy instances",
                                                  f"/analysis/reverse_proxy_traffic/throughput/{tools.create_query_string(summary=summary, date=date, duration=duration, aspect=aspect)}",
                                                                                requires_model=requires_model,
@@ -3,6 +3,7 @@ import os
 
 import ibmsecurity
 from ibmsecurity.utilities import tools
+from ibmsecurity.appliance import compare as appliance_compare
 
 logger = logging.getLogger(__name__)
 
@@ -1093,53 +1094,34 @@ def _check_instance_exist(isamAppliance, instance_name):
     return False, ret_obj['warnings']
 
 
-def compare(isamAppliance1, isamAppliance2):
+def _strip_server_counters(srv):
     """
-    Compare resources between two appliances
+    Remove the volatile server_uuid, current_requests and total_requests values from the servers string
     """
+    if "servers" in srv:
+        values = [value for value in srv['servers'].split(";")
+                  if value.find("server_uuid") == -1 and
+                  value.find("current_requests") == -1 and
+                  value.find("total_requests") == -1]
+        srv['servers'] = ";".join(values) if values else None
+    return srv
 
-    app1_instances = ibmsecurity.isam.web.api_access_control.resources.instances.get_all(isamAppliance1)
-    app2_instances = ibmsecurity.isam.web.api_access_control.resources.instances.get_all(isamAppliance2)
 
-    obj1 = []
-    obj2 = []
-
-    for inst1 in app1_instances['data']:
-        servers = get_all(isamAppliance1, instance_name=inst1['name'])
-        for srv in servers['data']:
-            if "servers" in srv:
-                srvlist = srv['servers'].split(";")
-                new_str = None
-                for value in srvlist:
-                    if value.find("server_uuid") == -1 and \
-                            value.find("current_requests") == -1 and \
-                            value.find("total_requests") == -1:
-                        if new_str is None:
-                            new_str = value
-                        else:
-                            new_str = new_str + ";" + value
-                srv['servers'] = new_str
-            obj1.append(srv)
-
-    for inst2 in app2_instances['data']:
-        servers = get_all(isamAppliance2, instance_name=inst2['name'])
-        for srv in servers['data']:
-            if "servers" in srv:
-                srvlist = srv['servers'].split(";")
-                new_str = None
-                for value in srvlist:
-                    if value.find("server_uuid") == -1 and \
-                            value.find("current_requests") == -1 and \
-                            value.find("total_requests") == -1:
-                        if new_str is None:
-                            new_str = value
-                        else:
-                            new_str = new_str + ";" + value
-                srv['servers'] = new_str
-            obj2.append(srv)
-
-    app1_instances['data'].extend(obj1)
-    app2_instances['data'].extend(obj2)
+def compare(isamAppliance1, isamAppliance2):
+    """
+    Compare resources between two appliances
+    """
+    # The instances of both appliances and the resources of every instance are retrieved concurrently
+    app1_instances, app2_instances = appliance_compare.collect(
+        isamAppliance1, isamAppliance2,
+        get_all=ibmsecurity.isam.web.api_access_control.resources.instances.get_all,
+        get=lambda appliance, inst: get_all(appliance, instance_name=inst['name']))
+
+    for instances in (app1_instances, app2_instances):
+        resources = []
+        for inst in instances['data']:
+            resources.extend(_strip_server_counters(srv) for srv in inst.pop('details'))
+        instances['data'].extend(resources)
 
     return tools.json_compare(app1_instances, app2_instances,
                               deleted_keys=['server_uuid', 'current_requests', 'total_requests'])
@@ -1152,41 +1134,12 @@ def compare_one_instance(isamAppliance1, isamAppliance2, instance1_name, instanc
     if instance2_name is None or instance2_name == '':
         instance2_name = instance1_name
 
-    obj1 = []
-    obj2 = []
-    servers1 = get_all(isamAppliance1, instance_name=instance1_name)
-    for srv in servers1['data']:
-        if "servers" in srv:
-            srvlist = srv['servers'].split(";")
-            new_str = None
-            for value in srvlist:
-                if value.find("server_uuid") == -1 and \
-                        value.find("current_requests") == -1 and \
-                        value.find("total_requests") == -1:
-                    if new_str is None:
-                        new_str = value
-                    else:
-                        new_str = new_str + ";" + value
-            srv['servers'] = new_str
-        obj1.append(srv)
-
-    servers2 = get_all(isamAppliance2, instance_name=instance2_name)
-    for srv in servers2['data']:
-        if "servers" in srv:
-            srvlist = srv['servers'].split(";")
-            new_str = None
-            for value in srvlist:
-                if value.find("server_uuid") == -1 and \
-                        value.find("current_requests") == -1 and \
-                        value.find("total_requests") == -1:
-                    if new_str is None:
-                        new_str = value
-                    else:
-                        new_str = new_str + ";" + value
-            srv['servers'] = new_str
-        obj2.append(srv)
-
-    servers1['data'] = obj1
-    servers2['data'] = obj2
+    servers1, servers2 = appliance_compare.collect(
+        isamAppliance1, isamAppliance2,
+        get_all=(lambda appliance: get_all(appliance, instance_name=instance1_name),
+                 lambda appliance: get_all(appliance, instance_name=instance2_name)))
+    for servers in (servers1, servers2):
+        for srv in servers['data']:
+            _strip_server_counters(srv)
 
     return tools.json_compare(servers1, servers2, deleted_keys=['server_uuid', 'current_requests', 'total_requests'])
@@ -35,7 +35,8 @@ def get(isamAppliance, id, file_id, size=None, start=None, options=None, check_m
                                     requires_model=requires_model)
 
 
-def export_file(isamAppliance, id, file_id, filepath, check_mode=False, force=False):
+def export_file(isamAppliance, id, file_id, filepath, check_mode=False, force=False, chunk_size=None,
+                resume=False, progress=None):
     """
     Export the log file of an existing instance
     """
@@ -50,7 +51,8 @@ def export_file(isamAppliance, id, file_id, filepath, check_mode=False, force=Fa
     else:
         return isamAppliance.invoke_get_file(
             "Export the log file of an existing instance",
-            "{0}/{1}/logging/{2}/v1?export".format(uri, id, file_id), filepath, requires_model=requires_model
+            "{0}/{1}/logging/{2}/v1?export".format(uri, id, file_id), filepath, requires_model=requires_model,
+            chunk_size=chunk_size, resume=resume, progress=progress
         )
 
 
@@ -3,6 +3,7 @@ from urllib.parse import unquote_plus
 
 import logging
 import ibmsecurity.utilities.tools
+import ibmsecurity.utilities.stanzas
 from ibmsecurity.utilities.tools import jsonSortedListEncoder
 import json
 
@@ -126,6 +127,27 @@ def set(isamAppliance, reverseproxy_id, stanza_id, entries, check_mode=False, fo
     return isamAppliance.create_return_object()
 
 
+def set_stanzas(isamAppliance, reverseproxy_id, stanzas, check_mode=False, force=False):
+    """
+    Set the entries of several stanzas at once - Reverse Proxy
+
+    stanzas is {stanza_id: entries}, entries in the format of set() or a dict of key to value(s),
+    see ibmsecurity.utilities.stanzas. Each stanza is retrieved once, missing stanzas are created and
+    only the keys that differ are replaced, with one request to add all values of a stanza.
+    """
+    from ibmsecurity.isam.web.reverse_proxy.configuration import stanza
+
+    return ibmsecurity.utilities.stanzas.sync(
+        isamAppliance, stanzas,
+        get_stanzas=lambda appliance: stanza.get(appliance, reverseproxy_id),
+        get_entries=lambda appliance, stanza_id: get_all(appliance, reverseproxy_id, stanza_id),
+        add_stanza=lambda appliance, stanza_id: stanza.add(appliance, reverseproxy_id, stanza_id, force=True),
+        delete_entry=lambda appliance, stanza_id, entry_id: delete_all(appliance, reverseproxy_id, stanza_id, entry_id,
+                                                                       force=True),
+        add_entries=lambda appliance, stanza_id, entries: _add(appliance, reverseproxy_id, stanza_id, entries),
+        check_mode=check_mode, force=force)
+
+
 def _collapse_entries_obj(entries):
     """
    Convert [['key', 'value1'], ['key', 'value2]] to {'key': ['value1', 'value2'], ...}
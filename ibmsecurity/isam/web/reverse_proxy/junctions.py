@@ -1,7 +1,10 @@
 import logging
 from ibmsecurity.utilities import tools
+from ibmsecurity.appliance import compare as appliance_compare
 import ibmsecurity.isam.web.reverse_proxy.junctions_server as junctions_server
+import ibmsecurity.isam.web.reverse_proxy.junctions_parser as junctions_parser
 import json
+from concurrent.futures import ThreadPoolExecutor
 from ibmsecurity.isam.web.reverse_proxy.junctions_config import server_fields
 from ibmsecurity.utilities.tools import jsonSortedListEncoder
 
@@ -75,24 +78,9 @@ def get(isamAppliance, reverseproxy_id, junctionname, check_mode=False, force=Fa
                                        requires_version=requires_version,
                                        warnings=warnings)
     # servers are provided as a single string, here we parse it out into a list + dict
-    servers = []
-    if tools.version_compare(isamAppliance.facts["version"], "9.0.1.0") > 0:
-        srv_separator = '#'
-    else:
-        srv_separator = '&'
-    srvs = ret_obj['data']['servers'].split(srv_separator)
     logger.debug(f"Servers in raw string: {ret_obj['data']['servers']}")
-    logger.debug(f"Number of servers in junction: {len(srvs)}")
-    for srv in srvs:
-        logger.debug(f"Parsing Server: {srv}")
-        server = {}
-        for s in srv.split(';'):
-            if s != '':
-                kv = s.split('!')
-                server[kv[0]] = kv[1]
-        servers.append(server)
-
-    ret_obj['data']['servers'] = servers
+    ret_obj['data']['servers'] = _parse_servers(isamAppliance, ret_obj['data']['servers'])
+    logger.debug(f"Number of servers in junction: {len(ret_obj['data']['servers'])}")
     return ret_obj
 
 
@@ -623,234 +611,230 @@ def compare(isamAppliance1, isamAppliance2, reverseproxy_id, reverseproxy_id2=No
     """
     if reverseproxy_id2 is None or reverseproxy_id2 == '':
         reverseproxy_id2 = reverseproxy_id
-    ret_obj1 = get_all(isamAppliance1, reverseproxy_id)
-    ret_obj2 = get_all(isamAppliance2, reverseproxy_id2)
-
-    for jct in ret_obj1['data']:
-        ret_obj = get(isamAppliance1, reverseproxy_id, jct['id'])
-        del ret_obj['data']['active_worker_threads']
-        for srv in ret_obj['data']['servers']:
-            del srv['current_requests']
-            del srv['operation_state']
-            del srv['server_state']
-            if ret_obj['data']['stateful_junction'] == 'no':
-                del srv['server_uuid']
-            del srv['total_requests']
-        jct['details'] = ret_obj['data']
-
-    for jct in ret_obj2['data']:
-        ret_obj = get(isamAppliance2, reverseproxy_id2, jct['id'])
-        del ret_obj['data']['active_worker_threads']
-        for srv in ret_obj['data']['servers']:
-            del srv['current_requests']
-            del srv['operation_state']
-            del srv['server_state']
-            if ret_obj['data']['stateful_junction'] == 'no':
-                del srv['server_uuid']
-            del srv['total_requests']
-        jct['details'] = ret_obj['data']
+
+    def _normalize(jct):
+        # The uuid of the servers only matters for stateful junctions
+        if jct['details'].get('stateful_junction') == 'no':
+            for srv in jct['details'].get('servers', []):
+                srv.pop('server_uuid', None)
+
+    # Both lists and the details of all junctions are retrieved concurrently
+    ret_obj1, ret_obj2 = appliance_compare.collect(
+        isamAppliance1, isamAppliance2,
+        get_all=(lambda appliance: get_all(appliance, reverseproxy_id),
+                 lambda appliance: get_all(appliance, reverseproxy_id2)),
+        get=(lambda appliance, jct: get(appliance, reverseproxy_id, jct['id']),
+             lambda appliance, jct: get(appliance, reverseproxy_id2, jct['id'])),
+        volatile=('active_worker_threads', 'servers/current_requests', 'servers/operation_state',
+                  'servers/server_state', 'servers/total_requests'),
+        normalize=_normalize)
 
     return tools.json_compare(ret_obj1, ret_obj2, deleted_keys=['active_worker_threads', 'servers/current_requests',
                                                                 'servers/operation_state', 'servers/server_state',
                                                                 'servers/server_uuid', 'servers/total_requests'])
 
-def set_all(isamAppliance, reverseproxy_id: str, junctions: list=[], check_mode=False, force=False, warnings=[]):
+def _parse_servers(isamAppliance, servers):
+    """
+    Parse the servers string of a junction into a list of dicts
+    """
+    return junctions_parser.parse_servers(servers, junctions_parser.server_separator(isamAppliance))
+
+
+def _normalize_junction(junction):
+    """
+    Prepare a desired junction for comparison with the current junction and for set().
+    Returns the junction (a copy) and the additional servers (all servers except the first one).
+    """
+    j = dict(junction)
+    j.pop('isVirtualJunction', None)
+    if j.get('junction_soft_limit', None) is None:
+        j['junction_soft_limit'] = '0 - using global value'
+    else:
+        j['junction_soft_limit'] = str(j.get('junction_soft_limit', None))
+    if j.get('junction_hard_limit', None) is None:
+        j['junction_hard_limit'] = '0 - using global value'
+    else:
+        j['junction_hard_limit'] = str(j.get('junction_hard_limit', None))
+    if j.get('client_ip_http', None) is None or j.get('client_ip_http', '').lower() == 'no':
+        j['client_ip_http'] = 'do not insert'
+    elif j.get('client_ip_http', '').lower() == 'yes':
+        j['client_ip_http'] = 'insert'
+    if j.get('junction_type', None) is not None:
+        j['junction_type'] = j.get('junction_type', '').lower()  # if junction_type is empty, rest api will fail anyway
+    if j.get('remote_http_header', None) is None:
+        pass
+    elif isinstance(j.get('remote_http_header', None), list):
+        j['remote_http_header'] = [_word.replace('_', '-') for _word in j.get('remote_http_header', None)]
+    else:
+        j['remote_http_header'] = [j.get('remote_http_header', '')]
+
+    # check that we have the required fields, if not, get them from the first server (if that exists)
+    servers = j.get('servers', None) or [{}]
+    for _field in list(server_fields.keys()):
+        if servers[0].get(_field, None) is not None and j.get(_field, None) is None:
+            # only use server_fields if they are not defined on junction level
+            j[_field] = servers[0].get(_field, None)
+    return j, servers[1:]
+
+
+def _index_junctions(isamAppliance, currentJunctions):
+    """
+    Index the output of get_all by junction point.
+    The detailed list (10.0.4+) contains the junction details, the simple list only the id.
+    """
+    index = {}
+    if currentJunctions['rc'] != 0:
+        return index
+    for c in currentJunctions['data']:
+        if c.get('junction_point', None) is not None:
+            index[c['junction_point']] = c
+        elif c.get('id', None) is not None:
+            index[c['id']] = c
+    return index
+
+
+def _current_junction(isamAppliance, reverseproxy_id, c, warnings):
+    """
+    Return the details of a current junction, with the servers as a list of dicts
+    """
+    if c.get('junction_point', None) is None:
+        logger.debug(f"The junction at {c['id']} already exists (simple syntax)")
+        warnings.append(f"Had to use simple get syntax unexpectedly for {c['id']}")
+        ret_obj = get(isamAppliance, reverseproxy_id, c['id'], check_mode=False, force=False, warnings=warnings)
+        return ret_obj.get('data', ret_obj)
+    current = dict(c)
+    if current.get('servers', None) is None:
+        current['servers'] = []
+    elif isinstance(current['servers'], str):
+        current['servers'] = _parse_servers(isamAppliance, current['servers'])
+    return current
+
+
+def plan_all(isamAppliance, reverseproxy_id: str, junctions: list = [], delete_missing=False, currentJunctions=None,
+             force=False, warnings=[]):
+    """
+    Compute the changes needed to get the junctions of a reverse proxy in the desired state.
+    The current junctions are retrieved once (detailed list), and are not modified.
+
+    :param isamAppliance:
+    :param reverseproxy_id:
+    :param junctions: List of junctions, as for set_all
+    :param delete_missing: Delete the junctions that are not in the list
+    :param currentJunctions: Output of get_all(detailed=True), retrieved when not provided
+    :param force: Replace all junctions in the list, even when they are the same
+    :return: list of steps, each step a dict with `action` (create, update, delete or none), `junction_point`,
+             `junction` (the arguments for set) and `servers` (the additional servers)
+    """
+    if currentJunctions is None:
+        currentJunctions = get_all(isamAppliance, reverseproxy_id=reverseproxy_id, detailed=True)
+    logger.debug(f"\nCurrent junctions:\n{currentJunctions}")
+    current = _index_junctions(isamAppliance, currentJunctions)
+
+    plan = []
+    desired_points = []
+    for junction in junctions:
+        j, servers = _normalize_junction(junction)
+        junction_point = j['junction_point']
+        desired_points.append(junction_point)
+        logger.debug(f"Processing junction: {junction_point}")
+        if junction_point not in current:
+            action = 'create'
+        elif force:
+            action = 'update'
+        else:
+            logger.debug(f"The junction at {junction_point} already exists.")
+            exist_jct = _current_junction(isamAppliance, reverseproxy_id, current[junction_point], warnings)
+            if junction_exists(isamAppliance, exist_jct, dict(j)):
+                action = 'none'
+            else:
+                action = 'update'
+        plan.append({'action': action, 'junction_point': junction_point, 'junction': j, 'servers': servers})
+
+    if delete_missing:
+        for junction_point in current:
+            if junction_point not in desired_points:
+                plan.append({'action': 'delete', 'junction_point': junction_point, 'junction': {}, 'servers': []})
+
+    return plan
+
+
+def _apply(isamAppliance, reverseproxy_id, step, warnings):
+    """
+    Execute one step of the plan.  Junctions are (re)created with force, so no checks are needed
+    and the additional servers are added directly.
+    """
+    if step['action'] == 'delete':
+        return delete(isamAppliance, reverseproxy_id, step['junction_point'], force=True)
+
+    j = dict(step['junction'])
+    j['force'] = True  # force create, replaces an existing junction
+    j['warnings'] = warnings
+    ret_obj = set(isamAppliance, reverseproxy_id, **j)
+    for s in step['servers']:
+        # statistics (current_requests, ...) are not arguments, server_uuid is
+        server_args = {_field: s[_field] for _field, kval in server_fields.items()
+                       if s.get(_field, None) is not None and (kval['type'] != 'ignore' or _field == 'server_uuid')}
+        if j.get('stateful_junction', None) is not None:
+            server_args['stateful_junction'] = j['stateful_junction']
+        junctions_server.add(isamAppliance, reverseproxy_id, junction_point=j['junction_point'],
+                             junction_type=j.get('junction_type', 'tcp'), force=True, warnings=warnings,
+                             **server_args)
+    return ret_obj
+
+
+def _public_plan(plan):
+    # Only return what changes, not the junction arguments (these may contain passwords)
+    return [{'action': step['action'], 'junction_point': step['junction_point'],
+             'servers': len(step['servers']) + (1 if step['action'] != 'delete' else 0)} for step in plan]
+
+
+def set_all(isamAppliance, reverseproxy_id: str, junctions: list = [], check_mode=False, force=False,
+            delete_missing=False, max_workers=1, warnings=[]):
     """
     Set junctions with all the servers
     The input is a list of junction objects, that can be passed to the `set` function
     The list of junctions is first compared to the output of `get_all`, so we only need to update junctions that are changed.
 
+    The current junctions are retrieved once, the resulting plan (create/update/delete/none per junction) is
+    returned in data['plan'], together with the number of HTTP requests that were sent in data['http_requests'].
+
     :param isamAppliance:
     :param reverseproxy_id:
     :param junctions: List of junctions to set.  This is a list of dicts, with each dict representing a junction
     :param check_mode:
-    :param force:
+    :param force: Replace all junctions in the list
+    :param delete_missing: Delete the junctions that are not in the list
+    :param max_workers: Number of junctions that are created/updated/deleted in parallel
     :return:
     """
-    logger = isamAppliance.logger
-
-    currentJunctions = get_all(isamAppliance, reverseproxy_id=reverseproxy_id, detailed=True)
-
-    __markChanged = False # use this bool to indicate if there's been a change or not.
-
-    if currentJunctions['rc'] == 0:
-        logger.debug(f"\nCurrent junctions:\n{currentJunctions}")
-    else:
-        # no junctions exists
-        logger.debug("No junctions exist yet.  Create them all.")
-        # Force create - There are no junctions yet
-        # use expansion
-        __markChanged = True
-        for j in junctions:
-            j.pop('isVirtualJunction', None)
-            __firstserver = j.get('servers', [''])[0]
-            for _field in list(server_fields.keys()):
-                if __firstserver.get(_field, None) is not None and j.get(_field, None) is None:
-                    # only use server_fields if they are not defined on junction level
-                        logger.debug(f"{_field} from {__firstserver.get(_field)} copied to junction level")
-                        j[_field] = __firstserver.get(_field, None)
-            if len(j.get('servers', [''])) > 1:
-                __servers = j.get('servers', [''])[1:]
-            else:
-                __servers = None
-            j.pop('servers', None)
-            j['force'] = True  # Force create
-            set(isamAppliance, reverseproxy_id, **j)
-            # Also add servers (if servers[] has more than 1 item)
-            if __servers is not None:
-                for s in __servers:
-                    for _field, kval in server_fields.items():
-                        if s.get(_field, None) is not None:
-                            j[_field] = s.get(_field, None)
-                    junctions_server.set(isamAppliance, reverseproxy_id, **j)
-    # Compare the junctions and the currentJunctions.
-    for j in junctions:
-        logger.debug(f"Processing junction: {j['junction_point']}")
-
-        _checkUpdate = False
-        j['isVirtualJunction'] = True
-        if j['junction_point'][:1] == '/':
-            j['isVirtualJunction'] = False
-        if j.get('junction_soft_limit', None) is None:
-            j['junction_soft_limit'] = '0 - using global value'
+    requests_before = getattr(isamAppliance, 'request_count', 0)
+    plan = plan_all(isamAppliance, reverseproxy_id, junctions=junctions, delete_missing=delete_missing,
+                    force=force, warnings=warnings)
+
+    changes = [step for step in plan if step['action'] != 'none']
+    for step in plan:
+        if step['action'] == 'none':
+            logger.debug(f"\n\n{reverseproxy_id}: Junction {step['junction_point']} does not need updating\n\n")
+            warnings.append(f"Instance {reverseproxy_id}: Junction {step['junction_point']} does not need updating")
+        elif step['action'] == 'update':
+            warnings.append(f"Instance {reverseproxy_id}: Updating junction {step['junction_point']}")
+
+    if changes and not check_mode:
+        if max_workers > 1 and len(changes) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for future in [executor.submit(_apply, isamAppliance, reverseproxy_id, step, warnings)
+                               for step in changes]:
+                    future.result()
         else:
-           j['junction_soft_limit'] = str( j.get('junction_soft_limit', None))
-        if j.get('junction_hard_limit', None) is None:
-            j['junction_hard_limit'] = '0 - using global value'
-        else:
-           j['junction_hard_limit'] = str( j.get('junction_hard_limit', None))
-        if j.get('client_ip_http', None) is None or j.get('client_ip_http', '').lower() == 'no':
-            j['client_ip_http'] = 'do not insert'
-        elif j.get('client_ip_http', '').lower() == 'yes':
-            j['client_ip_http'] = 'insert'
-        if j.get('junction_type', None) is not None:
-            j['junction_type'] = j.get('junction_type', '').lower() # if junction_type is empty, rest api will fail anyway
-        # update remote http header logic here
-        if j.get('remote_http_header', None) is None:
-            logger.debug("No remote http header")
-        elif isinstance(j.get('remote_http_header', None), list):
-            j['remote_http_header'] = [_word.replace('_', '-') for _word in
-                                              j.get('remote_http_header', None)]
-        else:
-            j['remote_http_header'] = [j.get('remote_http_header', '')]
-
-        # check that we have the required fields, if not, get them from the first server (if that exists)
-        __firstserver = j.get('servers', [''])[0]
-        for _field in list(server_fields.keys()):
-            if __firstserver.get(_field, None) is not None and j.get(_field, None) is None:
-                # only use server_fields if they are not defined on junction level
-                logger.debug(f"{_field} from {__firstserver.get('server_hostname')} copied to junction level")
-                j[_field] = __firstserver.get(_field, None)
-        if len(j.get('servers', [''])) > 1:
-            __servers = j.get('servers', [''])[1:]
-
-        for c in currentJunctions['data']:
-            servers = []
-            if tools.version_compare(isamAppliance.facts["version"], "9.0.1.0") > 0:
-                srv_separator = '#'
-            else:
-                srv_separator = '&'
-
-            if c.get('junction_point', None) == j['junction_point']:
-                if c.get('servers', None) is not None:
-                    if type(c.get('servers', [])) is str:
-                        srvs = c['servers'].split(srv_separator)
-                        logger.debug(f"Servers in raw string: {c['servers']}")
-                        logger.debug(f"Number of servers in junction: {len(srvs)}")
-                        for srv in srvs:
-                            logger.debug(f"Parsing Server: {srv}")
-                            server = {}
-                            for s in srv.split(';'):
-                                if s != '':
-                                    kv = s.split('!')
-                                    server[kv[0]] = kv[1]
-                            servers.append(server)
-                        c['servers'] = servers
-                else:
-                    c['servers'] = []
-
-                logger.debug(f"The junction at {j['junction_point']} already exists.")
-                _checkUpdate = dict(c)
-                break
-            elif c.get('id', None) == j['junction_point']:
-                logger.debug(f"The junction at {j['junction_point']} already exists (simple syntax)")
-                warnings.append(f"Had to use simple get syntax unexpectedly for {j['junction_point']}")
-                _checkUpdate = get(isamAppliance, reverseproxy_id, j['junction_point'], check_mode=False, force=False, warnings=warnings)
-                _checkUpdate = _checkUpdate.get('data', _checkUpdate)
-                if _checkUpdate.get('servers', None) is not None:
-                    if type(_checkUpdate.get('servers', [])) is str:
-                        srvs = _checkUpdate['servers'].split(srv_separator)
-                        logger.debug(f"Servers in raw string: {_checkUpdate['servers']}")
-                        logger.debug(f"Number of servers in junction: {len(srvs)}")
-                        for srv in srvs:
-                            logger.debug(f"Parsing Server: {srv}")
-                            server = {}
-                            for s in srv.split(';'):
-                                if s != '':
-                                    kv = s.split('!')
-                                    server[kv[0]] = kv[1]
-                            servers.append(server)
-                        _checkUpdate['servers'] = servers
-                else:
-                    _checkUpdate['servers'] = []
-                break
-
-        if _checkUpdate:
-            __firstserver = j.get('servers', [''])[0]
-            for _field in list(server_fields.keys()):
-                if __firstserver.get(_field, None) is not None and j.get(_field, None) is None:
-                    # only use server_fields if they are not defined on junction level
-                    logger.debug(f"{_field} from {__firstserver.get('server_hostname')} copied to junction level")
-                    j[_field] = __firstserver.get(_field, None)
-            if not junction_exists(isamAppliance, _checkUpdate, j):
-                __markChanged = True
-                # Run set()
-                logger.debug("\n\nUpdate junction\n\n")
-                warnings.append(f"Instance {reverseproxy_id}: Updating junction {j['junction_point']}")
-                j['force'] = True  # force create
-                j['warnings'] = warnings
-                j.pop('isVirtualJunction', None)
-                __result = set(isamAppliance, reverseproxy_id, **j)
-                logger.debug(f"Adding servers")
-                # Also add servers (if servers[] has more than 1 item)
-                if len(j.get('servers', [''])) > 1:
-                    j.pop('servers', None)
-                    for s in __servers:
-                        for _field, kval in server_fields.items():
-                            if s.get(_field, None) is not None:
-                                j[_field] = s.get(_field, None)
-                        junctions_server.set(isamAppliance, reverseproxy_id, **j)
-            else:
-                logger.debug(f"\n\n{reverseproxy_id}: Junction {j.get('junction_point','')} does not need updating\n\n")
-                warnings.append(f"Instance {reverseproxy_id}: Junction {j.get('junction_point','')} does not need updating")
-        else:
-            # Force create - this junction does not exist yet
-            j.pop('isVirtualJunction', None)
-            j['force'] = True # force create
-            __markChanged = True
-            j['warnings'] = warnings
-            __firstserver = j.get('servers', [''])[0]
-            for _field in list(server_fields.keys()):
-                if __firstserver.get(_field, None) is not None and j.get(_field, None) is None:
-                    # only use server_fields if they are not defined on junction level
-                        logger.debug(f"{_field} from {__firstserver.get('server_hostname')} copied to junction level")
-                        j[_field] = __firstserver.get(_field, None)
-            logger.debug(f"Creating new junction with {j}")
-            set(isamAppliance, reverseproxy_id, **j)
-            logger.debug(f"Adding servers")
-            # Also add servers (if servers[] has more than 1 item)
-            if len(j.get('servers', [''])) > 1:
-                __servers = j.get('servers', [''])[1:]
-                j.pop('servers', None)
-                for s in __servers:
-                    for _field, kval in server_fields.items():
-                        if s.get(_field, None) is not None:
-                            j[_field] = s.get(_field, None)
-                    junctions_server.set(isamAppliance, reverseproxy_id, **j)
-    if __markChanged:
-        return isamAppliance.create_return_object(changed=True, warnings=warnings)
-    else:
-        return isamAppliance.create_return_object(warnings=warnings)
+            for step in changes:
+                _apply(isamAppliance, reverseproxy_id, step, warnings)
+
+    ret_obj = isamAppliance.create_return_object(changed=len(changes) > 0, warnings=warnings)
+    ret_obj['data'] = {
+        'plan': _public_plan(plan),
+        'http_requests': getattr(isamAppliance, 'request_count', 0) - requests_before
+    }
+    return ret_obj
 
 
 def junction_server_exists(isamAppliance, srvs, server_hostname: str, server_port, case_sensitive_url: str='yes',
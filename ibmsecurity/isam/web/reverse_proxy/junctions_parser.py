@@ -0,0 +1,97 @@
+"""
+Parser and serializer for the `servers` string of a junction.
+
+The LMI returns the servers of a junction as a single string:
+  server_hostname!host1;server_port!443;...#server_hostname!host2;server_port!443;...
+Servers are separated by `#` (`&` before 9.0.1.0), fields by `;` and key and value by `!`.
+"""
+import functools
+
+from ibmsecurity.utilities import tools
+from ibmsecurity.isam.web.reverse_proxy.junctions_config import server_fields
+
+
+@functools.lru_cache(maxsize=32)
+def _separator_for_version(version):
+    if version is not None and tools.version_compare(version, "9.0.1.0") > 0:
+        return '#'
+    return '&'
+
+
+def server_separator(isamAppliance):
+    """
+    Separator between the servers of a junction, for the version of the appliance
+    """
+    return _separator_for_version(isamAppliance.facts.get("version", None))
+
+
+def parse_servers(servers, separator='#'):
+    """
+    Parse a servers string into a list of dicts (one per server)
+
+    :param servers: the servers string, lists are returned as is (already parsed)
+    :param separator: separator between servers, see server_separator()
+    :return: list of dicts
+    """
+    if servers is None:
+        return []
+    if not isinstance(servers, str):
+        return servers
+    return [dict(field.partition('!')[::2] for field in srv.split(';') if field)
+            for srv in servers.split(separator)]
+
+
+def format_servers(servers, separator='#'):
+    """
+    Serialize a list of server dicts (or JunctionServer records) into a servers string
+    """
+    return separator.join(';'.join(f"{k}!{v}" for k, v in _items(srv)) for srv in servers)
+
+
+def _items(srv):
+    if isinstance(srv, JunctionServer):
+        return srv.to_dict().items()
+    return srv.items()
+
+
+# The fields as they appear in the servers string
+_record_fields = tuple(dict.fromkeys(
+    [kval.get('alt_name', k) for k, kval in server_fields.items()] + list(server_fields.keys())))
+
+
+class JunctionServer:
+    """
+    Compact record for a junction server, with a slot for each field in junctions_config.server_fields.
+    Fields that are not known are kept in `extra`.
+    """
+    __slots__ = _record_fields + ('extra',)
+
+    def __init__(self, **fields):
+        for name in _record_fields:
+            object.__setattr__(self, name, fields.pop(name, None))
+        self.extra = fields or None
+
+    @classmethod
+    def from_dict(cls, srv):
+        return cls(**srv)
+
+    def to_dict(self):
+        result = {name: getattr(self, name) for name in _record_fields if getattr(self, name) is not None}
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+    def __eq__(self, other):
+        if not isinstance(other, JunctionServer):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"JunctionServer({self.to_dict()!r})"
+
+
+def parse_server_records(servers, separator='#'):
+    """
+    Parse a servers string into a list of JunctionServer records
+    """
+    return [JunctionServer(**srv) for srv in parse_servers(servers, separator)]
@@ -53,7 +53,8 @@ def delete(isamAppliance, instance_id, file_id, check_mode=False, force=False):
     return isamAppliance.create_return_object(warnings=ret_obj['warnings'])
 
 
-def export_file(isamAppliance, instance_id, file_id, filename, check_mode=False, force=False):
+def export_file(isamAppliance, instance_id, file_id, filename, check_mode=False, force=False, chunk_size=None,
+                resume=False, progress=None):
     """
     Exporting a common log file
     """
@@ -65,6 +66,6 @@ def export_file(isamAppliance, instance_id, file_id, filename, check_mode=False,
             return isamAppliance.invoke_get_file(
                 "Exporting a common log file",
                 f"{uri}/{instance_id}/{file_id}?export=true",
-                filename, requires_model=requires_model)
+                filename, requires_model=requires_model, chunk_size=chunk_size, resume=resume, progress=progress)
 
     return isamAppliance.create_return_object(warnings=ret_obj['warnings'])
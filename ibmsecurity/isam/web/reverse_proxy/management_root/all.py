@@ -1,12 +1,10 @@
 import logging
 import ibmsecurity.utilities.tools
 import os.path
-import shutil
-import zipfile
 from ibmsecurity.isam.web.reverse_proxy.management_root import directory
 from ibmsecurity.isam.web.reverse_proxy.management_root import file
 from ibmsecurity.isam.web.reverse_proxy import instance
-from ibmsecurity.utilities.tools import get_random_temp_dir, files_same_zip_content
+from ibmsecurity.utilities.zipmanifest import ZipManifest, server_manifest
 
 logger = logging.getLogger(__name__)
 
@@ -39,23 +37,15 @@ def import_zip(isamAppliance, instance_id, filename, delete_missing=False, check
     """
     warnings = []
 
-    if force is True or _check_import(isamAppliance, instance_id, filename):
+    diff = None
+    if force is not True:
+        diff = _check_import(isamAppliance, instance_id, filename)
+    if force is True or diff:
         if delete_missing is True:
-            tempdir = get_random_temp_dir()
-            tempfilename = "management_root.zip"
-            tempfile =  os.path.join(tempdir, tempfilename)
-            export_zip(isamAppliance, instance_id, tempfile)
-
-            zServerFile = zipfile.ZipFile(tempfile)
-            zClientFile = zipfile.ZipFile(filename)
-
-            files_on_server = [];
-            for info in zServerFile.infolist():
-                files_on_server.append(info.filename)
-            files_on_client = [];
-            for info in zClientFile.infolist():
-                files_on_client.append(info.filename)
-            missing_client_files = [x for x in files_on_server if x not in files_on_client]
+            # The server content is exported once, for the comparison and the files to delete
+            if diff is None:
+                diff = _compare(isamAppliance, instance_id, filename)
+            missing_client_files = sorted(diff.removed) if diff is not None else []
 
             if missing_client_files != []:
                 logger.info(f"list all missing files in {filename}, which will be deleted on the server: {missing_client_files}.")
@@ -71,7 +61,6 @@ def import_zip(isamAppliance, instance_id, filename, delete_missing=False, check
                     if search_dir not in missing_client_files:
                         logger.debug(f"delete file on the server: {x}.")
                         file.delete(isamAppliance, instance_id, x, check_mode=check_mode)
-            shutil.rmtree(tempdir)
 
         if check_mode is True:
             return isamAppliance.create_return_object(changed=True)
@@ -92,32 +81,39 @@ def import_zip(isamAppliance, instance_id, filename, delete_missing=False, check
 
     return isamAppliance.create_return_object(warnings=warnings)
 
+def _compare(isamAppliance, instance_id, filename):
+    """
+    Differences between the zip file and the management root of the instance, None if nothing was exported
+    """
+    with server_manifest(lambda tempfile: export_zip(isamAppliance, instance_id, tempfile)) as manifest:
+        if manifest is None:
+            return None
+        return ZipManifest.from_zip(filename).diff(manifest)
+
+
 def _check_import(isamAppliance, instance_id, filename):
     """
-    Checks if runtime template zip from server and client differ
+    Checks if management root zip from server and client differ
     :param isamAppliance:
     :param filename:
-    :return:
+    :return: the differences (ManifestDiff) if an import is needed, otherwise False
     """
 
     if not instance._check(isamAppliance, instance_id):
       logger.info(f"instance {instance_id} does not exist on this server. Skip import")
       return False
 
-    tempdir = get_random_temp_dir()
-    tempfilename = "management_root.zip"
-    tempfile =  os.path.join(tempdir, tempfilename)
-    export_zip(isamAppliance, instance_id, tempfile)
-
-    identical = files_same_zip_content(filename,tempfile)
+    diff = _compare(isamAppliance, instance_id, filename)
 
-    shutil.rmtree(tempdir)
-    if identical:
+    if diff is None:
+        logger.info("missing zip file from server. Comparison skipped.")
+        return False
+    elif diff.identical:
         logger.info(f"management_root files {filename} are identical with the server content. No update necessary.")
         return False
     else:
         logger.info(f"management_root files {filename} differ from the server content. Updating management_root files necessary.")
-        return True
+        return diff
 
 def check(isamAppliance, instance_id, id, name, type, check_mode=False, force=False):
     ret_obj = None
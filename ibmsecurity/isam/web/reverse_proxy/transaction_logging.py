@@ -29,7 +29,8 @@ def get_files(isamAppliance, instance_id, component_id, check_mode=False, force=
                                     requires_modules=requires_modules, requires_version=requires_version,requires_model=requires_model)
 
 
-def export_file(isamAppliance, instance_id, component_id, file_id, filepath, check_mode=False, force=False):
+def export_file(isamAppliance, instance_id, component_id, file_id, filepath, check_mode=False, force=False,
+                chunk_size=None, resume=False, progress=None):
     """
     Exporting the transaction logging data file or rollover transaction logging data file for a component
     """
@@ -48,7 +49,7 @@ def export_file(isamAppliance, instance_id, component_id, file_id, filepath, che
             "Exporting the transaction logging data file or rollover transaction logging data file for a component",
             f"{uri}/{instance_id}/transaction_logging/{component_id}/translog_files/{file_id}?export",
             filepath
-        ,requires_model=requires_model)
+        ,requires_model=requires_model, chunk_size=chunk_size, resume=resume, progress=progress)
 
     return isamAppliance.create_return_object(warnings=warnings)
 
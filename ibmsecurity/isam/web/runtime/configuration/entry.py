@@ -1,5 +1,6 @@
 import logging
 import ibmsecurity.utilities.tools
+import ibmsecurity.utilities.stanzas
 
 try:
     basestring
@@ -117,6 +118,27 @@ def set(isamAppliance, resource_id, stanza_id, entries, check_mode=False, force=
     return isamAppliance.create_return_object()
 
 
+def set_stanzas(isamAppliance, resource_id, stanzas, check_mode=False, force=False):
+    """
+    Set the entries of several stanzas at once - Runtime Environment
+
+    stanzas is {stanza_id: entries}, entries in the format of set() or a dict of key to value(s),
+    see ibmsecurity.utilities.stanzas. Each stanza is retrieved once, missing stanzas are created and
+    only the keys that differ are replaced, with one request to add all values of a stanza.
+    """
+    from ibmsecurity.isam.web.runtime.configuration import stanza
+
+    return ibmsecurity.utilities.stanzas.sync(
+        isamAppliance, stanzas,
+        get_stanzas=lambda appliance: stanza.get(appliance, resource_id),
+        get_entries=lambda appliance, stanza_id: get_all(appliance, resource_id, stanza_id),
+        add_stanza=lambda appliance, stanza_id: stanza.add(appliance, resource_id, stanza_id, force=True),
+        delete_entry=lambda appliance, stanza_id, entry_id: delete_all(appliance, resource_id, stanza_id, entry_id,
+                                                                       force=True),
+        add_entries=lambda appliance, stanza_id, entries: _add(appliance, resource_id, stanza_id, entries),
+        check_mode=check_mode, force=force)
+
+
 def _collapse_entries(entries):
     """
     Convert [['key', 'value1'], ['key', 'value2]] to [['key', ['value1', 'value2']]]
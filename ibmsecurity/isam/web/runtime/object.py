@@ -1,5 +1,6 @@
 import logging
 import ibmsecurity.utilities.tools
+import ibmsecurity.appliance.compare
 
 logger = logging.getLogger(__name__)
 
@@ -58,14 +59,13 @@ def compare(isamAppliance1, isamAppliance2, admin_id, admin_pwd, admin_domain='D
     Compare objects between two appliances
     Note that this only compares the first level
     """
-    ret_obj1 = retrieve(isamAppliance1, admin_id, admin_pwd, '/', admin_domain)
-    ret_obj2 = retrieve(isamAppliance2, admin_id, admin_pwd, '/', admin_domain)
+    def _attach_script(obj, data):
+        obj['script'] = data['contents']
 
-    for obj in ret_obj1['data']:
-        ret_obj = get(isamAppliance1, admin_id, admin_pwd, object=obj['id'], admin_domain=admin_domain)
-        obj['script'] = ret_obj['data']['contents']
-    for obj in ret_obj2['data']:
-        ret_obj = get(isamAppliance2, admin_id, admin_pwd, object=obj['id'], admin_domain=admin_domain)
-        obj['script'] = ret_obj['data']['contents']
+    ret_obj1, ret_obj2 = ibmsecurity.appliance.compare.collect(
+        isamAppliance1, isamAppliance2,
+        get_all=lambda appliance: retrieve(appliance, admin_id, admin_pwd, '/', admin_domain),
+        get=lambda appliance, obj: get(appliance, admin_id, admin_pwd, object=obj['id'], admin_domain=admin_domain),
+        attach=_attach_script)
 
     return ibmsecurity.utilities.tools.json_compare(ret_obj1, ret_obj2, deleted_keys=[])
@@ -1,4 +1,6 @@
 import logging
+from ibmsecurity.utilities import waiter
+from ibmsecurity.utilities.waiter import Waiter
 
 logger = logging.getLogger(__name__)
 
@@ -12,7 +14,6 @@ def reboot(isvgAppliance, check_mode=False, force=False):
     else:
         # obtain appliance lastboot time
         import ibmsecurity.isvg.firmware
-        import time
         ret_obj_appliance = ibmsecurity.isvg.firmware.get(isvgAppliance)
         for firm in ret_obj_appliance['data']:
             if firm['active'] is True:
@@ -26,21 +27,10 @@ def reboot(isvgAppliance, check_mode=False, force=False):
 
         # Depending on resource allocated, isvg appliance can take up to 30s or more before it reboots
         # after it is being told to do so.
-        # Loop until appliance returns an error, or reboot is detected, before returning control.
-        try:
-            while True:
-                ret_obj_appliance = ibmsecurity.isvg.firmware.get(isvgAppliance)
-                for firm in ret_obj_appliance['data']:
-                    if firm['active'] is True:
-                        last_boot = firm['last_boot']
-                        logger.info(
-                            "Active partition last boot time {0} after reboot process initiated.".format(last_boot))
-                        if last_boot > before_reboot_last_boot:
-                            raise Exception ("Break out of loop")
-                time.sleep(15)
-        except Exception as e:
-            logger.debug("Exception occured: {0}. Assuming appliance has now initiated reboot process".format(e))
-            pass
+        # Wait until appliance returns an error, or reboot is detected, before returning control.
+        Waiter(timeout=None, max_interval=15).wait(
+            waiter.reboot_initiated(isvgAppliance, before_reboot_last_boot, ibmsecurity.isvg.firmware.get),
+            "Reboot", isamAppliance=isvgAppliance)
 
         return ret_obj
 
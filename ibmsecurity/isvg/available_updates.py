@@ -1,4 +1,6 @@
 import logging
+from ibmsecurity.utilities import waiter
+from ibmsecurity.utilities.waiter import Waiter
 
 logger = logging.getLogger(__name__)
 
@@ -116,7 +118,6 @@ def install(isvgAppliance, type, version, release_date, name, check_mode=False,
         else:
             # obtain appliance lastboot time
             import ibmsecurity.isvg.firmware
-            import time
             ret_obj_appliance = ibmsecurity.isvg.firmware.get(isvgAppliance)
             for firm in ret_obj_appliance['data']:
                 if firm['active'] is True:
@@ -140,21 +141,10 @@ def install(isvgAppliance, type, version, release_date, name, check_mode=False,
 
             # isvg appliance has so much work to do after installing the firmware, it can take up
             # to several minutes before it reboots by itself.
-            # Loop until appliance returns an error, or reboot is detected, before returning control.
-            try:
-                while True:
-                    ret_obj_appliance = ibmsecurity.isvg.firmware.get(isvgAppliance)
-                    for firm in ret_obj_appliance['data']:
-                        if firm['active'] is True:
-                            last_boot = firm['last_boot']
-                            logger.info(
-                                "Active partition last boot time {0} after firmware installation.".format(last_boot))
-                            if last_boot > before_install_last_boot:
-                                raise Exception ("Break out of loop")
-                    time.sleep(30)
-            except Exception as e:
-                logger.debug("Exception occured: {0}. Assuming appliance has now initiated reboot process".format(e))
-                pass
+            # Wait until appliance returns an error, or reboot is detected, before returning control.
+            Waiter(timeout=None, max_interval=30).wait(
+                waiter.reboot_initiated(isvgAppliance, before_install_last_boot, ibmsecurity.isvg.firmware.get),
+                "Reboot after firmware installation", isamAppliance=isvgAppliance)
 
             return ret_obj
 
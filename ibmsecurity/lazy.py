@@ -0,0 +1,78 @@
+"""
+Lazy loading of the ibmsecurity modules. After `import ibmsecurity` any module can be reached by attribute access
+and is imported on first use:
+
+    import ibmsecurity
+    ibmsecurity.isam.web.reverse_proxy.junctions.get_all(isamAppliance, "default")
+
+Scripts therefore do not need to import every module of the package up front. Each package of ibmsecurity gets a
+module `__getattr__` (PEP 562) importing the requested submodule, also packages imported directly with
+`import ibmsecurity.isam.base.ntp`.
+"""
+import importlib
+import importlib.abc
+import importlib.machinery
+import sys
+
+
+def _lazy_getattr(package):
+    """
+    Module __getattr__ of a package, importing the submodule with the requested name
+    """
+
+    def __getattr__(name):
+        if name.startswith("__"):
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        fullname = f"{package}.{name}"
+        try:
+            return importlib.import_module(fullname)
+        except ModuleNotFoundError as e:
+            if e.name != fullname:
+                raise
+            raise AttributeError(f"module {package!r} has no attribute {name!r}") from None
+
+    return __getattr__
+
+
+class _LazyPackageLoader(importlib.abc.Loader):
+    """
+    Wraps the loader of a package to add the lazy __getattr__ after the package is executed
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.loader.exec_module(module)
+        if "__getattr__" not in module.__dict__:
+            module.__getattr__ = _lazy_getattr(module.__name__)
+
+    def __getattr__(self, name):
+        # get_resource_reader, get_data, is_package, ... of the wrapped loader
+        return getattr(self.loader, name)
+
+
+class _LazyPackageFinder(importlib.abc.MetaPathFinder):
+    """
+    Finds the subpackages of ibmsecurity like the default path finder, with a _LazyPackageLoader
+    """
+
+    def find_spec(self, fullname, path, target=None):
+        if not fullname.startswith("ibmsecurity."):
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path, target)
+        if spec is not None and spec.submodule_search_locations is not None and spec.loader is not None:
+            spec.loader = _LazyPackageLoader(spec.loader)
+        return spec
+
+
+def install(package_module):
+    """
+    Enable lazy loading, called by ibmsecurity/__init__.py
+    """
+    if not any(isinstance(finder, _LazyPackageFinder) for finder in sys.meta_path):
+        sys.meta_path.insert(0, _LazyPackageFinder())
+    package_module.__getattr__ = _lazy_getattr(package_module.__name__)
@@ -0,0 +1,121 @@
+"""
+Index of the ibmsecurity modules and their functions, to find and resolve functions by name without importing
+the whole package (see ibmsecurity/lazy.py for the lazy loading of modules by attribute access).
+
+The index is packaged as registry.json, built from the source without importing anything.
+Regenerate it after adding or removing modules or functions:
+
+    python -m ibmsecurity.registry --write
+"""
+import ast
+import fnmatch
+import importlib
+import json
+import os
+import warnings
+
+PACKAGE = "ibmsecurity"
+INDEX_FILE = os.path.join(os.path.dirname(__file__), "registry.json")
+
+_index = None
+
+
+def resolve(name):
+    """
+    The object (function, class, module) of a dotted name, eg. "ibmsecurity.isam.base.ntp.get",
+    importing only the module that defines it
+    """
+    module_name, _, attribute = name.rpartition(".")
+    if name in index() or not module_name:
+        return importlib.import_module(name)
+    module = importlib.import_module(module_name)
+    try:
+        return getattr(module, attribute)
+    except AttributeError:
+        raise ImportError(f"No function {attribute} in module {module_name}") from None
+
+
+def index():
+    """
+    {module name: [function names]} of all modules of the package, read from registry.json
+    """
+    global _index
+    if _index is None:
+        try:
+            with open(INDEX_FILE, 'r') as f:
+                _index = json.load(f)
+        except (OSError, ValueError):
+            _index = build_index()
+    return _index
+
+
+def modules(prefix=PACKAGE):
+    """
+    Names of the modules below a package, eg. modules("ibmsecurity.isam.base")
+    """
+    return [name for name in index() if name == prefix or name.startswith(prefix + ".")]
+
+
+def functions(module):
+    """
+    Public functions of a module, without importing it
+    """
+    return index().get(module, [])
+
+
+def find(pattern):
+    """
+    Dotted names of the functions matching a shell style pattern, eg. find("*.junctions.get*")
+    """
+    return [f"{module}.{function}" for module, names in index().items() for function in names
+            if fnmatch.fnmatchcase(f"{module}.{function}", pattern)]
+
+
+def _public_functions(filename):
+    with open(filename, 'rb') as f, warnings.catch_warnings():
+        # eg. invalid escape sequences in docstrings
+        warnings.simplefilter("ignore")
+        tree = ast.parse(f.read(), filename=filename)
+    return sorted(node.name for node in tree.body
+                  if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and not node.name.startswith("_"))
+
+
+def build_index(directory=None):
+    """
+    Build the index from the source files, nothing is imported
+    """
+    if directory is None:
+        directory = os.path.dirname(__file__)
+    result = {}
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if os.path.exists(os.path.join(root, d, "__init__.py")))
+        relpath = os.path.relpath(root, directory)
+        package = PACKAGE if relpath == os.curdir else ".".join([PACKAGE] + relpath.split(os.sep))
+        for filename in sorted(files):
+            if not filename.endswith(".py"):
+                continue
+            name = package if filename == "__init__.py" else f"{package}.{filename[:-3]}"
+            result[name] = _public_functions(os.path.join(root, filename))
+    return dict(sorted(result.items()))
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m ibmsecurity.registry",
+                                     description="List the functions of the ibmsecurity modules")
+    parser.add_argument("pattern", nargs="?", default="*", help="shell style pattern, eg. '*.junctions.*'")
+    parser.add_argument("--write", action="store_true", help=f"rebuild {os.path.basename(INDEX_FILE)}")
+    args = parser.parse_args(argv)
+
+    if args.write:
+        with open(INDEX_FILE, 'w') as f:
+            json.dump(build_index(), f, indent=0, separators=(",", ":"))
+            f.write("\n")
+        return
+    for name in find(args.pattern):
+        print(name)
+
+
+if __name__ == "__main__":
+    main()
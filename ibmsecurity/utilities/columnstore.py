@@ -0,0 +1,465 @@
+"""
+Append-only columnar storage of time series on local disk, with vectorized aggregation.
+
+A store is a directory with one sub-directory per table:
+    schema.json     {column: type}, "q" int64 (the time), "d" float64 (numbers), "s" string
+    strings.json    dictionary of the string columns, strings are stored as int32 codes
+    00000001.col    chunks: a json header (rows, time range, offset of every column) and the raw column data
+
+Every table has an int64 "time" column (epoch seconds). Rows are buffered by append() and written as a new
+chunk by flush(). Queries only read the chunks of their time range and only the columns they use.
+
+Arrays are numpy arrays when numpy is installed (aggregations are vectorized), array.array otherwise.
+
+    store = ColumnStore("/var/lib/isam-stats")
+    store.append("junction_reqtime", [{"time": 1700000000, "host": "isam1", "junction": "/app", "reqtime": 12.5}])
+    store.flush()
+    store.aggregate("junction_reqtime", "reqtime", "p95", by=["host", "junction"], bucket=3600)
+"""
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import threading
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"IBMSCOL1"
+TIME = "time"
+
+# array typecode of the data of each column type, strings are int32 codes
+_TYPECODES = {'q': 'q', 'd': 'd', 's': 'i'}
+_MISSING = {'q': 0, 'd': float('nan'), 's': -1}
+
+
+def _column_type(name, value):
+    """
+    Type of a new column: numbers are float64 (a column that starts with integers may get fractions later),
+    only the time is int64
+    """
+    if name == TIME:
+        return 'q'
+    if isinstance(value, (int, float)):
+        return 'd'
+    return 's'
+
+
+def _atomic_write(filename, data):
+    fd, tmpname = tempfile.mkstemp(dir=os.path.dirname(filename), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmpname, filename)
+    except BaseException:
+        os.remove(tmpname)
+        raise
+
+
+def _to_bytes(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode, data):
+    if numpy is not None:
+        return numpy.frombuffer(data, dtype=numpy.dtype(typecode).newbyteorder('<')).astype(typecode)
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _concatenate(typecode, parts):
+    if numpy is not None:
+        return numpy.concatenate(parts) if parts else numpy.empty(0, dtype=typecode)
+    values = array(typecode)
+    for part in parts:
+        values.extend(part)
+    return values
+
+
+def _filled(typecode, value, count):
+    if numpy is not None:
+        return numpy.full(count, value, dtype=typecode)
+    return array(typecode, [value]) * count
+
+
+class Table:
+    """
+    Schema, string dictionary and write buffer of one table
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.schema = self._load("schema.json", {})
+        self.strings = self._load("strings.json", [])
+        self.codes = {string: code for code, string in enumerate(self.strings)}
+        self.buffer = {}
+        self.buffered = 0
+
+    def _load(self, name, default):
+        try:
+            with open(os.path.join(self.directory, name), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def code(self, string):
+        code = self.codes.get(string)
+        if code is None:
+            code = self.codes[string] = len(self.strings)
+            self.strings.append(string)
+        return code
+
+    def chunks(self):
+        try:
+            return sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                          if name.endswith(".col"))
+        except OSError:
+            return []
+
+    def append(self, row):
+        for name, value in row.items():
+            if value is None:
+                continue
+            kind = self.schema.get(name)
+            if kind is None:
+                kind = self.schema[name] = _column_type(name, value)
+            column = self.buffer.get(name)
+            if column is None:
+                column = self.buffer[name] = array(_TYPECODES[kind], [_MISSING[kind]]) * self.buffered
+        for name, column in self.buffer.items():
+            kind = self.schema[name]
+            value = row.get(name)
+            if value is None:
+                column.append(_MISSING[kind])
+            elif kind == 's':
+                column.append(self.code(str(value)))
+            elif kind == 'q':
+                column.append(int(value))
+            else:
+                column.append(float(value))
+        self.buffered += 1
+
+    def flush(self):
+        if not self.buffered:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        times = self.buffer.get(TIME)
+        header = {'rows': self.buffered, 'min_time': min(times) if times else None,
+                  'max_time': max(times) if times else None, 'columns': {}}
+        data = []
+        offset = 0
+        for name, column in self.buffer.items():
+            raw = _to_bytes(column)
+            header['columns'][name] = {'offset': offset, 'length': len(raw)}
+            data.append(raw)
+            offset += len(raw)
+        encoded = json.dumps(header).encode('utf-8')
+        chunks = self.chunks()
+        number = int(os.path.basename(chunks[-1])[:-4]) + 1 if chunks else 1
+        filename = os.path.join(self.directory, f"{number:08d}.col")
+        # The dictionary and schema are written first, a chunk never refers to codes that are not saved
+        _atomic_write(os.path.join(self.directory, "strings.json"), json.dumps(self.strings).encode('utf-8'))
+        _atomic_write(os.path.join(self.directory, "schema.json"), json.dumps(self.schema).encode('utf-8'))
+        _atomic_write(filename, MAGIC + len(encoded).to_bytes(4, 'little') + encoded + b"".join(data))
+        self.buffer = {}
+        self.buffered = 0
+        return filename
+
+
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{f.name} is not a column chunk")
+    length = int.from_bytes(f.read(4), 'little')
+    header = json.loads(f.read(length))
+    header['start'] = len(MAGIC) + 4 + length
+    return header
+
+
+class Columns(dict):
+    """
+    {column: array} of a scan, string columns are int32 codes into `strings` (see decode)
+    """
+
+    def __init__(self, schema, strings, columns):
+        dict.__init__(self, columns)
+        self.schema = schema
+        self.strings = strings
+
+    def __len__(self):
+        for values in self.values():
+            return len(values)
+        return 0
+
+    def decode(self, name):
+        """
+        The values of a column as python values (strings decoded)
+        """
+        if self.schema.get(name) == 's':
+            return [self.strings[code] if code >= 0 else None for code in self[name]]
+        return list(self[name])
+
+    def rows(self):
+        """
+        The rows as dicts, eg. to append them to a ColumnStore
+        """
+        decoded = {name: self.decode(name) for name in self}
+        for i in range(len(self)):
+            yield {name: values[i] for name, values in decoded.items()}
+
+
+def _percentile(values, q):
+    """
+    Percentile of sorted values, with linear interpolation (as numpy.percentile)
+    """
+    if not values:
+        return float('nan')
+    position = (len(values) - 1) * q / 100.0
+    low = math.floor(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def _reduce(values, func):
+    if func == "count":
+        return len(values)
+    if func == "sum":
+        return math.fsum(values)
+    if func == "mean":
+        return math.fsum(values) / len(values)
+    if func == "min":
+        return min(values)
+    if func == "max":
+        return max(values)
+    return _percentile(sorted(values), float(func[1:]))
+
+
+def _check_func(func):
+    if func in ("count", "sum", "mean", "min", "max"):
+        return
+    try:
+        if func.startswith("p") and 0 <= float(func[1:]) <= 100:
+            return
+    except ValueError:
+        pass
+    raise ValueError(f"Unknown aggregation {func}, use count, sum, mean, min, max or pNN (eg. p95)")
+
+
+def _aggregate_numpy(keys, values, func):
+    """
+    {key tuple: result} with one pass of sorting, keys is a list of int/float arrays of the group columns
+    """
+    if len(values) == 0:
+        return {}
+    if keys:
+        stacked = numpy.stack([numpy.asarray(k, dtype='d') for k in keys], axis=1)
+        groups, inverse = numpy.unique(stacked, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+    else:
+        groups = numpy.zeros((1, 0))
+        inverse = numpy.zeros(len(values), dtype='q')
+    order = numpy.lexsort((values, inverse))
+    inverse = inverse[order]
+    values = values[order]
+    starts = numpy.flatnonzero(numpy.r_[True, inverse[1:] != inverse[:-1]])
+    counts = numpy.diff(numpy.r_[starts, len(values)])
+    if func == "count":
+        results = counts
+    elif func == "sum":
+        results = numpy.add.reduceat(values, starts)
+    elif func == "mean":
+        results = numpy.add.reduceat(values, starts) / counts
+    elif func == "min":
+        results = values[starts]
+    elif func == "max":
+        results = values[starts + counts - 1]
+    else:
+        position = starts + (counts - 1) * float(func[1:]) / 100.0
+        low = numpy.floor(position).astype('q')
+        high = numpy.minimum(low + 1, starts + counts - 1)
+        results = values[low] + (values[high] - values[low]) * (position - low)
+    group_rows = groups[inverse[starts]]
+    return {tuple(row): result for row, result in zip(group_rows.tolist(), results.tolist())}
+
+
+def _aggregate_python(keys, values, func):
+    grouped = {}
+    for i, value in enumerate(values):
+        if value != value:  # NaN, no value
+            continue
+        grouped.setdefault(tuple(k[i] for k in keys), []).append(value)
+    return {key: _reduce(group, func) for key, group in grouped.items()}
+
+
+class ColumnStore:
+    """
+    Directory of tables, see the module documentation. Safe to share between threads.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._tables = {}
+        self._lock = threading.RLock()
+
+    def _table(self, name):
+        table = self._tables.get(name)
+        if table is None:
+            table = self._tables[name] = Table(os.path.join(self.directory, name))
+        return table
+
+    def tables(self):
+        try:
+            return sorted(name for name in os.listdir(self.directory)
+                          if os.path.isdir(os.path.join(self.directory, name)))
+        except OSError:
+            return []
+
+    def schema(self, table):
+        with self._lock:
+            return dict(self._table(table).schema)
+
+    def append(self, table, rows):
+        """
+        Buffer rows (dicts of column to value, with a "time" in epoch seconds), new columns are added to the schema
+        """
+        with self._lock:
+            buffer = self._table(table)
+            for row in rows:
+                buffer.append(row)
+
+    def flush(self):
+        """
+        Write the buffered rows of all tables, one chunk per table
+        """
+        with self._lock:
+            return [filename for filename in (table.flush() for table in self._tables.values()) if filename]
+
+    def scan(self, table, columns=None, since=None, until=None):
+        """
+        Columns of the rows with since <= time < until, from the flushed chunks
+
+        :param columns: names of the columns to read (all if None)
+        """
+        with self._lock:
+            meta = self._table(table)
+            schema = dict(meta.schema)
+            strings = list(meta.strings)
+            chunks = meta.chunks()
+        names = list(schema) if columns is None else list(columns)
+        for name in names:
+            if name not in schema:
+                raise KeyError(f"Table {table} has no column {name}")
+        read = names if since is None and until is None or TIME in names else names + [TIME]
+        parts = {name: [] for name in read}
+        for filename in chunks:
+            with open(filename, 'rb') as f:
+                header = _read_header(f)
+                if header['min_time'] is not None and (
+                        (since is not None and header['max_time'] < since) or
+                        (until is not None and header['min_time'] >= until)):
+                    continue
+                for name in read:
+                    typecode = _TYPECODES[schema[name]]
+                    column = header['columns'].get(name)
+                    if column is None:
+                        parts[name].append(_filled(typecode, _MISSING[schema[name]], header['rows']))
+                        continue
+                    f.seek(header['start'] + column['offset'])
+                    parts[name].append(_from_bytes(typecode, f.read(column['length'])))
+        result = {name: _concatenate(_TYPECODES[schema[name]], parts[name]) for name in read}
+        if since is not None or until is not None:
+            times = result[TIME]
+            if numpy is not None:
+                mask = numpy.ones(len(times), dtype=bool)
+                if since is not None:
+                    mask &= times >= since
+                if until is not None:
+                    mask &= times < until
+                result = {name: values[mask] for name, values in result.items()}
+            else:
+                keep = [i for i, t in enumerate(times) if (since is None or t >= since) and (until is None or t < until)]
+                result = {name: array(values.typecode, (values[i] for i in keep)) for name, values in result.items()}
+        return Columns(schema, strings, {name: result[name] for name in names})
+
+    def aggregate(self, table, value, func="mean", by=(), bucket=None, since=None, until=None, where=None):
+        """
+        Aggregate a column per group, eg. aggregate("cpu", "user", "max", by=["host"], bucket=3600) for the
+        maximum per host per hour, see aggregate()
+        """
+        _check_func(func)
+        needed = list(dict.fromkeys([value] + list(by) + list(where or {}) + ([TIME] if bucket else [])))
+        return aggregate(self.scan(table, needed, since=since, until=until), value, func, by, bucket, where)
+
+
+def aggregate(columns, value, func="mean", by=(), bucket=None, where=None):
+    """
+    Aggregate a column of Columns per group
+
+    :param func: count, sum, mean, min, max or pNN for a percentile (eg. p95)
+    :param by: columns to group by
+    :param bucket: seconds of the time buckets, the bucket start is the last part of the group keys
+    :param where: {column: value or list of values} the rows must match
+    :return: {group key tuple: result}, strings decoded, sorted by key
+    """
+    _check_func(func)
+    by = list(by)
+    where = dict(where or {})
+    schema = columns.schema
+    values = columns[value]
+
+    mask = None
+    for name, wanted in where.items():
+        wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+        if schema[name] == 's':
+            codes = {code for code, string in enumerate(columns.strings) if string in {str(w) for w in wanted}}
+            wanted = codes
+        if numpy is not None:
+            match = numpy.isin(numpy.asarray(columns[name]), list(wanted))
+            mask = match if mask is None else mask & match
+        else:
+            wanted = set(wanted)
+            match = [v in wanted for v in columns[name]]
+            mask = match if mask is None else [a and b for a, b in zip(mask, match)]
+
+    keys = [columns[name] for name in by]
+    if bucket:
+        times = columns[TIME]
+        keys.append(numpy.asarray(times) // bucket * bucket if numpy is not None
+                    else array('q', (t // bucket * bucket for t in times)))
+
+    if numpy is not None:
+        values = numpy.asarray(values, dtype='d')
+        valid = ~numpy.isnan(values)
+        if mask is not None:
+            valid &= mask
+        result = _aggregate_numpy([numpy.asarray(k)[valid] for k in keys], values[valid], func)
+    else:
+        if mask is not None:
+            keep = [i for i, ok in enumerate(mask) if ok]
+            values = [values[i] for i in keep]
+            keys = [[k[i] for i in keep] for k in keys]
+        result = _aggregate_python(keys, [float(v) for v in values], func)
+
+    decoded = {}
+    for key, aggregated in result.items():
+        parts = []
+        for name, part in zip(by + ([TIME] if bucket else []), key):
+            if schema.get(name) == 's':
+                part = columns.strings[int(part)] if part >= 0 else None
+            elif schema.get(name) == 'q':
+                part = int(part)
+            parts.append(part)
+        decoded[tuple(parts)] = aggregated
+    return dict(sorted(decoded.items(), key=lambda item: tuple((p is None, p) for p in item[0])))
@@ -0,0 +1,57 @@
+"""
+Pluggable JSON decoder used when processing LMI responses.
+
+orjson or ujson are used when installed, the standard library json module otherwise.
+The backend can be forced with the environment variable IBMSECLIB_JSON_BACKEND (json, orjson or ujson).
+All backends return the same plain python objects (dict, list, str, int, float, bool, None).
+"""
+import json
+import logging
+from os import environ
+
+logger = logging.getLogger(__name__)
+
+_stdlib_loads = json.loads
+
+
+def _load_backend(name):
+    if name == "orjson":
+        import orjson
+        return orjson.loads
+    if name == "ujson":
+        import ujson
+        return ujson.loads
+    return _stdlib_loads
+
+
+def _select_backend():
+    requested = str(environ.get("IBMSECLIB_JSON_BACKEND", "")).lower()
+    if requested in ["json", "orjson", "ujson"]:
+        candidates = [requested]
+    else:
+        candidates = ["orjson", "ujson", "json"]
+    for name in candidates:
+        try:
+            return name, _load_backend(name)
+        except ImportError:
+            logger.debug(f"JSON backend {name} is not available")
+    return "json", _stdlib_loads
+
+
+backend, _loads = _select_backend()
+
+
+def loads(content):
+    """
+    Decode a JSON document from str or (utf-8) bytes.
+
+    Raises ValueError when the content is not valid JSON, whatever backend is active.
+    The faster backends are stricter than the json module (eg. NaN or integers over 64 bit),
+    so those documents are retried with the json module.
+    """
+    if _loads is _stdlib_loads:
+        return _stdlib_loads(content)
+    try:
+        return _loads(content)
+    except (ValueError, OverflowError):
+        return _stdlib_loads(content)
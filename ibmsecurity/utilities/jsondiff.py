@@ -0,0 +1,281 @@
+"""
+Structural diff of JSON documents, used by tools.json_compare for the compare() functions.
+
+The two documents are walked together, key by key, and the differences are returned as JSON-Patch style
+operations (RFC 6902) with the path of each difference:
+
+    {'op': 'replace', 'path': '/servers/0/server_hostname', 'value': 'b.example.com', 'old': 'a.example.com'}
+
+Like json_sort the order of list elements is ignored. Lists of objects sharing an identifying key (eg. "id" or
+"name") are matched on that key so a changed element gives operations on its changed fields, other lists are
+compared as multisets of elements.
+
+The text and HTML renderings are only built when used. equals() stops at the first difference.
+"""
+import collections
+import functools
+import html
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Keys identifying the objects of a list, the first one present in all objects with unique values is used
+LIST_KEYS = ("id", "uuid", "name")
+
+
+def _escape(token):
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _freeze(value):
+    """
+    Hashable form of a JSON value, equal for values that are equal ignoring the order of lists
+    """
+    if isinstance(value, dict):
+        return "{}", frozenset((key, _freeze(v)) for key, v in value.items())
+    if isinstance(value, list):
+        return "[]", frozenset(collections.Counter(_freeze(v) for v in value).items())
+    return value
+
+
+def _key_values(elements, key):
+    values = []
+    for element in elements:
+        if not isinstance(element, dict) or key not in element:
+            return None
+        values.append(element[key])
+    return values
+
+
+def _list_key(first, second, list_keys):
+    for key in list_keys:
+        first_values = _key_values(first, key)
+        second_values = _key_values(second, key)
+        if first_values is None or second_values is None:
+            continue
+        try:
+            if len(set(first_values)) == len(first_values) and len(set(second_values)) == len(second_values):
+                return key
+        except TypeError:
+            # unhashable values
+            continue
+    return None
+
+
+def _walk(first, second, path, list_keys):
+    if isinstance(first, dict) and isinstance(second, dict):
+        for key, value in first.items():
+            if key not in second:
+                yield {'op': 'remove', 'path': f"{path}/{_escape(key)}", 'old': value}
+            else:
+                yield from _walk(value, second[key], f"{path}/{_escape(key)}", list_keys)
+        for key, value in second.items():
+            if key not in first:
+                yield {'op': 'add', 'path': f"{path}/{_escape(key)}", 'value': value}
+    elif isinstance(first, list) and isinstance(second, list):
+        yield from _walk_list(first, second, path, list_keys)
+    elif isinstance(first, (dict, list)) or isinstance(second, (dict, list)) or first != second:
+        yield {'op': 'replace', 'path': path, 'value': second, 'old': first}
+
+
+def _walk_list(first, second, path, list_keys):
+    if first == second:
+        return
+    key = _list_key(first, second, list_keys)
+    if key is not None:
+        others = {element[key]: element for element in second}
+        for index, element in enumerate(first):
+            other = others.pop(element[key], None)
+            if other is None:
+                yield {'op': 'remove', 'path': f"{path}/{index}", 'old': element}
+            else:
+                yield from _walk(element, other, f"{path}/{index}", list_keys)
+        for element in others.values():
+            yield {'op': 'add', 'path': f"{path}/-", 'value': element}
+        return
+
+    first_frozen = [_freeze(element) for element in first]
+    second_frozen = [_freeze(element) for element in second]
+    counts = collections.Counter(second_frozen)
+    counts.subtract(first_frozen)
+    # Elements of the first list missing from the second and the reverse
+    for index, frozen in enumerate(first_frozen):
+        if counts[frozen] < 0:
+            counts[frozen] += 1
+            yield {'op': 'remove', 'path': f"{path}/{index}", 'old': first[index]}
+    for index, frozen in enumerate(second_frozen):
+        if counts[frozen] > 0:
+            counts[frozen] -= 1
+            yield {'op': 'add', 'path': f"{path}/-", 'value': second[index]}
+
+
+def equals(first, second, list_keys=LIST_KEYS):
+    """
+    True if the documents are the same (ignoring the order of lists), stops at the first difference
+    """
+    return next(_walk(first, second, "", list_keys), None) is None
+
+
+def _format(value):
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+class JsonDiff:
+    """
+    Differences between two JSON documents
+
+    :param first: the current document
+    :param second: the document to compare with
+    :param list_keys: keys identifying the objects of a list
+    """
+
+    def __init__(self, first, second, list_keys=LIST_KEYS):
+        self.first = first
+        self.second = second
+        self.operations = list(_walk(first, second, "", list_keys))
+
+    @property
+    def matches(self):
+        return not self.operations
+
+    def __bool__(self):
+        return bool(self.operations)
+
+    def __len__(self):
+        return len(self.operations)
+
+    def patch(self):
+        """
+        The operations as a JSON Patch, without the old values
+        """
+        return [{k: v for k, v in op.items() if k != 'old'} for op in self.operations]
+
+    @functools.cached_property
+    def lines(self):
+        """
+        One "- path: old value" and/or "+ path: new value" line per difference
+        """
+        lines = []
+        for op in self.operations:
+            if 'old' in op:
+                lines.append(f"- {op['path']}: {_format(op['old'])}")
+            if 'value' in op:
+                lines.append(f"+ {op['path']}: {_format(op['value'])}")
+        return lines
+
+    @property
+    def text(self):
+        return "\n".join(self.lines)
+
+    @functools.cached_property
+    def html(self):
+        rows = "\n".join(
+            f"<tr><td>{html.escape(op['op'])}</td><td>{html.escape(op['path'])}</td>"
+            f"<td>{html.escape(_format(op['old'])) if 'old' in op else ''}</td>"
+            f"<td>{html.escape(_format(op['value'])) if 'value' in op else ''}</td></tr>"
+            for op in self.operations)
+        return ("<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\"><title>Differences</title></head>\n<body>\n"
+                "<table border=\"1\">\n<tr><th>Operation</th><th>Path</th><th>Current</th><th>New</th></tr>\n"
+                f"{rows}\n</table>\n</body>\n</html>\n")
+
+
+class LazyDict(dict):
+    """
+    dict with values that are only computed when used: set_lazy(key, function) adds the key, function() is
+    called on the first access of its value (also by items(), values(), comparisons, copies and JSON
+    serialization)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lazy = {}
+
+    def set_lazy(self, key, function):
+        self._lazy[key] = function
+        super().__setitem__(key, None)
+
+    def _resolve(self, key):
+        function = self._lazy.pop(key, None)
+        if function is not None:
+            super().__setitem__(key, function())
+
+    def _resolve_all(self):
+        for key in list(self._lazy):
+            self._resolve(key)
+
+    def __getitem__(self, key):
+        self._resolve(key)
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        self._lazy.pop(key, None)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._lazy.pop(key, None)
+        super().__delitem__(key)
+
+    def __iter__(self):
+        # Makes dict(), update() and ** read the values with __getitem__
+        return super().__iter__()
+
+    def __eq__(self, other):
+        self._resolve_all()
+        if isinstance(other, LazyDict):
+            other._resolve_all()
+        return super().__eq__(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._resolve_all()
+        return super().__repr__()
+
+    def __reduce_ex__(self, protocol):
+        self._resolve_all()
+        return dict, (dict(self),)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def setdefault(self, key, default=None):
+        self._resolve(key)
+        return super().setdefault(key, default)
+
+    def pop(self, key, *default):
+        self._resolve(key)
+        return super().pop(key, *default)
+
+    def popitem(self):
+        self._resolve_all()
+        return super().popitem()
+
+    def update(self, *args, **kwargs):
+        values = dict(*args, **kwargs)
+        for key in values:
+            self._lazy.pop(key, None)
+        super().update(values)
+
+    def clear(self):
+        self._lazy.clear()
+        super().clear()
+
+    def items(self):
+        self._resolve_all()
+        return super().items()
+
+    def values(self):
+        self._resolve_all()
+        return super().values()
+
+    def copy(self):
+        self._resolve_all()
+        return dict(self)
+
+
+def diff(first, second, list_keys=LIST_KEYS):
+    return JsonDiff(first, second, list_keys=list_keys)
@@ -0,0 +1,298 @@
+"""
+Analysis of exported reverse proxy log files (reverse_proxy.logs.export_file, transaction_logging.export_file,
+reverse_proxy.statistics.export_file) into columns.
+
+Files are memory mapped and split into ranges at record boundaries, the ranges are parsed by a pool of
+processes with compiled regular expressions over the raw bytes (no per-line decoding or splitting), and the
+results are merged into one Columns (see columnstore) with a shared string dictionary:
+
+    columns = loganalyzer.analyze(["request.log", "request.log.1"], "request", junctions=["/app", "/portal"])
+    loganalyzer.aggregate(columns, "response_time", "p95", by=["junction"])
+    loganalyzer.aggregate(columns, "bytes", "sum", by=["junction", "status"], bucket=3600)
+    store.append("requests", columns.rows())
+
+Formats:
+- request: request log records in the default request-log-format (%h %l %u %t "%r" %s %b), an optional number
+  after the size is the time to serve the request (eg. %d, microseconds, see duration_unit). Transaction log
+  files that hold request records use the same format. Columns time, junction, method, status, bytes,
+  response_time (milliseconds, NaN when not logged).
+- stats: statistics files, blocks of "key : value" lines after a header with the time and component
+  (eg. "2024-01-01-10:00:00.000+00:00I----- pdweb.jct.1 /app"). Columns time, component, junction, stat, value.
+
+More formats can be added with register_format. Gzip compressed files (rolled over logs) are decompressed in
+memory and parsed by one process.
+"""
+import gzip
+import logging
+import mmap
+import os
+import re
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from ibmsecurity.utilities import columnstore
+from ibmsecurity.utilities.columnstore import Columns, aggregate  # noqa: F401, aggregate is part of this API
+
+logger = logging.getLogger(__name__)
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_TYPECODES = {'q': 'q', 'd': 'd', 's': 'i'}
+
+
+class LogFormat(namedtuple('LogFormat', ['schema', 'parse', 'boundary'])):
+    """
+    schema: {column: type}, types of columnstore ("q" int64, "d" float64, "s" string)
+    parse(buffer, start, end, **options): Builder of the records in buffer[start:end], a module level function
+        (it is sent to the worker processes)
+    boundary: regular expression (bytes) of the start of a record, ranges are split before a match
+    """
+    __slots__ = ()
+
+
+class Builder:
+    """
+    Columns of one range under construction, strings are coded with a local dictionary
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.columns = {name: array(_TYPECODES[kind]) for name, kind in schema.items()}
+        self.strings = []
+        self.codes = {}
+
+    def code(self, string):
+        code = self.codes.get(string)
+        if code is None:
+            code = self.codes[string] = len(self.strings)
+            self.strings.append(string)
+        return code
+
+
+_formats = {}
+
+
+def register_format(name, log_format):
+    _formats[name] = log_format
+
+
+def formats():
+    return sorted(_formats)
+
+
+# request log
+
+_REQUEST = re.compile(
+    rb'^\S+ \S+ \S+ \[([^\]]+)\] "(\S+) (/[^/ ?"]*)(\S*)[^"]*" (\d{3}) (\d+|-)(?: ([\d.]+))?[^\n]*$',
+    re.MULTILINE)
+_DURATION_UNITS = {'s': 1000.0, 'ms': 1.0, 'us': 0.001}
+
+
+def _request_time(value, cache={}):
+    # Records of the same second share the timestamp, the cache turns strptime into a dict lookup
+    seconds = cache.get(value)
+    if seconds is None:
+        try:
+            seconds = int(datetime.strptime(value.decode('ascii'), "%d/%b/%Y:%H:%M:%S %z").timestamp())
+        except ValueError:
+            seconds = 0
+        if len(cache) > 100000:
+            cache.clear()
+        cache[value] = seconds
+    return seconds
+
+
+def _junction_resolver(junctions):
+    """
+    Function of (first path segment, rest of the path) to the junction: the longest of `junctions` that is a
+    prefix of the path ("/" when none is), or the first segment when no junctions are known
+    """
+    if not junctions:
+        return lambda first, rest: first.decode('utf-8', 'replace')
+    junctions = sorted({junction.rstrip('/') or '/' for junction in junctions}, key=len, reverse=True)
+    depth = max(junction.count('/') for junction in junctions)
+    cache = {}
+
+    def resolve(first, rest):
+        key = first if depth == 1 else first + b"/".join(rest.split(b"/", depth)[:depth])
+        junction = cache.get(key)
+        if junction is None:
+            path = (first + rest).decode('utf-8', 'replace')
+            junction = next((j for j in junctions if j != '/' and (path == j or path.startswith(j + '/')
+                                                                    or path.startswith(j + '?'))), '/')
+            cache[key] = junction
+        return junction
+    return resolve
+
+
+def parse_request(buffer, start, end, junctions=None, duration_unit="us"):
+    builder = Builder(REQUEST.schema)
+    columns = builder.columns
+    times, junction_codes, methods = columns['time'].append, columns['junction'].append, columns['method'].append
+    statuses, sizes, durations = columns['status'].append, columns['bytes'].append, columns['response_time'].append
+    resolve = _junction_resolver(junctions)
+    scale = _DURATION_UNITS[duration_unit]
+    code = builder.code
+    nan = float('nan')
+    for timestamp, method, first, rest, status, size, duration in _REQUEST.findall(buffer, start, end):
+        times(_request_time(timestamp))
+        junction_codes(code(resolve(first, rest)))
+        methods(code(method.decode('ascii', 'replace')))
+        statuses(int(status))
+        sizes(int(size) if size != b"-" else 0)
+        durations(float(duration) * scale if duration else nan)
+    return builder
+
+
+REQUEST = LogFormat({'time': 'q', 'junction': 's', 'method': 's', 'status': 'q', 'bytes': 'q',
+                     'response_time': 'd'},
+                    parse_request, rb'\n')
+register_format("request", REQUEST)
+
+# statistics
+
+_STATS_HEADER = re.compile(
+    rb'^(\d{4}-\d\d-\d\d-\d\d:\d\d:\d\d)(?:\.\d+)?([+-]\d\d:\d\d)?I-* (\S+)[ \t]*([^\n]*)$', re.MULTILINE)
+_STATS_VALUE = re.compile(rb'^[ \t]*([^:\n]*?)[ \t]*:[ \t]*(-?[\d.]+)[ \t]*$', re.MULTILINE)
+
+
+def _stats_time(value, offset):
+    if offset:
+        moment = datetime.strptime((value + offset).decode('ascii'), "%Y-%m-%d-%H:%M:%S%z")
+    else:
+        moment = datetime.strptime(value.decode('ascii'), "%Y-%m-%d-%H:%M:%S").replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def parse_stats(buffer, start, end):
+    builder = Builder(STATS.schema)
+    columns = builder.columns
+    headers = list(_STATS_HEADER.finditer(buffer, start, end))
+    for i, header in enumerate(headers):
+        block_end = headers[i + 1].start() if i + 1 < len(headers) else end
+        moment = _stats_time(header.group(1), header.group(2))
+        component = builder.code(header.group(3).decode('utf-8', 'replace'))
+        junction = builder.code(header.group(4).decode('utf-8', 'replace').strip()) if header.group(4) else -1
+        for name, value in _STATS_VALUE.findall(buffer, header.end(), block_end):
+            try:
+                value = float(value)
+            except ValueError:
+                continue
+            columns['time'].append(moment)
+            columns['component'].append(component)
+            columns['junction'].append(junction)
+            columns['stat'].append(builder.code(name.decode('utf-8', 'replace')))
+            columns['value'].append(value)
+    return builder
+
+
+STATS = LogFormat({'time': 'q', 'component': 's', 'junction': 's', 'stat': 's', 'value': 'd'},
+                  parse_stats, _STATS_HEADER.pattern)
+register_format("stats", STATS)
+
+
+def _is_gzip(filename):
+    with open(filename, 'rb') as f:
+        return f.read(2) == _GZIP_MAGIC
+
+
+def ranges(filename, log_format, chunk_size):
+    """
+    (start, end) of the ranges of a file, split at record boundaries about every chunk_size bytes
+    """
+    size = os.path.getsize(filename)
+    if size == 0:
+        return []
+    if size <= chunk_size:
+        return [(0, size)]
+    boundary = re.compile(log_format.boundary, re.MULTILINE)
+    result = []
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        start = 0
+        while start < size:
+            match = boundary.search(buffer, min(start + chunk_size, size))
+            if match is None:
+                end = size
+            else:
+                # A newline boundary ends the range after it, a record header starts the next range
+                end = match.end() if match.group(0) == b"\n" else match.start()
+            if end <= start:
+                end = size
+            result.append((start, end))
+            start = end
+    return result
+
+
+def _parse(task):
+    filename, log_format, start, end, options = task
+    if start is None:
+        with gzip.open(filename, 'rb') as f:
+            data = f.read()
+        builder = log_format.parse(data, 0, len(data), **options)
+    else:
+        with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            builder = log_format.parse(buffer, start, end, **options)
+    return builder.columns, builder.strings
+
+
+def _merge(schema, results):
+    """
+    Columns of the results of the ranges, the string codes of every range are mapped to a shared dictionary
+    """
+    strings, codes = [], {}
+    parts = {name: [] for name in schema}
+    numpy = columnstore.numpy
+    for columns, local in results:
+        mapping = []
+        for string in local:
+            code = codes.get(string)
+            if code is None:
+                code = codes[string] = len(strings)
+                strings.append(string)
+            mapping.append(code)
+        for name, kind in schema.items():
+            values = columns[name]
+            if numpy is not None:
+                values = numpy.frombuffer(values, dtype=values.typecode) if len(values) else \
+                    numpy.empty(0, dtype=values.typecode)
+                if kind == 's':
+                    # -1 (no value) stays -1, the last element of the mapping
+                    values = numpy.asarray(mapping + [-1], dtype='i')[values]
+            elif kind == 's':
+                values = array('i', (mapping[code] if code >= 0 else -1 for code in values))
+            parts[name].append(values)
+    return Columns(dict(schema), strings,
+                   {name: columnstore._concatenate(_TYPECODES[kind], parts[name]) for name, kind in schema.items()})
+
+
+def analyze(files, log_format="request", processes=None, chunk_size=32 * 1024 * 1024, **options):
+    """
+    Parse log files into Columns
+
+    :param files: file names (exported log files)
+    :param log_format: name of a registered format ("request", "stats") or a LogFormat
+    :param processes: worker processes, 1 parses in this process, None uses the number of CPUs
+    :param chunk_size: approximate bytes per task
+    :param options: options of the parser, eg. junctions=[...] and duration_unit="us" for "request"
+    """
+    if isinstance(files, (str, os.PathLike)):
+        files = [files]
+    if not isinstance(log_format, LogFormat):
+        log_format = _formats[log_format]
+    tasks = []
+    for filename in files:
+        if _is_gzip(filename):
+            tasks.append((filename, log_format, None, None, options))
+        else:
+            tasks.extend((filename, log_format, start, end, options)
+                         for start, end in ranges(filename, log_format, chunk_size))
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(tasks) <= 1:
+        results = [_parse(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(processes, len(tasks))) as executor:
+            results = list(executor.map(_parse, tasks))
+    columns = _merge(log_format.schema, results)
+    logger.debug(f"Parsed {len(columns)} records from {len(files)} files in {len(tasks)} tasks")
+    return columns
@@ -0,0 +1,267 @@
+"""
+Incremental reads of appliance log files with the snippet APIs, instead of exporting whole files.
+
+A LogTailer keeps a cursor (byte offset and last listed size) per log file and only asks for the bytes after
+the cursor, in windows of `chunk_size`. The file list of a source is retrieved once per poll and files whose
+size did not change are not read at all. A file was rotated when a copy named after it appeared (eg.
+msg__webseald-default.log.2024-01-01-10-00-00 next to msg__webseald-default.log) and truncated when its size
+went down: it is read again from the start, after the rest of the old content is read from the rotated copy.
+
+    tailer = LogTailer(isamAppliance, [logtail.reverse_proxy("default"), logtail.common()],
+                       cursors=CursorFile("/var/lib/shipper/cursors.json"))
+    for line in tailer.follow(interval=10):
+        ship(line.file, line.text)
+
+Cursors are saved after every poll when a CursorFile is given, a restarted tailer continues where the previous
+run stopped. Files seen for the first time are read from their end (like tail -f), unless from_start=True.
+"""
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+LogLine = namedtuple('LogLine', ['hostname', 'source', 'file', 'text'])
+
+
+class LogSource(namedtuple('LogSource', ['name', 'list_files', 'read'])):
+    """
+    A group of log files with a snippet API:
+    list_files(isamAppliance) returns the return object of the file list (id and size of the files)
+    read(isamAppliance, file_id, start, size) returns the return object of a snippet of the file
+    """
+    __slots__ = ()
+
+
+def reverse_proxy(instance_id):
+    """
+    Log files of a reverse proxy instance
+    """
+    from ibmsecurity.isam.web.reverse_proxy import logs
+    return LogSource(f"reverse_proxy/{instance_id}",
+                     lambda isamAppliance: logs.get_all(isamAppliance, instance_id),
+                     lambda isamAppliance, file_id, start, size: logs.get(isamAppliance, instance_id, file_id,
+                                                                          start=start, size=size))
+
+
+def common():
+    """
+    Common log files of the reverse proxies
+    """
+    from ibmsecurity.isam.web.reverse_proxy import common_logs
+    return LogSource("reverse_proxy_common", common_logs.get_all,
+                     lambda isamAppliance, file_id, start, size: common_logs.get(isamAppliance, file_id,
+                                                                                 start=start, size=size))
+
+
+def reverse_proxy_trace(instance_id, component_id):
+    """
+    Trace files of a component of a reverse proxy instance
+    """
+    from ibmsecurity.isam.web.reverse_proxy import trace
+    return LogSource(f"reverse_proxy_trace/{instance_id}/{component_id}",
+                     lambda isamAppliance: trace.get_all_logs(isamAppliance, instance_id, component_id),
+                     lambda isamAppliance, file_id, start, size: trace.get(isamAppliance, instance_id, component_id,
+                                                                           file_id, start=start, size=size))
+
+
+def authorization_server(id):
+    """
+    Log files of an authorization server instance
+    """
+    from ibmsecurity.isam.web.authorization_server import logs
+    return LogSource(f"authorization_server/{id}",
+                     lambda isamAppliance: logs.get_all(isamAppliance, id),
+                     lambda isamAppliance, file_id, start, size: logs.get(isamAppliance, id, file_id,
+                                                                          start=start, size=size))
+
+
+def application(file_path=''):
+    """
+    Files of the application log files area, below file_path
+    """
+    from ibmsecurity.isam import application_logs
+    return LogSource(f"application/{file_path}" if file_path else "application",
+                     lambda isamAppliance: application_logs.get_all(isamAppliance, file_path, flat_details='yes'),
+                     lambda isamAppliance, file_id, start, size: application_logs.get(isamAppliance, file_id,
+                                                                                      start=start, length=size))
+
+
+def _files(data):
+    """
+    {file id: size} of a file list, the formats of the snippet APIs differ in their key names
+    """
+    files = {}
+    for entry in data if isinstance(data, list) else []:
+        if not isinstance(entry, dict) or entry.get('type', 'File') != 'File':
+            continue
+        file_id = entry.get('path') or entry.get('id') or entry.get('name')
+        if file_id is not None:
+            files[file_id] = int(entry.get('file_size', entry.get('size', 0)) or 0)
+    return files
+
+
+def _contents(data):
+    if isinstance(data, dict):
+        data = data.get('contents', '')
+    if isinstance(data, bytes):
+        data = data.decode('utf-8', errors='replace')
+    return data or ''
+
+
+class CursorFile:
+    """
+    Cursors of a tailer saved in a json file, {key: {'offset': bytes read, 'size': last listed size}}.
+    Without a filename the cursors are only kept in memory.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.cursors = {}
+        if filename is not None:
+            try:
+                with open(filename, 'r') as f:
+                    self.cursors = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+    def get(self, key):
+        return self.cursors.get(key)
+
+    def put(self, key, cursor):
+        self.cursors[key] = cursor
+
+    def remove(self, key):
+        self.cursors.pop(key, None)
+
+    def keys(self):
+        return list(self.cursors)
+
+    def save(self):
+        """
+        Replace the file atomically, a crash never leaves a partial file behind
+        """
+        if self.filename is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.cursors, f, indent=1, sort_keys=True)
+            os.replace(tmpname, self.filename)
+        except BaseException:
+            os.remove(tmpname)
+            raise
+
+
+class LogTailer:
+    """
+    Yields the new lines of the files of log sources, see the module documentation
+
+    :param sources: LogSource list, eg. [logtail.reverse_proxy("default")]
+    :param cursors: CursorFile to continue from (and save to), the cursors are kept in memory if None
+    :param from_start: read files seen for the first time from the start instead of their end
+    :param chunk_size: bytes asked for per snippet request
+    :param files: only tail these file ids (all files of the sources if None)
+    """
+
+    def __init__(self, isamAppliance, sources, cursors=None, from_start=False, chunk_size=65536, files=None):
+        self.isamAppliance = isamAppliance
+        self.sources = list(sources)
+        self.cursors = cursors if cursors is not None else CursorFile()
+        self.from_start = from_start
+        self.chunk_size = chunk_size
+        self.files = set(files) if files is not None else None
+
+    def _key(self, source, file_id):
+        return f"{self.isamAppliance.hostname}|{source.name}|{file_id}"
+
+    def _read(self, source, file_id, offset, hostname):
+        """
+        Yield the complete lines after offset, returns the offset after the last complete line.
+
+        An incomplete last line is left for the next poll, unless it fills a whole window.
+        """
+        while True:
+            contents = _contents(source.read(self.isamAppliance, file_id, offset, self.chunk_size)['data'])
+            if not contents:
+                return offset
+            raw = contents.encode('utf-8')
+            end = raw.rfind(b'\n') + 1
+            if end == 0:
+                if len(raw) < self.chunk_size:
+                    return offset
+                end = len(raw)
+            for text in raw[:end].decode('utf-8', errors='replace').splitlines():
+                yield LogLine(hostname, source.name, file_id, text)
+            offset += end
+            if len(raw) < self.chunk_size:
+                return offset
+
+    def _poll_source(self, source):
+        hostname = self.isamAppliance.hostname
+        files = _files(source.list_files(self.isamAppliance)['data'])
+        tailed = [file_id for file_id in files if self.files is None or file_id in self.files]
+        prefix = self._key(source, "")
+        known = {key[len(prefix):] for key in self.cursors.keys() if key.startswith(prefix)}
+        new_files = [file_id for file_id in files if file_id not in known]
+
+        # Rotated files (a new copy named after the file appeared) and truncated files (the size went down) are
+        # read again from the start. The rest of the old content of a rotated file is read from its copy first
+        rotated = []
+        for file_id in tailed:
+            cursor = self.cursors.get(self._key(source, file_id))
+            if cursor is None or cursor['size'] is None:
+                continue
+            copies = [f for f in new_files if f != file_id and f.startswith(file_id) and files[f] >= cursor['offset']]
+            if not copies and files[file_id] >= cursor['size']:
+                continue
+            if copies:
+                logger.info(f"{hostname}: {source.name}/{file_id} rotated to {copies[0]}")
+                self.cursors.put(self._key(source, copies[0]), {'offset': cursor['offset'], 'size': None})
+                rotated.append(copies[0])
+            else:
+                logger.info(f"{hostname}: {source.name}/{file_id} was truncated")
+            self.cursors.put(self._key(source, file_id), {'offset': 0, 'size': None})
+
+        for file_id in rotated + [f for f in tailed if f not in rotated]:
+            key = self._key(source, file_id)
+            size = files[file_id]
+            cursor = self.cursors.get(key)
+            if cursor is None and not (self.from_start or known):
+                self.cursors.put(key, {'offset': size, 'size': size})
+                continue
+            if cursor is None:
+                cursor = {'offset': 0, 'size': None}
+            elif cursor['size'] == size:
+                continue
+            offset = yield from self._read(source, file_id, cursor['offset'], hostname)
+            self.cursors.put(key, {'offset': offset, 'size': size})
+
+        # Files that no longer exist
+        for file_id in known - set(files):
+            self.cursors.remove(self._key(source, file_id))
+
+    def poll(self):
+        """
+        Yield the lines written since the previous poll (LogLine), the cursors are saved at the end
+        """
+        for source in self.sources:
+            yield from self._poll_source(source)
+        self.cursors.save()
+
+    def follow(self, interval=5.0, polls=None):
+        """
+        Poll every interval seconds and yield the new lines, forever or for a number of polls
+        """
+        count = 0
+        while polls is None or count < polls:
+            started = time.monotonic()
+            yield from self.poll()
+            count += 1
+            if polls is None or count < polls:
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
@@ -0,0 +1,109 @@
+"""
+Lazy iteration over the records of list endpoints, one page at a time.
+
+The paging style of an endpoint is taken from the parameters of its get_all function:
+- start and count (eg. aac.extensions.get_all, fed.federations.get_all, statistics.get_rp_throughput_summary):
+  pages of `page_size` records are retrieved until a page is short
+- count only (eg. aac.access_control.policies.get_all): the endpoint can not be paged, the whole list is
+  retrieved with one request
+- neither: one request
+
+    for partner in paging.iterate(ibmsecurity.isam.fed.partners.get_all, isamAppliance, "fed1", page_size=50):
+        ...
+
+With prefetch=True the next page is retrieved in the background while the records of the current page are
+consumed. At most two pages are held in memory, whatever the size of the collection.
+"""
+import inspect
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Keys of the list of records when an endpoint wraps its page in an object (eg. SCIM)
+_ITEMS_KEYS = ('Resources', 'items', 'data')
+
+
+def paging_style(get_all):
+    """
+    "start_count", "count" or None, see the module documentation
+    """
+    parameters = inspect.signature(get_all).parameters
+    if 'count' not in parameters:
+        return None
+    if 'start' in parameters:
+        return "start_count"
+    return "count"
+
+
+def _records(data, items=None):
+    if callable(items):
+        return items(data)
+    if isinstance(data, dict):
+        if items is not None:
+            return data.get(items) or []
+        for key in _ITEMS_KEYS:
+            if isinstance(data.get(key), list):
+                return data[key]
+        return []
+    return data if isinstance(data, list) else []
+
+
+def pages(get_all, isamAppliance, *args, page_size=100, first=0, prefetch=False, items=None, **kwargs):
+    """
+    Yield the pages (lists of records) of a get_all function, called as
+    get_all(isamAppliance, *args, start=..., count=..., **kwargs)
+
+    :param page_size: records per request
+    :param first: start of the first page, the index of the first record of the endpoint (0 or 1)
+    :param prefetch: retrieve the next page while the current one is consumed
+    :param items: key or function to get the records from the data of an endpoint that wraps them
+    """
+    style = paging_style(get_all)
+    if style != "start_count":
+        if style == "count":
+            logger.debug(f"{get_all.__module__}.{get_all.__name__} has no start, retrieving all records at once")
+        yield _records(get_all(isamAppliance, *args, **kwargs)['data'], items)
+        return
+
+    def fetch(start):
+        return _records(get_all(isamAppliance, *args, start=start, count=page_size, **kwargs)['data'], items)
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        start = first
+        page = fetch(start)
+        previous = None
+        while True:
+            if page and page == previous:
+                # The endpoint ignored start, the first page was the whole list
+                return
+            if len(page) > page_size:
+                # The endpoint ignored the paging parameters and returned everything
+                logger.debug(f"Paging ignored by {get_all.__module__}.{get_all.__name__}, "
+                             f"{len(page)} records for a page of {page_size}")
+                yield page
+                return
+            last = len(page) < page_size
+            following = None
+            if not last and executor is not None:
+                following = executor.submit(fetch, start + page_size)
+            if page:
+                yield page
+            if last:
+                return
+            start += page_size
+            previous = page
+            page = following.result() if following is not None else fetch(start)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def iterate(get_all, isamAppliance, *args, page_size=100, first=0, prefetch=False, items=None, **kwargs):
+    """
+    Yield the records of a get_all function one by one, see pages()
+    """
+    for page in pages(get_all, isamAppliance, *args, page_size=page_size, first=first, prefetch=prefetch,
+                      items=items, **kwargs):
+        yield from page
@@ -0,0 +1,133 @@
+"""
+Bulk synchronisation of configuration stanzas (reverse proxy, authorization server and runtime configuration).
+
+The desired configuration is a document of stanzas and their entries, eg.
+
+    {"server": [["web-host-name", "www.example.com"], ["worker-threads", "300"]],
+     "session": {"timeout": "7200", "inactive-timeout": "600"},
+     "ssl": {"base-crypto-library": ["Default"]}}
+
+Entries are either a list of [key, value] pairs (the format of the entry.add/set functions, a key may repeat
+for multiple values) or a dict of key to value or list of values. An empty list of values removes the key.
+Values are compared as strings and regardless of order, keys not in the desired document are left alone.
+"""
+import ast
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    basestring
+except NameError:
+    basestring = (str, bytes)
+
+
+class StanzaDiff(namedtuple('StanzaDiff', ['stanza', 'missing', 'add', 'delete'])):
+    """
+    Changes of one stanza:
+    missing: the stanza does not exist and has to be created
+    add: [key, value] pairs to add, in one request
+    delete: keys whose current values have to be removed first (changed or removed keys)
+    """
+    __slots__ = ()
+
+    @property
+    def changed(self):
+        return self.missing or bool(self.add) or bool(self.delete)
+
+    def to_dict(self):
+        return {'missing': self.missing, 'add': self.add, 'delete': self.delete}
+
+
+def normalize(entries):
+    """
+    {key: [values as str]} of entries in any of the supported formats, keys in the order given
+    """
+    if entries is None:
+        return {}
+    if isinstance(entries, basestring):
+        entries = ast.literal_eval(entries)
+    if isinstance(entries, dict):
+        entries = entries.items()
+    result = {}
+    for key, value in entries:
+        values = result.setdefault(key, [])
+        if isinstance(value, (list, tuple)):
+            values.extend(str(v) for v in value)
+        elif value is not None:
+            values.append(str(value))
+    return result
+
+
+def diff(stanza, current, desired, missing=False, force=False):
+    """
+    The StanzaDiff that turns the current entries of the stanza (as returned by entry.get_all) into
+    the desired entries. Only the keys whose values differ are deleted and added again (all keys with force).
+    """
+    current = normalize(current)
+    add = []
+    delete = []
+    for key, values in normalize(desired).items():
+        existing = current.get(key)
+        if existing is not None and not force and sorted(existing) == sorted(values):
+            continue
+        if existing:
+            delete.append(key)
+        add.extend([key, value] for value in values)
+    return StanzaDiff(stanza, missing, add, delete)
+
+
+def sync(isamAppliance, stanzas, get_stanzas, get_entries, add_stanza, delete_entry, add_entries,
+         check_mode=False, force=False):
+    """
+    Apply a document of stanzas with the minimum number of requests
+
+    The list of stanzas is retrieved once and every desired stanza that exists once, then for each stanza
+    with changes: the stanza is created if missing, changed keys are deleted (one request per key) and
+    all new values are added with a single request.
+
+    The functions are those of the configuration modules, called with the appliance as first argument:
+    get_stanzas() the list of stanza names, get_entries(stanza) the entries of a stanza,
+    add_stanza(stanza), delete_entry(stanza, key) and add_entries(stanza, entries)
+
+    :param stanzas: {stanza: entries}
+    :param force: replace all the desired keys, also when they are unchanged
+    :return: return object, data is {stanza: {'missing', 'add', 'delete'}} of the stanzas that changed
+    """
+    if isinstance(stanzas, basestring):
+        stanzas = ast.literal_eval(stanzas)
+
+    ret_obj = get_stanzas(isamAppliance)
+    warnings = list(ret_obj.get('warnings', []))
+    if not isinstance(ret_obj['data'], list):
+        # eg. the API is not available for the deployment model, see the warnings
+        return isamAppliance.create_return_object(warnings=warnings)
+    existing = set(ret_obj['data'])
+
+    changes = []
+    for stanza, entries in stanzas.items():
+        missing = stanza not in existing
+        current = {}
+        if not missing:
+            current = get_entries(isamAppliance, stanza)['data']
+        change = diff(stanza, current, entries, missing=missing, force=force)
+        if change.changed:
+            changes.append(change)
+
+    data = {change.stanza: change.to_dict() for change in changes}
+    if not changes or check_mode:
+        return isamAppliance.create_return_object(changed=bool(changes), data=data, warnings=warnings)
+
+    for change in changes:
+        if change.missing:
+            logger.info(f"Adding stanza {change.stanza}")
+            add_stanza(isamAppliance, change.stanza)
+        for key in change.delete:
+            logger.info(f"Deleting entry, will be re-added: {change.stanza}/{key}")
+            delete_entry(isamAppliance, change.stanza, key)
+        if change.add:
+            ret_obj = add_entries(isamAppliance, change.stanza, change.add)
+            warnings.extend(ret_obj.get('warnings', []))
+
+    return isamAppliance.create_return_object(changed=True, data=data, warnings=warnings)
@@ -0,0 +1,247 @@
+"""
+Periodic collection of appliance statistics (ibmsecurity.isam.statistics) into a ColumnStore.
+
+Each Metric names a table and a function that retrieves the statistics of one appliance. The records of the
+response are normalized into rows: a time (epoch seconds), the host, string fields as tags and numeric
+fields as values. Statistics endpoints return a time window, so consecutive samples overlap: only the rows
+newer than the last stored time of the same host and tags are appended.
+
+    store = ColumnStore("/var/lib/isam-stats")
+    collector = StatisticsCollector(fleet, store, [statscollector.cpu(), statscollector.junction_reqtime("default")])
+    collector.run(interval=300)
+
+    store.aggregate("cpu", "user_cpu", "max", by=["host"], bucket=3600)
+    store.aggregate("junction_reqtime", "reqtime", "p95", by=["host", "junction"])
+
+The response formats differ per endpoint and version, a Metric can bring its own rows() normalizer and
+rename the fields with `rename`.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Fields holding the time of a record, in order of preference
+TIME_FIELDS = ('time', 'timestamp', 'x', 't', 'date', 'start_time')
+# Keys of the list of records in a response object
+RECORD_KEYS = ('items', 'records', 'data')
+
+
+class Metric(namedtuple('Metric', ['table', 'fetch', 'rows', 'rename'])):
+    """
+    table: name of the table in the store
+    fetch(isamAppliance): return object of the statistics endpoint
+    rows(data): rows of the data of the response, defaults to normalize()
+    rename: {field: column} applied to the rows, eg. {'series': 'junction'}
+    """
+    __slots__ = ()
+
+    def __new__(cls, table, fetch, rows=None, rename=None):
+        return super().__new__(cls, table, fetch, rows, rename or {})
+
+
+def _epoch(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        # Some endpoints use milliseconds
+        return int(value / 1000) if value > 100000000000 else int(value)
+    if isinstance(value, str):
+        try:
+            return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+        except ValueError:
+            try:
+                return _epoch(float(value))
+            except ValueError:
+                return None
+    return None
+
+
+def _records(data):
+    """
+    (series, record) of the records of a response
+    """
+    if isinstance(data, list):
+        for record in data:
+            if isinstance(record, dict):
+                yield None, record
+        return
+    if not isinstance(data, dict):
+        return
+    for key in RECORD_KEYS:
+        if isinstance(data.get(key), list):
+            yield from _records(data[key])
+            return
+    series = {key: value for key, value in data.items() if isinstance(value, list)}
+    if series and all(isinstance(record, dict) for records in series.values() for record in records):
+        for name, records in series.items():
+            for record in records:
+                yield name, record
+        return
+    yield None, data
+
+
+def normalize(data, now=None):
+    """
+    Rows of a statistics response: records are taken from a list, from the list under a RECORD_KEYS key, or from
+    the lists of an object of series (the name of the series is the "series" tag). Numbers are values, strings
+    are tags, records without a time get `now`.
+    """
+    now = int(now if now is not None else time.time())
+    rows = []
+    for series, record in _records(data):
+        row = {}
+        for field in TIME_FIELDS:
+            if field in record:
+                row['time'] = _epoch(record[field])
+                if row['time'] is not None:
+                    break
+        if row.get('time') is None:
+            row['time'] = now
+        if series is not None:
+            row['series'] = series
+        for key, value in record.items():
+            if key in TIME_FIELDS and key not in row:
+                continue
+            if isinstance(value, bool):
+                row[key] = int(value)
+            elif isinstance(value, (int, float, str)) and key != 'time':
+                row[key] = value
+        rows.append(row)
+    return rows
+
+
+# Metrics of the ibmsecurity.isam.statistics endpoints
+
+def cpu(timespan=3600):
+    from ibmsecurity.isam import statistics
+    return Metric("cpu", lambda isamAppliance: statistics.get_cpu(isamAppliance, timespan))
+
+
+def memory(timespan=3600):
+    from ibmsecurity.isam import statistics
+    return Metric("memory", lambda isamAppliance: statistics.get_memory(isamAppliance, timespan))
+
+
+def storage(timespan=3600):
+    from ibmsecurity.isam import statistics
+    return Metric("storage", lambda isamAppliance: statistics.get_storage(isamAppliance, timespan))
+
+
+def network(interface, timespan=3600):
+    from ibmsecurity.isam import statistics
+    return Metric("network", lambda isamAppliance: statistics.get_network(isamAppliance, interface, timespan),
+                  rows=lambda data: [dict(row, interface=interface) for row in normalize(data)])
+
+
+def junction_reqtime(instance, duration=3600):
+    """
+    Average response time per junction of a reverse proxy instance, the series are the junctions
+    """
+    from ibmsecurity.isam import statistics
+    return Metric("junction_reqtime",
+                  lambda isamAppliance: statistics.get_rp_junction(isamAppliance, instance, int(time.time()), duration),
+                  rows=lambda data: [dict(row, instance=instance) for row in normalize(data)],
+                  rename={'series': 'junction'})
+
+
+def throughput(instance, duration=3600):
+    from ibmsecurity.isam import statistics
+    return Metric("throughput",
+                  lambda isamAppliance: statistics.get_rp_throughput(isamAppliance, instance, int(time.time()),
+                                                                     duration),
+                  rows=lambda data: [dict(row, instance=instance) for row in normalize(data)])
+
+
+class StatisticsCollector:
+    """
+    Samples metrics of many appliances into a ColumnStore, see the module documentation
+
+    :param appliances: list of appliances, or an ApplianceFleet
+    :param store: ColumnStore
+    :param metrics: Metric list
+    """
+
+    def __init__(self, appliances, store, metrics, max_workers=10):
+        if hasattr(appliances, 'appliances'):
+            appliances = list(appliances.appliances.values())
+        self.appliances = list(appliances)
+        self.store = store
+        self.metrics = list(metrics)
+        self.max_workers = max_workers
+        self._filename = os.path.join(store.directory, "collector.json")
+        try:
+            with open(self._filename, 'r') as f:
+                self.watermarks = json.load(f)
+        except (OSError, ValueError):
+            self.watermarks = {}
+        self._lock = threading.Lock()
+
+    def _sample(self, isamAppliance, metric):
+        data = metric.fetch(isamAppliance)['data']
+        rows = (metric.rows or normalize)(data)
+        fresh = []
+        with self._lock:
+            for row in rows:
+                row = {metric.rename.get(key, key): value for key, value in row.items()}
+                row['host'] = isamAppliance.hostname
+                tags = json.dumps({k: v for k, v in sorted(row.items()) if isinstance(v, str)})
+                key = f"{metric.table}|{tags}"
+                if row['time'] <= self.watermarks.get(key, -1):
+                    continue
+                fresh.append((key, row))
+            for key, row in fresh:
+                self.watermarks[key] = max(self.watermarks.get(key, -1), row['time'])
+        self.store.append(metric.table, [row for key, row in fresh])
+        return len(fresh)
+
+    def collect(self):
+        """
+        Sample every metric of every appliance once and flush the store
+
+        :return: {(hostname, table): number of new rows, or the exception}
+        """
+        def _call(job):
+            isamAppliance, metric = job
+            try:
+                return (isamAppliance.hostname, metric.table), self._sample(isamAppliance, metric)
+            except Exception as e:
+                logger.error(f"Unable to collect {metric.table} from {isamAppliance.hostname}: {e}")
+                return (isamAppliance.hostname, metric.table), e
+
+        jobs = [(isamAppliance, metric) for isamAppliance in self.appliances for metric in self.metrics]
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ibmsecurity-stats") as executor:
+            results = dict(executor.map(_call, jobs))
+        self.store.flush()
+        self._save()
+        return results
+
+    def _save(self):
+        os.makedirs(self.store.directory, exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(dir=self.store.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.watermarks, f)
+            os.replace(tmpname, self._filename)
+        except BaseException:
+            os.remove(tmpname)
+            raise
+
+    def run(self, interval=300, iterations=None):
+        """
+        Collect every interval seconds, forever or a number of times
+        """
+        count = 0
+        while iterations is None or count < iterations:
+            started = time.monotonic()
+            self.collect()
+            count += 1
+            if iterations is None or count < iterations:
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
@@ -1,17 +1,19 @@
 import random
 import string
 import logging
-import pprint
-import difflib
 import hashlib
 import ntpath
 import re
+import functools
 from io import open
 import zipfile
 import json
 import os
 import tempfile
 
+from ibmsecurity.utilities import jsondiff
+from ibmsecurity.utilities.zipmanifest import ZipManifest
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -134,7 +136,16 @@ def random_password(length=12, allow_special=True):
     return pw
 
 
-def json_compare(ret_obj1, ret_obj2, deleted_keys=[]):
+def json_compare(ret_obj1, ret_obj2, deleted_keys=[], equals_only=False):
+    """
+    Compare the data of two return objects, ignoring the order of lists (see utilities/jsondiff.py)
+
+    The differences are returned as JSON Patch style operations (`changes`), as text (`difference`), as lines
+    (`context_difference`) and as an html page (`html_difference`). The renderings are only built when they are
+    read.
+
+    :param equals_only: only set `matches`, stops at the first difference
+    """
     ret_obj = {'rc': 0, 'data': {'matches': False, 'difference': '', 'deleted_keys': deleted_keys},
                'changed': False, 'warnings': []}
 
@@ -149,20 +160,21 @@ def json_compare(ret_obj1, ret_obj2, deleted_keys=[]):
     if 'warnings' in ret_obj2 and ret_obj2['warnings']:
         ret_obj['warnings'].append(ret_obj2['warnings'])
 
-    sorted_json1 = json_sort(ret_obj1['data'])
-    sorted_json2 = json_sort(ret_obj2['data'])
+    if equals_only:
+        ret_obj['data']['matches'] = jsondiff.equals(ret_obj1['data'], ret_obj2['data'])
+        return ret_obj
 
-    if sorted_json1 == sorted_json2:
+    differences = jsondiff.diff(ret_obj1['data'], ret_obj2['data'])
+    if differences.matches:
         ret_obj['data']['matches'] = True
     else:
-        psj1 = pprint.pformat(sorted_json1)
-        logger.debug('Sorted JSON1 to Compare: \n' + psj1)
-        psj2 = pprint.pformat(sorted_json2)
-        logger.debug('Sorted JSON2 to Compare: \n' + psj2)
-        diff = difflib.ndiff(psj1.split('\n'), psj2.split('\n'))
-        ret_obj['data']['difference'] = '\n'.join(diff)
-        ret_obj['data']['context_difference'] = list(difflib.context_diff(psj1.split('\n'), psj2.split('\n')))
-        ret_obj['data']['html_difference'] = difflib.HtmlDiff().make_file(psj1.split('\n'), psj2.split('\n'), context=True)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Differences: \n' + differences.text)
+        data = ret_obj['data'] = jsondiff.LazyDict(ret_obj['data'])
+        data.set_lazy('difference', lambda: differences.text)
+        data['changes'] = differences.operations
+        data.set_lazy('context_difference', lambda: differences.lines)
+        data.set_lazy('html_difference', lambda: differences.html)
 
     return ret_obj
 
@@ -201,38 +213,26 @@ def files_same(original_file, new_file):
         return False
 
 
-def files_same_zip_content(original_file, new_file):
-    identical = True
+def files_same_zip_content(original_file, new_file, verify=False):
+    """
+    Compare the content of two zip files, using the sizes and CRC-32 of the entries (see utilities/zipmanifest.py)
+
+    :param verify: also compare the SHA-256 of entries with the same size and CRC-32
+    """
     logger.debug(f"Comparing original_file[{original_file}] vs new_file[{new_file}]")
-    z1 = zipfile.ZipFile(original_file)
-    z2 = zipfile.ZipFile(new_file)
-
-    if len(z1.infolist()) != len(z2.infolist()):
-        logger.debug(f"number of archive elements differ: {len(z1.infolist())} in {z1.filename} vs {len(z2.infolist())} from server")
-        identical = False
-        # Can stop comparison of zip files for perfomance
-        return identical
-    for zipentry in z1.infolist():
-        if zipentry.filename not in z2.namelist():
-            logger.debug(f"no file named {zipentry.filename} found in {z2.filename}")
-            identical = False
-        else:
-            with z1.open(zipentry.filename) as f:
-                original_file_contents = f.read()
-            with z2.open(zipentry.filename) as f:
-                new_file_contents = f.read()
-            hash_original_file = hashlib.sha224(original_file_contents).hexdigest()
-            hash_new_file = hashlib.sha224(new_file_contents).hexdigest()
-            if hash_original_file != hash_new_file:
-                identical = False
-                logger.debug(f"content for zip file {zipentry.filename} differs.")
-
-    if identical:
+    diff = ZipManifest.from_zip(original_file).diff(ZipManifest.from_zip(new_file), verify=verify)
+    if diff.added or diff.removed:
+        logger.debug(f"archive elements only in {original_file}: {sorted(diff.added)}, "
+                     f"only in {new_file}: {sorted(diff.removed)}")
+    for path in sorted(diff.changed):
+        logger.debug(f"content for zip file {path} differs.")
+
+    if diff.identical:
         logger.info(f"content for zip files {original_file} and {new_file} are the same.")
     else:
         logger.info(f"content for zip files {original_file} and {new_file} are different.")
 
-    return identical
+    return diff.identical
 
 
 def get_random_temp_dir():
@@ -268,6 +268,85 @@ def path_leaf(path):
     return tail or ntpath.basename(head)
 
 
+_version_build_re = re.compile(r'_b\d+$')
+_version_trailing_zeros_re = re.compile(r'(\.0+)*$')
+
+
+@functools.lru_cache(maxsize=1024)
+def _version_tuple(version):
+    """
+    Normalize a version string into a tuple of integers (without build suffix and trailing zeros)
+    """
+    version = _version_build_re.sub('', version)
+    return tuple(int(x) for x in _version_trailing_zeros_re.sub('', version).split("."))
+
+
+class Version(tuple):
+    """
+    Parsed appliance version, that can be compared with other Version objects or version strings.
+
+        Version("10.0.6.0") >= "10.0.6"      -> True
+        Version("10.0.6.0_b123") < "10.0.7"  -> True
+
+    Being a tuple of integers, it serializes to json as a list.  str() returns the original version string.
+    """
+
+    def __new__(cls, version):
+        if isinstance(version, Version):
+            return version
+        self = super().__new__(cls, _version_tuple(str(version)))
+        self.raw = str(version)
+        return self
+
+    def __getnewargs__(self):
+        # copy and pickle rebuild the object from the version string, not from the tuple of integers
+        return (self.raw,)
+
+    def __reduce__(self):
+        return Version, (self.raw,)
+
+    @staticmethod
+    def _coerce(other):
+        if isinstance(other, Version):
+            return other
+        if isinstance(other, str):
+            return Version(other)
+        return NotImplemented
+
+    def __eq__(self, other):
+        other = self._coerce(other)
+        return other if other is NotImplemented else tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        other = self._coerce(other)
+        return other if other is NotImplemented else tuple.__ne__(self, other)
+
+    def __lt__(self, other):
+        other = self._coerce(other)
+        return other if other is NotImplemented else tuple.__lt__(self, other)
+
+    def __le__(self, other):
+        other = self._coerce(other)
+        return other if other is NotImplemented else tuple.__le__(self, other)
+
+    def __gt__(self, other):
+        other = self._coerce(other)
+        return other if other is NotImplemented else tuple.__gt__(self, other)
+
+    def __ge__(self, other):
+        other = self._coerce(other)
+        return other if other is NotImplemented else tuple.__ge__(self, other)
+
+    __hash__ = tuple.__hash__
+
+    def __str__(self):
+        return self.raw
+
+    def __repr__(self):
+        return f"Version({self.raw!r})"
+
+
+@functools.lru_cache(maxsize=4096)
 def version_compare(version1, version2):
     """
     Compare two ISAM version strings. Please note that the versions should be all numeric separated by dots.
@@ -301,15 +380,13 @@ def version_compare(version1, version2):
     :return:
     """
 
-    def normalize(v):
-        v = re.sub(r'_b\d+$', '', v)
-        return [int(x) for x in re.sub(r'(\.0+)*$', '', v).split(".")]
-
-    if normalize(version1) == normalize(version2):
+    v1 = _version_tuple(str(version1))
+    v2 = _version_tuple(str(version2))
+    if v1 == v2:
         return 0
-    elif normalize(version1) > normalize(version2):
+    elif v1 > v2:
         return 1
-    elif normalize(version1) < normalize(version2):
+    else:
         return -1
 
 
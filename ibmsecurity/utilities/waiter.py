@@ -0,0 +1,240 @@
+"""
+Waiting for an appliance to come back (reboot, LMI restart, firmware install) without fixed sleeps.
+
+A Waiter checks a readiness predicate with exponential backoff and jitter until it is true or the deadline
+(monotonic clock, so request latency counts) has passed. The first checks come quickly, later checks are
+spread out up to `max_interval`. Exceptions raised by the predicate mean "not ready" (the LMI is down).
+
+    start_time = waiter.lmi_start_time(isamAppliance)
+    ibmsecurity.isam.base.lmi.restart(isamAppliance)
+    result = Waiter(timeout=300).wait(waiter.lmi_restarted(isamAppliance, start_time), "LMI restart")
+    if not result:
+        ...  # result.elapsed, result.attempts, result.error
+
+While waiting the requests of the predicates use a short connect timeout and no retries (see probing), so a
+host that is still down costs a few seconds per check instead of the full connect timeout and retries.
+"""
+import copy
+import logging
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class WaitResult(namedtuple('WaitResult', ['ready', 'elapsed', 'attempts', 'value', 'error'])):
+    """
+    Outcome of a wait: ready is False when the deadline passed, value is the last value of the predicate and
+    error the exception of the last check (if it failed). True when ready.
+    """
+    __slots__ = ()
+
+    def __bool__(self):
+        return self.ready
+
+
+@contextmanager
+def probing(isamAppliance, connect_timeout=5.0, read_timeout=30.0):
+    """
+    Use a short connect timeout and no retries for the requests of the appliance, the transport of the
+    appliance is restored afterwards
+    """
+    transport = getattr(isamAppliance, 'transport', None)
+    session = getattr(isamAppliance, 'session', None)
+    if transport is None or not hasattr(session, 'mount'):
+        yield isamAppliance
+        return
+    probe = copy.copy(transport)
+    probe.connect_timeout = connect_timeout
+    probe.read_timeout = read_timeout
+    probe.retries = 0
+    probe.apply(session)
+    try:
+        yield isamAppliance
+    finally:
+        transport.apply(session)
+
+
+class Waiter:
+    """
+    Checks predicates with backoff until they are true, see the module documentation
+
+    :param timeout: seconds until the wait gives up, None to wait until the predicate is true
+    :param interval: seconds before the second check, multiplied by factor for every next check
+    :param max_interval: the longest pause between checks
+    :param jitter: share of the pause that is random (0.2 is +/- 20%), so that many waiters do not check in step
+    :param delay: seconds before the first check, eg. the time an appliance needs to go down after a reboot request
+    :param probe_timeout: connect timeout of the requests while waiting (see probing), None keeps the transport
+    """
+
+    def __init__(self, timeout=300, interval=1.0, max_interval=15.0, factor=2.0, jitter=0.2, delay=0.0,
+                 probe_timeout=5.0, clock=time.monotonic, sleep=time.sleep):
+        self.timeout = timeout
+        self.interval = interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+        self.delay = delay
+        self.probe_timeout = probe_timeout
+        self.clock = clock
+        self.sleep = sleep
+        # (description, WaitResult) of the waits, for timing metrics
+        self.results = []
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    @classmethod
+    def from_check_freq(cls, wait_time=300, check_freq=5):
+        """
+        Waiter for the wait_time/check_freq arguments of the *_and_wait functions, check_freq is the longest pause
+        """
+        return cls(timeout=wait_time, interval=min(1.0, check_freq), max_interval=check_freq)
+
+    def pauses(self):
+        """
+        Yield the pauses between checks
+        """
+        pause = self.interval
+        while True:
+            with self._lock:
+                spread = 1.0 + self.jitter * (2 * self._random.random() - 1)
+            yield max(0.0, min(pause, self.max_interval) * spread)
+            pause *= self.factor
+
+    def wait(self, predicate, description="condition", isamAppliance=None):
+        """
+        Check predicate() until it returns a true value or the timeout expires
+
+        :param isamAppliance: appliance used by the predicate, its requests use the probe timeout while waiting
+        :return: WaitResult
+        """
+        if isamAppliance is not None and self.probe_timeout is not None:
+            with probing(isamAppliance, connect_timeout=self.probe_timeout):
+                return self._wait(predicate, description)
+        return self._wait(predicate, description)
+
+    def _wait(self, predicate, description):
+        start = self.clock()
+        deadline = start + self.timeout if self.timeout is not None else float('inf')
+        if self.delay:
+            self.sleep(min(self.delay, deadline - start))
+        pauses = self.pauses()
+        attempts = 0
+        while True:
+            attempts += 1
+            value, error = None, None
+            try:
+                value = predicate()
+            except Exception as e:
+                error = e
+            now = self.clock()
+            if value:
+                result = WaitResult(True, now - start, attempts, value, None)
+                logger.info(f"{description} ready after {result.elapsed:.1f} seconds ({attempts} checks)")
+                break
+            if now >= deadline:
+                result = WaitResult(False, now - start, attempts, value, error)
+                logger.warning(f"{description} not ready after {result.elapsed:.1f} seconds ({attempts} checks)")
+                break
+            pause = min(next(pauses), deadline - now)
+            logger.debug(f"{description} not ready after {now - start:.1f} seconds"
+                         f"{f' ({error})' if error is not None else ''}, next check in {pause:.1f} seconds")
+            self.sleep(pause)
+        with self._lock:
+            self.results.append((description, result))
+        return result
+
+    def wait_all(self, predicates, description="condition", max_workers=10):
+        """
+        Wait for many predicates at the same time, eg. one per appliance of a fleet
+
+        :param predicates: {key: predicate} or {key: (predicate, isamAppliance)}
+        :return: {key: WaitResult}
+        """
+        def _wait(item):
+            key, predicate = item
+            isamAppliance = None
+            if isinstance(predicate, tuple):
+                predicate, isamAppliance = predicate
+            return key, self.wait(predicate, f"{description} of {key}", isamAppliance=isamAppliance)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ibmsecurity-waiter") as executor:
+            return dict(executor.map(_wait, predicates.items()))
+
+
+# Readiness predicates
+
+def lmi_start_time(isamAppliance):
+    """
+    start_time of the LMI, to be taken before the restart
+    """
+    import ibmsecurity.isam.base.lmi
+    return ibmsecurity.isam.base.lmi.get(isamAppliance)['data'][0]['start_time']
+
+
+def lmi_restarted(isamAppliance, start_time):
+    """
+    The LMI responds with a start_time other than the one before the restart
+    """
+    import ibmsecurity.isam.base.lmi
+
+    def ready():
+        ret_obj = ibmsecurity.isam.base.lmi.get(isamAppliance)
+        data = ret_obj['data']
+        return ret_obj['rc'] == 0 and isinstance(data, list) and len(data) > 0 and \
+            'start_time' in data[0] and data[0]['start_time'] != start_time
+    return ready
+
+
+def partition_rebooted(isamAppliance, partitions):
+    """
+    The active partition has a last_boot other than the one before the reboot
+
+    :param partitions: the data of firmware.get before the reboot
+    """
+    import ibmsecurity.isam.base.firmware
+    before = [partition.get('last_boot') for partition in partitions]
+
+    def ready():
+        ret_obj = ibmsecurity.isam.base.firmware.get(isamAppliance, ignore_error=True)
+        data = ret_obj['data']
+        if ret_obj['rc'] != 0 or not isinstance(data, list):
+            return False
+        return any(partition.get('active') is True and 'last_boot' in partition and
+                   (i >= len(before) or partition['last_boot'] != before[i])
+                   for i, partition in enumerate(data))
+    return ready
+
+
+def reboot_initiated(appliance, last_boot, firmware_get):
+    """
+    The appliance stopped answering or its active partition booted after last_boot, for appliances that reboot
+    by themselves some time after a request (eg. ISVG after a firmware install)
+
+    :param firmware_get: the firmware.get function of the product
+    """
+    def ready():
+        try:
+            partitions = firmware_get(appliance)['data']
+            return any(partition['active'] is True and partition['last_boot'] > last_boot
+                       for partition in partitions)
+        except Exception as e:
+            logger.debug(f"Exception occurred: {e}. Assuming appliance has now initiated reboot process")
+            return True
+    return ready
+
+
+def runtime_started(isamAppliance):
+    """
+    The runtime component (policy server) reports that it is started
+    """
+    import ibmsecurity.isam.web.runtime.process
+
+    def ready():
+        data = ibmsecurity.isam.web.runtime.process.get(isamAppliance)['data']
+        return isinstance(data, dict) and str(data.get('status', '')).lower() == "started"
+    return ready
@@ -0,0 +1,119 @@
+"""
+Manifests of zip archives, used to compare a zip file with the content exported from the appliance
+(management root, runtime template files) without extracting or re-reading every entry.
+
+A manifest maps each path in the archive to (size, crc32, sha256). Size and CRC-32 come from the central
+directory of the zip, the SHA-256 of an entry is only computed when needed (`verify=True`), streaming the entry.
+"""
+import collections
+import contextlib
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+# Bytes read at a time when hashing an entry
+CHUNK_SIZE = 1024 * 1024
+
+
+class ManifestDiff(collections.namedtuple('ManifestDiff', ['added', 'removed', 'changed'])):
+    """
+    Difference between two manifests as sets of paths: `added` only in the first, `removed` only in the second,
+    `changed` in both with different content
+    """
+    __slots__ = ()
+
+    @property
+    def identical(self):
+        return not (self.added or self.removed or self.changed)
+
+
+class ZipManifest:
+    """
+    {path: (size, crc32, sha256)} index of a zip file, sha256 is None until hashed
+    """
+
+    def __init__(self, entries=None, filename=None):
+        self.entries = {path: list(entry) for path, entry in (entries or {}).items()}
+        self.filename = filename
+
+    @classmethod
+    def from_zip(cls, filename):
+        """
+        Manifest of a zip file, only the central directory is read
+        """
+        with zipfile.ZipFile(filename) as z:
+            entries = {info.filename: (info.file_size, info.CRC, None) for info in z.infolist()}
+        return cls(entries, filename=filename)
+
+    @property
+    def paths(self):
+        return self.entries.keys()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, path):
+        return path in self.entries
+
+    def hash(self, path):
+        """
+        SHA-256 of an entry, computed from the zip file the first time it is needed
+        """
+        entry = self.entries[path]
+        if entry[2] is None:
+            if self.filename is None:
+                raise ValueError(f"No zip file to compute the hash of {path}")
+            digest = hashlib.sha256()
+            with zipfile.ZipFile(self.filename) as z, z.open(path) as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            entry[2] = digest.hexdigest()
+        return entry[2]
+
+    def diff(self, other, verify=False):
+        """
+        Compare with another manifest
+
+        Entries whose size or CRC-32 differ have changed, no content is read for them.
+        With verify=True the entries with the same size and CRC-32 are also compared by SHA-256.
+
+        :return: ManifestDiff
+        """
+        added = self.paths - other.paths
+        removed = other.paths - self.paths
+        changed = set()
+        for path in self.paths & other.paths:
+            size, crc, _ = self.entries[path]
+            other_size, other_crc, _ = other.entries[path]
+            if size != other_size or crc != other_crc:
+                changed.add(path)
+            elif verify and self.hash(path) != other.hash(path):
+                changed.add(path)
+        return ManifestDiff(added, removed, changed)
+
+
+@contextlib.contextmanager
+def server_manifest(export):
+    """
+    Export a zip from the appliance once and yield its manifest (None if nothing was exported)
+
+    The export is kept in a temporary directory until the end of the `with` block so entries can be hashed,
+    then removed.
+
+    :param export: callable(filename) that downloads the zip
+    """
+    tempdir = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(tempdir, "export.zip")
+        export(filename)
+        if not os.path.exists(filename):
+            yield None
+            return
+        yield ZipManifest.from_zip(filename)
+    finally:
+        shutil.rmtree(tempdir, ignore_errors=True)
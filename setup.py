@@ -3,6 +3,7 @@ from setuptools import setup, find_packages
 setup(
     name="ibmsecurity",
     packages=find_packages(exclude=["test.*","test"]),
+    package_data={"ibmsecurity": ["registry.json"]},
     # Date of release used for version - please be sure to use YYYY.MM.DD.seq#, MM and DD should be two digits e.g. 2017.02.05.0
     # seq# will be zero unless there are multiple release on a given day - then increment by one for additional release for that date
     version="2026.1.23.0",
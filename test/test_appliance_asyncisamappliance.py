@@ -0,0 +1,186 @@
+"""Offline tests for ibmsecurity/appliance/asyncisamappliance.py"""
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+import ibmsecurity.isam.web.reverse_proxy.junctions
+from ibmsecurity.appliance.asyncisamappliance import AsyncISAMAppliance
+from ibmsecurity.appliance.ibmappliance import IBMError
+from ibmsecurity.appliance.transport import TransportConfig
+from ibmsecurity.user.applianceuser import ApplianceUser
+
+
+class BrokenStream(httpx.AsyncByteStream):
+    """Response body interrupted after the first chunk"""
+
+    async def __aiter__(self):
+        yield b"PK" + b"x" * 1000
+        raise httpx.ReadError("Connection reset by peer")
+
+
+class FakeLMI:
+    """Minimal LMI answering the fact discovery and junction requests"""
+
+    def __init__(self, activations=("wga",), unavailable=0):
+        self.calls = []
+        self.activations = activations
+        self.unavailable = unavailable
+        self.junctions = [{"id": "/jct1", "type": "standard"}]
+
+    def __call__(self, request):
+        path = request.url.path
+        self.calls.append((request.method, path))
+        if self.unavailable:
+            self.unavailable -= 1
+            return httpx.Response(503, text="Service unavailable")
+        if path == "/core/sys/versions":
+            return httpx.Response(200, json={"firmware_version": "10.0.8.0", "deployment_model": "Appliance"})
+        if path == "/setup_complete":
+            return httpx.Response(200, json={"configured": True})
+        if path == "/isam/capabilities/v1":
+            return httpx.Response(200, json=[{"id": a, "enabled": "True"} for a in self.activations])
+        if path == "/wga/reverseproxy/default/junctions":
+            if request.method == "POST":
+                self.junctions.append(json.loads(request.content))
+                return httpx.Response(200, json={})
+            return httpx.Response(200, json=self.junctions)
+        if path == "/snapshots" and request.method == "POST":
+            body = request.read()
+            return httpx.Response(200, json={"size": len(body), "length": int(request.headers['content-length']),
+                                             "type": request.headers['content-type']})
+        if path == "/isam/snapshots/broken.snapshot":
+            return httpx.Response(200, stream=BrokenStream(), headers={"content-type": "application/octet-stream"})
+        if path == "/isam/snapshots/snap1.snapshot":
+            return httpx.Response(200, content=b"PK" + b"x" * 3000000,
+                                  headers={"content-type": "application/octet-stream"})
+        return httpx.Response(404, json={"message": "not found"})
+
+
+def _appliance(lmi, **kwargs):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lmi))
+    return AsyncISAMAppliance("isam.example.com", ApplianceUser(username="admin@local", password="pw"),
+                              client=client, transport=TransportConfig(retries=2, backoff_factor=0), **kwargs)
+
+
+def test_facts_loaded_on_first_use() -> None:
+    lmi = FakeLMI()
+
+    async def main():
+        async with _appliance(lmi) as appliance:
+            ret_obj = await appliance.invoke_get("Retrieve junctions", "/wga/reverseproxy/default/junctions")
+            return appliance, ret_obj
+
+    appliance, ret_obj = asyncio.run(main())
+    assert ret_obj['rc'] == 0
+    assert ret_obj['data'] == [{"id": "/jct1", "type": "standard"}]
+    assert appliance.facts['version'] == "10.0.8.0"
+    assert appliance.facts['activations'] == ["wga"]
+    assert appliance.facts['version_info'] >= "10.0.6.0"
+    assert lmi.calls[-1] == ("GET", "/wga/reverseproxy/default/junctions")
+
+
+def test_concurrent_calls_share_fact_discovery() -> None:
+    lmi = FakeLMI()
+
+    async def main():
+        async with _appliance(lmi) as appliance:
+            return await asyncio.gather(*[
+                appliance.invoke_get("Retrieve junctions", "/wga/reverseproxy/default/junctions")
+                for _ in range(20)])
+
+    results = asyncio.run(main())
+    assert all(ret_obj['rc'] == 0 for ret_obj in results)
+    assert lmi.calls.count(("GET", "/core/sys/versions")) == 1
+
+
+def test_warnings_gating() -> None:
+    lmi = FakeLMI(activations=("mga",))
+
+    async def main():
+        async with _appliance(lmi) as appliance:
+            return await appliance.invoke_get("Retrieve junctions", "/wga/reverseproxy/default/junctions")
+
+    ret_obj = asyncio.run(main())
+    assert ret_obj['data'] == {}
+    assert "requires one of modules" in ret_obj['warnings'][0]
+    assert ("GET", "/wga/reverseproxy/default/junctions") not in lmi.calls
+
+
+def test_run_module_function() -> None:
+    lmi = FakeLMI()
+
+    async def main():
+        async with _appliance(lmi) as appliance:
+            await appliance.load_facts_async()
+            await appliance.invoke_post("Create junction", "/wga/reverseproxy/default/junctions",
+                                        {"id": "/jct2", "type": "tcp"})
+            return await appliance.run(ibmsecurity.isam.web.reverse_proxy.junctions.get_all, "default")
+
+    ret_obj = asyncio.run(main())
+    assert [j['id'] for j in ret_obj['data']] == ["/jct1", "/jct2"]
+
+
+def test_get_retried_and_error_raised() -> None:
+    async def main(lmi, uri):
+        async with _appliance(lmi) as appliance:
+            appliance.facts = {'version': "10.0.8.0", 'activations': ["wga"]}
+            return await appliance.invoke_get("Retrieve", uri)
+
+    lmi = FakeLMI(unavailable=2)
+    assert asyncio.run(main(lmi, "/wga/reverseproxy/default/junctions"))['rc'] == 0
+    assert len(lmi.calls) == 3
+
+    with pytest.raises(IBMError):
+        asyncio.run(main(FakeLMI(), "/unknown"))
+
+
+def test_get_file(tmp_path) -> None:
+    filename = str(tmp_path / "snap1.snapshot")
+
+    async def main():
+        async with _appliance(FakeLMI()) as appliance:
+            return await appliance.invoke_get_file("Download snapshot", "/isam/snapshots/snap1.snapshot", filename)
+
+    ret_obj = asyncio.run(main())
+    assert ret_obj['rc'] == 0
+    with open(filename, 'rb') as f:
+        assert len(f.read()) == 3000002
+
+
+def test_interrupted_get_file_removes_partial_file(tmp_path) -> None:
+    filename = str(tmp_path / "broken.snapshot")
+
+    async def main():
+        async with _appliance(FakeLMI()) as appliance:
+            return await appliance.invoke_get_file("Download snapshot", "/isam/snapshots/broken.snapshot", filename,
+                                                   ignore_error=True)
+
+    ret_obj = asyncio.run(main())
+    assert ret_obj['rc'] != 0
+    assert sorted(os.listdir(tmp_path)) == []
+
+
+def test_post_files(tmp_path) -> None:
+    path = tmp_path / "snapshot.zip"
+    path.write_bytes(b"PK" + b"s" * 2000000)
+    threads = set()
+
+    async def main():
+        async with _appliance(FakeLMI()) as appliance:
+            return await appliance.invoke_post_files(
+                "Upload Snapshot", "/snapshots",
+                [{'file_formfield': 'uploadedfile', 'filename': str(path), 'mimetype': 'application/octet-stream'}],
+                {'comment': "uploaded"}, progress=lambda sent, total: threads.add(threading.current_thread()))
+
+    ret_obj = asyncio.run(main())
+    # the file is read outside of the event loop
+    assert threads and threading.main_thread() not in threads
+    assert ret_obj['rc'] == 0
+    assert ret_obj['changed'] is True
+    assert ret_obj['data']['size'] == ret_obj['data']['length']
+    assert ret_obj['data']['type'].startswith("multipart/form-data; boundary=")
@@ -0,0 +1,85 @@
+"""Offline tests for ibmsecurity/appliance/compare.py"""
+import threading
+
+import pytest
+
+from ibmsecurity.appliance import compare
+from ibmsecurity.isam.web.reverse_proxy import junctions
+
+
+class Host:
+    def __init__(self, hostname):
+        self.hostname = hostname
+
+
+def _junction(appliance, jct_id, port=443):
+    return {'rc': 0, 'data': {
+        'id': jct_id, 'stateful_junction': "no", 'active_worker_threads': 3, 'last_modified': appliance.hostname,
+        'servers': [{'server_port': port, 'server_uuid': f"{appliance.hostname}-{jct_id}", 'current_requests': 1,
+                     'operation_state': "Online", 'server_state': "running", 'total_requests': 100}]}}
+
+
+def test_collect_fetches_lists_and_details_concurrently() -> None:
+    barrier = threading.Barrier(2, timeout=5)
+
+    def get_all(appliance):
+        # Both lists must be requested at the same time to pass the barrier
+        barrier.wait()
+        return {'rc': 0, 'data': [{'id': f"/jct{i}"} for i in range(20)], 'warnings': []}
+
+    details = threading.Barrier(8, timeout=5)
+
+    def get(appliance, jct):
+        details.wait()
+        return _junction(appliance, jct['id'])
+
+    first, second = compare.collect(Host("a"), Host("b"), get_all, get=get, volatile=('last_modified',),
+                                    max_workers=8)
+    assert [jct['id'] for jct in first['data']] == [f"/jct{i}" for i in range(20)]
+    assert first['data'][3]['details']['id'] == "/jct3"
+    assert 'last_modified' not in first['data'][3]['details']
+    assert second['data'][0]['details']['servers'][0]['server_uuid'] == "b-/jct0"
+
+
+def test_collect_raises_errors_of_requests() -> None:
+    def get(appliance, item):
+        raise IOError(f"{appliance.hostname} is down")
+
+    with pytest.raises(IOError):
+        compare.collect(Host("a"), Host("b"), lambda appliance: {'data': [{'id': 1}]}, get=get)
+
+
+def test_junctions_compare(monkeypatch) -> None:
+    ports = {"a": 443, "b": 8443}
+    monkeypatch.setattr(junctions, "get_all", lambda appliance, rp: {
+        'rc': 0, 'data': [{'id': "/jct1"}, {'id': "/jct2"}], 'warnings': []})
+    monkeypatch.setattr(junctions, "get", lambda appliance, rp, jct_id: _junction(
+        appliance, jct_id, ports[appliance.hostname] if jct_id == "/jct2" else 443))
+
+    ret_obj = junctions.compare(Host("a"), Host("b"), "default")
+    assert ret_obj['data']['matches'] is False
+    # counters, states and the uuids of stateless junctions are not compared
+    assert sorted(change['path'] for change in ret_obj['data']['changes']) == [
+        '/0/details/last_modified', '/1/details/last_modified', '/1/details/servers/-', '/1/details/servers/0']
+    assert ret_obj['data']['changes'][-1]['value'] == {'server_port': 8443}
+
+
+def test_strip_paths() -> None:
+    data = [{'id': "/jct1", 'active_worker_threads': 3, 'current_requests': 1,
+             'servers': [{'current_requests': 1, 'server_port': 443}, {'server_port': 80}],
+             'details': {'active_worker_threads': 3}}]
+    compare.strip_paths(data, ('active_worker_threads', 'servers/current_requests', 'missing/field'))
+    # only the fields at the paths are removed, the same keys elsewhere are kept
+    assert data == [{'id': "/jct1", 'current_requests': 1, 'servers': [{'server_port': 443}, {'server_port': 80}],
+                     'details': {'active_worker_threads': 3}}]
+
+
+def test_compare_pairs() -> None:
+    def func(appliance1, appliance2, instance):
+        if appliance2.hostname == "down":
+            raise IOError("down")
+        return {'data': {'matches': True}, 'instance': instance}
+
+    results = compare.compare_pairs([(Host("t1"), Host("p1")), (Host("t2"), Host("down"))], func, "default")
+    assert results[("t1", "p1")].value['instance'] == "default"
+    assert results[("t2", "down")].failed()
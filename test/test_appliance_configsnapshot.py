@@ -0,0 +1,142 @@
+"""Offline tests for ibmsecurity/appliance/configsnapshot.py"""
+import copy
+import os
+
+from ibmsecurity import registry
+from ibmsecurity.appliance import configsnapshot
+from ibmsecurity.appliance.configsnapshot import ConfigStore, RateLimiter
+from test.test_appliance_responsecache import FakeSession, _appliance
+
+RESPONSES = {
+    "/wga/reverseproxy": [{"id": "default", "started": "yes"}],
+    "/wga/reverseproxy/default/junctions": [{"id": "/jct1"}, {"id": "/jct2"}],
+    "/wga/reverseproxy/default/junctions?junctions_id=/jct1": {
+        "id": "/jct1", "stateful_junction": "no", "active_worker_threads": 2,
+        "servers": [{"server_hostname": "backend1", "current_requests": 4, "server_state": "running"}]},
+    "/wga/reverseproxy/default/junctions?junctions_id=/jct2": {
+        "id": "/jct2", "stateful_junction": "no", "active_worker_threads": 0,
+        "servers": [{"server_hostname": "backend2", "current_requests": 0, "server_state": "running"}]},
+    "/wga/reverseproxy/default/configuration/stanza": ["server", "session"],
+    "/wga/reverseproxy/default/configuration/stanza/server": [{"server-name": "default"}],
+    "/wga/reverseproxy/default/configuration/stanza/session": [{"timeout": "3600"}],
+}
+
+
+class SnapshotSession(FakeSession):
+    """Serves the documents of RESPONSES"""
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = responses
+
+    def get(self, url, **kwargs):
+        uri = url.split(":443", 1)[1]
+        self.calls.append(("GET", uri))
+        return self._response(self.responses[uri])
+
+
+def _snapshot_appliance():
+    appliance = _appliance()
+    appliance.session = SnapshotSession(copy.deepcopy(RESPONSES))
+    return appliance
+
+
+def test_catalog_getters_resolve() -> None:
+    names = {resource.name for resource in configsnapshot.CATALOG}
+    for resource in configsnapshot.CATALOG:
+        assert resource.parent is None or resource.parent in names
+        for function in (resource.getter, resource.detail):
+            if function is not None:
+                assert callable(registry.resolve(function)), function
+
+
+def test_export_and_read(tmp_path) -> None:
+    appliance = _snapshot_appliance()
+    store = ConfigStore(str(tmp_path))
+    snapshot = configsnapshot.export(appliance, store, resources=["web/reverse_proxy/*"], max_workers=4)
+
+    assert snapshot.errors == {}
+    assert sorted(snapshot.collections()) == [("web/reverse_proxy", ()), ("web/reverse_proxy/junctions", ("default",)),
+                                              ("web/reverse_proxy/stanzas", ("default",))]
+    junctions = snapshot.details("web/reverse_proxy/junctions", "default")
+    assert junctions["/jct1"]["servers"] == [{"server_hostname": "backend1"}]
+    assert "active_worker_threads" not in junctions["/jct2"]
+    assert snapshot.details("web/reverse_proxy/stanzas", "default")["session"] == [{"timeout": "3600"}]
+    assert snapshot.get("web/reverse_proxy/stanzas", "default") == ["server", "session"]
+    # the responses are kept as returned by the appliance
+    assert snapshot.uris == sorted(RESPONSES)
+    assert snapshot.response("/wga/reverseproxy/default/junctions?junctions_id=/jct1")["active_worker_threads"] == 2
+    assert appliance.response_cache is None
+
+    loaded = store.load("isam.example.com")
+    assert loaded.details("web/reverse_proxy/junctions", "default") == junctions
+
+
+def test_reexport_reuses_unchanged_details(tmp_path) -> None:
+    appliance = _snapshot_appliance()
+    store = ConfigStore(str(tmp_path))
+    configsnapshot.export(appliance, store, resources=["web/reverse_proxy/*"])
+    blobs = sum(len(files) for _, _, files in os.walk(tmp_path / "objects"))
+
+    # Unchanged lists, no detail is retrieved again
+    appliance.session.calls = []
+    snapshot = configsnapshot.export(appliance, store, resources=["web/reverse_proxy/*"])
+    assert appliance.session.calls == [("GET", "/wga/reverseproxy"), ("GET", "/wga/reverseproxy/default/junctions"),
+                                       ("GET", "/wga/reverseproxy/default/configuration/stanza")]
+    assert snapshot.details("web/reverse_proxy/junctions", "default")["/jct1"]["id"] == "/jct1"
+    assert snapshot.uris == sorted(RESPONSES)
+    assert sum(len(files) for _, _, files in os.walk(tmp_path / "objects")) == blobs
+
+    # Only the new item is retrieved, full=True retrieves everything
+    appliance.session.calls = []
+    appliance.session.responses["/wga/reverseproxy/default/configuration/stanza"].append("logging")
+    appliance.session.responses["/wga/reverseproxy/default/configuration/stanza/logging"] = [{"max-size": "0"}]
+    snapshot = configsnapshot.export(appliance, store, resources=["web/reverse_proxy/stanzas"])
+    assert appliance.session.calls[-1] == ("GET", "/wga/reverseproxy/default/configuration/stanza/logging")
+    assert len(appliance.session.calls) == 3
+    assert sorted(snapshot.details("web/reverse_proxy/stanzas", "default")) == ["logging", "server", "session"]
+    appliance.session.calls = []
+    configsnapshot.export(appliance, store, resources=["web/reverse_proxy/*"], full=True)
+    assert len(appliance.session.calls) == len(RESPONSES) + 1
+
+
+def test_reexport_compares_markers(tmp_path) -> None:
+    catalog = [resource._replace(marker="modified") if resource.name == "web/reverse_proxy/junctions" else resource
+               for resource in configsnapshot.CATALOG]
+    appliance = _snapshot_appliance()
+    appliance.session.responses["/wga/reverseproxy/default/junctions"] = [{"id": "/jct1", "modified": 1},
+                                                                          {"id": "/jct2", "modified": 1}]
+    store = ConfigStore(str(tmp_path))
+    configsnapshot.export(appliance, store, catalog=catalog, resources=["web/reverse_proxy/junctions"])
+
+    appliance.session.calls = []
+    appliance.session.responses["/wga/reverseproxy/default/junctions"][0]["modified"] = 2
+    details = appliance.session.responses["/wga/reverseproxy/default/junctions?junctions_id=/jct1"]
+    details["stateful_junction"] = "yes"
+    snapshot = configsnapshot.export(appliance, store, catalog=catalog, resources=["web/reverse_proxy/junctions"])
+    assert appliance.session.calls[-1] == ("GET", "/wga/reverseproxy/default/junctions?junctions_id=/jct1")
+    assert len(appliance.session.calls) == 3
+    assert snapshot.details("web/reverse_proxy/junctions", "default")["/jct1"]["stateful_junction"] == "yes"
+
+    appliance.session.responses["/wga/reverseproxy/default/junctions"].pop()
+    snapshot = configsnapshot.export(appliance, store, catalog=catalog, resources=["web/reverse_proxy/junctions"])
+    assert list(snapshot.details("web/reverse_proxy/junctions", "default")) == ["/jct1"]
+    assert len(appliance.session.calls) == 5
+    # first and second list, first response and details of /jct1, response and details of /jct2
+    assert store.prune() == 6
+    assert store.load("isam.example.com").details("web/reverse_proxy/junctions", "default")
+
+
+def test_errors_are_recorded(tmp_path) -> None:
+    appliance = _snapshot_appliance()
+    del appliance.session.responses["/wga/reverseproxy/default/junctions?junctions_id=/jct2"]
+    snapshot = configsnapshot.export(appliance, ConfigStore(str(tmp_path)), resources=["web/reverse_proxy/junctions"])
+    assert list(snapshot.errors) == ["web/reverse_proxy/junctions|default|/jct2"]
+    assert list(snapshot.details("web/reverse_proxy/junctions", "default")) == ["/jct1"]
+
+
+def test_rate_limiter() -> None:
+    limiter = RateLimiter(1000, burst=5)
+    for _ in range(20):
+        limiter.acquire()
+    assert limiter._tokens < 1
@@ -0,0 +1,132 @@
+"""Offline tests for ibmsecurity/appliance/download.py"""
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from ibmsecurity.appliance import download
+
+PAYLOAD = os.urandom(3 * 1024 * 1024 + 123)
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD with Range support, can cut the first transfer after `cut` bytes"""
+    protocol_version = "HTTP/1.1"
+    cut = None
+    ranges = True
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.headers.get('Range'))
+        if self.path.startswith("/missing"):
+            body = b'{"message": "not found"}'
+            self.send_response(404)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        start = 0
+        requested = self.headers.get('Range')
+        if requested and self.ranges:
+            start = int(requested.split('=')[1].rstrip('-'))
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+        else:
+            self.send_response(200)
+        body = PAYLOAD[start:]
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if RangeHandler.cut is not None:
+            cut, RangeHandler.cut = RangeHandler.cut, None
+            self.wfile.write(body[:cut])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    RangeHandler.cut = None
+    RangeHandler.ranges = True
+    RangeHandler.requests = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_download_with_checksum_and_progress(server, tmp_path) -> None:
+    filename = str(tmp_path / "snapshot.zip")
+    progress = []
+    r, result = download.download(requests.session(), server + "/snapshot", filename,
+                                  progress=lambda done, total: progress.append((done, total)))
+    assert r.status_code == 200
+    assert result['sha256'] == hashlib.sha256(PAYLOAD).hexdigest()
+    assert result['size'] == len(PAYLOAD)
+    with open(filename, 'rb') as f:
+        assert f.read() == PAYLOAD
+    assert not os.path.exists(filename + ".part")
+    assert progress[-1] == (len(PAYLOAD), len(PAYLOAD))
+    # 1 MiB chunks by default
+    assert len(progress) <= 6
+
+
+def test_error_leaves_no_file(server, tmp_path) -> None:
+    filename = str(tmp_path / "missing.zip")
+    r, result = download.download(requests.session(), server + "/missing", filename)
+    assert result is None
+    assert r.status_code == 404
+    assert r.json() == {"message": "not found"}
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_interrupted_transfer_resumed(server, tmp_path) -> None:
+    filename = str(tmp_path / "support.zip")
+    RangeHandler.cut = 1000000
+    r, result = download.download(requests.session(), server + "/support", filename, resume=True,
+                                  chunk_size=64 * 1024)
+    assert result['resumed'] is True
+    assert result['sha256'] == hashlib.sha256(PAYLOAD).hexdigest()
+    # Continued after the last complete chunk
+    assert RangeHandler.requests == [None, f"bytes={15 * 64 * 1024}-"]
+
+
+def test_interrupted_transfer_without_resume(server, tmp_path) -> None:
+    filename = str(tmp_path / "support.zip")
+    RangeHandler.cut = 1000000
+    with pytest.raises(requests.exceptions.RequestException):
+        download.download(requests.session(), server + "/support", filename)
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_existing_partial_file_resumed(server, tmp_path) -> None:
+    filename = str(tmp_path / "snapshot.zip")
+    with open(filename + ".part", 'wb') as f:
+        f.write(PAYLOAD[:500000])
+    r, result = download.download(requests.session(), server + "/snapshot", filename, resume=True,
+                                  chunk_size=64 * 1024)
+    assert r.status_code == 206
+    assert result['sha256'] == hashlib.sha256(PAYLOAD).hexdigest()
+    assert RangeHandler.requests == ["bytes=500000-"]
+
+
+def test_range_not_supported_restarts(server, tmp_path) -> None:
+    filename = str(tmp_path / "snapshot.zip")
+    RangeHandler.ranges = False
+    with open(filename + ".part", 'wb') as f:
+        f.write(b"stale content")
+    r, result = download.download(requests.session(), server + "/snapshot", filename, resume=True)
+    assert result['resumed'] is False
+    with open(filename, 'rb') as f:
+        assert f.read() == PAYLOAD
@@ -0,0 +1,114 @@
+"""Offline tests for ibmsecurity/appliance/emulator.py"""
+import json
+import shutil
+
+import pytest
+
+import ibmsecurity.isam.appliance
+from ibmsecurity.appliance import emulator
+from ibmsecurity.appliance.emulator import Cassette, LMIEmulator, LMIModel
+from ibmsecurity.appliance.ibmappliance import IBMError
+from ibmsecurity.appliance.transport import TransportConfig
+from ibmsecurity.isam.web.reverse_proxy import junctions
+from ibmsecurity.isam.web.reverse_proxy.configuration import entry
+
+
+@pytest.fixture
+def lmi():
+    with LMIEmulator(tls=False, seed=1) as lmi:
+        yield lmi
+
+
+def test_junctions_and_pending_changes(lmi) -> None:
+    appliance = lmi.appliance()
+    assert appliance.facts['version'] == "10.0.8.0"
+
+    ret_obj = junctions.add(appliance, "default", "/app", "app.example.com", 443, junction_type="ssl")
+    assert ret_obj['changed'] is True
+    assert junctions.add(appliance, "default", "/app", "app.example.com", 443, junction_type="ssl")['changed'] is False
+    junction = junctions.get(appliance, "default", "/app")['data']
+    assert junction['junction_type'] == "ssl"
+    assert junction['servers'][0]['server_hostname'] == "app.example.com"
+    assert [j['id'] for j in junctions.get_all(appliance, "default")['data']] == ["/app"]
+
+    assert ibmsecurity.isam.appliance.commit(appliance)['changed'] is True
+    assert lmi.model.state['pending_changes'] == []
+    assert junctions.delete(appliance, "default", "/app")['changed'] is True
+    assert lmi.model.state['reverse_proxies']['default']['junctions'] == {}
+
+
+def test_set_stanzas(lmi) -> None:
+    appliance = lmi.appliance()
+    desired = {"server": {"worker-threads": "500"}, "ssl": [["ssl-enable", "yes"]]}
+    assert entry.set_stanzas(appliance, "default", desired)['changed'] is True
+    assert entry.set_stanzas(appliance, "default", desired)['changed'] is False
+    stanzas = lmi.model.state['reverse_proxies']['default']['stanzas']
+    assert stanzas['server'] == {"server-name": ["default"], "worker-threads": ["500"]}
+    assert stanzas['ssl'] == {"ssl-enable": ["yes"]}
+
+
+def test_fault_injection(lmi) -> None:
+    appliance = lmi.appliance(transport=TransportConfig(retries=1, backoff_factor=0))
+    fault = lmi.inject(500, path="/wga/reverseproxy/*/junctions", method="GET", count=1)
+    with pytest.raises(IBMError):
+        junctions.get_all(appliance, "default")
+    assert junctions.get_all(appliance, "default")['data'] == []
+    assert fault.hits == 1
+
+    # 503 is retried by a transport with retries
+    fault = lmi.inject(503, path="/wga/reverseproxy/*/junctions", method="GET", count=1)
+    assert junctions.get_all(appliance, "default")['data'] == []
+    assert fault.hits == 1
+
+    lmi.clear_faults()
+    fault = lmi.inject(500, path="/setup_complete", rate=0.5)
+    for _ in range(40):
+        lmi._fault("GET", "/setup_complete")
+    assert 5 < fault.hits < 35
+
+
+def test_record_and_replay(lmi, tmp_path) -> None:
+    filename = str(tmp_path / "cassette.json")
+    with LMIEmulator(mode="record", upstream=lmi.url, cassette=filename, tls=False) as recorder:
+        assert recorder._upstream_session.verify is True
+        appliance = recorder.appliance()
+        assert appliance.scheme == "http" and '_url' not in vars(appliance)
+        junctions.add(appliance, "default", "/app", "app.example.com", 443)
+        before = len(lmi.requests)
+
+    cassette = Cassette.load(filename)
+    assert "POST /wga/reverseproxy/default/junctions" in cassette.interactions
+    with LMIEmulator(mode="replay", cassette=filename, tls=False) as player:
+        appliance = player.appliance()
+        assert junctions.add(appliance, "default", "/app", "app.example.com", 443)['changed'] is True
+        with pytest.raises(IBMError):
+            junctions.get(appliance, "other", "/app")
+    assert len(lmi.requests) == before
+
+
+def test_recorded_credentials_redacted() -> None:
+    body = json.dumps({'name': "ldap", 'properties': {'password': "secret", 'bindDN': "cn=root"},
+                       'users': [{'id': "admin", 'ltpaToken': "abc"}], 'token': ""}).encode()
+    assert json.loads(emulator._redact(body, "application/json")) == {
+        'name': "ldap", 'properties': {'password': emulator.REDACTED, 'bindDN': "cn=root"},
+        'users': [{'id': "admin", 'ltpaToken': emulator.REDACTED}], 'token': ""}
+    assert emulator._redact(b"password=secret", "text/plain") == b"password=secret"
+    assert LMIEmulator(mode="record", upstream="https://isam.example.com", verify="/ca.pem").verify == "/ca.pem"
+
+
+def test_model_state() -> None:
+    model = LMIModel({'policies': {"1": {'id': "1", 'name': "p1"}}})
+    assert model.handle("GET", "/iam/access/v8/policies/json", {}, {}) == (200, [{'id': "1", 'name': "p1"}])
+    assert model.handle("POST", "/iam/access/v8/policies", {}, {'name': "p1"})[0] == 400
+    assert model.handle("POST", "/isam/capabilities/v1", {}, {'code': "wga-1234"}) == (200, {})
+    assert model.handle("GET", "/isam/capabilities/wga/v1", {}, {})[1] == {'id': "wga", 'enabled': "True"}
+    assert model.handle("GET", "/unknown", {}, {})[0] == 404
+    assert model.to_dict()['pending_changes'] == [{'method': "POST", 'uri': "/isam/capabilities/v1"}]
+
+
+@pytest.mark.skipif(shutil.which("openssl") is None, reason="openssl is needed for the certificate")
+def test_https() -> None:
+    with LMIEmulator() as lmi:
+        appliance = lmi.appliance()
+        assert appliance.facts['version'] == "10.0.8.0"
+        assert lmi.requests[0][0] == "GET"
@@ -0,0 +1,127 @@
+"""Offline tests for ibmsecurity/appliance/factcache.py and lazy facts"""
+import json
+import os
+import time
+
+from ibmsecurity.appliance.factcache import FactCache
+from ibmsecurity.appliance.isamappliance import ISAMAppliance
+from ibmsecurity.user.applianceuser import ApplianceUser
+from ibmsecurity.utilities.tools import Version
+
+
+class FakeISAMAppliance(ISAMAppliance):
+    """Counts fact discovery instead of calling the LMI"""
+
+    def __init__(self, hostname, lazy_facts=False, fact_cache=None):
+        self.discoveries = 0
+        ISAMAppliance.__init__(self, hostname, ApplianceUser(username="admin@local", password="pw"),
+                               lazy_facts=lazy_facts, fact_cache=fact_cache)
+
+    def get_facts(self):
+        self.discoveries += 1
+        # Discovery reads the facts collected so far, this must not recurse
+        assert 'version' not in self.facts
+        self.facts['version'] = '10.0.8.0'
+        self.facts['version_info'] = self._parse_version('10.0.8.0')
+        self.facts['activations'] = ['wga']
+
+
+def _appliance(hostname="isam.example.com", **kwargs):
+    return FakeISAMAppliance(hostname, **kwargs)
+
+
+def test_lazy_facts_discovered_on_first_use() -> None:
+    appliance = _appliance(lazy_facts=True)
+    assert appliance.discoveries == 0
+    assert appliance.facts['version'] == '10.0.8.0'
+    assert appliance.facts['activations'] == ['wga']
+    assert appliance.discoveries == 1
+
+
+def test_eager_facts_by_default() -> None:
+    appliance = _appliance()
+    assert appliance.discoveries == 1
+    appliance.facts
+    assert appliance.discoveries == 1
+
+
+def test_fact_cache_reused_across_appliances(tmp_path) -> None:
+    cache = FactCache(directory=str(tmp_path))
+    first = _appliance(fact_cache=cache)
+    assert first.discoveries == 1
+    second = _appliance(fact_cache=cache)
+    assert second.discoveries == 0
+    assert second.facts['activations'] == ['wga']
+    assert isinstance(second.facts['version_info'], Version)
+    assert second.facts['version_info'] >= "10.0.6.0"
+
+
+def test_fact_cache_expired(tmp_path) -> None:
+    cache = FactCache(directory=str(tmp_path), ttl=60)
+    _appliance(fact_cache=cache)
+    filename = cache._filename("isam.example.com")
+    with open(filename) as f:
+        entry = json.load(f)
+    entry['saved'] = time.time() - 120
+    with open(filename, 'w') as f:
+        json.dump(entry, f)
+    assert cache.get("isam.example.com") is None
+    assert not os.path.exists(filename)
+
+
+def test_invalidate_facts(tmp_path) -> None:
+    cache = FactCache(directory=str(tmp_path))
+    appliance = _appliance(fact_cache=cache)
+    appliance.invalidate_facts()
+    assert cache.get("isam.example.com") is None
+    appliance.facts
+    assert appliance.discoveries == 2
+    assert cache.get("isam.example.com")['version'] == '10.0.8.0'
+
+    appliance.invalidate_facts(in_memory=False)
+    assert cache.get("isam.example.com") is None
+    appliance.facts
+    assert appliance.discoveries == 2
+
+
+def test_warm_and_save_facts(tmp_path) -> None:
+    cache = FactCache(directory=str(tmp_path))
+    appliance = _appliance(fact_cache=cache)
+    appliance.load_facts(refresh=True)
+    assert appliance.discoveries == 2
+
+    appliance.facts['activations'].append('mga')
+    appliance.save_facts()
+    assert cache.get("isam.example.com")['activations'] == ['wga', 'mga']
+
+
+def test_fact_cache_hostname_sanitized(tmp_path) -> None:
+    cache = FactCache(directory=str(tmp_path))
+    cache.put("../fe80::1", {'version': '10.0.8.0'})
+    assert os.listdir(str(tmp_path)) == [".._fe80__1.json"]
+    assert cache.get("../fe80::1") == {'version': '10.0.8.0'}
+
+
+class UnreachableISAMAppliance(FakeISAMAppliance):
+    """Discovery finds no version while the LMI is down"""
+
+    down = True
+
+    def get_facts(self):
+        if self.down:
+            self.discoveries += 1
+            self.facts['version'] = None
+            self.facts['version_info'] = None
+        else:
+            FakeISAMAppliance.get_facts(self)
+
+
+def test_failed_discovery_not_loaded(tmp_path) -> None:
+    cache = FactCache(directory=str(tmp_path))
+    appliance = UnreachableISAMAppliance("isam.example.com", fact_cache=cache)
+    assert appliance.facts['version'] is None
+    assert not appliance._facts_loaded and cache.get("isam.example.com") is None
+
+    appliance.down = False
+    assert appliance.facts['version'] == '10.0.8.0'
+    assert appliance._facts_loaded and appliance.discoveries == 3
@@ -0,0 +1,44 @@
+"""Offline tests for ibmsecurity/appliance/fleet.py"""
+import time
+
+from ibmsecurity.appliance.fleet import ApplianceFleet, FleetTimeout
+
+
+class FakeAppliance:
+    def __init__(self, hostname, user, lmi_port=443):
+        if hostname == "unreachable":
+            raise ConnectionError("no route to host")
+        self.hostname = hostname
+        self.user = user
+        self.lmi_port = lmi_port
+
+
+def slow_get(appliance, delay, fail_on=None):
+    time.sleep(delay)
+    if appliance.hostname == fail_on:
+        raise ValueError("failed")
+    return {'rc': 0, 'data': appliance.hostname}
+
+
+def test_fleet_runs_concurrently() -> None:
+    specs = [{"hostname": f"isam{i}", "password": "secret", "lmi_port": 9443} for i in range(10)]
+    fleet = ApplianceFleet(specs, max_workers=10, appliance_class=FakeAppliance)
+    assert fleet.appliances["isam0"].user.username == "admin@local"
+    assert fleet.appliances["isam0"].lmi_port == 9443
+
+    start = time.monotonic()
+    results = fleet.run(slow_get, 0.2, fail_on="isam3")
+    assert time.monotonic() - start < 1.0
+    assert list(results.keys()) == [f"isam{i}" for i in range(10)]
+    assert results["isam1"].succeeded() and results["isam1"].value['data'] == "isam1"
+    assert results["isam3"].failed() and isinstance(results["isam3"].error, ValueError)
+
+
+def test_fleet_reports_build_errors_and_timeouts() -> None:
+    fleet = ApplianceFleet([{"hostname": "isam1", "password": "secret"}, {"hostname": "unreachable", "password": "x"}],
+                           appliance_class=FakeAppliance)
+    assert list(fleet.appliances.keys()) == ["isam1"]
+    assert isinstance(fleet.errors["unreachable"], ConnectionError)
+
+    results = fleet.run(slow_get, 2, timeout=0.2)
+    assert isinstance(results["isam1"].error, FleetTimeout)
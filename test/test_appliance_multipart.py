@@ -0,0 +1,141 @@
+"""Offline tests for ibmsecurity/appliance/multipart.py"""
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from ibmsecurity.appliance.multipart import MultipartEncoder
+
+
+def _requests_body(fields, files, boundary):
+    body, content_type = requests.models.RequestEncodingMixin._encode_files(files, fields)
+    generated = content_type.split("boundary=")[1]
+    return body.replace(generated.encode("ascii"), boundary.encode("ascii"))
+
+
+def test_same_body_as_requests(tmp_path) -> None:
+    path = tmp_path / "snapshot.zip"
+    path.write_bytes(b"PK\x03\x04" + bytes(range(256)) * 100)
+    fields = {'comment': "Snapshot été", 'force': True, 'skip': None, 'list': ["a", "b"]}
+
+    with open(path, 'rb') as f:
+        expected = _requests_body(fields, [('uploadedfile', ('snapshot.zip', f, 'application/octet-stream'))],
+                                  "b0undary")
+    with MultipartEncoder(fields, [('uploadedfile', ('snapshot.zip', str(path), 'application/octet-stream'))],
+                          from_paths=True, boundary="b0undary", chunk_size=1000) as encoder:
+        assert encoder.to_bytes() == expected
+        assert len(encoder) == len(expected)
+        assert encoder.content_type == "multipart/form-data; boundary=b0undary"
+
+
+def test_requests_style_files(tmp_path) -> None:
+    path = tmp_path / "extension.ext"
+    path.write_bytes(b"x" * 5000)
+    f1 = open(path, 'rb')
+    f2 = open(path, 'rb')
+    expected = _requests_body(None, {'config_data': (None, '{"a": 1}'), 'third_party_package': ("ext", f1)},
+                              "b0undary")
+    encoder = MultipartEncoder(files={'config_data': (None, '{"a": 1}'), 'third_party_package': ("ext", f2)},
+                               boundary="b0undary")
+    with encoder:
+        assert encoder.to_bytes() == expected
+        # Can be sent again, eg. on retry
+        assert encoder.to_bytes() == expected
+    assert f2.closed
+    f1.close()
+
+
+def test_progress_and_bounded_chunks(tmp_path) -> None:
+    path = tmp_path / "firmware.pkg"
+    path.write_bytes(b"f" * (5 * 1024 * 1024 + 7))
+    progress = []
+    with MultipartEncoder.from_fileinfo([{'file_formfield': 'file', 'filename': str(path),
+                                          'mimetype': 'application/octet-stream'}], {},
+                                        progress=lambda sent, total: progress.append((sent, total))) as encoder:
+        sizes = [len(chunk) for chunk in encoder]
+    assert max(sizes) == 1024 * 1024
+    assert sum(sizes) == len(encoder)
+    assert progress[-1] == (len(encoder), len(encoder))
+
+
+def test_non_seekable_file_object() -> None:
+    class Pipe(io.RawIOBase):
+        def __init__(self, data):
+            self.data = io.BytesIO(data)
+
+        def readable(self):
+            return True
+
+        def read(self, size=-1):
+            return self.data.read(size)
+
+        def tell(self):
+            raise OSError("not seekable")
+
+    encoder = MultipartEncoder(files={'file': ("data.bin", Pipe(b"abc"))}, boundary="b0undary")
+    assert encoder.to_bytes() == _requests_body(None, {'file': ("data.bin", b"abc")}, "b0undary")
+
+
+def test_string_data_rejected() -> None:
+    with pytest.raises(ValueError):
+        MultipartEncoder("comment=x", [])
+
+
+class UploadHandler(BaseHTTPRequestHandler):
+    received = []
+
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        body = self.rfile.read(length)
+        self.received.append((self.headers['Content-Type'], self.headers.get('Transfer-Encoding'), body))
+        answer = json.dumps({"size": len(body)}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(answer)))
+        self.end_headers()
+        self.wfile.write(answer)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_invoke_post_files_streams_and_closes(tmp_path, monkeypatch) -> None:
+    from test.test_appliance_responsecache import _appliance
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), UploadHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    UploadHandler.received = []
+    path = tmp_path / "template.zip"
+    path.write_bytes(b"z" * 300000)
+
+    appliance = _appliance()
+    appliance.session = requests.session()
+    monkeypatch.setattr(appliance, '_url', lambda uri: f"http://127.0.0.1:{httpd.server_address[1]}{uri}")
+    opened = []
+    real_open = open
+
+    def tracking_open(*args, **kwargs):
+        f = real_open(*args, **kwargs)
+        opened.append(f)
+        return f
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+    try:
+        ret_obj = appliance.invoke_post_files("Upload", "/isam/snapshots",
+                                              [{'file_formfield': 'uploadedfile', 'filename': str(path),
+                                                'mimetype': 'application/octet-stream'}],
+                                              {'comment': "x"})
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+    content_type, transfer_encoding, body = UploadHandler.received[0]
+    assert ret_obj['rc'] == 0
+    assert ret_obj['data'] == {"size": len(body)}
+    assert content_type.startswith("multipart/form-data; boundary=")
+    assert transfer_encoding is None
+    assert b'filename="template.zip"' in body
+    assert opened and all(f.closed for f in opened)
@@ -0,0 +1,123 @@
+"""Offline tests for ibmsecurity/appliance/nameindex.py"""
+import json
+import time
+
+from ibmsecurity.appliance.nameindex import NameIndex
+from ibmsecurity.isam.aac.access_control import policies, policy_attachments, policy_sets
+from test.test_appliance_responsecache import FakeSession, _appliance
+
+
+class PolicySession(FakeSession):
+    """Serves the policies, policy sets and definitions collections"""
+
+    def __init__(self):
+        self.calls = []
+        self.cookies = {}
+        self.collections = {
+            "/iam/access/v8/policies/": [{"id": str(i), "name": f"policy{i}"} for i in range(150)],
+            "/iam/access/v8/policysets/": [{"id": f"s{i}", "name": f"set{i}"} for i in range(30)],
+            "/iam/access/v8/definitions": [{"id": f"d{i}", "name": f"definition{i}"} for i in range(20)],
+        }
+
+    def get(self, url, **kwargs):
+        uri = url.split(":443", 1)[1]
+        self.calls.append(("GET", uri))
+        return self._response(self.collections.get(uri, {}))
+
+    def post(self, url, data=None, **kwargs):
+        uri = url.split(":443", 1)[1]
+        self.calls.append(("POST", uri))
+        self.collections[uri + "/"].append(dict(json.loads(data), id="new"))
+        return self._response({})
+
+
+def _policy_appliance(name_index=True):
+    appliance = _appliance()
+    appliance.facts = {'version': '10.0.8.0', 'activations': ['mga']}
+    appliance.session = PolicySession()
+    if name_index:
+        appliance.enable_name_index()
+    return appliance
+
+
+def test_collection_lookup_and_resolve() -> None:
+    index = NameIndex()
+    loads = []
+
+    def load():
+        loads.append(1)
+        return {'data': [{"id": "1", "name": "a"}, {"id": "2", "name": "b"}, {"id": "3", "name": "a"}],
+                'warnings': ["w"]}
+
+    collection = index.collection("/iam/access/v8/policies/?sortBy=name", load)
+    assert collection.get("a") == "3"
+    assert collection.resolve(["b", "c"]) == {"b": "2", "c": None}
+    assert collection.warnings == ["w"]
+    assert index.collection("/iam/access/v8/policies", load) is collection
+    assert len(loads) == 1
+
+    index.refresh("/iam/access/v8/policies/3")
+    index.collection("/iam/access/v8/policies", load)
+    index.collection("/iam/access/v8/policies", load, refresh=True)
+    index.refresh("/iam/access/v8/policysets")
+    index.collection("/iam/access/v8/policies", load)
+    assert len(loads) == 3
+    assert index.builds == 3
+
+    # other arguments of the getter are part of the key
+    index.collection("/iam/access/v8/policies", load, variant="json")
+    assert len(loads) == 4
+    index.collection("/iam/access/v8/policies", load, variant="json")
+    index.refresh("/iam/access/v8/policies")
+    index.collection("/iam/access/v8/policies", load, variant="json")
+    assert len(loads) == 5
+
+
+def test_collection_expires() -> None:
+    index = NameIndex(ttl=0)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return {'data': [{"id": "1", "name": "a"}]}
+
+    index.collection("/iam/access/v8/policysets", load)
+    time.sleep(0.01)
+    index.collection("/iam/access/v8/policysets", load)
+    assert len(loads) == 2
+
+
+def test_convert_policy_names_three_gets() -> None:
+    appliance = _policy_appliance()
+    references = ([{"name": f"policy{i}", "type": "policy"} for i in range(150)] +
+                  [{"name": f"set{i}", "type": "policyset"} for i in range(30)] +
+                  [{"name": f"definition{i}", "type": "definition"} for i in range(19)] +
+                  [{"name": "missing", "type": "definition"}])
+
+    converted = policy_attachments._convert_policy_name_to_id(appliance, references)
+    assert len(appliance.session.calls) == 3
+    assert converted[0] == {"id": "0", "type": "policy"}
+    assert converted[150] == {"id": "s0", "type": "policyset"}
+    assert converted[-1] == {"id": {}, "type": "definition"}
+
+    assert policy_sets._convert_policy_name_to_id(appliance, ["policy7", "nothing", "policy9"]) == ["7", "9"]
+    assert policies.search(appliance, "policy3")['data'] == "3"
+    assert len(appliance.session.calls) == 3
+
+
+def test_without_name_index() -> None:
+    appliance = _policy_appliance(name_index=False)
+    assert appliance.name_index is None
+    references = [{"name": f"policy{i}", "type": "policy"} for i in range(10)]
+    # every call retrieves the collection again, one GET per type within a call
+    policy_attachments._convert_policy_name_to_id(appliance, references)
+    assert policies.search(appliance, "policy3")['data'] == "3"
+    assert len(appliance.session.calls) == 2
+
+
+def test_write_refreshes_collection() -> None:
+    appliance = _policy_appliance()
+    assert policy_sets.search(appliance, "set31")['data'] == {}
+    appliance.invoke_post("Create a new Policy Set", "/iam/access/v8/policysets", {"name": "set31"})
+    assert policy_sets.search(appliance, "set31")['data'] == "new"
+    assert [c for c in appliance.session.calls if c[0] == "GET"] == [("GET", "/iam/access/v8/policysets/")] * 2
@@ -0,0 +1,89 @@
+"""Offline tests for ibmsecurity/appliance/planappliance.py"""
+import pytest
+
+from ibmsecurity.appliance import configsnapshot
+from ibmsecurity.appliance.configsnapshot import ConfigStore
+from ibmsecurity.appliance.ibmappliance import IBMError
+from ibmsecurity.appliance.planappliance import PlanAppliance
+from ibmsecurity.isam.web.reverse_proxy import junctions
+from ibmsecurity.isam.web.reverse_proxy.configuration import entry
+from test.test_appliance_configsnapshot import _snapshot_appliance
+
+ENTRY_SET = "ibmsecurity.isam.web.reverse_proxy.configuration.entry.set"
+
+
+@pytest.fixture
+def plan(tmp_path):
+    appliance = _snapshot_appliance()
+    appliance.session.responses["/wga/reverseproxy/default/configuration/stanza/session"] = {"timeout": "3600"}
+    appliance.session.responses["/wga/reverseproxy/default/configuration/stanza/server"] = {"server-name": "default"}
+    store = ConfigStore(str(tmp_path))
+    configsnapshot.export(appliance, store, resources=["web/reverse_proxy/*"])
+    plan = PlanAppliance.from_store(store, "isam.example.com")
+    plan.live_session = appliance.session
+    appliance.session.calls = []
+    return plan
+
+
+def test_check_mode_from_snapshot(plan) -> None:
+    assert plan.facts['version'] == "10.0.8.0"
+    assert plan.facts['version_info'] >= "10.0.0.0"
+
+    assert plan.run(entry.set, "default", "server", [["server-name", "default"]], check_mode=True)['changed'] is False
+    assert plan.run(entry.set, "default", "session", [["timeout", "7200"]], check_mode=True)['changed'] is True
+    assert junctions._check(plan, "default", "/jct2") is True
+
+    assert [repr(mutation) for mutation in plan.plan] == [
+        f"{ENTRY_SET}(reverseproxy_id='default', stanza_id='session', entries=[['timeout', '7200']])"]
+    assert plan.live_session.calls == []
+    assert plan.request_count == 0
+
+
+def test_requests_are_recorded_not_sent(plan) -> None:
+    ret_obj = entry.set(plan, "default", "session", [["timeout", "7200"]])
+    assert ret_obj['changed'] is True
+    assert [(m.method, m.uri) for m in plan.plan] == [
+        ("DELETE", "/wga/reverseproxy/default/configuration/stanza/session/entry_name/timeout"),
+        ("POST", "/wga/reverseproxy/default/configuration/stanza/session/entry_name")]
+    assert plan.plan[1].data == {"entries": [["timeout", "7200"]]}
+    assert plan.plan[1].function == "ibmsecurity.isam.web.reverse_proxy.configuration.entry._add"
+    assert plan.plan[1].description == "Adding a configuration entry or entries by stanza - Reverse Proxy"
+    assert plan.live_session.calls == []
+
+
+def test_missing_uris(plan) -> None:
+    with pytest.raises(IBMError):
+        junctions.get_all(plan, "other")
+    assert plan.missing == ["/wga/reverseproxy/other/junctions"]
+
+
+HELPERS = '''
+def _changed(isamAppliance, name):
+    return isamAppliance.create_return_object(changed=True)
+
+
+def _add(isamAppliance, name, check_mode=False):
+    return _changed(isamAppliance, name)
+
+
+def add(isamAppliance, name, port=443, admin_pwd=None, check_mode=False, force=False):
+    return _add(isamAppliance, name, check_mode=check_mode)
+'''
+
+
+def test_check_mode_change_reported_by_helper(plan) -> None:
+    module = {'__name__': "ibmsecurity.isam.example"}
+    exec(compile(HELPERS, "example.py", "exec"), module)
+    assert plan.run(module['add'], "app", admin_pwd="secret", check_mode=True)['changed'] is True
+    assert plan.run(module['add'], "other")['changed'] is True
+    # Changes of functions not called with run() are not attributed
+    assert module['add'](plan, "direct", check_mode=True)['changed'] is True
+    assert [repr(mutation) for mutation in plan.plan] == [
+        "ibmsecurity.isam.example.add(name='app', port=443, admin_pwd='*redacted*')"]
+
+
+def test_request_data_redacted(plan) -> None:
+    plan.invoke_post("Adding a server connection", "/mgmt/server_connections/ldap/v1",
+                     {'name': "ldap", 'connection': {'bindPwd': "secret", 'hostName': "ldap.example.com"}})
+    assert plan.plan[0].to_dict()['data'] == {'name': "ldap", 'connection': {'bindPwd': "*redacted*",
+                                                                             'hostName': "ldap.example.com"}}
@@ -0,0 +1,54 @@
+"""Offline tests for ibmsecurity/appliance/isamappliance.py response processing"""
+import logging
+
+import pytest
+import requests
+
+from ibmsecurity.appliance.ibmappliance import IBMError, IBMResponse
+from ibmsecurity.appliance.isamappliance import ISAMAppliance
+
+
+def _appliance():
+    appliance = ISAMAppliance.__new__(ISAMAppliance)
+    appliance.logger = logging.getLogger(__name__)
+    appliance.debug = True
+    return appliance
+
+
+def _response(status_code, content, content_type='application/json'):
+    r = requests.models.Response()
+    r.status_code = status_code
+    r._content = content
+    r.encoding = 'utf-8'
+    if content_type is not None:
+        r.headers['content-type'] = content_type
+    return r
+
+
+@pytest.mark.parametrize("content, content_type, expected", [
+    (b'{"a": [1, 2, {"b": "\xc3\xa9"}]}', 'application/json', {"a": [1, 2, {"b": "é"}]}),
+    (b'[{"id": "/jct"}]', 'text/html', [{"id": "/jct"}]),
+    (b'[]', None, []),
+    (b'', 'application/json', b''),
+    (b'not json', 'text/plain', b'not json'),
+    (b'PK\x03\x04binary', 'application/octet-stream', b'PK\x03\x04binary'),
+    (b'{"message": "json in a download"}', 'application/octet-stream', {"message": "json in a download"}),
+    (b'{"invalid": \xff}', 'application/json', b'{"invalid": \xff}'),
+])
+def test_process_response_data(caplog, content, content_type, expected) -> None:
+    caplog.set_level(logging.DEBUG)
+    return_obj = IBMResponse({'rc': 0, 'data': {}, 'changed': False, 'warnings': []})
+    _appliance()._process_response(return_obj, _response(200, content, content_type), ignore_error=False)
+    assert return_obj['rc'] == 0
+    assert return_obj['data'] == expected
+
+
+def test_process_response_error() -> None:
+    return_obj = IBMResponse({'rc': 0, 'data': {}, 'changed': True, 'warnings': []})
+    with pytest.raises(IBMError):
+        _appliance()._process_response(return_obj, _response(400, b'{"message": "bad"}'), ignore_error=False)
+
+    _appliance()._process_response(return_obj, _response(404, b'{"message": "missing"}'), ignore_error=True)
+    assert return_obj['rc'] == 404
+    assert return_obj['changed'] is False
+    assert return_obj['data'] == {"message": "missing"}
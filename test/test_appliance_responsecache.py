@@ -0,0 +1,104 @@
+"""Offline tests for ibmsecurity/appliance/responsecache.py"""
+import json
+import logging
+
+import requests
+
+from ibmsecurity.appliance.isamappliance import ISAMAppliance
+from ibmsecurity.appliance.responsecache import ResponseCache
+
+
+class FakeSession:
+    """Records calls, returns the stored junction list"""
+
+    def __init__(self):
+        self.calls = []
+        self.cookies = {}
+        self.junctions = [{"id": "/jct1"}]
+
+    def _response(self, data):
+        r = requests.models.Response()
+        r.status_code = 200
+        r.headers['content-type'] = 'application/json'
+        r._content = json.dumps(data).encode('utf-8')
+        return r
+
+    def get(self, url, **kwargs):
+        self.calls.append(("GET", url))
+        return self._response(self.junctions)
+
+    def delete(self, url, **kwargs):
+        self.calls.append(("DELETE", url))
+        return self._response({})
+
+    def post(self, url, data=None, **kwargs):
+        self.calls.append(("POST", url))
+        self.junctions.append(json.loads(data))
+        return self._response({})
+
+
+def _appliance():
+    appliance = ISAMAppliance.__new__(ISAMAppliance)
+    appliance.logger = logging.getLogger(__name__)
+    appliance.debug = False
+    appliance.hostname = "isam.example.com"
+    appliance.lmi_port = 443
+    appliance.facts = {'version': '10.0.8.0', 'activations': ['wga']}
+    appliance.disable_urllib_warnings = False
+    appliance.verify = False
+    appliance.cert = None
+    appliance.session = FakeSession()
+    return appliance
+
+
+def test_cache_lru_and_stats() -> None:
+    cache = ResponseCache(ttl=60, maxsize=2)
+    cache.put("GET", "/a", {"x": 1})
+    cache.put("GET", "/b", {"x": 2})
+    assert cache.get("GET", "/a") == {"x": 1}
+    cache.put("GET", "/c", {"x": 3})  # evicts /b, /a was used more recently
+    assert cache.get("GET", "/b") is None
+    assert cache.get("GET", "/c") == {"x": 3}
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['size']) == (2, 1, 1, 2)
+
+
+def test_cache_returns_copies_and_expires() -> None:
+    cache = ResponseCache(ttl=-1)
+    cache.put("GET", "/a", [{"x": 1}])
+    assert cache.get("GET", "/a") is None
+
+    cache = ResponseCache()
+    cache.put("GET", "/a", [{"x": 1}])
+    cache.get("GET", "/a")[0]["x"] = 2
+    assert cache.get("GET", "/a") == [{"x": 1}]
+
+
+def test_cache_invalidation_by_prefix() -> None:
+    cache = ResponseCache()
+    cache.put("GET", "/wga/reverseproxy/default/junctions?detailed=true", [])
+    cache.put("GET", "/wga/reverseproxy/default/junctions?junctions_id=/x", {})
+    cache.put("GET", "/wga/reverseproxy/default2/junctions", [])
+    cache.put("GET", "/wga/reverseproxy", [])
+    cache.invalidate("/wga/reverseproxy/default/junctions")
+    assert cache.get("GET", "/wga/reverseproxy/default/junctions?detailed=true") is None
+    assert cache.get("GET", "/wga/reverseproxy/default/junctions?junctions_id=/x") is None
+    assert cache.get("GET", "/wga/reverseproxy") is None
+    assert cache.get("GET", "/wga/reverseproxy/default2/junctions") == []
+
+
+def test_appliance_serves_gets_from_cache() -> None:
+    appliance = _appliance()
+    appliance.enable_response_cache()
+    uri = "/wga/reverseproxy/default/junctions"
+
+    for _ in range(3):
+        ret_obj = appliance.invoke_get("Retrieving junctions", uri)
+        assert ret_obj['data'] == [{"id": "/jct1"}]
+    assert len(appliance.session.calls) == 1
+
+    appliance.invoke_post("Creating a junction", uri, {"id": "/jct2"})
+    ret_obj = appliance.invoke_get("Retrieving junctions", uri)
+    assert ret_obj['data'] == [{"id": "/jct1"}, {"id": "/jct2"}]
+    assert len(appliance.session.calls) == 3
+    assert appliance.response_cache.stats()['hits'] == 2
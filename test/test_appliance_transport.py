@@ -0,0 +1,121 @@
+"""Offline tests for ibmsecurity/appliance/transport.py"""
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import requests
+
+from ibmsecurity.appliance.transport import TransportConfig, TimeoutHTTPAdapter, TRANSPORT_ERRORS
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Answers 503 to the first `failures` requests, then 200"""
+    failures = 2
+    calls = []
+
+    def _answer(self):
+        self.calls.append(self.command)
+        length = int(self.headers.get('Content-Length', 0))
+        if length:
+            self.rfile.read(length)
+        status = 503 if len(self.calls) <= self.failures else 200
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _answer
+    do_POST = _answer
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    FlakyHandler.calls = []
+    httpd = HTTPServer(('127.0.0.1', 0), FlakyHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _session(**kwargs):
+    return TransportConfig(backoff_factor=0, **kwargs).apply(requests.session())
+
+
+def test_get_retried_on_503(server) -> None:
+    r = _session(retries=3).get(server + "/isam/version")
+    assert r.status_code == 200
+    assert FlakyHandler.calls == ['GET', 'GET', 'GET']
+
+
+def test_post_not_retried(server) -> None:
+    r = _session(retries=3).post(server + "/isam/capabilities/v1", data="{}")
+    assert r.status_code == 503
+    assert FlakyHandler.calls == ['POST']
+
+
+def test_retries_disabled(server) -> None:
+    r = _session(retries=0).get(server + "/isam/version")
+    assert r.status_code == 503
+    assert len(FlakyHandler.calls) == 1
+
+
+def test_last_response_returned_when_retries_exhausted(server) -> None:
+    r = _session(retries=1).get(server + "/isam/version")
+    assert r.status_code == 503
+    assert len(FlakyHandler.calls) == 2
+
+
+def test_connection_refused_is_transport_error() -> None:
+    with pytest.raises(TRANSPORT_ERRORS):
+        _session(retries=1, connect_timeout=1).get("http://127.0.0.1:1/isam/version")
+
+
+def test_default_timeout_applied() -> None:
+    config = TransportConfig(connect_timeout=5, read_timeout=60, pool_maxsize=25)
+    adapter = config.adapter()
+    assert isinstance(adapter, TimeoutHTTPAdapter)
+    assert adapter.timeout == (5, 60)
+    assert adapter._pool_maxsize == 25
+
+
+def test_post_never_in_retry_methods() -> None:
+    config = TransportConfig(retries=3, retry_methods=('GET', 'post'))
+    assert config.retry_methods == ('GET',)
+    assert 'POST' not in config.retry().allowed_methods
+
+
+def test_environment_defaults(monkeypatch) -> None:
+    monkeypatch.setenv("IBMSECLIB_CONNECT_TIMEOUT", "none")
+    monkeypatch.setenv("IBMSECLIB_READ_TIMEOUT", "120")
+    monkeypatch.setenv("IBMSECLIB_RETRIES", "0")
+    config = TransportConfig()
+    assert config.timeout == (None, 120.0)
+    assert config.retry() is None
+
+
+def test_session_cookie_kept() -> None:
+    from test.test_appliance_responsecache import _appliance
+
+    for keep, expected in ((False, None), (True, "token")):
+        appliance = _appliance()
+        appliance.transport = TransportConfig(keep_session_cookie=keep)
+        appliance.session.cookies = {'LtpaToken2': "token"}
+        appliance.invoke_get("Get junctions", "/wga/reverseproxy/default/junctions")
+        assert appliance.session.cookies.get('LtpaToken2') == expected
+
+
+def test_no_retries_by_default(monkeypatch) -> None:
+    from ibmsecurity.appliance.isamappliance import ISAMAppliance
+
+    monkeypatch.delenv("IBMSECLIB_RETRIES", raising=False)
+    config = TransportConfig()
+    assert config.retries == 0 and config.retry() is None
+    assert config.retry_methods == ('GET', 'HEAD', 'OPTIONS')
+    assert ISAMAppliance.transport.retries == 0
@@ -0,0 +1,51 @@
+"""Offline tests for ibmsecurity/registry.py and ibmsecurity/lazy.py"""
+import json
+import subprocess
+import sys
+
+import pytest
+
+from ibmsecurity import registry
+
+
+def test_packaged_index_is_current() -> None:
+    with open(registry.INDEX_FILE) as f:
+        packaged = json.load(f)
+    assert packaged == registry.build_index(), "run: python -m ibmsecurity.registry --write"
+
+
+def test_find_and_functions() -> None:
+    assert "ibmsecurity.isam.web.reverse_proxy.junctions.get_all" in registry.find("*.junctions.get*")
+    assert "set_all" in registry.functions("ibmsecurity.isam.web.reverse_proxy.junctions")
+    assert "ibmsecurity.isam.base.snapshots" in registry.modules("ibmsecurity.isam.base")
+
+
+def test_resolve() -> None:
+    import ibmsecurity.isam.base.snapshots
+
+    assert registry.resolve("ibmsecurity.isam.base.snapshots.get") is ibmsecurity.isam.base.snapshots.get
+    assert registry.resolve("ibmsecurity.isam.base.snapshots") is ibmsecurity.isam.base.snapshots
+    with pytest.raises(ImportError):
+        registry.resolve("ibmsecurity.isam.base.snapshots.nothing")
+    with pytest.raises(ImportError):
+        registry.resolve("ibmsecurity.isam.nothing.get")
+
+
+def test_lazy_attribute_access() -> None:
+    code = """
+import sys
+import ibmsecurity
+import ibmsecurity.isam.base.date_time
+func = ibmsecurity.isam.web.reverse_proxy.junctions.get_all
+assert ibmsecurity.isam.base.snapshots.get.__module__ == "ibmsecurity.isam.base.snapshots"
+try:
+    ibmsecurity.isam.nothing
+except AttributeError:
+    pass
+else:
+    raise AssertionError("no AttributeError")
+print(len([name for name in sys.modules if name.startswith("ibmsecurity.")]))
+"""
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert int(result.stdout) < 30
@@ -0,0 +1,65 @@
+"""Offline tests for ibmsecurity/utilities/jsondiff.py and tools.json_compare"""
+import copy
+import json
+
+from ibmsecurity.utilities import jsondiff, tools
+
+
+def test_order_of_lists_ignored() -> None:
+    first = {'a': [3, [1, 2], {'x': [1, 1, 2]}], 'b': "x"}
+    second = {'b': "x", 'a': [{'x': [2, 1, 1]}, [2, 1], 3]}
+    assert jsondiff.equals(first, second)
+    assert jsondiff.diff(first, second).matches
+    assert not jsondiff.equals({'x': [1, 1, 2]}, {'x': [1, 2, 2]})
+
+
+def test_operations_and_paths() -> None:
+    first = {'id': "x", 'tags': ["a", "b", "b"], 'old': 1, 'a/b': {'c~': 1}, 'type': [1]}
+    second = {'id': "x", 'tags': ["b", "a", "c"], 'new': None, 'a/b': {'c~': 2}, 'type': {'1': 1}}
+    assert jsondiff.diff(first, second).operations == [
+        {'op': 'remove', 'path': '/tags/1', 'old': "b"},
+        {'op': 'add', 'path': '/tags/-', 'value': "c"},
+        {'op': 'remove', 'path': '/old', 'old': 1},
+        {'op': 'replace', 'path': '/a~1b/c~0', 'value': 2, 'old': 1},
+        {'op': 'replace', 'path': '/type', 'value': {'1': 1}, 'old': [1]},
+        {'op': 'add', 'path': '/new', 'value': None},
+    ]
+
+
+def test_lists_matched_on_key() -> None:
+    first = [{'id': "/jct1", 'servers': [{'uuid': "s1", 'port': 80}]}, {'id': "/jct2"}]
+    second = [{'id': "/jct3"}, {'id': "/jct1", 'servers': [{'uuid': "s1", 'port': 443}]}]
+    differences = jsondiff.diff(first, second)
+    assert differences.patch() == [
+        {'op': 'replace', 'path': '/0/servers/0/port', 'value': 443},
+        {'op': 'remove', 'path': '/1'},
+        {'op': 'add', 'path': '/-', 'value': {'id': "/jct3"}},
+    ]
+    assert differences.lines[:2] == ["- /0/servers/0/port: 80", "+ /0/servers/0/port: 443"]
+    assert "<td>/0/servers/0/port</td>" in differences.html
+
+
+def test_json_compare() -> None:
+    ret_obj1 = {'rc': 0, 'data': {'name': "a", 'values': ["1", "2"]}, 'warnings': ["w1"]}
+    ret_obj2 = {'rc': 0, 'data': {'values': ["2", "1"], 'name': "a"}, 'warnings': []}
+    ret_obj = tools.json_compare(ret_obj1, ret_obj2, deleted_keys=['uuid'])
+    assert ret_obj['data'] == {'matches': True, 'difference': '', 'deleted_keys': ['uuid']}
+    assert ret_obj['warnings'] == [["w1"]]
+
+    ret_obj2['data']['name'] = "b<"
+    ret_obj = tools.json_compare(ret_obj1, ret_obj2)
+    assert ret_obj['data']['matches'] is False
+    assert ret_obj['data']['difference'] == '- /name: "a"\n+ /name: "b<"'
+    assert ret_obj['data']['changes'] == [{'op': 'replace', 'path': '/name', 'value': "b<", 'old': "a"}]
+    assert ret_obj['data']['context_difference'] == ['- /name: "a"', '+ /name: "b<"']
+    assert "b&lt;" in ret_obj['data']['html_difference']
+    # The renderings are built when read, also by JSON serialization and copies
+    ret_obj = tools.json_compare(ret_obj1, ret_obj2)
+    assert sorted(ret_obj['data']._lazy) == ['context_difference', 'difference', 'html_difference']
+    assert json.loads(json.dumps(ret_obj))['data']['difference'] == '- /name: "a"\n+ /name: "b<"'
+    ret_obj = tools.json_compare(ret_obj1, ret_obj2)
+    assert copy.deepcopy(ret_obj)['data']['context_difference'] == ['- /name: "a"', '+ /name: "b<"']
+    assert dict(tools.json_compare(ret_obj1, ret_obj2)['data'])['html_difference'].startswith("<!DOCTYPE html>")
+
+    ret_obj = tools.json_compare(ret_obj1, ret_obj2, equals_only=True)
+    assert ret_obj['data'] == {'matches': False, 'difference': '', 'deleted_keys': []}
@@ -0,0 +1,76 @@
+"""Offline tests for ibmsecurity/utilities/loganalyzer.py"""
+import gzip
+import math
+
+import pytest
+
+from ibmsecurity.utilities import loganalyzer
+
+REQUESTS = (
+    '10.0.0.1 - alice [18/Oct/2026:10:00:00 +0000] "GET /app/index.html HTTP/1.1" 200 1000 1500\n'
+    '10.0.0.2 - unauthenticated [18/Oct/2026:10:00:01 +0000] "POST /app/login?x=1 HTTP/1.1" 302 - 2500\n'
+    '10.0.0.3 - bob [18/Oct/2026:11:00:00 +0100] "GET /portal/a/b HTTP/1.1" 500 20 10000\n'
+    'garbage line\n'
+    '10.0.0.4 - bob [18/Oct/2026:10:30:00 +0000] "GET /favicon.ico HTTP/1.1" 404 0\n'
+)
+
+STATS = (
+    "2026-10-18-10:00:00.000+00:00I----- pdweb.jct.1 /app\n"
+    "  reqs : 12\n"
+    "  total-time : 3.5\n"
+    "2026-10-18-10:01:00.000+00:00I----- pdweb.https\n"
+    "  reqs : 40\n"
+)
+
+
+def test_request_log(tmp_path) -> None:
+    filename = tmp_path / "request.log"
+    filename.write_text(REQUESTS)
+    columns = loganalyzer.analyze([str(filename)], "request", processes=1, junctions=["/app", "/portal/a"])
+    assert len(columns) == 4
+    assert columns.decode("junction") == ["/app", "/app", "/portal/a", "/"]
+    assert list(columns["time"]) == [1792317600, 1792317601, 1792317600, 1792319400]
+    assert list(columns["bytes"]) == [1000, 0, 20, 0]
+    assert list(columns["response_time"])[:3] == [1.5, 2.5, 10.0] and math.isnan(columns["response_time"][3])
+
+    assert loganalyzer.aggregate(columns, "response_time", "max", by=["junction"]) == {("/app",): 2.5,
+                                                                                       ("/portal/a",): 10.0}
+    by_status = loganalyzer.aggregate(columns, "bytes", "count", by=["status"], where={"method": "GET"})
+    assert by_status == {(200,): 1, (404,): 1, (500,): 1}
+
+    # Without junctions the first path segment is the junction
+    columns = loganalyzer.analyze(str(filename), "request", processes=1)
+    assert columns.decode("junction")[2:] == ["/portal", "/favicon.ico"]
+    assert next(columns.rows())["method"] == "GET"
+
+
+def test_ranges_and_processes(tmp_path) -> None:
+    plain = tmp_path / "request.log"
+    plain.write_text(REQUESTS * 200)
+    compressed = tmp_path / "request.log.1.gz"
+    with gzip.open(compressed, "wt") as f:
+        f.write(REQUESTS * 10)
+    ranges = loganalyzer.ranges(str(plain), loganalyzer.REQUEST, 1000)
+    assert len(ranges) > 10 and ranges[0][0] == 0 and ranges[-1][1] == plain.stat().st_size
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+    single = loganalyzer.analyze([str(plain), str(compressed)], "request", processes=1, chunk_size=1000)
+    pooled = loganalyzer.analyze([str(plain), str(compressed)], "request", processes=2, chunk_size=1000)
+    assert len(single) == len(pooled) == 4 * 210
+    assert single.decode("junction") == pooled.decode("junction")
+    assert list(single["status"]) == list(pooled["status"])
+
+
+def test_stats(tmp_path) -> None:
+    filename = tmp_path / "stats.log"
+    filename.write_text(STATS * 50)
+    columns = loganalyzer.analyze(str(filename), "stats", processes=1, chunk_size=100)
+    assert len(columns) == 150
+    rows = list(columns.rows())[:3]
+    assert rows[0] == {"time": 1792317600, "component": "pdweb.jct.1", "junction": "/app", "stat": "reqs",
+                       "value": 12.0}
+    assert rows[2]["junction"] is None and rows[2]["value"] == 40.0
+    totals = loganalyzer.aggregate(columns, "value", "sum", by=["component", "stat"])
+    assert totals[("pdweb.https", "reqs")] == 2000.0
+    with pytest.raises(KeyError):
+        loganalyzer.analyze(str(filename), "unknown")
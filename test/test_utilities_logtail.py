@@ -0,0 +1,91 @@
+"""Offline tests for ibmsecurity/utilities/logtail.py"""
+from urllib.parse import parse_qs, urlsplit
+
+from ibmsecurity.utilities import logtail
+from ibmsecurity.utilities.logtail import CursorFile, LogTailer
+from test.test_appliance_responsecache import FakeSession, _appliance
+
+BASE = "/wga/reverseproxy_logging/instance/default"
+
+
+class LogSession(FakeSession):
+    """Serves the log files of the reverse proxy instance "default", {file id: bytes}"""
+
+    def __init__(self, files):
+        super().__init__()
+        self.files = files
+
+    def get(self, url, **kwargs):
+        parts = urlsplit(url)
+        path = parts.path.split(BASE, 1)[1].strip("/")
+        if not path:
+            self.calls.append(("list", None, None))
+            return self._response([{"id": name, "file_size": len(data)} for name, data in self.files.items()])
+        query = {key: int(value[0]) for key, value in parse_qs(parts.query).items()}
+        self.calls.append((path, query['start'], query['size']))
+        data = self.files[path][query['start']:query['start'] + query['size']]
+        return self._response({"contents": data.decode('utf-8')})
+
+
+def _tailer(files, **kwargs):
+    appliance = _appliance()
+    appliance.facts['model'] = "Appliance"
+    appliance.session = LogSession(files)
+    return LogTailer(appliance, [logtail.reverse_proxy("default")], **kwargs)
+
+
+def _texts(lines):
+    return [line.text for line in lines]
+
+
+def test_only_new_bytes_are_read() -> None:
+    files = {"msg.log": b"one\ntwo\n"}
+    tailer = _tailer(files, chunk_size=8)
+    assert _texts(tailer.poll()) == []
+    assert tailer.isamAppliance.session.calls == [("list", None, None)]
+
+    files["msg.log"] += "three\nfo".encode('utf-8')
+    assert _texts(tailer.poll()) == ["three"]
+    files["msg.log"] += b"ur\nfive\n"
+    tailer.isamAppliance.session.calls = []
+    lines = list(tailer.poll())
+    assert _texts(lines) == ["four", "five"]
+    assert lines[0] == ("isam.example.com", "reverse_proxy/default", "msg.log", "four")
+    assert tailer.isamAppliance.session.calls == [("list", None, None), ("msg.log", 14, 8), ("msg.log", 19, 8)]
+
+    # Unchanged files are not read
+    tailer.isamAppliance.session.calls = []
+    assert _texts(tailer.poll()) == []
+    assert tailer.isamAppliance.session.calls == [("list", None, None)]
+
+
+def test_rotation_and_truncation() -> None:
+    files = {"msg.log": b"a\n"}
+    tailer = _tailer(files, from_start=True)
+    assert _texts(tailer.poll()) == ["a"]
+
+    files["msg.log.2024-01-01"] = b"a\nb\nc\n"
+    files["msg.log"] = b"d\n"
+    assert _texts(tailer.poll()) == ["b", "c", "d"]
+    assert tailer.cursors.get("isam.example.com|reverse_proxy/default|msg.log.2024-01-01") == {'offset': 6, 'size': 6}
+
+    files["msg.log"] = b""
+    assert _texts(tailer.poll()) == []
+    files["msg.log"] = b"e\n"
+    assert _texts(tailer.poll()) == ["e"]
+
+    # New files after the first poll are read from the start, removed files are forgotten
+    files["other.log"] = b"x\n"
+    del files["msg.log.2024-01-01"]
+    assert _texts(tailer.poll()) == ["x"]
+    assert sorted(tailer.cursors.keys()) == ["isam.example.com|reverse_proxy/default|msg.log",
+                                             "isam.example.com|reverse_proxy/default|other.log"]
+
+
+def test_cursors_are_persisted(tmp_path) -> None:
+    filename = str(tmp_path / "cursors.json")
+    files = {"msg.log": b"a\n"}
+    assert _texts(_tailer(files, cursors=CursorFile(filename), from_start=True).poll()) == ["a"]
+    files["msg.log"] += b"b\n"
+    assert _texts(_tailer(files, cursors=CursorFile(filename)).follow(interval=0, polls=2)) == ["b"]
+    assert CursorFile(filename).get("isam.example.com|reverse_proxy/default|msg.log") == {'offset': 4, 'size': 4}
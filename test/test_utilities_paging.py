@@ -0,0 +1,69 @@
+"""Offline tests for ibmsecurity/utilities/paging.py"""
+from urllib.parse import parse_qs, urlsplit
+
+from ibmsecurity.isam import statistics
+from ibmsecurity.isam.aac import extensions
+from ibmsecurity.utilities import paging
+from test.test_appliance_responsecache import FakeSession, _appliance
+
+RECORDS = [{"id": str(i)} for i in range(23)]
+
+
+class PagingSession(FakeSession):
+    """Serves RECORDS with start/count query parameters or a range header"""
+
+    def get(self, url, headers=None, **kwargs):
+        query = {key: int(value[0]) for key, value in parse_qs(urlsplit(url).query).items()
+                 if key in ('start', 'count')}
+        if headers and 'range' in headers:
+            first, last = (int(i) for i in headers['range'].split('=')[1].split('-'))
+            query = {'start': first, 'count': last - first + 1}
+        self.calls.append((query.get('start'), query.get('count')))
+        start = query.get('start', 0)
+        return self._response(RECORDS[start:start + query['count']] if 'count' in query else RECORDS)
+
+
+def _paging_appliance():
+    appliance = _appliance()
+    appliance.facts['model'] = "Appliance"
+    appliance.session = PagingSession()
+    return appliance
+
+
+def test_start_count_pages() -> None:
+    appliance = _paging_appliance()
+    pages = paging.pages(extensions.get_all, appliance, page_size=10)
+    assert [len(page) for page in pages] == [10, 10, 3]
+    assert appliance.session.calls == [(0, 10), (10, 10), (20, 10)]
+
+    appliance.session.calls = []
+    records = paging.iterate(extensions.get_all, appliance, page_size=10, prefetch=True)
+    assert next(records) == {"id": "0"}
+    assert list(records) == RECORDS[1:]
+    assert appliance.session.calls == [(0, 10), (10, 10), (20, 10)]
+
+    # Exactly full pages end with an empty one
+    appliance.session.calls = []
+    assert len(list(paging.iterate(extensions.get_all, appliance, page_size=23))) == 23
+    assert appliance.session.calls == [(0, 23), (23, 23)]
+
+
+def test_range_header() -> None:
+    appliance = _paging_appliance()
+    records = paging.iterate(statistics.get_rp_throughput_summary, appliance, "2024-01-01", 86400, "junction",
+                             page_size=20)
+    assert list(records) == RECORDS
+    assert appliance.session.calls == [(0, 20), (20, 20)]
+
+
+def test_styles() -> None:
+    assert paging.paging_style(extensions.get_all) == "start_count"
+    assert paging.paging_style(lambda isamAppliance, count=None: None) == "count"
+    assert paging.paging_style(lambda isamAppliance: None) is None
+
+    def ignores_paging(isamAppliance, start=None, count=None):
+        return {'data': {'Resources': RECORDS[:10], 'totalResults': 10}}
+
+    assert list(paging.iterate(ignores_paging, None, page_size=10)) == RECORDS[:10]
+    assert list(paging.iterate(ignores_paging, None, page_size=4)) == RECORDS[:10]
+    assert list(paging.iterate(lambda isamAppliance: {'data': RECORDS}, None)) == RECORDS
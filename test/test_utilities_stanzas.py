@@ -0,0 +1,83 @@
+"""Offline tests for ibmsecurity/utilities/stanzas.py and the set_stanzas functions"""
+import json
+from urllib.parse import unquote_plus
+
+from ibmsecurity.isam.web.reverse_proxy.configuration import entry
+from ibmsecurity.utilities import stanzas
+from test.test_appliance_responsecache import FakeSession, _appliance
+
+BASE = "/wga/reverseproxy/default/configuration/stanza"
+
+
+class StanzaSession(FakeSession):
+    """Keeps the stanzas of one reverse proxy, {stanza: {key: [values]}}"""
+
+    def __init__(self, config):
+        super().__init__()
+        self.config = config
+
+    def _path(self, url):
+        return [unquote_plus(part) for part in url.split(BASE, 1)[1].strip("/").split("/") if part]
+
+    def get(self, url, **kwargs):
+        path = self._path(url)
+        self.calls.append(("GET", path))
+        if not path:
+            return self._response(list(self.config))
+        return self._response(self.config[path[0]])
+
+    def post(self, url, data=None, **kwargs):
+        path = self._path(url)
+        self.calls.append(("POST", path))
+        if len(path) == 1:
+            self.config[path[0]] = {}
+        else:
+            for key, value in json.loads(data)['entries']:
+                self.config[path[0]].setdefault(key, []).append(value)
+        return self._response({})
+
+    def delete(self, url, **kwargs):
+        path = self._path(url)
+        self.calls.append(("DELETE", path))
+        del self.config[path[0]][path[2]]
+        return self._response({})
+
+
+def test_diff() -> None:
+    current = {"worker-threads": ["300"], "web-host-name": ["www"], "ssl-id": ["a", "b"], "other": ["1"]}
+    desired = [["worker-threads", 300], ["ssl-id", "b"], ["ssl-id", "a"], ["web-host-name", "web"], ["new", "x"]]
+    change = stanzas.diff("server", current, desired)
+    assert change == ("server", False, [["web-host-name", "web"], ["new", "x"]], ["web-host-name"])
+    assert stanzas.diff("server", current, {"other": []}).delete == ["other"]
+    assert not stanzas.diff("server", current, "{'ssl-id': ['a', 'b']}").changed
+    assert stanzas.diff("server", current, {"other": "1"}, force=True).add == [["other", "1"]]
+
+
+def test_set_stanzas_requests() -> None:
+    appliance = _appliance()
+    appliance.session = StanzaSession({
+        "server": {"worker-threads": ["300"], "web-host-name": ["www"]},
+        "session": {"timeout": ["3600"]},
+    })
+    desired = {
+        "server": [["worker-threads", "300"], ["web-host-name", "web"], ["http", "no"]],
+        "session": {"timeout": 3600},
+        "ssl/tls": {"base-crypto-library": "Default", "ssl-enable": ["yes"]},
+    }
+
+    ret_obj = entry.set_stanzas(appliance, "default", desired, check_mode=True)
+    assert ret_obj['changed'] is True
+    assert sorted(ret_obj['data']) == ["server", "ssl/tls"]
+    assert [call[0] for call in appliance.session.calls] == ["GET"] * 3
+
+    appliance.session.calls = []
+    ret_obj = entry.set_stanzas(appliance, "default", desired)
+    assert ret_obj['changed'] is True
+    assert appliance.session.calls == [
+        ("GET", []), ("GET", ["server"]), ("GET", ["session"]),
+        ("DELETE", ["server", "entry_name", "web-host-name"]), ("POST", ["server", "entry_name"]),
+        ("POST", ["ssl/tls"]), ("POST", ["ssl/tls", "entry_name"])]
+    assert appliance.session.config["server"] == {"worker-threads": ["300"], "web-host-name": ["web"], "http": ["no"]}
+    assert appliance.session.config["ssl/tls"] == {"base-crypto-library": ["Default"], "ssl-enable": ["yes"]}
+
+    assert entry.set_stanzas(appliance, "default", desired)['changed'] is False
@@ -0,0 +1,99 @@
+"""Offline tests for ibmsecurity/utilities/statscollector.py and columnstore.py"""
+import math
+
+import pytest
+
+from ibmsecurity.utilities import statscollector
+from ibmsecurity.utilities.columnstore import ColumnStore
+from ibmsecurity.utilities.statscollector import Metric, StatisticsCollector
+from test.test_appliance_responsecache import FakeSession, _appliance
+
+
+def _rows():
+    rows = []
+    for i in range(100):
+        rows.append({"time": 1700000000 + i * 60, "host": "isam1", "junction": "/app", "reqtime": float(i + 1)})
+        rows.append({"time": 1700000000 + i * 60, "host": "isam2", "junction": "/app", "reqtime": 2.0 * (i + 1)})
+    return rows
+
+
+def test_append_scan(tmp_path) -> None:
+    store = ColumnStore(str(tmp_path))
+    store.append("rt", _rows()[:100])
+    store.flush()
+    store.append("rt", _rows()[100:])
+    # A column added by a later chunk reads as missing in the earlier chunks
+    store.append("rt", [{"time": 1800000000, "host": "isam3", "errors": 2}])
+    assert len(store.flush()) == 1
+    assert store.tables() == ["rt"]
+    assert store.schema("rt") == {"time": "q", "host": "s", "junction": "s", "reqtime": "d", "errors": "d"}
+
+    reopened = ColumnStore(str(tmp_path))
+    columns = reopened.scan("rt", ["host", "errors"])
+    assert len(columns) == 201
+    assert columns.decode("host")[-1] == "isam3"
+    assert math.isnan(columns["errors"][0]) and columns["errors"][-1] == 2.0
+    assert len(reopened.scan("rt", ["reqtime"], since=1800000000)) == 1
+    assert len(reopened.scan("rt", ["reqtime"], until=1700000000 + 600)) == 20
+    with pytest.raises(KeyError):
+        reopened.scan("rt", ["missing"])
+
+
+def test_aggregate(tmp_path) -> None:
+    store = ColumnStore(str(tmp_path))
+    store.append("rt", _rows())
+    store.flush()
+    p95 = store.aggregate("rt", "reqtime", "p95", by=["host", "junction"])
+    assert p95 == {("isam1", "/app"): pytest.approx(95.05), ("isam2", "/app"): pytest.approx(190.1)}
+    hourly = store.aggregate("rt", "reqtime", "max", by=["host"], bucket=3600, where={"host": "isam1"})
+    start = 1700000000 // 3600 * 3600
+    assert list(hourly) == [("isam1", start), ("isam1", start + 3600)]
+    assert hourly[("isam1", start)] == 47.0
+    assert store.aggregate("rt", "reqtime", "count") == {(): 200}
+    with pytest.raises(ValueError):
+        store.aggregate("rt", "reqtime", "median")
+
+
+def test_normalize() -> None:
+    rows = statscollector.normalize({"/app": [{"x": 1700000000000, "y": 10}], "/web": [{"x": 1700000060, "y": 5}]})
+    assert rows == [{"time": 1700000000, "series": "/app", "y": 10}, {"time": 1700000060, "series": "/web", "y": 5}]
+    rows = statscollector.normalize({"items": [{"timestamp": "2024-01-01T00:00:00Z", "state": "up", "ok": True}]})
+    assert rows == [{"time": 1704067200, "state": "up", "ok": 1}]
+    assert statscollector.normalize({"used": 12.5}, now=5) == [{"time": 5, "used": 12.5}]
+
+
+class StatsSession(FakeSession):
+    """Every request returns a window of three samples ending at `end`"""
+
+    def __init__(self):
+        super().__init__()
+        self.end = 1700000120
+
+    def get(self, url, **kwargs):
+        self.calls.append(("GET", url))
+        return self._response({"/app": [{"x": t, "y": 10} for t in range(self.end - 120, self.end + 1, 60)]})
+
+
+def test_collector(tmp_path) -> None:
+    appliances = []
+    for hostname in ("isam1", "isam2"):
+        appliance = _appliance()
+        appliance.facts['model'] = "Appliance"
+        appliance.hostname = hostname
+        appliance.session = StatsSession()
+        appliances.append(appliance)
+    failing = Metric("broken", lambda isamAppliance: 1 / 0)
+    store = ColumnStore(str(tmp_path))
+    collector = StatisticsCollector(appliances, store, [statscollector.junction_reqtime("default"), failing])
+    results = collector.collect()
+    assert results[("isam1", "junction_reqtime")] == 3
+    assert isinstance(results[("isam2", "broken")], ZeroDivisionError)
+    assert "/analysis/reverse_proxy_traffic/reqtime?" in appliances[0].session.calls[0][1]
+
+    # The next window overlaps the last one, a new collector continues from the saved high-water marks
+    for appliance in appliances:
+        appliance.session.end += 60
+    collector = StatisticsCollector(appliances, store, [statscollector.junction_reqtime("default")])
+    assert collector.collect()[("isam2", "junction_reqtime")] == 1
+    counts = store.aggregate("junction_reqtime", "y", "count", by=["host", "junction", "instance"])
+    assert counts == {("isam1", "/app", "default"): 4, ("isam2", "/app", "default"): 4}
@@ -0,0 +1,41 @@
+"""Offline tests for the version helpers in ibmsecurity/utilities/tools.py"""
+import json
+
+import pytest
+
+from ibmsecurity.utilities import tools
+
+
+@pytest.mark.parametrize("version1, version2, result", [
+    ("1", "1", 0), ("2.1", "2.2", -1), ("3.0.4.10", "3.0.4.2", 1), ("4.08", "4.08.01", -1),
+    ("3.2.1.9.8144", "3.2", 1), ("3.2", "3.2.1.9.8144", -1), ("1.2", "2.1", -1), ("2.1", "1.2", 1),
+    ("5.6.7", "5.6.7", 0), ("1.01.1", "1.1.1", 0), ("1", "1.0", 0), ("1.0", "1.0.1", -1),
+    ("1.0.2.0", "1.0.2", 0), ("10.0", "9.0.3", 1), ("10.0.6.0_b123", "10.0.6", 0),
+])
+def test_version_compare(version1, version2, result) -> None:
+    assert tools.version_compare(version1, version2) == result
+    assert tools.version_compare(version2, version1) == -result
+
+
+def test_version_object() -> None:
+    v = tools.Version("10.0.6.0_b42")
+    assert v >= "10.0.6" and v > "10.0.5.1" and v < "10.0.7" and v == "10.0.6.0" and v != "10.0.6.1"
+    assert v == tools.Version("10.0.6")
+    assert tools.Version(v) is v
+    assert str(v) == "10.0.6.0_b42"
+    assert sorted([tools.Version("10.0"), tools.Version("9.0.7.1"), tools.Version("10.0.0.1")]) == \
+        ["9.0.7.1", "10.0", "10.0.0.1"]
+    assert json.dumps({'version_info': v}) == '{"version_info": [10, 0, 6]}'
+    with pytest.raises(ValueError):
+        tools.Version("not a version")
+
+
+def test_version_copy_and_pickle() -> None:
+    import copy
+    import pickle
+
+    version = tools.Version("10.0.6.0_b123")
+    for clone in (copy.copy(version), copy.deepcopy(version), pickle.loads(pickle.dumps(version))):
+        assert clone == version and str(clone) == "10.0.6.0_b123" and isinstance(clone, tools.Version)
+    facts = copy.deepcopy({'version': "10.0.6.0", 'version_info': tools.Version("10.0.6.0")})
+    assert facts['version_info'] >= "10.0.6"
@@ -0,0 +1,99 @@
+"""Offline tests for ibmsecurity/utilities/waiter.py"""
+import requests
+
+from ibmsecurity.appliance.transport import TransportConfig
+from ibmsecurity.isam.base import lmi
+from ibmsecurity.utilities import waiter
+from ibmsecurity.utilities.waiter import Waiter
+from test.test_appliance_responsecache import FakeSession, _appliance
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_backoff_and_deadline() -> None:
+    clock = FakeClock()
+    w = Waiter(timeout=10, interval=1, max_interval=4, jitter=0, clock=lambda: clock.now, sleep=clock.sleep)
+    result = w.wait(lambda: False, "never")
+    assert not result
+    assert clock.sleeps == [1, 2, 4, 3]
+    assert (result.elapsed, result.attempts) == (10, 5)
+    assert w.results == [("never", result)]
+
+    checks = iter([ValueError("down"), ValueError("down"), {"up": True}])
+
+    def predicate():
+        value = next(checks)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    clock.sleeps = []
+    result = w.wait(predicate, "up")
+    assert result.ready and result.value == {"up": True} and result.attempts == 3
+    assert clock.sleeps == [1, 2]
+
+
+def test_jitter_and_wait_all() -> None:
+    w = Waiter(interval=10, max_interval=10, jitter=0.2)
+    pauses = w.pauses()
+    assert all(8 <= next(pauses) <= 12 for _ in range(50))
+
+    results = Waiter(timeout=0.2, interval=0.01).wait_all({"isam1": lambda: True, "isam2": lambda: False})
+    assert results["isam1"].ready and not results["isam2"].ready
+
+
+class LMISession(FakeSession):
+    """The LMI reports a new start time after `restart_after` status requests"""
+
+    def __init__(self, restart_after):
+        super().__init__()
+        self.restart_after = restart_after
+
+    def get(self, url, **kwargs):
+        self.calls.append(("GET", url))
+        start_time = "2024-01-01T10:00:00" if len(self.calls) <= self.restart_after else "2024-01-01T10:05:00"
+        return self._response([{"start_time": start_time}])
+
+
+def test_await_startup() -> None:
+    appliance = _appliance()
+    appliance.session = LMISession(restart_after=3)
+    ret_obj = lmi.await_startup(appliance, wait_time=5, check_freq=0.01)
+    assert ret_obj['warnings'] == []
+    assert len(appliance.session.calls) == 4
+
+    appliance.session = LMISession(restart_after=1000)
+    ret_obj = lmi.await_startup(appliance, wait_time=0.1, check_freq=0.01)
+    assert ret_obj['warnings'][0].startswith("The LMI restart not detected or completed")
+
+
+def test_probing() -> None:
+    appliance = _appliance()
+    appliance.session = requests.session()
+    appliance.transport = TransportConfig(connect_timeout=30, retries=3)
+    appliance.transport.apply(appliance.session)
+    with waiter.probing(appliance, connect_timeout=2):
+        adapter = appliance.session.get_adapter("https://isam.example.com")
+        assert adapter.timeout == (2, 30.0) and adapter.max_retries.total == 0
+    adapter = appliance.session.get_adapter("https://isam.example.com")
+    assert adapter.timeout == (30, None) and adapter.max_retries.total == 3
+
+
+def test_restart_and_wait_invalidates_facts_after_startup() -> None:
+    appliance = _appliance()
+    appliance.session = LMISession(restart_after=3)
+    invalidated = []
+    appliance.invalidate_facts = lambda in_memory=True: invalidated.append(len(appliance.session.calls))
+    appliance.session.post = lambda url, **kwargs: appliance.session._response({})
+    ret_obj = lmi.restart_and_wait(appliance, wait_time=5, check_freq=0.01)
+    assert ret_obj['warnings'] == []
+    # Only once the new start time was seen
+    assert invalidated == [len(appliance.session.calls)] and invalidated[0] >= 4
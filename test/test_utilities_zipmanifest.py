@@ -0,0 +1,97 @@
+"""Offline tests for ibmsecurity/utilities/zipmanifest.py"""
+import os
+import shutil
+import zipfile
+
+import ibmsecurity.isam.web.reverse_proxy.management_root.all as management_root
+from ibmsecurity.utilities import tools
+from ibmsecurity.utilities.zipmanifest import ZipManifest, server_manifest
+from test.test_appliance_responsecache import _appliance
+
+
+def _zip(path, entries, compression=zipfile.ZIP_DEFLATED):
+    with zipfile.ZipFile(path, 'w', compression=compression) as z:
+        for name, content in entries.items():
+            z.writestr(name, content)
+    return str(path)
+
+
+SERVER = {"errors/": b"", "errors/404.html": b"not found", "index.html": b"<html>", "old.html": b"old"}
+
+
+def test_diff_uses_central_directory(tmp_path, monkeypatch) -> None:
+    client = _zip(tmp_path / "client.zip", {"errors/": b"", "errors/404.html": b"missing", "index.html": b"<html>",
+                                            "new.html": b"new"}, compression=zipfile.ZIP_STORED)
+    server = _zip(tmp_path / "server.zip", SERVER)
+
+    def no_hash(self, path):
+        raise AssertionError(f"{path} hashed")
+
+    monkeypatch.setattr(ZipManifest, "hash", no_hash)
+    diff = ZipManifest.from_zip(client).diff(ZipManifest.from_zip(server))
+    assert diff.added == {"new.html"}
+    assert diff.removed == {"old.html"}
+    assert diff.changed == {"errors/404.html"}
+    assert not diff.identical
+
+
+def test_verify_hashes_only_candidates(tmp_path) -> None:
+    client = _zip(tmp_path / "client.zip", {"a.html": b"same", "b.html": b"client"})
+    server = _zip(tmp_path / "server.zip", {"a.html": b"same", "b.html": b"server"})
+    client_manifest, server_manifest_ = ZipManifest.from_zip(client), ZipManifest.from_zip(server)
+    diff = client_manifest.diff(server_manifest_, verify=True)
+    assert diff.changed == {"b.html"}
+    assert client_manifest.entries["a.html"][2] == server_manifest_.entries["a.html"][2] is not None
+    assert client_manifest.entries["b.html"][2] is None
+
+
+def test_files_same_zip_content(tmp_path) -> None:
+    original = _zip(tmp_path / "a.zip", SERVER)
+    same = _zip(tmp_path / "b.zip", dict(reversed(list(SERVER.items()))), compression=zipfile.ZIP_STORED)
+    other = _zip(tmp_path / "c.zip", dict(SERVER, **{"index.html": b"<html/>"}))
+    assert tools.files_same_zip_content(original, same) is True
+    assert tools.files_same_zip_content(original, same, verify=True) is True
+    assert tools.files_same_zip_content(original, other) is False
+
+
+def test_server_manifest(tmp_path) -> None:
+    server = _zip(tmp_path / "server.zip", SERVER)
+
+    with server_manifest(lambda filename: shutil.copy(server, filename)) as manifest:
+        assert manifest.hash("index.html") is not None
+        exported = manifest.filename
+    assert not os.path.exists(exported)
+
+    with server_manifest(lambda filename: None) as manifest:
+        assert manifest is None
+
+
+def test_import_zip_delete_missing_exports_once(tmp_path, monkeypatch) -> None:
+    client = _zip(tmp_path / "client.zip", {"errors/": b"", "errors/404.html": b"missing", "index.html": b"<html>"})
+    server = _zip(tmp_path / "server.zip", dict(SERVER, **{"old/": b"", "old/a.html": b"a"}))
+    appliance = _appliance()
+    exports, deleted, posted = [], [], []
+
+    def export_zip(isamAppliance, instance_id, filename, check_mode=False, force=False):
+        exports.append(instance_id)
+        shutil.copy(server, filename)
+        return isamAppliance.create_return_object()
+
+    monkeypatch.setattr(management_root, "export_zip", export_zip)
+    monkeypatch.setattr(management_root.instance, "_check", lambda isamAppliance, instance_id: True)
+    monkeypatch.setattr(management_root.file, "delete",
+                        lambda isamAppliance, instance_id, id, check_mode=False: deleted.append(id))
+    monkeypatch.setattr(management_root.directory, "delete",
+                        lambda isamAppliance, instance_id, id, check_mode=False: deleted.append(id))
+    monkeypatch.setattr(appliance, "invoke_post_files",
+                        lambda description, uri, fileinfo, data, json_response: posted.append(uri))
+
+    management_root.import_zip(appliance, "default", client, delete_missing=True)
+    assert exports == ["default"]
+    assert deleted == ["old.html", "old/"]
+    assert posted == ["/wga/reverseproxy/default/management_root"]
+
+    exports.clear()
+    ret_obj = management_root.import_zip(appliance, "default", server, delete_missing=True)
+    assert exports == ["default"]
+    assert ret_obj['changed'] is False
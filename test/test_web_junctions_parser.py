@@ -0,0 +1,49 @@
+"""Offline tests for ibmsecurity/isam/web/reverse_proxy/junctions_parser.py"""
+import pytest
+
+from ibmsecurity.isam.web.reverse_proxy import junctions_parser
+
+
+class FakeAppliance:
+    def __init__(self, version):
+        self.facts = {'version': version}
+
+
+SERVERS = ("server_hostname!backend1;server_port!443;server_uuid!1234;query_content_url!/cgi-bin/query_contents;"
+           "#server_hostname!backend2;server_port!8443;server_state!running")
+
+
+def test_parse_servers() -> None:
+    servers = junctions_parser.parse_servers(SERVERS, '#')
+    assert servers == [
+        {'server_hostname': 'backend1', 'server_port': '443', 'server_uuid': '1234',
+         'query_content_url': '/cgi-bin/query_contents'},
+        {'server_hostname': 'backend2', 'server_port': '8443', 'server_state': 'running'}
+    ]
+    assert junctions_parser.parse_servers(servers) is servers
+    assert junctions_parser.parse_servers(None) == []
+
+
+def test_format_round_trip() -> None:
+    servers = junctions_parser.parse_servers(SERVERS, '#')
+    assert junctions_parser.parse_servers(junctions_parser.format_servers(servers, '&'), '&') == servers
+
+
+def test_records() -> None:
+    records = junctions_parser.parse_server_records(SERVERS, '#')
+    assert records[0].server_hostname == 'backend1'
+    assert records[0].query_content_url == '/cgi-bin/query_contents'
+    assert records[1].server_state == 'running'
+    assert records[1].extra is None
+    assert junctions_parser.JunctionServer(server_hostname='x', other='y').to_dict() == {'server_hostname': 'x',
+                                                                                         'other': 'y'}
+    assert junctions_parser.parse_servers(junctions_parser.format_servers(records)) == \
+        junctions_parser.parse_servers(SERVERS)
+    with pytest.raises(AttributeError):
+        records[0].unknown = 1
+
+
+@pytest.mark.parametrize("version, separator", [("10.0.8.0", '#'), ("9.0.1.1", '#'), ("9.0.1.0", '&'),
+                                                ("9.0.0.0", '&')])
+def test_server_separator(version, separator) -> None:
+    assert junctions_parser.server_separator(FakeAppliance(version)) == separator
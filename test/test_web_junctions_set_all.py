@@ -0,0 +1,93 @@
+"""Offline tests for the junction reconciliation in ibmsecurity/isam/web/reverse_proxy/junctions.py"""
+import logging
+
+from ibmsecurity.appliance.ibmappliance import IBMResponse
+import ibmsecurity.isam.web.reverse_proxy.junctions
+
+
+class FakeAppliance:
+    """Serves a detailed junction list and records all other requests"""
+
+    def __init__(self, junctions):
+        self.logger = logging.getLogger(__name__)
+        self.facts = {'version': '10.0.8.0', 'activations': ['wga']}
+        self.junctions = junctions
+        self.calls = []
+        self.request_count = 0
+
+    def create_return_object(self, rc=0, data={}, warnings=[], changed=False):
+        return IBMResponse({'rc': rc, 'data': data, 'changed': changed, 'warnings': warnings, 'status_code': 0})
+
+    def invoke_get(self, description, uri, **kwargs):
+        self.request_count += 1
+        self.calls.append(("GET", uri))
+        return self.create_return_object(data=[dict(j) for j in self.junctions])
+
+    def _change(self, method, uri, data=None, **kwargs):
+        self.request_count += 1
+        self.calls.append((method, uri, data))
+        return self.create_return_object(changed=True)
+
+    def invoke_post(self, description, uri, data, **kwargs):
+        return self._change("POST", uri, data)
+
+    def invoke_put(self, description, uri, data, **kwargs):
+        return self._change("PUT", uri, data)
+
+    def invoke_delete(self, description, uri, **kwargs):
+        return self._change("DELETE", uri)
+
+
+def _current(junction_point, hostname):
+    return {
+        'id': junction_point,
+        'junction_point': junction_point,
+        'junction_type': 'TCP',
+        'junction_soft_limit': '0 - using global value',
+        'junction_hard_limit': '0 - using global value',
+        'client_ip_http': 'do not insert',
+        'servers': f"server_hostname!{hostname};server_port!80;server_state!running;current_requests!0"
+    }
+
+
+def _desired(junction_point, *hostnames):
+    return {
+        'junction_point': junction_point,
+        'junction_type': 'tcp',
+        'servers': [{'server_hostname': h, 'server_port': 80} for h in hostnames]
+    }
+
+
+def test_set_all_plan_and_execution() -> None:
+    appliance = FakeAppliance([_current("/same", "backend1"), _current("/changed", "backend1"),
+                               _current("/extra", "backend1")])
+    desired = [_desired("/same", "backend1"), _desired("/changed", "backend2"),
+               _desired("/new", "backend1", "backend2")]
+
+    ret_obj = ibmsecurity.isam.web.reverse_proxy.junctions.set_all(appliance, "default", junctions=desired,
+                                                                   delete_missing=True, check_mode=True,
+                                                                   warnings=[])
+    assert ret_obj['changed'] is True
+    assert [(s['action'], s['junction_point']) for s in ret_obj['data']['plan']] == [
+        ('none', '/same'), ('update', '/changed'), ('create', '/new'), ('delete', '/extra')]
+    assert appliance.calls == [("GET", "/wga/reverseproxy/default/junctions?detailed=true")]
+    assert desired[2]['servers'][1] == {'server_hostname': 'backend2', 'server_port': 80}
+
+    appliance.calls = []
+    ret_obj = ibmsecurity.isam.web.reverse_proxy.junctions.set_all(appliance, "default", junctions=desired,
+                                                                   delete_missing=True, max_workers=4,
+                                                                   warnings=[])
+    # 1 GET, 2 junction POSTs, 1 server PUT and 1 DELETE
+    assert ret_obj['data']['http_requests'] == 5
+    assert sorted(call[0] for call in appliance.calls) == ["DELETE", "GET", "POST", "POST", "PUT"]
+    put = [call for call in appliance.calls if call[0] == "PUT"][0]
+    assert put[2]['junction_point'] == "/new" and put[2]['server_hostname'] == "backend2"
+
+
+def test_set_all_nothing_to_do() -> None:
+    appliance = FakeAppliance([_current("/same", "backend1")])
+    ret_obj = ibmsecurity.isam.web.reverse_proxy.junctions.set_all(appliance, "default",
+                                                                   junctions=[_desired("/same", "backend1")],
+                                                                   warnings=[])
+    assert ret_obj['changed'] is False
+    assert ret_obj['data']['http_requests'] == 1
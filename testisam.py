@@ -3,39 +3,13 @@ Test script for ibmsecurity modules
 """
 import logging.config
 import pprint
-import pkgutil
-import importlib
 from ibmsecurity.appliance.isamappliance import ISAMAppliance
 from ibmsecurity.user.applianceuser import ApplianceUser
 import ibmsecurity
 
 
-def import_submodules(package, recursive=True):
-    """
-    Import all submodules of a module, recursively, including subpackages
-
-    :param package: package (name or actual module)
-    :type package: str | module
-    :rtype: dict[str, types.ModuleType]
-    """
-    if isinstance(package, str):
-        package = importlib.import_module(package)
-    results = {}
-    for name, is_pkg in pkgutil.walk_packages(package.__path__):
-        full_name = package.__name__ + "." + name
-        results[full_name] = importlib.import_module(full_name)
-        if recursive and is_pkg:
-            results.update(import_submodules(full_name))
-    return results
-
-
-# Import all packages within ibmsecurity - recursively
-# Note: Advisable to replace this code with specific imports for production code
-try:
-    import_submodules(ibmsecurity)
-except Exception as e:
-    print('Failed to import some submodules: ' + str(e))
-
+# Modules of ibmsecurity are imported when first used, eg. ibmsecurity.isam.base.snmp_monitoring.get
+# (see ibmsecurity/lazy.py), no need to import all of them up front
 
 # Setup logging to send to stdout, format and set log level
 # logging.getLogger(__name__).addHandler(logging.NullHandler())
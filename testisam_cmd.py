@@ -19,38 +19,14 @@ import logging.config
 import pprint
 from ibmsecurity.appliance.isamappliance import ISAMAppliance
 from ibmsecurity.user.applianceuser import ApplianceUser
-import pkgutil
-import importlib
 import ibmsecurity
+from ibmsecurity import registry
 
 from docopt import docopt
 
 
-def import_submodules(package, recursive=True):
-    """
-    Import all submodules of a module, recursively, including subpackages
-
-    :param package: package (name or actual module)
-    :type package: str | module
-    :rtype: dict[str, types.ModuleType]
-    """
-    if isinstance(package, str):
-        package = importlib.import_module(package)
-    results = {}
-    for loader, name, is_pkg in pkgutil.walk_packages(package.__path__):
-        full_name = package.__name__ + "." + name
-        results[full_name] = importlib.import_module(full_name)
-        if recursive and is_pkg:
-            results.update(import_submodules(full_name))
-    return results
-
-
-# Import all packages within ibmsecurity - recursively
-# Note: Advisable to replace this code with specific imports for production code
-try:
-    import_submodules(ibmsecurity)
-except Exception as e:
-    print('Failed to import some submodules: ' + str(e))
+# Modules of ibmsecurity are imported when first used, eg. ibmsecurity.isam.base.snmp_monitoring.get
+# (see ibmsecurity/lazy.py), no need to import all of them up front
 
 # Setup logging to send to stdout, format and set log level
 # logging.getLogger(__name__).addHandler(logging.NullHandler())
@@ -145,9 +121,7 @@ if __name__ == "__main__":
     isam_server = ISAMAppliance(hostname=hostname, user=u, lmi_port=lmi_port)
 
     # Run the method with options
-    module_name, method_name = isam_module.rsplit(".", 1)
-    mod = importlib.import_module(module_name)
-    func_ptr = getattr(mod, method_name)  # Convert action to actual function pointer
+    func_ptr = registry.resolve(isam_module)  # Convert action to actual function pointer
     logging.debug(func_ptr)
     func_call = "func_ptr(" + options + ")"
 
@@ -2,37 +2,12 @@ import logging.config
 import pprint
 from ibmsecurity.appliance.isdsappliance import ISDSAppliance
 from ibmsecurity.user.isdsapplianceuser import ISDSApplianceUser
-import pkgutil
-import importlib
 import yaml
 # import json
 import ibmsecurity
 
 
-def import_submodules(package, recursive=True):
-    """Import all submodules of a module, recursively, including subpackages
-
-    :param package: package (name or actual module)
-    :type package: str | module
-    :rtype: dict[str, types.ModuleType]
-    """
-    if isinstance(package, str):
-        package = importlib.import_module(package)
-    results = {}
-    for loader, name, is_pkg in pkgutil.walk_packages(package.__path__):
-        full_name = package.__name__ + "." + name
-        results[full_name] = importlib.import_module(full_name)
-        if recursive and is_pkg:
-            results.update(import_submodules(full_name))
-    return results
-
-
-# Import all packages within ibmsecurity!!!
-try:
-    import_submodules(ibmsecurity)
-except Exception as e:
-    print('Failed to import some submodules: ' + str(e))
-
+# Modules of ibmsecurity are imported when first used (see ibmsecurity/lazy.py)
 
 
 # logging.getLogger(__name__).addHandler(logging.NullHandler())